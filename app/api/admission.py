@@ -0,0 +1,70 @@
+"""昂贵接口的准入控制依赖
+
+用法::
+
+    @router.post("/optimize", dependencies=[Depends(admit("optimization"))])
+
+运维诊断等只对管理员开放的接口用 ``Depends(require_role("admin"))``。
+
+请求方身份取自 ``Authorization: Bearer <JWT>``：``sub`` 为用户ID，
+``role`` 声明缺失时从（读穿缓存的）用户记录中读取。没有令牌或令牌
+无效的请求按客户端地址以匿名角色限流。
+"""
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_db
+from models import User
+from services.admission_service import ANONYMOUS, Identity, admission_service
+from services.cache_service import cache_service
+from utils.auth import bearer_claims, client_host
+
+
+async def resolve_identity(request: Request, db: AsyncSession) -> Identity:
+    """解析限流主体"""
+    claims = bearer_claims(request)
+    if claims is None:
+        return Identity(f"ip:{client_host(request)}", ANONYMOUS)
+    user_id = claims["sub"]
+    role = claims.get("role")
+    if role is None:
+        user = await cache_service.get(db, User, user_id)
+        role = (user or {}).get("role") or "user"
+    return Identity(f"u{user_id}", role, user_id)
+
+
+def require_role(*roles: str):
+    """只允许指定角色访问的依赖：未登录返回 401，角色不符返回 403"""
+
+    async def dependency(
+        request: Request, db: AsyncSession = Depends(get_async_db)
+    ) -> Identity:
+        identity = await resolve_identity(request, db)
+        if identity.user_id is None:
+            raise HTTPException(
+                status_code=401,
+                detail="需要登录",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if identity.role not in roles:
+            raise HTTPException(status_code=403, detail="权限不足")
+        return identity
+
+    return dependency
+
+
+def admit(endpoint_class: str):
+    """按接口类别做准入控制的依赖，请求结束后归还并发额度"""
+
+    async def dependency(
+        request: Request, db: AsyncSession = Depends(get_async_db)
+    ):
+        identity = await resolve_identity(request, db)
+        ticket = await admission_service.acquire(endpoint_class, identity)
+        try:
+            yield ticket
+        finally:
+            await admission_service.release(ticket)
+
+    return dependency
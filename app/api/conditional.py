@@ -0,0 +1,184 @@
+"""条件请求（弱 ETag / Last-Modified）
+
+校验值由 ``(表名, id, updated_at)`` 生成，不需要序列化响应体：
+- 单个对象：只有请求带 If-None-Match / If-Modified-Since 时才按主键查询
+  updated_at（索引查找），匹配则直接返回 304，不加载整行
+- 列表：先查询结果窗口的 (id, updated_at) 和总数，摘要作为 ETag，
+  窗口内最大的 updated_at 作为 Last-Modified，匹配时同样不加载整行
+
+ETag 为弱校验值：计数类字段（浏览量等）不更新 updated_at，其变化不会
+使 ETag 失效。
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class Validators(NamedTuple):
+    """响应校验值"""
+
+    etag: str
+    last_modified: Optional[datetime]
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified, usegmt=True
+            )
+        return headers
+
+
+class NotModified(Exception):
+    """客户端缓存仍然有效，由全局处理器转换为 304"""
+
+    def __init__(self, validators: Validators):
+        self.validators = validators
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        # SQLite 等返回无时区时间，按 UTC 处理
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def object_validators(model, obj_id: int, updated_at: Any) -> Validators:
+    """单个对象的校验值，updated_at 可以是 datetime 或 ISO 字符串"""
+    updated_at = _utc(updated_at)
+    stamp = updated_at.isoformat() if updated_at else None
+    return Validators(
+        _etag(model.__tablename__, obj_id, stamp), updated_at
+    )
+
+
+def row_validators(model, data: Dict[str, Any]) -> Validators:
+    """由 to_dict() 结果生成校验值"""
+    return object_validators(
+        model, data["id"], data.get("updated_at") or data.get("created_at")
+    )
+
+
+def list_validators(
+    model, window: Sequence[Tuple[int, Any]], *extra: Any
+) -> Validators:
+    """列表的校验值：窗口内每行的 (id, updated_at) 加上总数等附加参数"""
+    stamps = [(obj_id, _utc(updated_at)) for obj_id, updated_at in window]
+    last_modified = max(
+        (stamp for _, stamp in stamps if stamp is not None), default=None
+    )
+    parts = [(obj_id, s.isoformat() if s else None) for obj_id, s in stamps]
+    return Validators(
+        _etag(model.__tablename__, parts, *extra), last_modified
+    )
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def has_conditions(request: Request) -> bool:
+    headers = request.headers
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """按 RFC 7232 判断：有 If-None-Match 时忽略 If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        wanted = _opaque(validators.etag)
+        return any(_opaque(tag) == wanted for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP 日期精确到秒
+        return validators.last_modified.replace(microsecond=0) <= _utc(since)
+    return False
+
+
+def check(request: Request, validators: Validators):
+    """条件满足时抛出 NotModified"""
+    if is_not_modified(request, validators):
+        raise NotModified(validators)
+
+
+async def check_object(
+    request: Request, db: AsyncSession, model, obj_id: int
+):
+    """单个对象的条件请求：按主键查 updated_at，未修改时抛出 NotModified"""
+    if not has_conditions(request):
+        return
+    updated_at = await db.scalar(
+        select(func.coalesce(model.updated_at, model.created_at)).where(
+            model.id == obj_id
+        )
+    )
+    if updated_at is not None:
+        check(request, object_validators(model, obj_id, updated_at))
+
+
+def apply(response: Response, validators: Validators):
+    """在响应上设置 ETag / Last-Modified"""
+    response.headers.update(validators.headers())
+
+
+async def fetch_page(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    model,
+    filters: Sequence[Any],
+    page: int,
+    page_size: int,
+) -> Tuple[list, int]:
+    """按ID倒序分页查询并处理条件请求，返回 (对象列表, 总数)"""
+    total = await db.scalar(
+        select(func.count()).select_from(model).where(*filters)
+    )
+    window = (
+        await db.execute(
+            select(
+                model.id, func.coalesce(model.updated_at, model.created_at)
+            )
+            .where(*filters)
+            .order_by(model.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+    ).all()
+    validators = list_validators(model, window, total)
+    check(request, validators)
+    apply(response, validators)
+    if not window:
+        return [], total
+
+    ids = [obj_id for obj_id, _ in window]
+    objects = (
+        (await db.execute(select(model).where(model.id.in_(ids))))
+        .scalars()
+        .all()
+    )
+    by_id = {obj.id: obj for obj in objects}
+    return [by_id[obj_id] for obj_id in ids if obj_id in by_id], total
@@ -0,0 +1,110 @@
+"""ASGI 中间件"""
+
+import asyncio
+from fnmatch import fnmatch
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from utils import deadline, request_context
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 客户端指定截止时间的请求头（秒）
+TIMEOUT_HEADER = b"x-request-timeout"
+
+
+class RequestContextMiddleware:
+    """把请求的 scope 放入上下文变量，供下游取得当前路由"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = request_context.set_scope(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_context.reset_scope(token)
+
+
+class DeadlineMiddleware:
+    """为每个请求设置截止时间，超时后取消处理并返回 504
+
+    截止时间取请求头 ``X-Request-Timeout``（不超过 maximum），否则按
+    路由规则（路径通配符 -> 秒）或默认值。超时会取消处理协程，数据库
+    会话随之回滚关闭。卸载到进程池的任务是协作式取消：还在排队的直接
+    撤销，正在运行的要等下一次 ``check_cancelled()`` 才退出，不检查
+    取消的任务会运行到结束并占用进程直到完成。
+    """
+
+    def __init__(
+        self,
+        app,
+        default: float = 30.0,
+        maximum: float = 300.0,
+        routes: Optional[Dict[str, float]] = None,
+    ):
+        self.app = app
+        self.default = default
+        self.maximum = maximum
+        self.routes = routes or {}
+
+    def _timeout(self, scope) -> Optional[float]:
+        for name, value in scope.get("headers", ()):
+            if name == TIMEOUT_HEADER:
+                try:
+                    seconds = float(value)
+                except ValueError:
+                    break
+                if seconds > 0:
+                    return min(seconds, self.maximum)
+                break
+        path = scope.get("path", "")
+        for pattern, seconds in self.routes.items():
+            if fnmatch(path, pattern):
+                return seconds or None
+        return self.default or None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        seconds = self._timeout(scope)
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        token = deadline.set_deadline(seconds)
+        try:
+            await asyncio.wait_for(
+                self.app(scope, receive, send_wrapper), seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"请求超时({seconds}s)，已取消: {scope['path']}")
+            if started:
+                # 响应已开始发送，只能中断
+                return
+            response = JSONResponse(
+                status_code=504,
+                content={
+                    "error": "请求超时",
+                    "message": f"请求处理超过 {seconds}s，已取消",
+                    "path": scope["path"],
+                },
+            )
+            await response(scope, receive, send)
+        finally:
+            deadline.reset_deadline(token)
@@ -0,0 +1,237 @@
+"""响应内容协商（JSON / MessagePack / Arrow IPC）
+
+按 Accept 选择编码：
+- application/json：默认
+- application/msgpack（兼容 x-msgpack、vnd.msgpack）：结构与 JSON 相同
+- application/vnd.apache.arrow.stream：仅表格类接口提供，分页等信息写在
+  schema 元数据中，分析端可直接零拷贝读入 DataFrame
+
+响应体超过阈值时按 Accept-Encoding 使用 zstd 或 gzip 压缩。msgpack、
+pyarrow、zstandard 是可选依赖，未安装时不提供对应格式。
+"""
+
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from config.settings import settings
+from models.schemas.common import PaginatedResponse, ResponseModel
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - 可选依赖
+    pa = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+JSON = "application/json"
+MSGPACK = (
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/vnd.msgpack",
+)
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+def _parse_accept(header: str) -> List[tuple]:
+    """解析 Accept / Accept-Encoding，返回 [(值, q)]"""
+    ranges = []
+    for part in header.split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, raw = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        ranges.append((value.lower(), q))
+    return ranges
+
+
+def _quality(media_type: str, ranges: List[tuple]) -> float:
+    """取最具体的匹配范围的 q 值：type/subtype > type/* > */*"""
+    main = media_type.split("/")[0]
+    best, specificity = 0.0, -1
+    for value, q in ranges:
+        if value == media_type:
+            level = 2
+        elif value == f"{main}/*":
+            level = 1
+        elif value == "*/*":
+            level = 0
+        else:
+            continue
+        if level > specificity:
+            best, specificity = q, level
+    return best
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> str:
+    """选择 q 值最高的格式，相同时按 offered 顺序；都不接受时退回 JSON"""
+    if not accept:
+        return offered[0]
+    ranges = _parse_accept(accept)
+    chosen, best = offered[0], 0.0
+    for media_type in offered:
+        q = _quality(media_type, ranges)
+        if q > best:
+            chosen, best = media_type, q
+    return chosen
+
+
+def _choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    if not accept_encoding:
+        return None
+    ranges = dict(_parse_accept(accept_encoding))
+    candidates = (["zstd"] if zstandard is not None else []) + ["gzip"]
+    for name in candidates:
+        if ranges.get(name, ranges.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        level = settings.response_zstd_level
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    return gzip.compress(
+        body, compresslevel=settings.response_gzip_level, mtime=0
+    )
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "tolist"):
+        # numpy 数组和标量
+        return value.tolist()
+    raise TypeError(f"无法编码为 MessagePack: {type(value).__name__}")
+
+
+def _column(values: List[Any]):
+    """推断 Arrow 列类型；嵌套 JSON 转为字符串，类型混杂时退回字符串"""
+    if any(isinstance(value, (dict, list)) for value in values):
+        values = [
+            None
+            if value is None
+            else json.dumps(value, ensure_ascii=False, default=str)
+            for value in values
+        ]
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(
+            [None if value is None else str(value) for value in values],
+            pa.string(),
+        )
+
+
+def _metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Dict]:
+    if not metadata:
+        return None
+    return {key: str(value) for key, value in metadata.items()}
+
+
+def rows_table(
+    rows: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None
+):
+    """由 to_dict() 结果列表构造 Arrow 表"""
+    names = list(rows[0]) if rows else []
+    columns = {
+        name: _column([row.get(name) for row in rows]) for name in names
+    }
+    return pa.table(columns, metadata=_metadata(metadata))
+
+
+def columns_table(
+    columns: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+):
+    """由列数据（列表或 numpy 数组）构造 Arrow 表"""
+    return pa.table(
+        {name: pa.array(values) for name, values in columns.items()},
+        metadata=_metadata(metadata),
+    )
+
+
+def _encode_arrow(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def respond(
+    request: Request,
+    payload: BaseModel,
+    response: Optional[Response] = None,
+    table: Optional[Callable[[], Any]] = None,
+) -> Response:
+    """按 Accept 编码响应
+
+    table 为构造 Arrow 表的函数，只有表格类接口传入，协商到 Arrow 时才
+    调用。response 是路由注入的 Response，其上的头（ETag 等）会被保留。
+    """
+    offered = [JSON]
+    if msgpack is not None:
+        offered.extend(MSGPACK)
+    if table is not None and pa is not None:
+        offered.append(ARROW)
+    media_type = negotiate(request.headers.get("accept"), offered)
+
+    if media_type == ARROW:
+        body = _encode_arrow(table())
+    elif media_type in MSGPACK:
+        body = msgpack.packb(payload.model_dump(), default=_msgpack_default)
+    else:
+        body = payload.model_dump_json().encode()
+
+    headers = dict(response.headers) if response is not None else {}
+    headers.pop("content-length", None)
+    headers["Vary"] = "Accept, Accept-Encoding"
+    if len(body) >= settings.response_compress_min_bytes:
+        encoding = _choose_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            body = _compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def respond_page(
+    request: Request,
+    response: Response,
+    items: List[Dict[str, Any]],
+    total: int,
+    page: int,
+    page_size: int,
+) -> Response:
+    """分页列表：JSON/MessagePack 为常规分页结构，Arrow 为 items 表"""
+    data = PaginatedResponse.create(items, total, page, page_size)
+    metadata = data.model_dump(exclude={"items"})
+    return respond(
+        request,
+        ResponseModel(data=data),
+        response,
+        table=lambda: rows_table(items, metadata),
+    )
@@ -1,5 +1,25 @@
 """API路由模块"""
 
+from .attachments import router as attachments_router
+from .diagnostics import router as diagnostics_router
+from .experiments import router as experiments_router
+from .feedback import router as feedback_router
 from .health import router as health_router
+from .jobs import router as jobs_router
+from .recipes import router as recipes_router
+from .search import router as search_router
+from .tasks import router as tasks_router
+from .users import router as users_router
 
-__all__ = ["health_router"]
+__all__ = [
+    "attachments_router",
+    "diagnostics_router",
+    "experiments_router",
+    "feedback_router",
+    "health_router",
+    "jobs_router",
+    "recipes_router",
+    "search_router",
+    "tasks_router",
+    "users_router",
+]
@@ -0,0 +1,166 @@
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.files import (
+    FileRangeResponse,
+    RangeNotSatisfiable,
+    accel_redirect,
+    request_range,
+)
+from config.settings import settings
+from core.blobstore import BlobTooLarge
+from db.database import get_async_db, get_read_db
+from models.schemas.attachment import AttachmentLink
+from models.schemas.common import ResponseModel
+from services.attachment_service import (
+    AttachmentNotFound,
+    DigestMismatch,
+    attachment_service,
+)
+
+router = APIRouter(prefix="/attachments", tags=["附件"])
+
+SHA256_PATTERN = r"^[0-9a-f]{64}$"
+
+
+def _content_disposition(filename: Optional[str]) -> str:
+    if not filename:
+        return "attachment"
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+@router.post("")
+async def upload_attachment(
+    request: Request,
+    response: Response,
+    filename: Optional[str] = Query(None, max_length=255),
+    sha256: Optional[str] = Query(
+        None, pattern=SHA256_PATTERN, description="内容摘要，用于校验"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """上传附件（请求体即文件内容，流式写盘）
+
+    返回的 ref 写入实验或反馈的附件字段；内容已存在时复用并返回 200。
+    """
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > (
+        attachment_service.max_bytes
+    ):
+        raise HTTPException(status_code=413, detail="附件超过大小上限")
+    content_type = request.headers.get(
+        "content-type", "application/octet-stream"
+    )
+    try:
+        data = await attachment_service.upload(
+            db,
+            request.stream(),
+            content_type=content_type,
+            filename=filename,
+            expected_sha256=sha256,
+        )
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except DigestMismatch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.status_code = 200 if data["deduplicated"] else 201
+    return ResponseModel(data=data)
+
+
+@router.api_route("/{sha256}", methods=["GET", "HEAD"])
+async def download_attachment(
+    request: Request,
+    sha256: str,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """下载附件，支持 Range 断点续传和 If-None-Match"""
+    blob = await attachment_service.get_blob(db, sha256)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="附件不存在")
+    etag = f'"{blob.sha256}"'
+    headers = {
+        "ETag": etag,
+        # 内容按摘要寻址，永不改变
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": _content_disposition(blob.filename),
+    }
+    if request.headers.get("if-none-match") in (etag, "*"):
+        return Response(status_code=304, headers=headers)
+    media_type = blob.content_type or "application/octet-stream"
+    prefix = settings.attachment_accel_redirect
+    if prefix:
+        relpath = attachment_service.store.relpath(blob.sha256)
+        return accel_redirect(
+            prefix.rstrip("/") + "/" + relpath,
+            {**headers, "Content-Type": media_type},
+        )
+    try:
+        byte_range = request_range(request, blob.size, etag)
+    except RangeNotSatisfiable as e:
+        return Response(status_code=416, headers={"Content-Range": str(e)})
+    return FileRangeResponse(
+        attachment_service.store.path(blob.sha256),
+        blob.size,
+        byte_range,
+        headers=headers,
+        media_type=media_type,
+    )
+
+
+@router.get("/{sha256}/meta")
+async def get_attachment_meta(
+    sha256: str, db: AsyncSession = Depends(get_read_db)
+):
+    """附件元数据（大小、类型、引用次数）"""
+    blob = await attachment_service.get_blob(db, sha256)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="附件不存在")
+    return ResponseModel(data=blob.to_dict())
+
+
+@router.post("/{sha256}/links")
+async def link_attachment(
+    sha256: str,
+    link: AttachmentLink,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """把附件加入实验或反馈的附件字段"""
+    try:
+        values = await attachment_service.link(
+            db, sha256, link.owner, link.owner_id, link.field
+        )
+    except AttachmentNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if values is None:
+        raise HTTPException(status_code=404, detail="所属对象不存在")
+    return ResponseModel(data={link.field: values})
+
+
+@router.delete("/{sha256}/links")
+async def unlink_attachment(
+    sha256: str,
+    link: AttachmentLink,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """从实验或反馈的附件字段中移除附件"""
+    try:
+        values = await attachment_service.unlink(
+            db, sha256, link.owner, link.owner_id, link.field
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if values is None:
+        raise HTTPException(status_code=404, detail="所属对象不存在")
+    return ResponseModel(data={link.field: values})
@@ -0,0 +1,59 @@
+"""运维诊断接口
+
+连接池占用、慢查询语句和执行计划会暴露内部结构和查询参数形态，
+只对管理员开放，不放在免认证的健康检查路由下。
+"""
+
+from fastapi import APIRouter, Depends, Query
+
+from api.admission import require_role
+from config.settings import settings
+from db import pool
+from db.database import async_engine, engine, replicas
+from db.slow_query import slow_query_log
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["运维诊断"],
+    dependencies=[Depends(require_role("admin"))],
+)
+
+
+@router.get("/db-pool")
+async def db_pool_status():
+    """数据库连接池占用、取连接等待和溢出统计"""
+    return {
+        "pre_ping": settings.db_pool_pre_ping,
+        "pgbouncer": settings.db_pgbouncer,
+        "engines": {
+            "sync": pool.pool_status(engine.pool),
+            "async": pool.pool_status(async_engine.pool),
+        },
+        "replicas": [
+            {**status, **pool.pool_status(replica.pool)}
+            for status, replica in zip(replicas.metrics(), replicas.engines)
+        ],
+        "primary_reads": replicas.primary_reads,
+    }
+
+
+@router.get("/slow-queries")
+async def slow_queries(
+    order_by: str = Query(
+        "total_ms", pattern="^(total_ms|max_ms|mean_ms|count)$"
+    ),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """按语句指纹汇总的慢查询及其执行计划"""
+    return {
+        "enabled": settings.slow_query_enabled,
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.snapshot(order_by=order_by, limit=limit),
+    }
+
+
+@router.delete("/slow-queries")
+async def reset_slow_queries():
+    """清空慢查询汇总"""
+    slow_query_log.reset()
+    return {"reset": True}
@@ -0,0 +1,201 @@
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import conditional, negotiation
+from api.admission import admit
+from config.settings import settings
+from db.database import get_async_db, get_read_db
+from models import Experiment
+from models.experiment import ExperimentResult, ExperimentStatus
+from models.schemas.common import ResponseModel
+from models.schemas.experiment import ExperimentBatchCreate
+from services import batch_service, measurement_service
+from services.cache_service import cache_service
+from services.experiment_report_service import (
+    AGGREGATES,
+    DIMENSIONS,
+    MEASURES,
+    ReportUnavailable,
+    experiment_report_service,
+)
+
+router = APIRouter(prefix="/experiments", tags=["实验"])
+
+
+@router.get("")
+async def list_experiments(
+    request: Request,
+    response: Response,
+    recipe_id: Optional[int] = None,
+    status: Optional[ExperimentStatus] = None,
+    batch_number: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """分页列出实验记录（支持 ETag 条件请求和二进制格式）"""
+    filters = []
+    if recipe_id is not None:
+        filters.append(Experiment.recipe_id == recipe_id)
+    if status is not None:
+        filters.append(Experiment.status == status)
+    if batch_number is not None:
+        filters.append(Experiment.batch_number == batch_number)
+    experiments, total = await conditional.fetch_page(
+        request, response, db, Experiment, filters, page, page_size
+    )
+    items = [experiment.to_dict() for experiment in experiments]
+    return negotiation.respond_page(
+        request, response, items, total, page, page_size
+    )
+
+
+@router.post("/batch", status_code=201)
+async def create_experiments_batch(
+    request: ExperimentBatchCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """批量导入实验记录，返回每条的写入结果"""
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"单次最多提交 {settings.batch_max_items} 条",
+        )
+    result = await batch_service.create_experiments(db, request)
+    response.status_code = batch_service.status_code(result)
+    return ResponseModel(data=result)
+
+
+@router.get("/measurements", dependencies=[Depends(admit("export"))])
+async def export_measurements(
+    request: Request,
+    recipe_id: Optional[int] = None,
+    status: Optional[ExperimentStatus] = None,
+    batch_number: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """按实验分页导出测量数据长表（Accept 为 Arrow 时返回 IPC 流）"""
+    filters = []
+    if recipe_id is not None:
+        filters.append(Experiment.recipe_id == recipe_id)
+    if status is not None:
+        filters.append(Experiment.status == status)
+    if batch_number is not None:
+        filters.append(Experiment.batch_number == batch_number)
+    result = await measurement_service.measurement_columns(
+        db, filters, (page - 1) * page_size, page_size
+    )
+    columns = result["columns"]
+    metadata = {
+        "page": page,
+        "page_size": page_size,
+        "experiments": result["experiments"],
+    }
+    data = {
+        **metadata,
+        "columns": {
+            name: values.tolist() if hasattr(values, "tolist") else values
+            for name, values in columns.items()
+        },
+    }
+    return negotiation.respond(
+        request,
+        ResponseModel(data=data),
+        table=lambda: negotiation.columns_table(columns, metadata),
+    )
+
+
+@router.get("/reports")
+async def experiment_report(
+    request: Request,
+    group_by: List[str] = Query(
+        ["recipe_id"], description=f"分组维度: {', '.join(DIMENSIONS)}"
+    ),
+    measures: List[str] = Query(
+        list(MEASURES), description=f"指标: {', '.join(MEASURES)}"
+    ),
+    aggregates: List[str] = Query(
+        ["mean", "count"], description=f"聚合函数: {', '.join(AGGREGATES)}"
+    ),
+    recipe_id: List[int] = Query([], description="配方ID"),
+    user_id: List[int] = Query([], description="实验人员ID"),
+    status: List[ExperimentStatus] = Query([], description="实验状态"),
+    result: List[ExperimentResult] = Query([], description="实验结果"),
+    start_month: Optional[str] = Query(
+        None, pattern=r"^\d{4}-\d{2}$", description="起始月份 YYYY-MM"
+    ),
+    end_month: Optional[str] = Query(
+        None, pattern=r"^\d{4}-\d{2}$", description="截止月份 YYYY-MM"
+    ),
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """实验指标分组报表（读列式快照，不查询数据库）
+
+    结果截至快照水位线 as_of；Accept 为 Arrow 时返回 IPC 流。
+    """
+    for values, allowed, label in (
+        (group_by, DIMENSIONS, "分组维度"),
+        (measures, MEASURES, "指标"),
+        (aggregates, AGGREGATES, "聚合函数"),
+    ):
+        unknown = sorted(set(values) - set(allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的{label}: {', '.join(unknown)}",
+            )
+    filters = {
+        "recipe_id": recipe_id,
+        "user_id": user_id,
+        "status": [item.value for item in status],
+        "result": [item.value for item in result],
+        "start_month": start_month,
+        "end_month": end_month,
+    }
+    try:
+        table = await experiment_report_service.report(
+            list(dict.fromkeys(group_by)),
+            list(dict.fromkeys(measures)),
+            list(dict.fromkeys(aggregates)),
+            filters,
+        )
+    except ReportUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    total = len(table)
+    table = table.slice(0, limit)
+    metadata = {"as_of": experiment_report_service.as_of, "groups": total}
+    return negotiation.respond(
+        request,
+        ResponseModel(data={**metadata, "rows": table.to_pylist()}),
+        table=lambda: table.replace_schema_metadata(
+            {key: str(value) for key, value in metadata.items()}
+        ),
+    )
+
+
+@router.get("/{experiment_id}")
+async def get_experiment(
+    experiment_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """获取实验记录（读穿缓存，支持 ETag 条件请求）"""
+    await conditional.check_object(request, db, Experiment, experiment_id)
+    data = await cache_service.get(db, Experiment, experiment_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="实验不存在")
+    conditional.apply(response, conditional.row_validators(Experiment, data))
+    return ResponseModel(data=data)
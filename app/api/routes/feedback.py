@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_db
+from models import Feedback
+from models.schemas.common import ResponseModel
+from services.counter_service import counter_service
+from services.feedback_cluster_service import feedback_cluster_service
+
+router = APIRouter(prefix="/feedback", tags=["反馈"])
+
+
+@router.get("/clusters")
+async def list_feedback_clusters(
+    pending_only: bool = Query(True, description="只列出有待处理反馈的簇"),
+    min_size: int = Query(2, ge=1, description="簇的最少反馈数"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """按待处理反馈的优先级列出反馈簇，附每簇最早一条反馈的标题"""
+    clusters = await feedback_cluster_service.cluster_summaries(
+        db, pending_only=pending_only, min_size=min_size, limit=limit
+    )
+    first_ids = [cluster["first_feedback_id"] for cluster in clusters]
+    titles = dict(
+        (
+            await db.execute(
+                select(Feedback.id, Feedback.title).where(
+                    Feedback.id.in_(first_ids)
+                )
+            )
+        ).all()
+    )
+    for cluster in clusters:
+        cluster["title"] = titles.get(cluster["first_feedback_id"])
+    return ResponseModel(data=clusters)
+
+
+@router.get("/clusters/{cluster_id}")
+async def get_feedback_cluster(
+    cluster_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """簇的汇总和成员反馈（从新到旧）"""
+    summary, members = await feedback_cluster_service.cluster_members(
+        db, cluster_id
+    )
+    if summary is None:
+        raise HTTPException(status_code=404, detail="反馈簇不存在")
+    page = [int(feedback_id) for feedback_id in members[offset:][:limit]]
+    rows = (
+        await db.execute(select(Feedback).where(Feedback.id.in_(page)))
+    ).scalars()
+    by_id = {row.id: row for row in rows}
+    summary["items"] = await counter_service.apply_pending(
+        "feedback",
+        [
+            by_id[feedback_id].to_dict()
+            for feedback_id in page
+            if feedback_id in by_id
+        ],
+    )
+    return ResponseModel(data=summary)
+
+
+@router.get("/{feedback_id}/cluster")
+async def get_cluster_of_feedback(
+    feedback_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    """反馈所在簇的汇总"""
+    summary = await feedback_cluster_service.cluster_of(db, feedback_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="反馈不存在或未参与聚类")
+    return ResponseModel(data=summary)
+
+
+@router.post("/{feedback_id}/helpful")
+async def vote_feedback_helpful(
+    feedback_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    """为反馈投一票“有用”（计数缓冲后批量写回）"""
+    feedback = await db.get(Feedback, feedback_id)
+    if feedback is None:
+        raise HTTPException(status_code=404, detail="反馈不存在")
+    name = "feedback.helpfulness_votes"
+    await counter_service.incr(name, feedback_id)
+    pending = await counter_service.get_pending(name, [feedback_id])
+    votes = (feedback.helpfulness_votes or 0) + pending.get(feedback_id, 0)
+    return ResponseModel(data={"id": feedback_id, "helpfulness_votes": votes})
+
+
+# 放在最后，避免 /{feedback_id} 先于 /clusters 匹配
+@router.get("/{feedback_id}")
+async def get_feedback(
+    feedback_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    """获取反馈详情，并累计查看次数"""
+    feedback = await db.get(Feedback, feedback_id)
+    if feedback is None:
+        raise HTTPException(status_code=404, detail="反馈不存在")
+    await counter_service.incr("feedback.view_count", feedback_id)
+    data = await counter_service.apply_pending(
+        "feedback", [feedback.to_dict()]
+    )
+    return ResponseModel(data=data[0])
@@ -3,6 +3,9 @@ import psutil
 from fastapi import APIRouter
 from datetime import datetime
 from config.settings import settings
+from services.admission_service import admission_service
+from services.cache_service import cache_service
+from services.offload_service import offload_executor
 
 
 router = APIRouter(prefix="/api/v1", tags=["健康检查"])
@@ -50,3 +53,27 @@ async def detailed_health_check():
             "log_level": settings.log_level,
         },
     }
+
+
+@router.get("/health/offload")
+async def offload_health_check():
+    """进程池卸载执行器的队列深度和运行耗时"""
+    return {
+        "started": offload_executor.started,
+        "pools": offload_executor.metrics(),
+    }
+
+
+@router.get("/health/cache")
+async def cache_health_check():
+    """读穿缓存命中统计"""
+    return cache_service.metrics()
+
+
+@router.get("/health/admission")
+async def admission_health_check():
+    """准入控制的并发占用、排队和拒绝统计"""
+    return {
+        "enabled": admission_service.enabled,
+        "classes": await admission_service.metrics(),
+    }
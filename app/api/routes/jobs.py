@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+
+from models.schemas.common import ResponseModel
+from models.schemas.job import JobInfo, JobSubmitRequest
+from services.job_service import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["后台任务"])
+
+
+@router.post("", status_code=202)
+async def submit_job(request: JobSubmitRequest):
+    """提交后台任务，立即返回任务ID"""
+    try:
+        info = await job_queue.submit(
+            request.name, request.params, max_retries=request.max_retries
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ResponseModel(data=info)
+
+
+@router.get("/{job_id}", response_model=ResponseModel[JobInfo])
+async def get_job(job_id: str):
+    """查询任务状态、进度和结果"""
+    info = await job_queue.get(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return ResponseModel(data=info)
+
+
+@router.delete("/{job_id}", response_model=ResponseModel[JobInfo])
+async def cancel_job(job_id: str):
+    """取消任务：排队中的直接取消，运行中的在下一个检查点停止"""
+    info = await job_queue.cancel(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return ResponseModel(data=info)
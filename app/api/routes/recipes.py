@@ -0,0 +1,343 @@
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import conditional, negotiation
+from api.admission import admit
+from config.settings import settings
+from db.database import get_async_db, get_read_db
+from models import Recipe
+from models.recipe import RecipeStatus
+from models.schemas.common import PaginatedResponse, ResponseModel
+from models.schemas.recipe import (
+    DOERequest,
+    IngredientSearchRequest,
+    RecipeBatchCreate,
+    RecipeCreate,
+    RecipeDuplicateMatch,
+    RecipeOptimizeRequest,
+)
+from services import (
+    batch_service,
+    doe_service,
+    ingredient_service,
+    lineage_service,
+    optimization_service,
+)
+from services.cache_service import cache_service
+from services.counter_service import counter_service
+from services.dedup_service import dedup_service
+from services.facet_service import facet_service
+from services.feedback_rollup_service import feedback_rollup_service
+
+router = APIRouter(prefix="/recipes", tags=["配方"])
+
+
+@router.get("/{recipe_id}/feedback-scores")
+async def get_feedback_scores(
+    recipe_id: int,
+    windows: List[int] = Query(
+        [7, 30, 90], description="窗口天数，可重复指定"
+    ),
+    start: Optional[date] = Query(None, description="自定义范围起始日期"),
+    end: Optional[date] = Query(None, description="截止日期，默认今天"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """配方反馈评分的窗口汇总（各项评分的平均值和计数）
+
+    指定 start 时返回 [start, end] 范围的汇总，否则返回以 end 为最后
+    一天的各个窗口的汇总。
+    """
+    if any(days < 1 for days in windows):
+        raise HTTPException(status_code=400, detail="窗口天数必须为正数")
+    if start is not None:
+        end = end or feedback_rollup_service.today()
+        if start > end:
+            raise HTTPException(status_code=400, detail="起始日期晚于截止日期")
+        scores = await feedback_rollup_service.range(
+            db, recipe_id, start, end
+        )
+        data = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "scores": scores,
+        }
+    else:
+        data = await feedback_rollup_service.windows(
+            db, recipe_id, windows, end
+        )
+    return ResponseModel(data=data)
+
+
+@router.get("/{recipe_id}/feedback-scores/daily")
+async def get_daily_feedback_scores(
+    recipe_id: int,
+    start: Optional[date] = Query(None, description="起始日期，默认30天前"),
+    end: Optional[date] = Query(None, description="截止日期，默认今天"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """配方反馈评分的逐日汇总（只列出有反馈的日期）"""
+    end = end or feedback_rollup_service.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="起始日期晚于截止日期")
+    days = await feedback_rollup_service.daily(db, recipe_id, start, end)
+    return ResponseModel(data=days)
+
+
+@router.get("/{recipe_id}/lineage/tree")
+async def get_version_tree(
+    recipe_id: int, db: AsyncSession = Depends(get_read_db)
+):
+    """获取配方所在的完整版本树"""
+    tree = await lineage_service.get_version_tree(db, recipe_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    return ResponseModel(data=tree)
+
+
+@router.get("/{recipe_id}/lineage/descendants")
+async def get_descendants(
+    recipe_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="最大代数"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """获取配方的全部派生版本"""
+    items = await lineage_service.get_descendants(db, recipe_id, max_depth)
+    return ResponseModel(data=items)
+
+
+@router.get("/{recipe_id}/lineage/ancestors")
+async def get_path_to_root(
+    recipe_id: int, db: AsyncSession = Depends(get_read_db)
+):
+    """获取从根配方到当前配方的路径"""
+    path = await lineage_service.get_path_to_root(db, recipe_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    return ResponseModel(data=path)
+
+
+@router.get("/{recipe_id}/lineage/latest-approved")
+async def get_latest_approved(
+    recipe_id: int, db: AsyncSession = Depends(get_read_db)
+):
+    """获取最新的已审核派生版本"""
+    recipe = await lineage_service.get_latest_approved_descendant(
+        db, recipe_id
+    )
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="没有已审核的版本")
+    data = await counter_service.apply_pending("recipe", [recipe.to_dict()])
+    return ResponseModel(data=data[0])
+
+
+async def _to_matches(
+    db: AsyncSession, hits: List[Tuple[int, float]]
+) -> List[RecipeDuplicateMatch]:
+    if not hits:
+        return []
+    names = dict(
+        (
+            await db.execute(
+                select(Recipe.id, Recipe.name).where(
+                    Recipe.id.in_([recipe_id for recipe_id, _ in hits])
+                )
+            )
+        ).all()
+    )
+    return [
+        RecipeDuplicateMatch(
+            recipe_id=recipe_id, name=names[recipe_id], similarity=sim
+        )
+        for recipe_id, sim in hits
+        if recipe_id in names
+    ]
+
+
+@router.post("/duplicates/check")
+async def check_duplicates(
+    recipe: RecipeCreate,
+    threshold: Optional[float] = Query(None, gt=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """检查待创建的配方是否与已有配方近似重复"""
+    hits = await dedup_service.find_near_duplicates(
+        db, recipe.model_dump(), threshold=threshold, limit=limit
+    )
+    return ResponseModel(data=await _to_matches(db, hits))
+
+
+@router.get("/{recipe_id}/duplicates")
+async def get_duplicates(
+    recipe_id: int,
+    threshold: Optional[float] = Query(None, gt=0, le=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """查找与指定配方近似重复的配方"""
+    recipe = await db.get(Recipe, recipe_id)
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    hits = await dedup_service.find_near_duplicates(
+        db,
+        recipe.to_dict(),
+        threshold=threshold,
+        limit=limit,
+        exclude_id=recipe_id,
+    )
+    return ResponseModel(data=await _to_matches(db, hits))
+
+
+@router.post("/search/ingredients")
+async def search_by_ingredients(
+    request: IngredientSearchRequest, db: AsyncSession = Depends(get_read_db)
+):
+    """按原料（CAS号/名称、用量范围）检索配方"""
+    try:
+        recipes, total = await ingredient_service.search_recipes(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = await counter_service.apply_pending(
+        "recipe", [recipe.to_dict() for recipe in recipes]
+    )
+    return ResponseModel(
+        data=PaginatedResponse.create(
+            items, total, request.page, request.page_size
+        )
+    )
+
+
+@router.get("/facets")
+async def get_facets(
+    category: List[str] = Query([], description="配方类别"),
+    difficulty: List[str] = Query([], description="难度级别"),
+    status: List[str] = Query([], description="配方状态"),
+    tags: List[str] = Query([], description="标签"),
+    top: Optional[int] = Query(
+        None, ge=1, description="每个分面最多返回的取值数"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """按分面筛选配方，返回命中总数和各分面取值的数量"""
+    selections = {
+        "category": category,
+        "difficulty": difficulty,
+        "status": status,
+        "tags": tags,
+    }
+    result = await facet_service.facet_counts(db, selections, top=top)
+    return ResponseModel(data=result)
+
+
+@router.post("/optimize", dependencies=[Depends(admit("optimization"))])
+async def optimize_recipe(
+    request: RecipeOptimizeRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """根据配方家族的历史实验给出下一轮参数建议"""
+    try:
+        result = await optimization_service.optimize_recipe(
+            db, request, client=http_request
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    return ResponseModel(data=result)
+
+
+@router.post("/batch", status_code=201)
+async def create_recipes_batch(
+    request: RecipeBatchCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """批量创建配方，返回每条的写入结果"""
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"单次最多提交 {settings.batch_max_items} 条",
+        )
+    result = await batch_service.create_recipes(db, request)
+    response.status_code = batch_service.status_code(result)
+    return ResponseModel(data=result)
+
+
+@router.post(
+    "/{recipe_id}/doe", dependencies=[Depends(admit("optimization"))]
+)
+async def create_doe_batch(
+    recipe_id: int,
+    request: DOERequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """围绕配方参数生成试验设计，批量创建实验和工站任务"""
+    try:
+        result = await doe_service.create_doe_batch(db, recipe_id, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    return ResponseModel(data=result)
+
+
+@router.get("")
+async def list_recipes(
+    request: Request,
+    response: Response,
+    status: Optional[RecipeStatus] = None,
+    category: Optional[str] = None,
+    creator_id: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """分页列出配方（支持 ETag 条件请求和二进制格式）"""
+    filters = []
+    if status is not None:
+        filters.append(Recipe.status == status)
+    if category is not None:
+        filters.append(Recipe.category == category)
+    if creator_id is not None:
+        filters.append(Recipe.creator_id == creator_id)
+    recipes, total = await conditional.fetch_page(
+        request, response, db, Recipe, filters, page, page_size
+    )
+    items = await counter_service.apply_pending(
+        "recipe", [recipe.to_dict() for recipe in recipes]
+    )
+    return negotiation.respond_page(
+        request, response, items, total, page, page_size
+    )
+
+
+# 放在最后，避免 /{recipe_id} 先于 /facets 等静态路径匹配
+@router.get("/{recipe_id}")
+async def get_recipe(
+    recipe_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """获取配方详情（读穿缓存，支持 ETag 条件请求），并累计浏览量"""
+    await conditional.check_object(request, db, Recipe, recipe_id)
+    data = await cache_service.get(db, Recipe, recipe_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="配方不存在")
+    conditional.apply(response, conditional.row_validators(Recipe, data))
+    await counter_service.incr("recipe.view_count", recipe_id)
+    data = await counter_service.apply_pending("recipe", [data])
+    return ResponseModel(data=data[0])
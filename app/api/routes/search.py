@@ -0,0 +1,41 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import get_async_db
+from models.schemas.common import ResponseModel
+from services.fulltext_service import SOURCES, fulltext_service
+
+router = APIRouter(prefix="/search", tags=["全文检索"])
+
+
+@router.get("/notes")
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=200),
+    source: Literal["experiment", "feedback"] = "experiment",
+    mode: Literal["and", "or"] = "and",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """检索实验记录或反馈的文本内容，按 BM25 得分排序"""
+    try:
+        hits, total = await fulltext_service.search(
+            db, source, q, limit=limit, offset=offset, mode=mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    model, _ = SOURCES[source]
+    ids = [record_id for record_id, _ in hits]
+    rows = (await db.execute(select(model).where(model.id.in_(ids)))).scalars()
+    by_id = {row.id: row for row in rows}
+    items = [
+        {"score": round(score, 4), **by_id[record_id].to_dict()}
+        for record_id, score in hits
+        if record_id in by_id
+    ]
+    return ResponseModel(
+        data={"total": total, "offset": offset, "items": items}
+    )
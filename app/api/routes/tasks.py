@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import conditional, negotiation
+from config.settings import settings
+from db.database import get_async_db
+from models import Task
+from models.schemas.common import ResponseModel
+from models.schemas.workstation import TaskBatchCreate, TaskResponse
+from models.task import TaskStatus
+from services import batch_service
+
+router = APIRouter(prefix="/tasks", tags=["工站任务"])
+
+
+def _task_data(task: Task) -> Dict[str, Any]:
+    """ORM任务 -> 响应字典（按 TaskResponse 从属性读取）
+
+    实测 from_attributes 校验比 TaskResponse.trusted 逐字段构造更快：
+    嵌套的 commands 反正要交给 pydantic-core 转换。
+    """
+    return TaskResponse.model_validate(task).model_dump(exclude_unset=True)
+
+
+@router.get("")
+async def list_tasks(
+    request: Request,
+    response: Response,
+    workstation_id: Optional[int] = None,
+    experiment_id: Optional[int] = None,
+    status: Optional[TaskStatus] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """分页列出工站任务（支持 ETag 条件请求和二进制格式）"""
+    filters = []
+    if workstation_id is not None:
+        filters.append(Task.workstation_id == workstation_id)
+    if experiment_id is not None:
+        filters.append(Task.experiment_id == experiment_id)
+    if status is not None:
+        filters.append(Task.status == status)
+    tasks, total = await conditional.fetch_page(
+        request, response, db, Task, filters, page, page_size
+    )
+    items = [_task_data(task) for task in tasks]
+    return negotiation.respond_page(
+        request, response, items, total, page, page_size
+    )
+
+
+@router.post("/batch", status_code=201)
+async def create_tasks_batch(
+    request: TaskBatchCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """批量创建工站任务，返回每条的写入结果"""
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"单次最多提交 {settings.batch_max_items} 条",
+        )
+    result = await batch_service.create_tasks(db, request)
+    response.status_code = batch_service.status_code(result)
+    return ResponseModel(data=result)
+
+
+@router.get("/{task_id}")
+async def get_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """获取任务状态和进度（支持 ETag 条件请求）"""
+    await conditional.check_object(request, db, Task, task_id)
+    task = await db.get(Task, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    data = _task_data(task)
+    conditional.apply(response, conditional.row_validators(Task, data))
+    return ResponseModel(data=data)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import conditional
+from db.database import get_async_db
+from models import User
+from models.schemas.common import ResponseModel
+from services.cache_service import cache_service
+
+router = APIRouter(prefix="/users", tags=["用户"])
+
+
+@router.get("/{user_id}")
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """获取用户信息（读穿缓存，支持 ETag 条件请求）"""
+    await conditional.check_object(request, db, User, user_id)
+    data = await cache_service.get(db, User, user_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="用户不存在")
+    conditional.apply(response, conditional.row_validators(User, data))
+    return ResponseModel(data=data)
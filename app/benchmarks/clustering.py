@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+反馈聚类基准
+用合成的中文反馈（若干“问题”模板加随机描述）测量全量重聚类耗时、
+聚类纯度，以及增量归簇的单条延迟（p50/p95）。
+
+用法:
+    python -m benchmarks.clustering [--docs 100000] [--workers 4]
+                                    [--output out.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np  # noqa: E402
+
+from core.clustering import hash_terms, recluster  # noqa: E402
+from core.fulltext import term_counts  # noqa: E402
+
+SUBJECTS = [
+    "过滤", "反应温度", "产率", "称量模块", "搅拌器", "干燥箱", "pH计",
+    "溶剂采购", "加料顺序", "页面加载", "导出报表", "推荐结果", "离心机",
+    "色谱柱", "冷凝回流", "结晶", "乳化", "粘度测试", "样品标签", "审批流程",
+]
+SYMPTOMS = [
+    "出现大量白色沉淀", "无法稳定在设定值", "比标注值低了一半", "显示异常",
+    "设置后不生效", "导致样品碳化", "读数漂移需要反复校准", "本地买不到",
+    "描述不清楚", "经常超时",
+]
+FILLER = "今天昨天我们实验室同事发现好像又再次请尽快处理谢谢了麻烦看一下"
+
+
+def make_feedback(rng: random.Random, topic: int):
+    subject = SUBJECTS[topic % len(SUBJECTS)]
+    symptom = SYMPTOMS[topic // len(SUBJECTS) % len(SYMPTOMS)]
+    noise = "".join(rng.choices(FILLER, k=rng.randint(2, 8)))
+    return (f"{subject}问题", f"{subject}{symptom}，{noise}", None)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="反馈聚类基准")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--assign", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topics = [rng.randrange(args.topics) for _ in range(args.docs)]
+    docs = [make_feedback(rng, topic) for topic in topics]
+
+    def chunks():
+        for start in range(0, args.docs, args.chunk_size):
+            end = min(start + args.chunk_size, args.docs)
+            yield list(range(start + 1, end + 1)), docs[start:end]
+
+    started = time.perf_counter()
+    index = recluster(chunks, workers=args.workers)
+    recluster_s = time.perf_counter() - started
+    stats = index.stats()
+    print(f"全量聚类 {args.docs} 条 ({args.workers} 进程): {recluster_s:.2f}s")
+    print(stats)
+
+    ids, labels = index.labels()
+    truth = np.asarray(topics)[ids - 1]
+    majority = sum(
+        Counter(truth[labels == cluster].tolist()).most_common(1)[0][1]
+        for cluster in np.unique(labels)
+    )
+    purity = majority / len(ids)
+    print(f"纯度: {purity:.4f}")
+
+    latencies = []
+    for offset in range(args.assign):
+        fields = make_feedback(rng, rng.randrange(args.topics))
+        started = time.perf_counter()
+        hashes, tfs = hash_terms(term_counts(*fields))
+        index.vectorizer.observe(hashes)
+        vector = index.vectorizer.transform(hashes, tfs)
+        index.assign(args.docs + 1 + offset, vector)
+        latencies.append((time.perf_counter() - started) * 1000)
+    values = np.asarray(latencies)
+    assign = {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+    print("增量归簇:", assign)
+
+    if args.output:
+        output = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "docs": args.docs,
+                "topics": args.topics,
+                "workers": args.workers,
+            },
+            "recluster_s": round(recluster_s, 3),
+            "purity": round(purity, 4),
+            "index": stats,
+            "assign": assign,
+        }
+        Path(args.output).write_text(
+            json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
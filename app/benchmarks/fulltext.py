@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+全文检索基准
+用合成的中文实验记录构建倒排索引（分批写成磁盘段），测量构建耗时、
+清单恢复耗时和查询延迟（p50/p95），查询分 and / or 两种模式。
+
+用法:
+    python -m benchmarks.fulltext [--docs 200000] [--output out.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np  # noqa: E402
+
+from core.fulltext import FullTextIndex, term_counts  # noqa: E402
+
+PHRASES = [
+    "溶液颜色变深", "出现白色沉淀", "反应温度偏高", "搅拌速度不足",
+    "产率明显下降", "过滤困难", "粘度增加", "pH值偏低", "结晶颗粒细小",
+    "干燥时间过长", "原料纯度不够", "乳化不完全", "气泡较多", "分层明显",
+    "升温速率过快", "保温时间延长后效果更好", "冷却后析出晶体",
+    "加入催化剂后反应加快", "溶剂回收率提高", "样品批次差异大",
+]
+FILLER = "的了在和与及后前时中上下再又也都已将被把对从向按"
+
+QUERIES = [
+    "白色沉淀", "产率下降", "反应温度", "结晶", "pH值", "乳化",
+    "溶剂回收", "保温时间", "催化剂 反应", "颜色 变深",
+]
+
+
+def make_note(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 6)):
+        parts.append(rng.choice(PHRASES))
+        parts.append("".join(rng.choices(FILLER, k=rng.randint(1, 4))))
+    return "，".join(parts)
+
+
+def build(directory: str, docs: int, batch: int, seed: int) -> float:
+    rng = random.Random(seed)
+    index = FullTextIndex(directory)
+    started = time.perf_counter()
+    for doc_id in range(1, docs + 1):
+        index.upsert(doc_id, term_counts(make_note(rng)))
+        if index.pending >= batch:
+            index.checkpoint()
+    index.checkpoint()
+    return time.perf_counter() - started
+
+
+def run_queries(
+    index: FullTextIndex, mode: str, rounds: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    hits = 0
+    for _ in range(rounds):
+        for query in QUERIES:
+            started = time.perf_counter()
+            _, total = index.search(query, limit=20, mode=mode)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += total
+    values = np.asarray(latencies)
+    return {
+        "queries": len(latencies),
+        "mean_hits": round(hits / len(latencies), 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="全文检索基准")
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_s = build(directory, args.docs, args.batch, args.seed)
+        print(f"构建 {args.docs} 条: {build_s:.2f}s")
+
+        started = time.perf_counter()
+        index = FullTextIndex.load(directory)
+        load_s = time.perf_counter() - started
+        print(f"恢复: {load_s * 1000:.1f}ms, {index.stats()}")
+
+        results = {}
+        for mode in ("and", "or"):
+            results[mode] = run_queries(index, mode, args.rounds)
+            print(f"{mode:<4}", results[mode])
+        stats = index.stats()
+
+    if args.output:
+        output = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "docs": args.docs,
+                "batch": args.batch,
+            },
+            "build_s": round(build_s, 3),
+            "load_ms": round(load_s * 1000, 3),
+            "index": stats,
+            "queries": results,
+        }
+        Path(args.output).write_text(
+            json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
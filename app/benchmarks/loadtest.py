@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+离线压测脚本
+生成确定性的测试数据，启动 LLM/工站桩服务和被测应用（uvicorn 子进程），
+按场景权重发起请求，统计各场景吞吐量、延迟分位数和错误率并保存为 JSON，
+全程不访问外部网络。
+
+用法:
+    python -m benchmarks.loadtest run [--concurrency 32] [--duration 60]
+    python -m benchmarks.loadtest run --rate 200 --mix detail=1,poll=1
+    python -m benchmarks.loadtest compare base.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+APP_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# 被限流/过载的状态码单独统计，不计入错误
+SHED_STATUSES = {429, 503}
+
+
+class Recorder:
+    """按场景记录延迟和状态码（请求异常时记录异常类型名）"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.enabled = False
+
+    def record(self, scenario, status: Union[int, str], latency: float):
+        if not self.enabled:
+            return
+        self.latencies[scenario.name].append(latency)
+        self.statuses[scenario.name][status] += 1
+        if status not in scenario.ok and status not in SHED_STATUSES:
+            self.errors[scenario.name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        import numpy as np
+
+        def stats(latencies, statuses, errors):
+            values = np.asarray(latencies) * 1000
+            count = len(values)
+            shed = sum(statuses[s] for s in SHED_STATUSES)
+            p50, p95, p99 = (
+                np.percentile(values, [50, 95, 99]) if count else (0, 0, 0)
+            )
+            return {
+                "count": count,
+                "rps": round(count / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "mean_ms": round(float(values.mean()), 2) if count else 0.0,
+                "max_ms": round(float(values.max()), 2) if count else 0.0,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "shed_rate": round(shed / count, 4) if count else 0.0,
+                "statuses": {
+                    str(k): v
+                    for k, v in sorted(
+                        statuses.items(), key=lambda item: str(item[0])
+                    )
+                },
+            }
+
+        scenarios = {
+            name: stats(
+                self.latencies[name], self.statuses[name], self.errors[name]
+            )
+            for name in sorted(self.latencies)
+        }
+        total_statuses = Counter()
+        for statuses in self.statuses.values():
+            total_statuses.update(statuses)
+        total = stats(
+            [x for values in self.latencies.values() for x in values],
+            total_statuses,
+            sum(self.errors.values()),
+        )
+        return {"scenarios": scenarios, "total": total}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=APP_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_mix(value: Optional[str]) -> Optional[Dict[str, float]]:
+    """解析 "detail=30,poll=30" 形式的场景权重"""
+    if not value:
+        return None
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def _server_env(args, workdir: Path, llm_url: str) -> Dict[str, str]:
+    """被测应用的环境变量：数据文件全部写到临时目录
+
+    每次压测都从空的索引和快照开始，也不会在仓库的 data 目录留下文件。
+    """
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": os.pathsep.join(
+                [str(project_root), env.get("PYTHONPATH", "")]
+            ),
+            "SECRET_KEY": "bench-secret",
+            "JWT_SECRET_KEY": "bench-jwt-secret",
+            "DATABASE_URL": args.database_url,
+            "DATABASE_USER": "bench",
+            "DATABASE_PASSWORD": "bench",
+            "DATABASE_NAME": "bench",
+            "OPENAI_API_KEY": "bench",
+            "OPENAI_BASE_URL": f"{llm_url}/v1",
+            "LOG_LEVEL": "WARNING",
+            "LOG_FILE": str(workdir / "logs" / "app.log"),
+            "CHROMA_PERSIST_DIRECTORY": str(workdir / "chroma"),
+            "JOB_LOCAL_DB_PATH": str(workdir / "jobs.sqlite3"),
+            "FACET_SNAPSHOT_PATH": str(workdir / "facets.snapshot"),
+            "FULLTEXT_INDEX_DIR": str(workdir / "fulltext"),
+            "FEEDBACK_CLUSTER_SNAPSHOT_PATH": str(
+                workdir / "feedback_clusters.snapshot"
+            ),
+            "FEEDBACK_ROLLUP_SNAPSHOT_PATH": str(
+                workdir / "feedback_rollups.snapshot"
+            ),
+            "EXPERIMENT_REPORT_SNAPSHOT_DIR": str(
+                workdir / "experiment_snapshots"
+            ),
+            "ATTACHMENT_DIR": str(workdir / "attachments"),
+            "CACHE_ENABLED": "true" if args.redis_url else "false",
+            "ADMISSION_ENABLED": "true" if args.admission else "false",
+        }
+    )
+    if args.redis_url:
+        env["REDIS_URL"] = args.redis_url
+    return env
+
+
+def _tokens(info, secret: str) -> List[Dict[str, str]]:
+    """为每个压测用户签发 JWT，准入控制按用户限流"""
+    from jose import jwt
+
+    return [
+        {"Authorization": f"Bearer {jwt.encode({'sub': str(i)}, secret)}"}
+        for i in range(1, info.users + 1)
+    ]
+
+
+async def _wait_ready(base_url: str, process: subprocess.Popen, timeout=60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"被测应用退出，返回码 {process.returncode}")
+            try:
+                response = await client.get("/api/v1/api/v1/health")
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("等待被测应用启动超时")
+
+
+async def _simulate_workstations(args, info, workstation_url: str, stop):
+    """模拟工站回报：定期推进运行中任务的进度，使轮询结果发生变化"""
+    import httpx
+    from sqlalchemy import update
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from models import Task
+
+    from .seed import async_url
+
+    rng = random.Random(args.seed)
+    engine = create_async_engine(async_url(args.database_url))
+    # 本地任务ID -> 桩工站上的任务ID
+    remote_ids: Dict[int, int] = {}
+    async with httpx.AsyncClient(base_url=workstation_url) as client:
+        while not stop.is_set():
+            task_ids = [rng.randint(1, info.tasks) for _ in range(20)]
+            try:
+                async with engine.begin() as conn:
+                    for task_id in task_ids:
+                        if task_id not in remote_ids:
+                            submitted = await client.post(
+                                "/api/tasks", json={"task_id": task_id}
+                            )
+                            remote_ids[task_id] = submitted.json()["task_id"]
+                        remote = await client.get(
+                            f"/api/tasks/{remote_ids[task_id]}"
+                        )
+                        progress = remote.json().get("progress", 0.0)
+                        await conn.execute(
+                            update(Task)
+                            .where(Task.id == task_id)
+                            .values(
+                                progress=round(progress * 100, 1),
+                                updated_at=datetime.now(timezone.utc),
+                            )
+                        )
+            except Exception as e:
+                # 与压测请求争锁失败时跳过本轮
+                print(f"⚠️  工站模拟更新失败: {e}", file=sys.stderr)
+            try:
+                await asyncio.wait_for(stop.wait(), args.workstation_interval)
+            except asyncio.TimeoutError:
+                pass
+    await engine.dispose()
+
+
+async def _execute(client, scenario, user, recorder, started: float):
+    import httpx
+
+    try:
+        response = await scenario.fn(client, user)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        # 连接失败、超时等没有状态码，按异常类型区分（如 ReadTimeout）
+        status = type(e).__name__
+    recorder.record(scenario, status, time.perf_counter() - started)
+
+
+def _pick(rng: random.Random, scenarios, weights):
+    return rng.choices(scenarios, weights=weights)[0]
+
+
+async def _closed_loop(client, users, scenarios, recorder, stop):
+    """闭环：每个虚拟用户收到响应后立即发下一个请求"""
+    weights = [s.weight for s in scenarios]
+
+    async def worker(user):
+        while not stop.is_set():
+            scenario = _pick(user.rng, scenarios, weights)
+            await _execute(
+                client, scenario, user, recorder, time.perf_counter()
+            )
+
+    await asyncio.gather(*(worker(user) for user in users))
+
+
+async def _open_loop(client, users, scenarios, recorder, stop, rate: float):
+    """开环：按泊松到达率发请求，延迟从计划发送时刻算起"""
+    weights = [s.weight for s in scenarios]
+    rng = random.Random(0)
+    pending = set()
+    scheduled = time.perf_counter()
+    while not stop.is_set():
+        scheduled += rng.expovariate(rate)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        user = rng.choice(users)
+        scenario = _pick(user.rng, scenarios, weights)
+        task = asyncio.create_task(
+            _execute(client, scenario, user, recorder, scheduled)
+        )
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def _drive(args, base_url: str, info, recorder: Recorder) -> float:
+    import httpx
+
+    from .scenarios import VirtualUser, select
+
+    scenarios = select(_parse_mix(args.mix))
+    tokens = _tokens(info, "bench-jwt-secret")
+    users = [
+        VirtualUser(
+            user_id=(i % info.users) + 1,
+            rng=random.Random(args.seed * 1000 + i),
+            info=info,
+            headers=tokens[i % info.users],
+        )
+        for i in range(args.concurrency)
+    ]
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=None
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        elapsed = 0.0
+        phases = (("warmup", args.warmup), ("run", args.duration))
+        for phase, seconds in phases:
+            if seconds <= 0:
+                continue
+            recorder.enabled = phase == "run"
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            loop.call_later(seconds, stop.set)
+            print(f"⏱  {phase}: {seconds:g}s")
+            start = time.perf_counter()
+            if args.rate:
+                await _open_loop(
+                    client, users, scenarios, recorder, stop, args.rate
+                )
+            else:
+                await _closed_loop(client, users, scenarios, recorder, stop)
+            elapsed = time.perf_counter() - start
+        recorder.enabled = False
+    return elapsed
+
+
+async def _run(args, workdir: Path) -> Dict[str, Any]:
+    from .seed import seed
+    from .stubs import (
+        StubServer,
+        create_llm_app,
+        create_workstation_app,
+    )
+
+    print("🌱 生成压测数据...")
+    started = time.perf_counter()
+    info = await seed(
+        args.database_url,
+        users=args.users,
+        recipes=args.recipes,
+        experiments_per_recipe=args.experiments_per_recipe,
+        tasks=args.tasks,
+        workstations=args.workstations,
+        random_seed=args.seed,
+    )
+    print(
+        f"   用户 {info.users}，配方 {info.recipes}，实验 {info.experiments}，"
+        f"任务 {info.tasks}，用时 {time.perf_counter() - started:.1f}s"
+    )
+
+    llm = StubServer(create_llm_app(args.llm_latency, args.seed))
+    workstation = StubServer(
+        create_workstation_app(args.workstation_latency, args.seed)
+    )
+    await llm.start()
+    await workstation.start()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    log = open(workdir / "server.log", "wb")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(args.workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=APP_DIR,
+        env=_server_env(args, workdir, llm.url),
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    stop = asyncio.Event()
+    simulator = None
+    try:
+        await _wait_ready(base_url, process)
+        print(f"🚀 被测应用已启动: {base_url}（workers={args.workers}）")
+        simulator = asyncio.create_task(
+            _simulate_workstations(args, info, workstation.url, stop)
+        )
+        recorder = Recorder()
+        elapsed = await _drive(args, base_url, info, recorder)
+    finally:
+        stop.set()
+        if simulator is not None:
+            await simulator
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+        await workstation.stop()
+        await llm.stop()
+
+    result = recorder.summary(elapsed)
+    result["meta"] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "elapsed": round(elapsed, 2),
+        "database": args.database_url.split("://", 1)[0],
+        "args": {
+            k: v
+            for k, v in vars(args).items()
+            if k not in ("func", "database_url", "redis_url")
+        },
+        "seed": info.to_dict(),
+    }
+    return result
+
+
+def _print_summary(result: Dict[str, Any]):
+    header = (
+        f"{'scenario':<20}{'count':>10}{'rps':>9}{'p50':>9}{'p95':>9}"
+        f"{'p99':>9}{'errors':>10}{'shed':>10}"
+    )
+    print(header)
+    rows = list(result["scenarios"].items()) + [("TOTAL", result["total"])]
+    for name, s in rows:
+        print(
+            f"{name:<20}{s['count']:>10}{s['rps']:>9.1f}{s['p50_ms']:>9.1f}"
+            f"{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}"
+            f"{s['error_rate']:>10.2%}{s['shed_rate']:>10.2%}"
+        )
+
+
+def run(args):
+    """执行压测"""
+    workdir = Path(tempfile.mkdtemp(prefix="formula-bench-"))
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{workdir / 'bench.db'}"
+    elif not args.reset_database:
+        # 生成数据会删除并重建全部表
+        sys.exit("❌ 指定 --database-url 时必须同时指定 --reset-database")
+
+    # 应用模块在导入时读取配置，压测进程与被测应用使用同一套环境变量
+    os.environ.update(_server_env(args, workdir, "http://127.0.0.1"))
+
+    result = asyncio.run(_run(args, workdir))
+    _print_summary(result)
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR
+        / f"{datetime.now():%Y%m%d-%H%M%S}-{result['meta']['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"💾 结果已保存: {output}")
+    print(f"   服务日志: {workdir / 'server.log'}")
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "    n/a"
+    return f"{(new - old) / old:+7.1%}"
+
+
+def compare(args):
+    """对比两次压测结果"""
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+    print(
+        f"基准: {base['meta'].get('commit')} {base['meta']['timestamp']}\n"
+        f"对比: {new['meta'].get('commit')} {new['meta']['timestamp']}"
+    )
+    print(
+        f"{'scenario':<20}{'rps':>16}{'p50':>16}{'p95':>16}{'p99':>16}"
+        f"{'errors':>16}"
+    )
+    names = sorted(set(base["scenarios"]) | set(new["scenarios"]))
+    for name in names + ["TOTAL"]:
+        if name == "TOTAL":
+            old, cur = base["total"], new["total"]
+        elif name not in base["scenarios"] or name not in new["scenarios"]:
+            print(f"{name:<20}仅在一份结果中出现")
+            continue
+        else:
+            old, cur = base["scenarios"][name], new["scenarios"][name]
+        cells = [
+            f"{cur[key]:>9.1f}{_delta(old[key], cur[key])}"
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        error_delta = cur["error_rate"] - old["error_rate"]
+        print(
+            f"{name:<20}{''.join(cells)}"
+            f"{cur['error_rate']:>8.2%} {error_delta:>+7.2%}"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="离线压测")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="执行压测")
+    p.add_argument("--database-url", type=str, default=None)
+    p.add_argument("--reset-database", action="store_true")
+    p.add_argument("--redis-url", type=str, default=None)
+    p.add_argument("--admission", action="store_true", help="开启准入控制")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--rate", type=float, default=None, help="开环到达率")
+    p.add_argument("--duration", type=float, default=60.0)
+    p.add_argument("--warmup", type=float, default=10.0)
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--mix", type=str, default=None)
+    p.add_argument("--users", type=int, default=50)
+    p.add_argument("--recipes", type=int, default=2000)
+    p.add_argument("--experiments-per-recipe", type=float, default=3.0)
+    p.add_argument("--tasks", type=int, default=2000)
+    p.add_argument("--workstations", type=int, default=8)
+    p.add_argument("--workstation-interval", type=float, default=1.0)
+    p.add_argument("--llm-latency", type=float, default=0.5)
+    p.add_argument("--workstation-latency", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", type=str, default=None)
+    p.set_defaults(func=run)
+
+    p = sub.add_parser("compare", help="对比两次压测结果")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
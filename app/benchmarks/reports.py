@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+实验报表快照基准
+用合成的实验记录测量按月分区 Parquet 快照的全量导出、增量导出
+（少量变更行，集中在最近两个月）耗时，以及几种典型报表查询在缓存
+解码分区和每次读取 Parquet 两种方式下的延迟（p50/p95）。
+
+用法:
+    python -m benchmarks.reports [--rows 1000000] [--output out.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.compute as pc  # noqa: E402
+
+from core.analytics import ColumnarSnapshot  # noqa: E402
+
+STATUSES = ["planned", "running", "completed", "failed"]
+RESULTS = ["success", "partial", "failure", "unknown"]
+
+REPORTS = {
+    "by_recipe": (["recipe_id"], None),
+    "by_user_month": (["user_id", "month"], None),
+    "one_recipe_by_month": (["month"], pc.field("recipe_id") == 7),
+    "quarter_by_result": (
+        ["result"],
+        (pc.field("month") >= "2025-04") & (pc.field("month") <= "2025-06"),
+    ),
+}
+MEASURES = ["duration_minutes", "actual_cost", "quality_score", "temperature"]
+
+
+def make_rows(rng, ids: np.ndarray, first_month: int = 0) -> pa.Table:
+    """first_month 之后（共24个月）的合成实验记录"""
+    n = len(ids)
+    months = [f"{2024 + m // 12}-{m % 12 + 1:02d}" for m in range(24)]
+    month_index = rng.integers(first_month, 24, n)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    created = created + (month_index * 30 + rng.uniform(0, 28, n)) * 86400
+    quality = rng.uniform(0, 10, n)
+    quality[rng.random(n) < 0.2] = np.nan
+    return pa.table(
+        {
+            "id": ids,
+            "recipe_id": rng.integers(1, 2000, n),
+            "user_id": rng.integers(1, 200, n),
+            "month": pa.array(np.asarray(months)[month_index]),
+            "status": pa.array(np.asarray(STATUSES)[rng.integers(0, 4, n)]),
+            "result": pa.array(np.asarray(RESULTS)[rng.integers(0, 4, n)]),
+            "meets_criteria": rng.random(n) < 0.5,
+            "created_at": pa.array(
+                (created * 1e6).astype(np.int64), pa.timestamp("us", "UTC")
+            ),
+            "updated_at": pa.array(
+                (created * 1e6).astype(np.int64), pa.timestamp("us", "UTC")
+            ),
+            "duration_minutes": rng.integers(10, 600, n),
+            "actual_cost": rng.uniform(10, 1000, n),
+            "quality_score": pa.array(quality, from_pandas=True),
+            "success_rating": rng.integers(1, 6, n),
+            "temperature": rng.normal(25, 3, n),
+            "humidity": rng.uniform(30, 70, n),
+            "pressure": rng.normal(101.3, 0.5, n),
+        }
+    )
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="实验报表快照基准")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--changed", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rows = make_rows(rng, np.arange(1, args.rows + 1))
+
+    with tempfile.TemporaryDirectory() as root:
+        snapshot = ColumnarSnapshot(root, rows.schema)
+        started = time.perf_counter()
+        snapshot.apply(rows, watermark="full")
+        full_s = time.perf_counter() - started
+        print(f"全量导出 {args.rows} 行: {full_s:.2f}s", snapshot.stats())
+
+        # 变更集中在最近的实验上（补录结果、修正数据）
+        recent = rows.filter(pc.field("month") >= "2025-11")["id"]
+        changed_ids = rng.choice(recent.to_numpy(), args.changed, False)
+        changed = make_rows(rng, changed_ids, first_month=22)
+        started = time.perf_counter()
+        incremental = snapshot.apply(changed, watermark="incremental")
+        incremental_s = time.perf_counter() - started
+        print(f"增量导出 {args.changed} 行: {incremental_s:.2f}s", incremental)
+
+        aggregations = [("id", "count")] + [
+            (measure, aggregate)
+            for measure in MEASURES
+            for aggregate in ("mean", "count")
+        ]
+        reports = {}
+        for cache in (True, False):
+            snapshot.cache = cache
+            mode = "cached" if cache else "parquet"
+            for name, (group_by, where) in REPORTS.items():
+                latencies = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    result = snapshot.query(group_by, aggregations, where)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                key = f"{mode}/{name}"
+                reports[key] = {
+                    "groups": len(result),
+                    **percentiles(latencies),
+                }
+                print(f"{key}:", reports[key])
+
+    if args.output:
+        output = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "pyarrow": pa.__version__,
+                "rows": args.rows,
+                "changed": args.changed,
+            },
+            "full_export_s": round(full_s, 3),
+            "incremental_export_s": round(incremental_s, 3),
+            "incremental": incremental,
+            "reports": reports,
+        }
+        Path(args.output).write_text(
+            json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+反馈评分汇总基准
+用合成的反馈评分对比两种 7/30/90 天窗口平均分的计算方式：扫描原始
+记录（内存中的 numpy 数组，已比数据库聚合快得多）与按天汇总后相加
+日桶，并测量汇总的增量更新耗时。
+
+用法:
+    python -m benchmarks.rollups [--docs 1000000] [--recipes 2000]
+                                 [--output out.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np  # noqa: E402
+
+from core.rollups import DailyRollup  # noqa: E402
+
+METRICS = ("rating", "usefulness_score", "accuracy_score", "clarity_score")
+WINDOWS = (7, 30, 90)
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "max_ms": round(float(values.max()), 4),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="反馈评分汇总基准")
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ids = np.arange(1, args.docs + 1)
+    # 少数热门配方占大部分反馈
+    keys = (rng.zipf(1.3, args.docs) % args.recipes).astype(np.int64)
+    days = rng.integers(20000, 20000 + args.days, args.docs, np.int32)
+    values = rng.uniform(0, 10, (args.docs, len(METRICS)))
+    values[:, 0] = rng.integers(1, 6, args.docs)
+    values[rng.random(values.shape) < 0.3] = np.nan
+
+    started = time.perf_counter()
+    rollup = DailyRollup(METRICS)
+    rollup.bulk_load(ids, keys, days, values)
+    build_s = time.perf_counter() - started
+    print(f"构建 {args.docs} 条 / {len(rollup.series)} 个配方: {build_s:.2f}s")
+
+    last = 20000 + args.days - 1
+    recipes = rng.choice(keys, args.queries)
+    scan, bucket = [], []
+    for recipe in recipes:
+        started = time.perf_counter()
+        for window in WINDOWS:
+            rows = values[(keys == recipe) & (days > last - window)]
+            counts = (~np.isnan(rows)).sum(axis=0)
+            np.nansum(rows, axis=0) / np.maximum(counts, 1)
+        scan.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for window in WINDOWS:
+            rollup.window(int(recipe), last - window + 1, last)
+        bucket.append((time.perf_counter() - started) * 1000)
+    results = {"scan": percentiles(scan), "rollup": percentiles(bucket)}
+    print("扫描原始记录:", results["scan"])
+    print("日桶相加:", results["rollup"])
+
+    updates = []
+    for _ in range(args.queries):
+        doc_id = int(rng.integers(1, args.docs + 1))
+        started = time.perf_counter()
+        rollup.upsert(
+            doc_id,
+            int(rng.integers(args.recipes)),
+            last,
+            [float(value) for value in rng.uniform(0, 10, len(METRICS))],
+        )
+        updates.append((time.perf_counter() - started) * 1000)
+    results["upsert"] = percentiles(updates)
+    print("增量更新:", results["upsert"])
+
+    if args.output:
+        output = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "docs": args.docs,
+                "recipes": args.recipes,
+                "days": args.days,
+            },
+            "build_s": round(build_s, 3),
+            **results,
+        }
+        Path(args.output).write_text(
+            json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""压测场景
+
+每个场景是一个协程函数 ``fn(client, user) -> httpx.Response``，发出一次
+请求。虚拟用户按权重随机选择场景；``ok`` 中的状态码视为成功，429/503
+单独计为被限流，其余计为错误。
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+import httpx
+
+from .seed import SeedInfo
+
+API = "/api/v1"
+
+
+@dataclass
+class VirtualUser:
+    """虚拟用户：独立的随机数序列、身份和条件请求缓存"""
+
+    user_id: int
+    rng: random.Random
+    info: SeedInfo
+    headers: Dict[str, str] = field(default_factory=dict)
+    etags: Dict[str, str] = field(default_factory=dict)
+
+    def hot_recipe(self) -> int:
+        """八成请求落在一成热点配方上"""
+        recipes = self.info.recipes
+        hot = max(1, recipes // 10)
+        if self.rng.random() < 0.8:
+            return self.rng.randint(1, hot)
+        return self.rng.randint(1, recipes)
+
+
+ScenarioFn = Callable[[httpx.AsyncClient, VirtualUser], Awaitable]
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    fn: ScenarioFn
+    ok: FrozenSet[int] = frozenset({200})
+
+
+async def health(client: httpx.AsyncClient, user: VirtualUser):
+    # 健康检查路由自带 /api/v1 前缀，挂载时又加了一次
+    return await client.get(f"{API}{API}/health")
+
+
+async def search_list(client: httpx.AsyncClient, user: VirtualUser):
+    params = {
+        "category": user.rng.choice(user.info.categories),
+        "page": user.rng.randint(1, 5),
+        "page_size": 20,
+    }
+    return await client.get(
+        f"{API}/recipes", params=params, headers=user.headers
+    )
+
+
+async def search_ingredients(client: httpx.AsyncClient, user: VirtualUser):
+    cas = user.rng.sample(user.info.cas_numbers, 3)
+    body = {
+        "all_of": [{"cas_number": cas[0]}],
+        "any_of": [
+            {
+                "cas_number": cas[1],
+                "min_amount": 10,
+                "unit": user.info.units[cas[1]],
+            },
+            {"cas_number": cas[2]},
+        ],
+        "page_size": 20,
+    }
+    return await client.post(
+        f"{API}/recipes/search/ingredients", json=body, headers=user.headers
+    )
+
+
+async def search_facets(client: httpx.AsyncClient, user: VirtualUser):
+    params = {"category": user.rng.sample(user.info.categories, 2), "top": 10}
+    return await client.get(
+        f"{API}/recipes/facets", params=params, headers=user.headers
+    )
+
+
+async def detail(client: httpx.AsyncClient, user: VirtualUser):
+    recipe_id = user.hot_recipe()
+    return await client.get(
+        f"{API}/recipes/{recipe_id}", headers=user.headers
+    )
+
+
+async def create(client: httpx.AsyncClient, user: VirtualUser):
+    """围绕配方生成一小批实验和工站任务（写路径）"""
+    recipe_id = user.hot_recipe()
+    body = {
+        "design": "latin_hypercube",
+        "factors": [
+            {"name": "temperature", "relative_span": 0.2},
+            {"name": "ph", "relative_span": 0.1},
+        ],
+        "count": 4,
+        "seed": user.rng.randint(0, 2**31),
+        "user_id": user.user_id,
+        "workstation_id": user.rng.randint(1, user.info.workstations),
+    }
+    return await client.post(
+        f"{API}/recipes/{recipe_id}/doe", json=body, headers=user.headers
+    )
+
+
+async def create_batch(client: httpx.AsyncClient, user: VirtualUser):
+    """批量导入一批已完成的实验记录"""
+    items = [
+        {
+            "name": f"导入实验{user.rng.randint(1, 10**9)}",
+            "recipe_id": user.hot_recipe(),
+            "user_id": user.user_id,
+            "status": "completed",
+            "quality_score": round(user.rng.uniform(3, 10), 2),
+            "measurements": {"yield": round(user.rng.random(), 3)},
+        }
+        for _ in range(50)
+    ]
+    return await client.post(
+        f"{API}/experiments/batch", json={"items": items}, headers=user.headers
+    )
+
+
+async def generate(client: httpx.AsyncClient, user: VirtualUser):
+    """生成下一轮配方参数建议（模型拟合在进程池中执行）"""
+    recipe_id = user.rng.choice(user.info.optimizable)
+    body = {
+        "recipe_id": recipe_id,
+        "optimization_goals": ["quality"],
+        "batch_size": 3,
+    }
+    return await client.post(
+        f"{API}/recipes/optimize", json=body, headers=user.headers
+    )
+
+
+async def poll_task(client: httpx.AsyncClient, user: VirtualUser):
+    """轮询任务状态，带上次的 ETag"""
+    if user.rng.random() < 0.2:
+        path = f"{API}/tasks"
+        params = {
+            "workstation_id": user.rng.randint(1, user.info.workstations),
+            "status": "running",
+        }
+    else:
+        # 每个虚拟用户反复轮询自己关注的少量任务
+        task_id = user.rng.randint(1, 20) * 97 % user.info.tasks + 1
+        path = f"{API}/tasks/{task_id}"
+        params = {}
+    key = f"{path}?{sorted(params.items())}"
+    headers = dict(user.headers)
+    if key in user.etags:
+        headers["If-None-Match"] = user.etags[key]
+    response = await client.get(path, params=params, headers=headers)
+    if "etag" in response.headers:
+        user.etags[key] = response.headers["etag"]
+    return response
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("health", 5, health),
+    Scenario("search.list", 10, search_list, frozenset({200, 304})),
+    Scenario("search.ingredients", 10, search_ingredients),
+    Scenario("search.facets", 5, search_facets),
+    Scenario("detail", 30, detail, frozenset({200, 304})),
+    Scenario("create", 5, create),
+    # 默认不参与，用 --mix 开启，保持与早先结果可比
+    Scenario("create.batch", 0, create_batch, frozenset({201})),
+    Scenario("generate", 5, generate),
+    Scenario("poll", 30, poll_task, frozenset({200, 304})),
+]
+
+
+def select(mix: Optional[Dict[str, float]] = None) -> List[Scenario]:
+    """按 mix（场景名 -> 权重）调整场景权重，权重为 0 的场景被剔除"""
+    scenarios = []
+    for scenario in SCENARIOS:
+        weight = scenario.weight
+        if mix is not None:
+            weight = mix.get(scenario.name, 0.0)
+        if weight > 0:
+            scenarios.append(
+                Scenario(scenario.name, weight, scenario.fn, scenario.ok)
+            )
+    if mix is not None:
+        unknown = set(mix) - {s.name for s in SCENARIOS}
+        if unknown:
+            raise ValueError(f"未知的场景: {sorted(unknown)}")
+    return scenarios
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Schema 校验微基准
+测量 models/schemas 中各模型单个对象的校验耗时：字典校验
+（model_validate）、JSON 校验（model_validate_json）以及 BaseSchema
+的免校验构造（trusted）。配方按原料/步骤数量分档，观察大载荷下的
+开销。
+
+用法:
+    python -m benchmarks.schemas [--sizes 10,100,500] [--output out.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import pydantic  # noqa: E402
+
+from models.schemas.common import BaseSchema  # noqa: E402
+from models.schemas.recipe import (  # noqa: E402
+    RecipeCreate,
+    RecipeResponse,
+)
+from models.schemas.user import UserCreate  # noqa: E402
+from models.schemas.workstation import (  # noqa: E402
+    TaskControlRequest,
+    TaskCreate,
+    TaskResponse,
+)
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat()
+
+
+def recipe_payload(size: int) -> Dict[str, Any]:
+    return {
+        "name": f"配方-{size}",
+        "description": "微基准配方",
+        "category": "合成",
+        "tags": ["常温", "快速"],
+        "ingredients": [
+            {
+                "name": f"原料{i}",
+                "amount": 1.5 + i,
+                "unit": "g",
+                "purity": 99.5,
+                "cas_number": "64-17-5",
+            }
+            for i in range(size)
+        ],
+        "procedures": [
+            {
+                "step_number": i + 1,
+                "description": f"步骤{i + 1}",
+                "duration": 5,
+                "temperature": 25.0,
+                "conditions": {"stir_rpm": 400},
+                "equipment": ["烧杯"],
+            }
+            for i in range(size)
+        ],
+        "parameters": {"temperature": 60, "ph": 7.0},
+    }
+
+
+def recipe_response_payload(size: int) -> Dict[str, Any]:
+    return {
+        **recipe_payload(size),
+        "id": 1,
+        "status": "approved",
+        "creator_id": 1,
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+
+
+def task_payload(size: int) -> Dict[str, Any]:
+    return {
+        "name": f"任务-{size}",
+        "priority": "high",
+        "commands": [
+            {"action": f"step_{i}", "parameters": {"temperature": 25 + i}}
+            for i in range(size)
+        ],
+        "workstation_id": 1,
+        "recipe_id": 1,
+    }
+
+
+def task_response_payload(size: int) -> Dict[str, Any]:
+    return {
+        **task_payload(size),
+        "id": 1,
+        "user_id": 1,
+        "status": "running",
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+
+
+def user_payload(size: int) -> Dict[str, Any]:
+    return {
+        "username": "bench",
+        "email": "bench@example.com",
+        "password": "bench1234",
+        "confirm_password": "bench1234",
+    }
+
+
+def control_payload(size: int) -> Dict[str, Any]:
+    return {"action": "pause", "reason": "微基准"}
+
+
+# (名称, 模型, 载荷生成函数, 是否随 size 变化)
+CASES: List[Tuple[str, type, Callable[[int], Dict[str, Any]], bool]] = [
+    ("RecipeCreate", RecipeCreate, recipe_payload, True),
+    ("RecipeResponse", RecipeResponse, recipe_response_payload, True),
+    ("TaskCreate", TaskCreate, task_payload, True),
+    ("TaskResponse", TaskResponse, task_response_payload, True),
+    ("UserCreate", UserCreate, user_payload, False),
+    ("TaskControlRequest", TaskControlRequest, control_payload, False),
+]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    """多轮取最小值，返回单次耗时(微秒)"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run_case(model, payload: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    raw = json.dumps(payload, ensure_ascii=False).encode()
+    result = {
+        "validate_us": measure(lambda: model.model_validate(payload), repeat),
+        "validate_json_us": measure(
+            lambda: model.model_validate_json(raw), repeat
+        ),
+    }
+    if issubclass(model, BaseSchema):
+        # 内部数据已是合法值，模拟从ORM对象转换
+        trusted = model.model_validate(payload).model_dump()
+        result["trusted_us"] = measure(lambda: model.trusted(trusted), repeat)
+    return {key: round(value, 2) for key, value in result.items()}
+
+
+def run_procedures(sizes: List[int], repeat: int) -> Dict[str, float]:
+    """单独测量步骤号校验（validate_procedures）"""
+    result = {}
+    for size in sizes:
+        steps = RecipeCreate.model_validate(recipe_payload(size)).procedures
+        result[str(size)] = round(
+            measure(lambda: RecipeCreate.validate_procedures(steps), repeat),
+            2,
+        )
+    return result
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="Schema 校验微基准")
+    parser.add_argument("--sizes", type=str, default="10,100,500")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    results = []
+    print(
+        f"{'schema':<20}{'size':>6}{'validate':>12}{'json':>12}"
+        f"{'trusted':>12}  (us/object)"
+    )
+    for name, model, payload, sized in CASES:
+        for size in sizes if sized else [0]:
+            row = run_case(model, payload(size), args.repeat)
+            results.append({"schema": name, "size": size, **row})
+            trusted = row.get("trusted_us")
+            print(
+                f"{name:<20}{size or '-':>6}{row['validate_us']:>12.1f}"
+                f"{row['validate_json_us']:>12.1f}"
+                f"{trusted if trusted is not None else '-':>12}"
+            )
+
+    procedures = run_procedures(sizes, args.repeat)
+    print("validate_procedures:", procedures)
+
+    if args.output:
+        output = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "pydantic": pydantic.VERSION,
+            },
+            "results": results,
+            "validate_procedures_us": procedures,
+        }
+        Path(args.output).write_text(
+            json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
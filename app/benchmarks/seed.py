@@ -0,0 +1,263 @@
+"""压测数据生成
+
+按固定随机种子生成用户、配方（含版本族）、已完成的实验和工站任务，
+同一参数多次生成的数据完全一致，便于跨提交对比。使用 Core 批量插入
+后重建原料索引和谱系闭包表，不触发 ORM 事件。
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import Experiment, Recipe, Task, User
+from models.experiment import ExperimentResult, ExperimentStatus
+from models.recipe import RecipeStatus
+from models.recipe_ingredient import RecipeIngredient, build_index_rows
+from models.task import TaskPriority, TaskStatus
+from services.lineage_service import rebuild_lineage
+
+# (名称, CAS号, 单位)
+INGREDIENTS = [
+    ("乙醇", "64-17-5", "mL"),
+    ("水", "7732-18-5", "mL"),
+    ("氯化钠", "7647-14-5", "g"),
+    ("氢氧化钠", "1310-73-2", "g"),
+    ("盐酸", "7647-01-0", "mL"),
+    ("丙酮", "67-64-1", "mL"),
+    ("甘油", "56-81-5", "mL"),
+    ("柠檬酸", "77-92-9", "g"),
+    ("碳酸钙", "471-34-1", "g"),
+    ("葡萄糖", "50-99-7", "g"),
+    ("硫酸铜", "7758-98-7", "g"),
+    ("醋酸", "64-19-7", "mL"),
+]
+CATEGORIES = ["合成", "提取", "配制", "催化", "结晶", "分析"]
+TAGS = ["常温", "加热", "避光", "无水", "快速", "高纯"]
+ROLES = ["user"] * 8 + ["expert"] * 3 + ["admin"]
+RESULTS = [
+    ExperimentResult.SUCCESS,
+    ExperimentResult.PARTIAL,
+    ExperimentResult.FAILURE,
+]
+TASK_STATUSES = [
+    TaskStatus.QUEUED,
+    TaskStatus.RUNNING,
+    TaskStatus.RUNNING,
+    TaskStatus.COMPLETED,
+]
+
+BATCH_SIZE = 1000
+
+# 时间戳相对固定时刻生成，保证数据可复现
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class SeedInfo:
+    """生成数据的概要，压测场景据此构造请求"""
+
+    users: int = 0
+    recipes: int = 0
+    experiments: int = 0
+    tasks: int = 0
+    workstations: int = 0
+    # 有实验记录、可以做优化的配方
+    optimizable: List[int] = field(default_factory=list)
+    cas_numbers: List[str] = field(
+        default_factory=lambda: [cas for _, cas, _ in INGREDIENTS]
+    )
+    # CAS号 -> 生成数据使用的用量单位
+    units: Dict[str, str] = field(
+        default_factory=lambda: {cas: unit for _, cas, unit in INGREDIENTS}
+    )
+    categories: List[str] = field(default_factory=lambda: list(CATEGORIES))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "users": self.users,
+            "recipes": self.recipes,
+            "experiments": self.experiments,
+            "tasks": self.tasks,
+            "workstations": self.workstations,
+        }
+
+
+def async_url(database_url: str) -> str:
+    """与 db.database 一致：postgresql/sqlite 分别使用 asyncpg/aiosqlite"""
+    return database_url.replace(
+        "postgresql://", "postgresql+asyncpg://"
+    ).replace("sqlite://", "sqlite+aiosqlite://")
+
+
+def _ingredients(rng: random.Random) -> List[Dict[str, Any]]:
+    chosen = rng.sample(INGREDIENTS, rng.randint(2, 6))
+    return [
+        {
+            "name": name,
+            "cas_number": cas,
+            "amount": round(rng.uniform(1, 200), 2),
+            "unit": unit,
+        }
+        for name, cas, unit in chosen
+    ]
+
+
+def _procedures(rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "step": step,
+            "action": rng.choice(["混合", "加热", "搅拌", "冷却", "过滤"]),
+            "duration": rng.randint(1, 60),
+        }
+        for step in range(1, rng.randint(3, 8))
+    ]
+
+
+def _parameters(rng: random.Random) -> Dict[str, float]:
+    return {
+        "temperature": round(rng.uniform(20, 90), 1),
+        "ph": round(rng.uniform(3, 11), 2),
+        "stir_rpm": rng.choice([100, 200, 400, 800]),
+    }
+
+
+def _jitter(rng: random.Random, values: Dict[str, float]) -> Dict:
+    return {k: round(v * rng.uniform(0.9, 1.1), 3) for k, v in values.items()}
+
+
+async def seed(
+    database_url: str,
+    users: int = 50,
+    recipes: int = 2000,
+    experiments_per_recipe: float = 3.0,
+    tasks: int = 2000,
+    workstations: int = 8,
+    random_seed: int = 42,
+) -> SeedInfo:
+    """重建表结构（删除已有表）并写入压测数据"""
+    rng = random.Random(random_seed)
+    engine = create_async_engine(async_url(database_url))
+    metadata = Recipe.metadata
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+
+    now = BASE_TIME
+    info = SeedInfo(users=users, recipes=recipes, workstations=workstations)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "username": f"bench{i}",
+                    "email": f"bench{i}@example.com",
+                    "hashed_password": "x",
+                    "role": rng.choice(ROLES),
+                    "is_active": True,
+                }
+                for i in range(1, users + 1)
+            ],
+        )
+
+        recipe_rows, index_rows, experiment_rows = [], [], []
+        for recipe_id in range(1, recipes + 1):
+            # 约三成配方是已有配方的新版本
+            parent = (
+                rng.randint(1, recipe_id - 1)
+                if recipe_id > 10 and rng.random() < 0.3
+                else None
+            )
+            ingredients = _ingredients(rng)
+            parameters = _parameters(rng)
+            recipe_rows.append(
+                {
+                    "id": recipe_id,
+                    "name": f"配方{recipe_id}",
+                    "description": "压测数据",
+                    "category": rng.choice(CATEGORIES),
+                    "tags": rng.sample(TAGS, 2),
+                    "ingredients": ingredients,
+                    "procedures": _procedures(rng),
+                    "parameters": parameters,
+                    "status": rng.choice(list(RecipeStatus)),
+                    "parent_recipe_id": parent,
+                    "creator_id": rng.randint(1, users),
+                    "created_at": now - timedelta(days=rng.randint(0, 365)),
+                    "updated_at": now - timedelta(days=rng.randint(0, 30)),
+                }
+            )
+            index_rows.extend(build_index_rows(recipe_id, ingredients))
+
+            count = int(rng.expovariate(1 / experiments_per_recipe))
+            if count >= 3:
+                info.optimizable.append(recipe_id)
+            for _ in range(count):
+                experiment_rows.append(
+                    {
+                        "name": f"实验{len(experiment_rows) + 1}",
+                        "recipe_id": recipe_id,
+                        "user_id": rng.randint(1, users),
+                        "batch_number": f"B{recipe_id:06d}",
+                        "actual_ingredients": ingredients,
+                        "actual_parameters": _jitter(rng, parameters),
+                        "status": ExperimentStatus.COMPLETED,
+                        "result": rng.choice(RESULTS),
+                        "quality_score": round(rng.uniform(3, 10), 2),
+                        "actual_cost": round(rng.uniform(10, 500), 2),
+                        "duration_minutes": rng.randint(10, 300),
+                        "measurements": {
+                            "yield": round(rng.uniform(0.2, 0.99), 3),
+                            "purity": round(rng.uniform(0.8, 1.0), 4),
+                            "curve": [
+                                round(rng.random(), 3) for _ in range(16)
+                            ],
+                        },
+                    }
+                )
+
+        for table, rows in (
+            (Recipe, recipe_rows),
+            (RecipeIngredient, index_rows),
+            (Experiment, experiment_rows),
+        ):
+            for i in range(0, len(rows), BATCH_SIZE):
+                await conn.execute(insert(table), rows[i : i + BATCH_SIZE])
+        info.experiments = len(experiment_rows)
+
+        task_rows = [
+            {
+                "name": f"任务{i}",
+                "commands": [{"action": "run", "parameters": {}}],
+                "priority": TaskPriority.NORMAL,
+                "workstation_id": rng.randint(1, workstations),
+                "recipe_id": rng.randint(1, recipes),
+                "user_id": rng.randint(1, users),
+                "status": rng.choice(TASK_STATUSES),
+                "progress": round(rng.uniform(0, 100), 1),
+            }
+            for i in range(1, tasks + 1)
+        ]
+        for i in range(0, len(task_rows), BATCH_SIZE):
+            await conn.execute(insert(Task), task_rows[i : i + BATCH_SIZE])
+        info.tasks = tasks
+
+        if conn.dialect.name == "postgresql":
+            # 显式写入了ID，需要推进序列，压测中的新建请求才不会冲突
+            for table in ("users", "recipes"):
+                await conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', "
+                        f"'id'), (SELECT max(id) FROM {table}))"
+                    )
+                )
+
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        await rebuild_lineage(db)
+    await engine.dispose()
+    return info
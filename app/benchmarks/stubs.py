@@ -0,0 +1,136 @@
+"""压测用的桩服务（LLM、工站）
+
+只监听本机回环地址，返回固定格式的响应并模拟处理延迟，压测不依赖
+外部网络。LLM 桩兼容 OpenAI Chat Completions 接口，工站桩模拟任务
+下发、状态查询和心跳。
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+
+# 桩 LLM 返回的配方（JSON 字符串放在 message.content 中）
+CANNED_RECIPE = {
+    "name": "压测配方",
+    "description": "桩服务生成的配方",
+    "category": "benchmark",
+    "ingredients": [
+        {"name": "乙醇", "cas_number": "64-17-5", "amount": 50, "unit": "mL"},
+        {"name": "水", "cas_number": "7732-18-5", "amount": 100, "unit": "mL"},
+    ],
+    "procedures": [
+        {"step": 1, "action": "混合", "duration": 5},
+        {"step": 2, "action": "加热", "temperature": 60, "duration": 30},
+    ],
+    "parameters": {"temperature": 60, "ph": 7.0},
+}
+
+
+def _delay(mean: float, rng: random.Random) -> float:
+    """指数分布的处理延迟，模拟长尾"""
+    return rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+def create_llm_app(latency: float = 0.5, seed: int = 0) -> FastAPI:
+    """OpenAI 兼容的 LLM 桩服务"""
+    app = FastAPI(title="stub-llm")
+    rng = random.Random(seed)
+    ids = itertools.count(1)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: Dict[str, Any]):
+        await asyncio.sleep(_delay(latency, rng))
+        content = json.dumps(CANNED_RECIPE, ensure_ascii=False)
+        return {
+            "id": f"chatcmpl-{next(ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 200,
+                "completion_tokens": 300,
+                "total_tokens": 500,
+            },
+        }
+
+    return app
+
+
+def create_workstation_app(latency: float = 0.05, seed: int = 0) -> FastAPI:
+    """工站桩服务：任务按固定时长从 queued 推进到 completed"""
+    app = FastAPI(title="stub-workstation")
+    rng = random.Random(seed)
+    ids = itertools.count(1)
+    tasks: Dict[int, float] = {}
+    duration = 30.0
+
+    @app.get("/api/heartbeat")
+    async def heartbeat():
+        return {"status": "online", "current_tasks": len(tasks)}
+
+    @app.post("/api/tasks")
+    async def submit_task(body: Dict[str, Any]):
+        await asyncio.sleep(_delay(latency, rng))
+        task_id = next(ids)
+        tasks[task_id] = time.monotonic()
+        return {"task_id": task_id, "status": "queued"}
+
+    @app.get("/api/tasks/{task_id}")
+    async def task_status(task_id: int):
+        await asyncio.sleep(_delay(latency, rng))
+        started = tasks.get(task_id)
+        if started is None:
+            return {"task_id": task_id, "status": "unknown"}
+        progress = min(1.0, (time.monotonic() - started) / duration)
+        status = "completed" if progress >= 1 else "running"
+        return {"task_id": task_id, "status": status, "progress": progress}
+
+    return app
+
+
+class StubServer:
+    """在当前事件循环中运行的 uvicorn 服务，端口由系统分配"""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1"):
+        config = uvicorn.Config(
+            app, host=host, port=0, log_level="warning", lifespan="off"
+        )
+        self.server = uvicorn.Server(config)
+        self.host = host
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        sockets = self.server.servers[0].sockets
+        return f"http://{self.host}:{sockets[0].getsockname()[1]}"
+
+    async def start(self):
+        self._task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self._task.done():
+                # 启动失败时抛出原始异常
+                self._task.result()
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        if self._task is not None:
+            self.server.should_exit = True
+            await self._task
+            self._task = None
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import validator
 from pydantic_settings import BaseSettings as PydanticBaseSettings
 from pathlib import Path
@@ -26,6 +26,32 @@ class Settings(PydanticBaseSettings):
     database_password: str
     database_name: str
 
+    # 只读副本配置
+    database_replica_urls: List[str] = []  # 为空时只读会话也走主库
+    replica_retry_interval: float = 10.0  # 副本连接失败后暂停使用(秒)
+    replica_read_your_writes: float = 5.0  # 写入后读请求回主库的时长(秒)
+
+    # 数据库连接池配置
+    db_pool_size: int = 10  # 常驻连接数，<=0 时不使用连接池
+    db_max_overflow: int = 20  # 超出常驻连接数后最多再建的连接数
+    db_pool_timeout: float = 30.0  # 等待空闲连接的最长时间(秒)
+    db_pool_recycle: int = 300  # 连接最长存活时间(秒)，-1 为不回收
+    # 取出连接前的探活策略：always 每次探活，idle 只对空闲超过
+    # db_pool_ping_idle 秒的连接探活，never 不探活
+    db_pool_pre_ping: str = "idle"
+    db_pool_ping_idle: float = 30.0
+    db_statement_cache_size: int = 100  # asyncpg 预编译语句缓存条数
+    # 经 pgbouncer 事务池模式连接：关闭预编译语句缓存并使用唯一语句名
+    db_pgbouncer: bool = False
+
+    # 慢查询日志配置
+    slow_query_enabled: bool = True
+    slow_query_threshold_ms: float = 200.0  # 超过该耗时(毫秒)记为慢查询
+    slow_query_explain: bool = True  # 是否为慢 SELECT 采集执行计划
+    slow_query_explain_interval: float = 300.0  # 同一语句的采集间隔(秒)
+    slow_query_explain_timeout: float = 10.0  # 采集执行计划的语句超时(秒)
+    slow_query_max_fingerprints: int = 500  # 保留的语句指纹数
+
     # Redis配置
     redis_url: str = "redis://localhost:6379/0"
     redis_host: str = "localhost"
@@ -55,6 +81,155 @@ class Settings(PydanticBaseSettings):
     celery_broker_url: str = "redis://localhost:6379/1"
     celery_result_backend: str = "redis://localhost:6379/2"
 
+    # 计数器配置（浏览量/投票数写回缓冲）
+    counter_backend: str = "memory"  # memory 或 redis
+    counter_flush_interval: float = 5.0  # 刷写间隔(秒)，即崩溃时最大丢失窗口
+    counter_flush_batch_size: int = 1000
+
+    # 内存索引多进程同步配置（分面、全文、反馈聚类、评分汇总、查重）
+    index_catch_up_interval: float = 30.0  # 追赶其他进程写入的间隔(秒)
+    index_catch_up_lag: float = 300.0  # 追赶窗口向前多留的时间(秒)
+    index_delete_scan_interval: float = 3600.0  # 全量核对已删除记录的间隔(秒)
+
+    # 配方查重配置（MinHash/LSH）
+    dedup_threshold: float = 0.7  # 估计Jaccard相似度阈值
+    dedup_num_perm: int = 128
+    dedup_bands: int = 16
+    dedup_workers: int = 2  # 全量签名计算进程数（与请求共用主机）
+
+    # 配方分面索引配置
+    facet_snapshot_path: str = "./data/facets.snapshot"
+    facet_snapshot_interval: float = 300.0  # 快照写入间隔(秒)
+    facet_cache_size: int = 256  # 筛选结果缓存条数
+
+    # 全文检索配置
+    fulltext_index_dir: str = "./data/fulltext"
+    fulltext_flush_docs: int = 20000  # 内存段达到该文档数时写成磁盘段
+    fulltext_flush_interval: float = 60.0  # 落盘间隔(秒)
+    fulltext_max_segments: int = 8  # 磁盘段数上限，超出时合并
+    fulltext_bm25_k1: float = 1.2
+    fulltext_bm25_b: float = 0.75
+
+    # 反馈聚类配置
+    feedback_cluster_snapshot_path: str = "./data/feedback_clusters.snapshot"
+    feedback_cluster_snapshot_interval: float = 300.0  # 快照写入间隔(秒)
+    feedback_cluster_threshold: float = 0.6  # 归入簇的最低余弦相似度
+    feedback_cluster_dim: int = 256  # 特征哈希维度（2的幂）
+    feedback_cluster_bands: int = 20  # LSH 分组数
+    feedback_cluster_rows: int = 10  # 每组超平面数
+    feedback_cluster_workers: int = 2  # 全量聚类进程数（与请求共用主机）
+
+    # 反馈评分汇总配置
+    feedback_rollup_snapshot_path: str = "./data/feedback_rollups.snapshot"
+    feedback_rollup_snapshot_interval: float = 300.0  # 快照写入间隔(秒)
+    feedback_rollup_timezone: str = "Asia/Shanghai"  # 按该时区划分自然日
+
+    # 实验报表快照配置
+    experiment_report_snapshot_dir: str = "./data/experiment_snapshots"
+    experiment_report_export_interval: float = 60.0  # 增量导出间隔(秒)
+    experiment_report_timezone: str = "Asia/Shanghai"  # 按该时区划分月份
+    experiment_report_cache: bool = True  # 在内存中缓存解码后的分区
+
+    # 附件存储配置
+    attachment_dir: str = "./data/attachments"
+    attachment_max_bytes: int = 2 * 1024**3  # 单个附件上限(字节)
+    attachment_gc_grace: float = 86400.0  # 无引用附件的保留期(秒)
+    attachment_gc_interval: float = 3600.0  # 垃圾回收间隔(秒)，0 表示不启动
+    attachment_fsync: bool = True  # 上传完成时 fsync 后再放入存储
+    # 部署在 nginx 后时设置 internal location 前缀（如 /_attachments/），
+    # 下载改由 X-Accel-Redirect 交给 nginx 发送
+    attachment_accel_redirect: Optional[str] = None
+
+    # 配方优化配置
+    optimizer_num_candidates: int = 8192  # 每轮候选点数量
+    optimizer_num_features: int = 512  # 代理模型随机特征维度
+    optimizer_max_experiments: int = 5000  # 使用的最近实验条数上限
+    optimizer_workers: Optional[int] = None  # 候选打分线程数，默认CPU核数
+
+    # 试验设计配置
+    doe_max_variants: int = 10000  # 单次生成的最大试验点数
+
+    # 进程池卸载配置（CPU密集任务）
+    offload_pools: Dict[str, int] = {"default": 2, "optimization": 1}
+    offload_max_queue: int = 32  # 每个池在运行任务之外最多排队的任务数
+    offload_start_method: str = "spawn"
+    offload_shared_min_bytes: int = 1048576  # 不小于该大小的数组经共享内存回传
+
+    # 后台任务配置
+    job_backend: str = "local"  # local（进程内SQLite队列）或 celery
+    job_local_db_path: str = "./data/jobs.sqlite3"  # :memory: 时不落盘
+    job_local_concurrency: int = 2  # 进程内队列同时执行的任务数
+    job_poll_interval: float = 1.0  # 进程内队列轮询间隔(秒)
+    job_result_ttl: float = 604800  # 任务记录和结果保留时间(秒)
+    job_lease: float = 60.0  # 进程内队列运行中任务的租约(秒)，过期后重新排队
+
+    # 读穿缓存配置（按ID读取配方/用户/实验）
+    cache_enabled: bool = True
+    cache_ttl: int = 300  # Redis缓存TTL(秒)
+    cache_ttl_jitter: float = 0.1  # TTL随机抖动比例
+    cache_local_size: int = 10000  # 进程内LRU条数
+    cache_local_ttl: float = 30.0  # 进程内缓存TTL(秒)
+    cache_negative_ttl: int = 2  # 不存在的ID的缓存时间(秒)
+
+    # 响应编码配置（MessagePack/Arrow 内容协商）
+    response_compress_min_bytes: int = 4096  # 超过该大小才压缩
+    response_gzip_level: int = 5
+    response_zstd_level: int = 3
+
+    # 准入控制配置（昂贵接口的限流、并发预算和过载保护）
+    admission_enabled: bool = True
+    admission_backend: str = "memory"  # memory 或 redis（多进程共享）
+    # 接口类别 -> 同时执行的请求数
+    admission_concurrency: Dict[str, int] = {
+        "llm": 4,
+        "optimization": 2,
+        "export": 4,
+    }
+    # 接口类别 -> 每次请求消耗的令牌数
+    admission_cost: Dict[str, float] = {
+        "llm": 5.0,
+        "optimization": 3.0,
+        "export": 1.0,
+    }
+    # 角色 -> [每秒令牌数, 桶容量]；user 为每个用户，role 为整个角色共享
+    admission_user_rates: Dict[str, List[float]] = {
+        "admin": [2.0, 60],
+        "expert": [1.0, 30],
+        "user": [0.5, 15],
+        "anonymous": [0.1, 5],
+    }
+    admission_role_rates: Dict[str, List[float]] = {
+        "admin": [20.0, 200],
+        "expert": [10.0, 100],
+        "user": [10.0, 100],
+        "anonymous": [1.0, 10],
+    }
+    # 角色 -> 排队优先级，数值越小越优先
+    admission_priorities: Dict[str, int] = {
+        "admin": 0,
+        "expert": 1,
+        "user": 2,
+        "anonymous": 3,
+    }
+    admission_queue_target: float = 2.0  # 排队等待目标(秒)，超过即返回503
+    admission_max_queue: int = 100  # 每个类别的最大排队数
+    admission_lease_ttl: float = 600  # redis 模式并发租约过期时间(秒)
+
+    # 请求截止时间配置（可由请求头 X-Request-Timeout 缩短或延长）
+    request_timeout: float = 30.0  # 默认截止时间(秒)，0 表示不限
+    request_timeout_max: float = 300.0  # 请求头可指定的上限(秒)
+    # 路径通配符 -> 截止时间(秒)，按顺序匹配，优先于默认值
+    request_timeout_routes: Dict[str, float] = {
+        "/api/v1/recipes/optimize": 120.0,
+        "/api/v1/recipes/*/doe": 60.0,
+        "/api/v1/experiments/measurements": 60.0,
+        "/api/v1/*/batch": 120.0,
+        "/api/v1/attachments*": 0.0,
+    }
+
+    # 批量写入配置
+    batch_max_items: int = 5000  # 单次批量请求的最大条数
+
     # CORS配置
     allowed_hosts: List[str] = ["*"]
     allowed_origins: List[str] = ["*"]
@@ -0,0 +1 @@
+# 核心功能模块
@@ -0,0 +1,5 @@
+"""列式分析快照（依赖可选的 pyarrow）"""
+
+from .snapshot import ColumnarSnapshot
+
+__all__ = ["ColumnarSnapshot"]
@@ -0,0 +1,352 @@
+"""按分区组织的 Parquet 列式快照
+
+每个分区（如月份）对应一个 Parquet 文件：
+- 增量导出时变更行按主键替换旧行，只重写受影响的分区，其余分区的
+  文件原样保留
+- manifest.json 记录当前一代的分区文件和水位线；分区文件先写临时
+  文件再改名，全部写完后原子替换清单，上一代的文件留到下一次导出时
+  再删除，正在读取旧清单的查询不会读到一半被删掉的文件
+- 多个进程共享同一目录：写入在根目录 .lock 文件的排他 flock 内进行，
+  加锁后先重新读取清单，因此不会基于过期的清单覆盖其他进程的导出；
+  只读的进程在查询前发现清单被替换时重新读取
+- 查询按分区表达式裁剪文件，再用 Arrow 的向量化执行引擎过滤和分组
+  聚合，全程在进程内完成；默认把解码后的分区缓存在内存中（按文件名，
+  分区被重写后自然失效），不缓存时谓词下推到 Parquet 行组
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+MANIFEST_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+class ColumnarSnapshot:
+    """以 key 为主键、按 partition 列分区的 Parquet 快照"""
+
+    def __init__(
+        self,
+        root: str,
+        schema: pa.Schema,
+        key: str = "id",
+        partition: str = "month",
+        compression: str = "zstd",
+        cache: bool = True,
+    ):
+        self.root = root
+        self.schema = schema
+        self.key = key
+        self.partition = partition
+        self.compression = compression
+        self.cache = cache
+        self.generation = 0
+        self.watermark: Optional[str] = None
+        # 分区值 -> 当前文件名（相对 root）
+        self.partitions: Dict[str, str] = {}
+        self._obsolete: List[str] = []
+        # 文件名 -> 主键数组，判断删除和跨分区移动的行落在哪些分区
+        self._keys: Dict[str, np.ndarray] = {}
+        # 文件名 -> 解码后的分区表
+        self._tables: Dict[str, pa.Table] = {}
+        self._dataset: Optional[ds.Dataset] = None
+        # 已读取的清单文件标识，用于发现其他进程的导出
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        # 跨进程写锁在本对象内可重入（apply 在 writing() 内调用时不重复加锁）
+        self._write_mutex = threading.RLock()
+        self._write_depth = 0
+        self._load_manifest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _manifest_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._path(MANIFEST))
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load_manifest(self):
+        self.generation = 0
+        self.watermark = None
+        self.partitions = {}
+        self._obsolete = []
+        self._stamp = self._manifest_stamp()
+        if self._stamp is None:
+            return
+        with open(self._path(MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 版本或列不一致时视为空快照，下一次导出全量重建
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get(
+            "columns"
+        ) != list(self.schema.names):
+            self._obsolete = list(manifest.get("partitions", {}).values())
+            return
+        self.generation = manifest["generation"]
+        self.watermark = manifest["watermark"]
+        self.partitions = manifest["partitions"]
+        self._obsolete = manifest.get("obsolete", [])
+
+    def _write_manifest(self):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "columns": list(self.schema.names),
+            "generation": self.generation,
+            "watermark": self.watermark,
+            "partitions": self.partitions,
+            "obsolete": self._obsolete,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self._path(MANIFEST))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._stamp = self._manifest_stamp()
+
+    def _write_table(self, table: pa.Table, name: str):
+        """写分区文件：先写临时文件再改名，读者不会看到写了一半的文件"""
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            pq.write_table(table, tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def refresh(self) -> bool:
+        """清单被其他进程替换后重新读取，返回是否有变化"""
+        with self._lock:
+            if self._manifest_stamp() == self._stamp:
+                return False
+            self._load_manifest()
+            current = set(self.partitions.values())
+            for cache in (self._keys, self._tables):
+                for name in [name for name in cache if name not in current]:
+                    del cache[name]
+            self._dataset = None
+        return True
+
+    @contextmanager
+    def writing(self):
+        """跨进程独占写入（同步）
+
+        持有根目录 .lock 文件的排他锁并重新读取清单；读取水位线、查询
+        变更到 apply 都应在其中完成，其他进程的导出不会与之交错。
+        """
+        with self._write_mutex:
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield
+                finally:
+                    self._write_depth -= 1
+                return
+            os.makedirs(self.root, exist_ok=True)
+            fd = os.open(self._path(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                self._write_depth = 1
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    self._write_depth = 0
+            finally:
+                # 关闭文件描述符即释放锁
+                os.close(fd)
+
+    def _partition_keys(self, name: str) -> np.ndarray:
+        keys = self._keys.get(name)
+        if keys is None:
+            column = pq.read_table(self._path(name), columns=[self.key])
+            keys = column[self.key].to_numpy()
+            self._keys[name] = keys
+        return keys
+
+    def _read(self, name: str) -> pa.Table:
+        table = self._tables.get(name)
+        if table is None:
+            table = pq.read_table(self._path(name))
+            # 已被替换的旧文件（查询持有上一代数据集时）不进缓存
+            if self.cache and name in self.partitions.values():
+                self._tables[name] = table
+        return table
+
+    def keys(self) -> np.ndarray:
+        """快照中全部主键"""
+        with self._lock:
+            arrays = [
+                self._partition_keys(name)
+                for name in self.partitions.values()
+            ]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(arrays)
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    @property
+    def ready(self) -> bool:
+        """是否已完成过至少一次导出"""
+        return os.path.exists(self._path(MANIFEST))
+
+    def apply(
+        self,
+        changed: pa.Table,
+        deleted: Sequence[int] = (),
+        watermark: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """写入变更行（按主键覆盖）并删除 deleted 中的主键"""
+        changed = changed.cast(self.schema)
+        changed_keys = changed[self.key].to_numpy()
+        removed = np.union1d(changed_keys, np.asarray(deleted, np.int64))
+        new_parts = pc.unique(changed[self.partition]).to_pylist()
+
+        with self.writing(), self._lock:
+            for name in self._obsolete:
+                if os.path.exists(self._path(name)):
+                    os.unlink(self._path(name))
+            self._obsolete = []
+
+            affected = set(new_parts)
+            for value, name in self.partitions.items():
+                if np.isin(self._partition_keys(name), removed).any():
+                    affected.add(value)
+            if not affected:
+                if watermark is not None:
+                    self.watermark = watermark
+                self._write_manifest()
+                return {
+                    "changed": 0,
+                    "deleted": 0,
+                    "partitions_rewritten": 0,
+                    "rows_rewritten": 0,
+                }
+
+            generation = self.generation + 1
+            partitions = dict(self.partitions)
+            obsolete = []
+            rows = 0
+            for value in sorted(affected, key=str):
+                parts = []
+                old_name = partitions.pop(value, None)
+                if old_name is not None:
+                    old = self._read(old_name)
+                    keep = pc.invert(
+                        pc.is_in(old[self.key], pa.array(removed))
+                    )
+                    parts.append(old.filter(keep))
+                    obsolete.append(old_name)
+                parts.append(
+                    changed.filter(pc.field(self.partition) == value)
+                )
+                table = pa.concat_tables(parts).sort_by(self.key)
+                if not len(table):
+                    continue
+                name = os.path.join(
+                    f"{self.partition}={value}",
+                    f"part-{generation:08d}.parquet",
+                )
+                self._write_table(table, name)
+                partitions[value] = name
+                self._keys[name] = table[self.key].to_numpy()
+                if self.cache:
+                    self._tables[name] = table
+                rows += len(table)
+
+            self.generation = generation
+            self.partitions = partitions
+            self._obsolete = obsolete
+            if watermark is not None:
+                self.watermark = watermark
+            self._write_manifest()
+            for name in obsolete:
+                self._keys.pop(name, None)
+                self._tables.pop(name, None)
+            self._dataset = None
+        return {
+            "changed": len(changed),
+            "deleted": len(deleted),
+            "partitions_rewritten": len(affected),
+            "rows_rewritten": rows,
+        }
+
+    def dataset(self) -> ds.Dataset:
+        """当前一代快照的数据集，每个文件带有分区表达式用于裁剪"""
+        with self._lock:
+            if self._dataset is None:
+                items = sorted(self.partitions.items())
+                self._dataset = ds.FileSystemDataset.from_paths(
+                    [self._path(name) for _, name in items],
+                    schema=self.schema,
+                    format=ds.ParquetFileFormat(),
+                    filesystem=pafs.LocalFileSystem(),
+                    partitions=[
+                        pc.field(self.partition) == value for value, _ in items
+                    ],
+                )
+            return self._dataset
+
+    def query(
+        self,
+        group_by: Sequence[str] = (),
+        aggregations: Sequence[Tuple[str, str]] = (),
+        where: Optional[pc.Expression] = None,
+    ) -> pa.Table:
+        """过滤后按 group_by 分组，aggregations 为 (列, 聚合函数)
+
+        结果列名为 <列>_<聚合函数>，分组按键升序排列。
+        """
+        columns = list(
+            dict.fromkeys([*group_by, *(column for column, _ in aggregations)])
+        )
+        tables = []
+        for fragment in self.dataset().get_fragments(filter=where):
+            if self.cache:
+                table = self._read(os.path.relpath(fragment.path, self.root))
+                if where is not None:
+                    table = table.filter(where)
+                table = table.select(columns)
+            else:
+                table = fragment.to_table(columns=columns, filter=where)
+            tables.append(table)
+        if tables:
+            table = pa.concat_tables(tables)
+        else:
+            table = self.schema.empty_table().select(columns)
+        result = table.group_by(list(group_by)).aggregate(list(aggregations))
+        if group_by:
+            result = result.sort_by([(key, "ascending") for key in group_by])
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = [self._path(name) for name in self.partitions.values()]
+        return {
+            "generation": self.generation,
+            "watermark": self.watermark,
+            "partitions": len(files),
+            "rows": len(self),
+            "bytes": sum(os.path.getsize(path) for path in files),
+        }
@@ -0,0 +1,5 @@
+"""按内容寻址的附件存储"""
+
+from .store import BlobStore, BlobTooLarge, PendingBlob
+
+__all__ = ["BlobStore", "BlobTooLarge", "PendingBlob"]
@@ -0,0 +1,176 @@
+"""按内容寻址的本地磁盘附件存储
+
+- 对象按 SHA-256 存放在 objects/ab/cd/<sha256>，内容相同的文件只存一份
+- 上传流式写入 tmp/ 下的临时文件，边写边计算摘要，内存中只有一个写
+  缓冲区，与文件大小无关；写完 fsync 后原子改名为对象文件
+- 存储目录上的 flock 锁协调上传和垃圾回收：上传在“登记元数据并放入
+  对象”期间持共享锁，回收删除对象时持排他锁，避免刚登记的对象被删
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobTooLarge(Exception):
+    """上传内容超过大小上限"""
+
+
+@dataclass
+class PendingBlob:
+    """已写入临时文件、尚未放入对象目录的上传内容"""
+
+    tmp_path: str
+    sha256: str
+    size: int
+
+
+class BlobStore:
+    """本地磁盘上的内容寻址对象存储"""
+
+    def __init__(
+        self,
+        root: str,
+        buffer_size: int = 1 << 20,
+        fsync: bool = True,
+    ):
+        self.root = root
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.lock_path = os.path.join(root, ".lock")
+
+    @staticmethod
+    def valid(digest: str) -> bool:
+        return bool(DIGEST_RE.match(digest))
+
+    def relpath(self, digest: str) -> str:
+        """对象相对 root 的路径"""
+        if not self.valid(digest):
+            raise ValueError(f"无效的 SHA-256: {digest}")
+        return os.path.join("objects", digest[:2], digest[2:4], digest)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, self.relpath(digest))
+
+    def exists(self, digest: str) -> bool:
+        return self.valid(digest) and os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(digest))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, f, sha, data: bytearray):
+        sha.update(data)
+        f.write(data)
+
+    def _finish(self, f):
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        f.close()
+
+    async def receive(
+        self,
+        chunks: AsyncIterator[bytes],
+        max_size: Optional[int] = None,
+    ) -> PendingBlob:
+        """把分块到达的内容写入临时文件并计算 SHA-256
+
+        缓冲区满时在线程中写盘和计算摘要，不阻塞事件循环。超过
+        max_size 时删除临时文件并抛出 BlobTooLarge。
+        """
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        f = os.fdopen(fd, "wb", buffering=0)
+        sha = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise BlobTooLarge(f"附件超过 {max_size} 字节上限")
+                buffer += chunk
+                if len(buffer) >= self.buffer_size:
+                    data, buffer = buffer, bytearray()
+                    await asyncio.to_thread(self._write, f, sha, data)
+            if buffer:
+                await asyncio.to_thread(self._write, f, sha, buffer)
+            await asyncio.to_thread(self._finish, f)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+        return PendingBlob(tmp_path, sha.hexdigest(), size)
+
+    def commit(self, pending: PendingBlob) -> bool:
+        """把临时文件放入对象目录，返回是否新增（内容已存在时丢弃）"""
+        path = self.path(pending.sha256)
+        if os.path.exists(path):
+            self.discard(pending)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(pending.tmp_path, path)
+        return True
+
+    def discard(self, pending: PendingBlob):
+        if os.path.exists(pending.tmp_path):
+            os.unlink(pending.tmp_path)
+
+    def delete(self, digest: str) -> bool:
+        try:
+            os.unlink(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def sweep_tmp(self, max_age: float) -> int:
+        """删除超过 max_age 秒未修改的临时文件（中断的上传）"""
+        if not os.path.isdir(self.tmp_dir):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for entry in os.scandir(self.tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    @contextmanager
+    def locked(self, exclusive: bool = False):
+        """跨进程的存储锁（同步）"""
+        os.makedirs(self.root, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            # 关闭文件描述符即释放锁
+            os.close(fd)
+
+    @asynccontextmanager
+    async def shared(self):
+        """共享存储锁（异步），在线程中等待排他锁释放"""
+        os.makedirs(self.root, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
@@ -0,0 +1,7 @@
+"""文本聚类（特征哈希 TF-IDF + 随机超平面 LSH）"""
+
+from .batch import recluster
+from .index import ClusterIndex
+from .vectorizer import TextVectorizer, hash_terms
+
+__all__ = ["ClusterIndex", "TextVectorizer", "hash_terms", "recluster"]
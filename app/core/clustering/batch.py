@@ -0,0 +1,122 @@
+"""全量重聚类
+
+分两遍读取文本，分词和向量化按块分发到进程池以利用全部 CPU 核心：
+1. 统计分桶文档频率
+2. 用全局 idf 计算向量（以 float16 传回主进程，同时在途的块数有上限）
+
+主进程再按文档ID顺序把向量逐条归入 ClusterIndex，与增量归簇使用
+同一套质心 + LSH 规则，单条只需比较候选簇，代价与文档总数无关。
+直接对相似配对求连通分量会把相近的不同问题串成一个大簇，因此不采用。
+
+进程池默认用 spawn 启动：调用方通常是 API 进程中的线程，fork 多线程
+进程可能继承其他线程持有的锁（日志、连接池）而死锁。
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from core.fulltext import term_counts
+
+from .index import ClusterIndex
+from .vectorizer import TextVectorizer, document_frequency, hash_terms
+
+# 一块文档：(文档ID列表, 每篇文档的文本字段)
+Chunk = Tuple[List[int], List[Sequence[Optional[str]]]]
+
+# 子进程内复用的向量化器（含 idf），避免每个块都重新传输
+_worker_vectorizer: Optional[TextVectorizer] = None
+
+
+def _df_chunk(texts: List[Sequence[Optional[str]]]) -> np.ndarray:
+    return document_frequency(
+        hash_terms(term_counts(*fields))[0] for fields in texts
+    )
+
+
+def _init_worker(dim: int, df: np.ndarray, n_docs: int):
+    global _worker_vectorizer
+    _worker_vectorizer = TextVectorizer(dim)
+    _worker_vectorizer.df = df
+    _worker_vectorizer.n_docs = n_docs
+
+
+def _vector_chunk(texts: List[Sequence[Optional[str]]]) -> np.ndarray:
+    vectors = _worker_vectorizer.transform_many(
+        [term_counts(*fields) for fields in texts]
+    )
+    return vectors.astype(np.float16)
+
+
+def _imap(
+    fn,
+    chunks: Iterable[Chunk],
+    workers: int,
+    initargs=None,
+    start_method: str = "spawn",
+):
+    """按块执行 fn，按输入顺序产出 (文档ID列表, 结果)"""
+    if workers == 1:
+        if initargs is not None:
+            _init_worker(*initargs)
+        for chunk_ids, texts in chunks:
+            yield chunk_ids, fn(texts)
+        return
+
+    kwargs = {"mp_context": multiprocessing.get_context(start_method)}
+    if initargs is not None:
+        kwargs.update(initializer=_init_worker, initargs=initargs)
+    with ProcessPoolExecutor(max_workers=workers, **kwargs) as pool:
+        # 限制同时在途的块数，内存占用与文档总数无关
+        pending: Deque = deque()
+        try:
+            for chunk_ids, texts in chunks:
+                pending.append((chunk_ids, pool.submit(fn, texts)))
+                if len(pending) >= workers * 2:
+                    chunk_ids, future = pending.popleft()
+                    yield chunk_ids, future.result()
+            for chunk_ids, future in pending:
+                yield chunk_ids, future.result()
+        except BaseException:
+            # 取消或出错时撤销尚未开始的块
+            pool.shutdown(cancel_futures=True)
+            raise
+
+
+def recluster(
+    load_chunks: Callable[[], Iterable[Chunk]],
+    workers: Optional[int] = None,
+    start_method: str = "spawn",
+    **config,
+) -> ClusterIndex:
+    """全量聚类，load_chunks 每次调用都从头产出全部文档"""
+    workers = workers or os.cpu_count() or 1
+    index = ClusterIndex(**config)
+    vectorizer = index.vectorizer
+
+    for chunk_ids, df in _imap(
+        _df_chunk, load_chunks(), workers, start_method=start_method
+    ):
+        vectorizer.df += df
+        vectorizer.n_docs += len(chunk_ids)
+
+    initargs = (vectorizer.dim, vectorizer.df, vectorizer.n_docs)
+    chunks = _imap(
+        _vector_chunk, load_chunks(), workers, initargs, start_method
+    )
+    for chunk_ids, vectors in chunks:
+        for doc_id, vector in zip(chunk_ids, vectors):
+            index.assign(doc_id, vector.astype(np.float32))
+    return index
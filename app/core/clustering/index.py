@@ -0,0 +1,258 @@
+"""增量聚类索引
+
+每个簇保存成员向量之和（质心方向），质心按随机超平面 LSH 分桶：
+``bands`` 组超平面，每组 ``rows`` 个，投影符号拼成该组的桶键。新文档
+只与至少一组桶键相同的簇比较余弦相似度，最相似且不低于阈值的簇
+接收它，否则自成新簇。簇吸收成员后重新计算桶键。
+
+成员被删除或改写时只减少簇的计数，质心保留其贡献，直到下一次全量
+重聚类；计数归零的簇从桶中移除。
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .vectorizer import TextVectorizer
+
+SNAPSHOT_VERSION = 1
+
+
+class ClusterIndex:
+    """基于质心和随机超平面 LSH 的增量聚类"""
+
+    def __init__(
+        self,
+        dim: int = 256,
+        threshold: float = 0.6,
+        bands: int = 20,
+        rows: int = 10,
+        seed: int = 7,
+    ):
+        if not 0 < rows <= 15:
+            raise ValueError("rows 必须在 1~15 之间")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        self.vectorizer = TextVectorizer(dim)
+        self.watermark: Optional[datetime] = None
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((dim, bands * rows)).astype(
+            np.float32
+        )
+        self._bit_weights = (1 << np.arange(rows)).astype(np.int16)
+        self.sums = np.zeros((64, dim), dtype=np.float32)
+        self.counts = np.zeros(64, dtype=np.int32)
+        self.keys = np.full((64, bands), -1, dtype=np.int16)
+        self.n_clusters = 0
+        self.cluster_of = np.full(1024, -1, dtype=np.int32)
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:
+        return self.vectorizer.dim
+
+    def __len__(self) -> int:
+        return int((self.cluster_of >= 0).sum())
+
+    def band_keys(self, vectors: np.ndarray) -> np.ndarray:
+        """向量（或质心和）的各组桶键，形状 (n, bands)"""
+        bits = (vectors @ self.planes > 0).reshape(-1, self.bands, self.rows)
+        return (bits * self._bit_weights).sum(axis=2, dtype=np.int16)
+
+    def _grow_items(self, item_id: int):
+        size = len(self.cluster_of)
+        if item_id < size:
+            return
+        while size <= item_id:
+            size *= 2
+        cluster_of = np.full(size, -1, dtype=np.int32)
+        cluster_of[: len(self.cluster_of)] = self.cluster_of
+        self.cluster_of = cluster_of
+
+    def _new_cluster(self) -> int:
+        if self.n_clusters == len(self.counts):
+            size = len(self.counts) * 2
+            sums = np.zeros((size, self.dim), dtype=np.float32)
+            sums[: self.n_clusters] = self.sums
+            counts = np.zeros(size, dtype=np.int32)
+            counts[: self.n_clusters] = self.counts
+            keys = np.full((size, self.bands), -1, dtype=np.int16)
+            keys[: self.n_clusters] = self.keys
+            self.sums, self.counts, self.keys = sums, counts, keys
+        cluster = self.n_clusters
+        self.n_clusters += 1
+        return cluster
+
+    def _rekey(self, cluster: int):
+        old = self.keys[cluster]
+        new = self.band_keys(self.sums[cluster])[0]
+        for band in np.flatnonzero(old != new):
+            buckets = self._buckets[band]
+            if old[band] >= 0:
+                buckets[int(old[band])].discard(cluster)
+            buckets.setdefault(int(new[band]), set()).add(cluster)
+        self.keys[cluster] = new
+
+    def _unbucket(self, cluster: int):
+        for band, key in enumerate(self.keys[cluster]):
+            if key >= 0:
+                self._buckets[band][int(key)].discard(cluster)
+        self.keys[cluster] = -1
+
+    def _detach(self, item_id: int):
+        """把文档从所在簇中去掉（调用方持锁）"""
+        if item_id >= len(self.cluster_of):
+            return
+        cluster = self.cluster_of[item_id]
+        if cluster < 0:
+            return
+        self.cluster_of[item_id] = -1
+        self.counts[cluster] -= 1
+        if not self.counts[cluster]:
+            self._unbucket(cluster)
+            self.sums[cluster] = 0
+
+    def nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        """相似度最高的候选簇，没有候选时返回 (-1, 0.0)"""
+        keys = self.band_keys(vector)[0]
+        candidates: Set[int] = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(int(key), ()))
+        if not candidates:
+            return -1, 0.0
+        clusters = np.fromiter(
+            candidates, dtype=np.int64, count=len(candidates)
+        )
+        sums = self.sums[clusters]
+        norms = np.linalg.norm(sums, axis=1)
+        sims = sums @ vector / np.maximum(norms, 1e-12)
+        best = int(np.argmax(sims))
+        return int(clusters[best]), float(sims[best])
+
+    def assign(self, item_id: int, vector: np.ndarray) -> int:
+        """把文档放入最相似的簇或新建簇，零向量不参与聚类，返回簇编号"""
+        with self._lock:
+            self._detach(item_id)
+            if not vector.any():
+                return -1
+            cluster, similarity = self.nearest(vector)
+            if cluster < 0 or similarity < self.threshold:
+                cluster = self._new_cluster()
+            self._grow_items(item_id)
+            self.sums[cluster] += vector
+            self.counts[cluster] += 1
+            self.cluster_of[item_id] = cluster
+            self._rekey(cluster)
+            return cluster
+
+    def remove(self, item_id: int):
+        with self._lock:
+            self._detach(item_id)
+
+    def cluster(self, item_id: int) -> int:
+        if item_id >= len(self.cluster_of):
+            return -1
+        return int(self.cluster_of[item_id])
+
+    def members(self, cluster: int) -> np.ndarray:
+        return np.flatnonzero(self.cluster_of == cluster)
+
+    def labels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """已聚类文档的 (ID, 簇编号)"""
+        with self._lock:
+            ids = np.flatnonzero(self.cluster_of >= 0)
+            return ids, self.cluster_of[ids].copy()
+
+    def _bucket_all(self):
+        """按 keys 重建全部桶"""
+        live = np.flatnonzero(self.counts[: self.n_clusters] > 0)
+        self._buckets = []
+        for band in range(self.bands):
+            column = self.keys[live, band]
+            order = np.argsort(column, kind="stable")
+            values, starts = np.unique(column[order], return_index=True)
+            groups = np.split(live[order], starts[1:])
+            self._buckets.append(
+                {
+                    int(key): set(group.tolist())
+                    for key, group in zip(values, groups)
+                }
+            )
+
+    def save(self, path: str):
+        """原子地把索引快照写入磁盘"""
+        with self._lock:
+            n = self.n_clusters
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "config": {
+                    "dim": self.dim,
+                    "threshold": self.threshold,
+                    "bands": self.bands,
+                    "rows": self.rows,
+                    "seed": self.seed,
+                },
+                "watermark": self.watermark,
+                "sums": self.sums[:n].copy(),
+                "counts": self.counts[:n].copy(),
+                "keys": self.keys[:n].copy(),
+                "cluster_of": self.cluster_of.copy(),
+                "df": self.vectorizer.df.copy(),
+                "n_docs": self.vectorizer.n_docs,
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, **config) -> Optional["ClusterIndex"]:
+        """从快照恢复，版本或配置不匹配时返回 None"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != SNAPSHOT_VERSION:
+            return None
+        saved = state["config"]
+        if any(saved.get(key) != value for key, value in config.items()):
+            return None
+        index = cls(**saved)
+        n = len(state["counts"])
+        size = max(64, n)
+        index.sums = np.zeros((size, index.dim), dtype=np.float32)
+        index.sums[:n] = state["sums"]
+        index.counts = np.zeros(size, dtype=np.int32)
+        index.counts[:n] = state["counts"]
+        index.keys = np.full((size, index.bands), -1, dtype=np.int16)
+        index.keys[:n] = state["keys"]
+        index.n_clusters = n
+        index.cluster_of = state["cluster_of"]
+        index.vectorizer.df = state["df"]
+        index.vectorizer.n_docs = state["n_docs"]
+        index.watermark = state["watermark"]
+        index._bucket_all()
+        return index
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = self.counts[: self.n_clusters]
+            return {
+                "documents": int((self.cluster_of >= 0).sum()),
+                "clusters": int((counts > 0).sum()),
+                "multi_member_clusters": int((counts > 1).sum()),
+                "largest": int(counts.max()) if len(counts) else 0,
+            }
@@ -0,0 +1,81 @@
+"""文本向量化（特征哈希 TF-IDF）
+
+分词复用全文检索的分词器。每个词项取 crc32 哈希：
+- 低 20 位作为文档频率桶，文档频率按桶累加，不需要维护词表，
+  新文档到来时可以增量更新
+- 第 20 位起的若干位决定落在 ``dim`` 维中的哪一维，最高位决定符号
+  （带符号哈希使碰撞的词项在期望上互相抵消）
+
+权重为 (1 + log tf) × idf，最后做 L2 归一化，余弦相似度即点积。
+"""
+
+import zlib
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+DF_BUCKETS = 1 << 20
+_DF_MASK = np.uint32(DF_BUCKETS - 1)
+_SLOT_SHIFT = np.uint32(20)
+_SIGN_SHIFT = np.uint32(31)
+MAX_DIM = 1024  # 维度位（20~29）不能与符号位重叠
+
+
+def hash_terms(counts: Counter) -> Tuple[np.ndarray, np.ndarray]:
+    """返回 (词项哈希, 词频)"""
+    hashes = np.fromiter(
+        (zlib.crc32(term.encode("utf-8")) for term in counts),
+        dtype=np.uint32,
+        count=len(counts),
+    )
+    tfs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return hashes, tfs
+
+
+def document_frequency(hash_lists: Iterable[np.ndarray]) -> np.ndarray:
+    """一批文档的分桶文档频率"""
+    buckets = [np.unique(hashes & _DF_MASK) for hashes in hash_lists]
+    if not buckets:
+        return np.zeros(DF_BUCKETS, dtype=np.uint32)
+    return np.bincount(
+        np.concatenate(buckets), minlength=DF_BUCKETS
+    ).astype(np.uint32)
+
+
+class TextVectorizer:
+    """特征哈希 TF-IDF 向量化器"""
+
+    def __init__(self, dim: int = 256):
+        if dim <= 0 or dim > MAX_DIM or dim & (dim - 1):
+            raise ValueError(f"dim 必须是不超过 {MAX_DIM} 的 2 的幂")
+        self.dim = dim
+        self.df = np.zeros(DF_BUCKETS, dtype=np.uint32)
+        self.n_docs = 0
+
+    def observe(self, hashes: np.ndarray):
+        """把一篇新文档计入文档频率"""
+        self.df[np.unique(hashes & _DF_MASK)] += 1
+        self.n_docs += 1
+
+    def transform(self, hashes: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        """单篇文档的归一化向量，空文档为零向量"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not len(hashes):
+            return vector
+        df = self.df[hashes & _DF_MASK].astype(np.float32)
+        idf = np.log((self.n_docs + 1) / (df + 1)) + 1
+        weights = (1 + np.log(tfs)) * idf
+        weights[(hashes >> _SIGN_SHIFT) == 1] *= -1
+        slots = (hashes >> _SLOT_SHIFT) & np.uint32(self.dim - 1)
+        vector += np.bincount(slots, weights, minlength=self.dim)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def transform_many(self, counts_list: List[Counter]) -> np.ndarray:
+        vectors = np.zeros((len(counts_list), self.dim), dtype=np.float32)
+        for row, counts in enumerate(counts_list):
+            vectors[row] = self.transform(*hash_terms(counts))
+        return vectors
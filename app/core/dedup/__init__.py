@@ -0,0 +1,14 @@
+"""配方近似重复检测"""
+
+from .cluster import cluster_signatures, compute_signatures
+from .lsh import LSHIndex
+from .minhash import MinHasher, estimate_jaccard, recipe_shingles
+
+__all__ = [
+    "LSHIndex",
+    "MinHasher",
+    "cluster_signatures",
+    "compute_signatures",
+    "estimate_jaccard",
+    "recipe_shingles",
+]
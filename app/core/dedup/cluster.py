@@ -0,0 +1,135 @@
+"""全量配方近似重复聚类
+
+签名计算按块分发到进程池以利用全部 CPU 核心；主进程构建 LSH 索引，
+对每个桶内成员与桶代表做向量化的相似度校验，再用并查集合并成簇。
+进程池默认用 spawn 启动，避免在 API 进程的线程中 fork 多线程进程。
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .lsh import LSHIndex
+from .minhash import MinHasher, estimate_jaccard
+
+# 子进程内复用的签名器，避免每个块都重新生成随机系数
+_worker_hasher: Optional[MinHasher] = None
+
+
+def _init_worker(num_perm: int, seed: int):
+    global _worker_hasher
+    _worker_hasher = MinHasher(num_perm=num_perm, seed=seed)
+
+
+def _signature_chunk(recipes: List[Dict[str, Any]]) -> np.ndarray:
+    return _worker_hasher.batch_signatures(recipes)
+
+
+class UnionFind:
+    """路径压缩 + 按秩合并的并查集（基于 numpy 数组）"""
+
+    def __init__(self, size: int):
+        self.parent = np.arange(size)
+        self.rank = np.zeros(size, dtype=np.int8)
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return int(root)
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self.rank[ra] < self.rank[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        if self.rank[ra] == self.rank[rb]:
+            self.rank[ra] += 1
+
+
+def compute_signatures(
+    recipes: Iterable[Dict[str, Any]],
+    hasher: MinHasher,
+    chunk_size: int = 2000,
+    workers: Optional[int] = None,
+    check: Optional[Callable[[], None]] = None,
+    start_method: str = "spawn",
+) -> Tuple[List[int], np.ndarray]:
+    """并行计算签名，返回 (配方ID列表, 签名矩阵)
+
+    每个块完成后调用 check（任务取消时抛出异常），异常时撤销尚未开始
+    的块。
+    """
+    ids: List[int] = []
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    for recipe in recipes:
+        ids.append(recipe["id"])
+        current.append(recipe)
+        if len(current) >= chunk_size:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    if not chunks:
+        return ids, np.empty((0, hasher.num_perm), dtype=np.uint32)
+
+    workers = workers or os.cpu_count() or 1
+    parts: List[np.ndarray] = []
+    if workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            parts.append(hasher.batch_signatures(chunk))
+            if check is not None:
+                check()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(hasher.num_perm, hasher.seed),
+        ) as pool:
+            try:
+                for part in pool.map(_signature_chunk, chunks):
+                    parts.append(part)
+                    if check is not None:
+                        check()
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+    return ids, np.vstack(parts)
+
+
+def cluster_signatures(
+    ids: List[int],
+    signatures: np.ndarray,
+    threshold: float = 0.7,
+    bands: int = 16,
+) -> List[List[int]]:
+    """对签名聚类，返回包含两条及以上配方的簇（按簇大小降序）"""
+    index = LSHIndex(
+        num_perm=signatures.shape[1], bands=bands, threshold=threshold
+    )
+    index.add_many(ids, signatures)
+
+    uf = UnionFind(len(ids))
+    for rows in index.bucket_groups():
+        # 星型校验：桶内每个成员只与代表比较，传递性由其它分段补足
+        sims = estimate_jaccard(
+            index.signatures_of(rows[:1])[0], index.signatures_of(rows[1:])
+        )
+        for row in rows[1:][sims >= threshold]:
+            uf.union(int(rows[0]), int(row))
+
+    clusters: Dict[int, List[int]] = {}
+    for row, key in enumerate(ids):
+        clusters.setdefault(uf.find(row), []).append(key)
+    result = [sorted(c) for c in clusters.values() if len(c) > 1]
+    result.sort(key=len, reverse=True)
+    return result
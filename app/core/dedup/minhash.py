@@ -0,0 +1,140 @@
+"""配方MinHash签名
+
+把配方的名称、原料和步骤归一化为 shingle 集合，再用 numpy 向量化地
+计算 MinHash 签名。两个签名逐位相等的比例即为 Jaccard 相似度的估计。
+"""
+
+import re
+import unicodedata
+import zlib
+from math import floor, log10
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+_MAX_HASH = np.uint32((1 << 32) - 1)
+_SHIFT = np.uint64(32)
+
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """全角转半角、小写化并去除标点空白"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _PUNCT_RE.sub("", text)
+
+
+def _round_amount(amount: Any) -> str:
+    """用量保留两位有效数字，使微小的用量调整仍视为同一原料"""
+    try:
+        value = float(amount)
+    except (TypeError, ValueError):
+        return ""
+    if value <= 0:
+        return "0"
+    digits = 1 - int(floor(log10(value)))
+    return f"{round(value, digits):g}"
+
+
+def _char_shingles(prefix: str, text: str, k: int) -> Set[str]:
+    if len(text) <= k:
+        return {f"{prefix}:{text}"} if text else set()
+    return {f"{prefix}:{text[i : i + k]}" for i in range(len(text) - k + 1)}
+
+
+def recipe_shingles(
+    name: Optional[str],
+    ingredients: Optional[Iterable[Any]],
+    procedures: Optional[Iterable[Any]],
+    k: int = 3,
+) -> Set[str]:
+    """把配方内容转换为 shingle 集合
+
+    名称与步骤描述使用字符 k-gram（对中文同样有效），原料按
+    名称/CAS号/取整后的用量/单位组合为整体 token。
+    """
+    shingles = _char_shingles("n", normalize_text(name), k)
+
+    for item in ingredients or []:
+        item = _as_dict(item)
+        ident = normalize_text(item.get("cas_number")) or normalize_text(
+            item.get("name")
+        )
+        if not ident:
+            continue
+        shingles.add(f"i:{ident}")
+        shingles.add(
+            f"a:{ident}:{_round_amount(item.get('amount'))}"
+            f"{normalize_text(item.get('unit'))}"
+        )
+
+    for step in procedures or []:
+        step = _as_dict(step)
+        shingles |= _char_shingles(
+            "p", normalize_text(step.get("description")), k
+        )
+    return shingles
+
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    if isinstance(item, dict):
+        return item
+    if hasattr(item, "model_dump"):
+        return item.model_dump()
+    return {"name": str(item), "description": str(item)}
+
+
+def _hash_shingles(shingles: Iterable[str]) -> np.ndarray:
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64
+    )
+
+
+class MinHasher:
+    """MinHash 签名生成器
+
+    同一 (num_perm, seed) 生成的签名可以互相比较；签名可在子进程中
+    计算后传回主进程。
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # multiply-shift 通用哈希：(a*x + b) mod 2^64 取高32位，a 为奇数
+        high = np.iinfo(np.int64).max
+        self._a = rng.integers(1, high, size=num_perm, dtype=np.uint64) | 1
+        self._b = rng.integers(0, high, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: Set[str]) -> np.ndarray:
+        """计算单个 shingle 集合的签名 (num_perm,) uint32"""
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = _hash_shingles(shingles)
+        # (n, 1) × (num_perm,) -> (n, num_perm)，每列取最小值
+        values = (hashes[:, None] * self._a + self._b) >> _SHIFT
+        return values.min(axis=0).astype(np.uint32)
+
+    def recipe_signature(self, recipe: Dict[str, Any]) -> np.ndarray:
+        """计算配方字典（to_dict()/RecipeCreate.model_dump()）的签名"""
+        return self.signature(
+            recipe_shingles(
+                recipe.get("name"),
+                recipe.get("ingredients"),
+                recipe.get("procedures"),
+            )
+        )
+
+    def batch_signatures(self, recipes: List[Dict[str, Any]]) -> np.ndarray:
+        """批量计算签名，返回 (len(recipes), num_perm) 矩阵"""
+        out = np.empty((len(recipes), self.num_perm), dtype=np.uint32)
+        for i, recipe in enumerate(recipes):
+            out[i] = self.recipe_signature(recipe)
+        return out
+
+
+def estimate_jaccard(sig: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """估计一个签名与一组签名之间的 Jaccard 相似度"""
+    return (others == sig).mean(axis=-1)
@@ -0,0 +1,5 @@
+"""试验设计（DOE）"""
+
+from .designs import DESIGNS, Factor, generate_design
+
+__all__ = ["DESIGNS", "Factor", "generate_design"]
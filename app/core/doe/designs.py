@@ -0,0 +1,98 @@
+"""试验设计（DOE）采样
+
+所有设计都先在单位超立方体 [0,1]^k 中生成，再按因子映射到实际取值：
+- 全因子：每个因子取若干等距水平，生成全部组合
+- 拉丁超立方：每个因子的 n 个分层各取一个点，边缘分布均匀
+- Sobol：低差异序列，点数取 2 的幂时均匀性最好
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy.stats import qmc
+
+DESIGNS = ("full_factorial", "latin_hypercube", "sobol")
+
+
+@dataclass
+class Factor:
+    """试验因子：取值区间、水平数（全因子设计使用）和刻度"""
+
+    name: str
+    low: float
+    high: float
+    levels: int = 3
+    log_scale: bool = False
+    round_digits: Optional[int] = None
+
+    def __post_init__(self):
+        if self.high < self.low:
+            raise ValueError(f"因子 {self.name} 的上限小于下限")
+        if self.log_scale and self.low <= 0:
+            raise ValueError(f"因子 {self.name} 使用对数刻度时下限必须大于0")
+        if self.levels < 1:
+            raise ValueError(f"因子 {self.name} 的水平数必须大于0")
+
+
+def full_factorial(levels: Sequence[int]) -> np.ndarray:
+    """全因子设计，返回形状 (∏levels, k) 的单位坐标"""
+    axes = [
+        np.linspace(0.0, 1.0, n) if n > 1 else np.array([0.5])
+        for n in levels
+    ]
+    grid = np.meshgrid(*axes, indexing="ij")
+    return np.stack([g.ravel() for g in grid], axis=1)
+
+
+def latin_hypercube(
+    count: int, dims: int, seed: Optional[int] = None
+) -> np.ndarray:
+    """随机拉丁超立方设计"""
+    return qmc.LatinHypercube(d=dims, seed=seed).random(count)
+
+
+def sobol(count: int, dims: int, seed: Optional[int] = None) -> np.ndarray:
+    """加扰 Sobol 序列，按 2 的幂生成后截取前 count 个点"""
+    exponent = max(0, int(np.ceil(np.log2(max(count, 1)))))
+    points = qmc.Sobol(d=dims, scramble=True, seed=seed).random_base2(
+        exponent
+    )
+    return points[:count]
+
+
+def scale(unit: np.ndarray, factors: List[Factor]) -> np.ndarray:
+    """把单位坐标映射到因子的实际取值（向量化）"""
+    low = np.array([f.low for f in factors], dtype=np.float64)
+    high = np.array([f.high for f in factors], dtype=np.float64)
+    log = np.array([f.log_scale for f in factors])
+
+    values = low + unit * (high - low)
+    if log.any():
+        log_low, log_high = np.log(low[log]), np.log(high[log])
+        values[:, log] = np.exp(log_low + unit[:, log] * (log_high - log_low))
+    for j, factor in enumerate(factors):
+        if factor.round_digits is not None:
+            values[:, j] = np.round(values[:, j], factor.round_digits)
+    return values
+
+
+def generate_design(
+    design: str,
+    factors: List[Factor],
+    count: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """生成设计矩阵，返回形状 (n, k) 的因子实际取值"""
+    if not factors:
+        raise ValueError("至少需要一个试验因子")
+    if design == "full_factorial":
+        unit = full_factorial([f.levels for f in factors])
+    elif design in ("latin_hypercube", "sobol"):
+        if not count:
+            raise ValueError(f"{design} 设计需要指定试验点数")
+        sampler = latin_hypercube if design == "latin_hypercube" else sobol
+        unit = sampler(count, len(factors), seed)
+    else:
+        raise ValueError(f"不支持的设计类型: {design}，可选: {DESIGNS}")
+    return scale(unit, factors)
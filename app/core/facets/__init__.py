@@ -0,0 +1,6 @@
+"""配方分面位图索引"""
+
+from .index import FacetIndex
+from .roaring import RoaringBitmap
+
+__all__ = ["FacetIndex", "RoaringBitmap"]
@@ -0,0 +1,325 @@
+"""配方分面位图索引
+
+每个分面取值对应一个 RoaringBitmap（配方ID集合）：
+- 筛选：同一分面内多个取值取并集，不同分面之间取交集
+- 计数：每个分面按代价自动选择
+  * 倒排扫描：array 容器做位测试后 bincount，bitmap 容器做 AND + popcount，
+    代价与该分面的倒排规模成正比，适合结果集很大的筛选
+  * 文档聚集：按结果集ID取出每个文档的取值编码后 bincount，
+    代价与结果集大小成正比，适合选择性高的筛选
+  * 无筛选时直接返回各位图的基数（缓存）
+
+另外按文档ID保存每个分面的取值编码矩阵，既用于聚集计数，也用于
+增量更新时找到旧取值。
+"""
+
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .roaring import (
+    WORDS_PER_CHUNK,
+    RoaringBitmap,
+    bits_set,
+    is_bitmap,
+)
+
+SNAPSHOT_VERSION = 1
+
+# 每个文档的分面取值：{分面: (取值, ...)}
+DocFacets = Dict[str, Tuple[str, ...]]
+
+
+class _Facet:
+    """单个分面的倒排与文档取值编码"""
+
+    def __init__(self, name: str, width: int = 1):
+        self.name = name
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self.postings: List[Optional[RoaringBitmap]] = []
+        # doc_codes[k, doc_id] = 该文档第k个取值的编码+1（0 表示无）；
+        # 按列存储，聚集计数时每列一次连续的 take
+        self.doc_codes = np.zeros((width, 1024), dtype=np.int32)
+        self._flat = None
+        self._cost: Optional[int] = None
+        self._totals: Optional[np.ndarray] = None
+
+    def code_of(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.postings.append(RoaringBitmap())
+        return code
+
+    def ensure_capacity(self, doc_id: int, width: int):
+        cols, rows = self.doc_codes.shape
+        if doc_id < rows and width <= cols:
+            return
+        new_rows = rows
+        while new_rows <= doc_id:
+            new_rows *= 2
+        grown = np.zeros((max(cols, width), new_rows), dtype=np.int32)
+        grown[:cols, :rows] = self.doc_codes
+        self.doc_codes = grown
+
+    def doc_values(self, doc_id: int) -> List[int]:
+        if doc_id >= self.doc_codes.shape[1]:
+            return []
+        return [int(c) - 1 for c in self.doc_codes[:, doc_id] if c]
+
+    def set_doc_values(self, doc_id: int, codes: List[int]):
+        self.ensure_capacity(doc_id, len(codes))
+        self.doc_codes[:, doc_id] = 0
+        self.doc_codes[: len(codes), doc_id] = np.asarray(codes) + 1
+
+    def invalidate(self):
+        self._flat = None
+        self._cost = None
+        self._totals = None
+
+    def postings_cost(self) -> int:
+        """倒排扫描的代价估计：array 元素数 + bitmap 容器字数"""
+        if self._cost is None:
+            cost = 0
+            for bitmap in filter(None, self.postings):
+                for container in bitmap.containers.values():
+                    cost += (
+                        WORDS_PER_CHUNK
+                        if is_bitmap(container)
+                        else len(container)
+                    )
+            self._cost = cost
+        return self._cost
+
+    def flat(self):
+        """倒排的扁平化视图：(array容器ID, 对应编码, bitmap容器列表)"""
+        if self._flat is None:
+            ids, codes, bitmaps = [], [], []
+            for code, bitmap in enumerate(self.postings):
+                if bitmap is None:
+                    continue
+                for high, container in bitmap.containers.items():
+                    if is_bitmap(container):
+                        bitmaps.append((code, high, container))
+                        continue
+                    ids.append(
+                        container.astype(np.uint32) | np.uint32(high << 16)
+                    )
+                    codes.append(np.full(len(container), code, np.int32))
+            ids = np.concatenate(ids) if ids else np.empty(0, np.uint32)
+            codes = np.concatenate(codes) if codes else np.empty(0, np.int32)
+            self._flat = (ids, codes, bitmaps)
+        return self._flat
+
+    def totals(self) -> np.ndarray:
+        if self._totals is None:
+            self._totals = np.array(
+                [len(b) if b is not None else 0 for b in self.postings],
+                dtype=np.int64,
+            )
+        return self._totals
+
+    def count_by_postings(self, dense: np.ndarray) -> np.ndarray:
+        ids, codes, bitmaps = self.flat()
+        counts = np.zeros(len(self.values), dtype=np.int64)
+        if len(ids):
+            hit = bits_set(dense, ids)
+            counts += np.bincount(codes[hit], minlength=len(self.values))
+        for code, high, words in bitmaps:
+            start = high * WORDS_PER_CHUNK
+            chunk = dense[start : start + WORDS_PER_CHUNK]
+            counts[code] += int(np.bitwise_count(chunk & words).sum())
+        return counts
+
+    def count_by_docs(self, doc_ids: np.ndarray) -> np.ndarray:
+        counts = np.zeros(len(self.values) + 1, dtype=np.int64)
+        for column in self.doc_codes:
+            counts += np.bincount(
+                np.take(column, doc_ids), minlength=len(counts)
+            )
+        return counts[1:]
+
+
+class FacetIndex:
+    """分面位图索引"""
+
+    def __init__(self, facets: Iterable[str]):
+        self.facets: Dict[str, _Facet] = {f: _Facet(f) for f in facets}
+        self.universe = RoaringBitmap()
+        # 已索引变更的 updated_at 水位线，用于增量追赶
+        self.watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self.universe)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self.universe
+
+    def _num_chunks(self) -> int:
+        highs = self.universe.containers.keys()
+        return max(highs) + 1 if highs else 0
+
+    def bulk_load(self, docs: Iterable[Tuple[int, DocFacets]]):
+        """全量构建：先收集每个取值的ID数组，再一次性构建位图"""
+        # 每个分面收集 (文档ID, 位置, 编码) 三元组，最后向量化写入
+        triples = {f: ([], [], []) for f in self.facets}
+        all_ids = []
+        for doc_id, values in docs:
+            all_ids.append(doc_id)
+            for name, facet in self.facets.items():
+                doc_ids, positions, codes = triples[name]
+                for position, value in enumerate(values.get(name, ())):
+                    doc_ids.append(doc_id)
+                    positions.append(position)
+                    codes.append(facet.code_of(value))
+        self.universe = RoaringBitmap.from_array(all_ids)
+        max_id = max(all_ids, default=0)
+        for name, facet in self.facets.items():
+            doc_ids, positions, codes = map(np.asarray, triples[name])
+            facet.ensure_capacity(max_id, int(positions.max(initial=0)) + 1)
+            facet.doc_codes[positions, doc_ids] = codes + 1
+            order = np.argsort(codes, kind="stable")
+            bounds = np.flatnonzero(np.diff(codes[order])) + 1
+            for group in np.split(order, bounds) if len(order) else []:
+                facet.postings[int(codes[group[0]])] = (
+                    RoaringBitmap.from_array(doc_ids[group])
+                )
+            facet.invalidate()
+
+    def remove(self, doc_id: int):
+        """删除文档"""
+        if doc_id not in self.universe:
+            return
+        self.universe.discard(doc_id)
+        for facet in self.facets.values():
+            codes = facet.doc_values(doc_id)
+            for code in codes:
+                facet.postings[code].discard(doc_id)
+            if codes:
+                facet.set_doc_values(doc_id, [])
+                facet.invalidate()
+
+    def upsert(self, doc_id: int, values: DocFacets):
+        """新增或更新文档，只改动取值发生变化的位图"""
+        for name, facet in self.facets.items():
+            before = set(facet.doc_values(doc_id))
+            after_codes = list(
+                dict.fromkeys(facet.code_of(v) for v in values.get(name, ()))
+            )
+            after = set(after_codes)
+            if before == after:
+                continue
+            for code in before - after:
+                facet.postings[code].discard(doc_id)
+            for code in after - before:
+                facet.postings[code].add(doc_id)
+            facet.set_doc_values(doc_id, after_codes)
+            facet.invalidate()
+        self.universe.add(doc_id)
+
+    def filter(
+        self, selections: Optional[Dict[str, List[str]]] = None
+    ) -> RoaringBitmap:
+        """按分面筛选：分面内取并集，分面间取交集"""
+        result = self.universe
+        for name, values in (selections or {}).items():
+            if not values:
+                continue
+            facet = self.facets.get(name)
+            if facet is None:
+                raise ValueError(f"未知的分面: {name}")
+            matched = RoaringBitmap()
+            for value in values:
+                code = facet.codes.get(value)
+                if code is not None:
+                    matched = matched | facet.postings[code]
+            result = result & matched
+        return result
+
+    def facet_counts(
+        self,
+        bitmap: RoaringBitmap,
+        facets: Optional[Iterable[str]] = None,
+        top: Optional[int] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """统计筛选结果中每个分面取值的数量（按数量降序）"""
+        size = len(bitmap)
+        unfiltered = size == len(self.universe)
+        doc_ids = dense = None
+        result = {}
+        for name in facets or self.facets:
+            facet = self.facets[name]
+            if unfiltered:
+                counts = facet.totals()
+            elif size * len(facet.doc_codes) <= facet.postings_cost():
+                if doc_ids is None:
+                    doc_ids = bitmap.to_array()
+                counts = facet.count_by_docs(doc_ids)
+            else:
+                if dense is None:
+                    dense = bitmap.to_dense_words(self._num_chunks())
+                counts = facet.count_by_postings(dense)
+
+            nonzero = np.flatnonzero(counts)
+            order = nonzero[np.argsort(-counts[nonzero], kind="stable")]
+            if top is not None:
+                order = order[:top]
+            result[name] = {facet.values[i]: int(counts[i]) for i in order}
+        return result
+
+    def save(self, path: str):
+        """原子地把索引快照写入磁盘"""
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "watermark": self.watermark,
+            "universe": self.universe.containers,
+            "facets": {
+                name: {
+                    "values": facet.values,
+                    "postings": [
+                        b.containers if b is not None else None
+                        for b in facet.postings
+                    ],
+                    "doc_codes": facet.doc_codes,
+                }
+                for name, facet in self.facets.items()
+            },
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> Optional["FacetIndex"]:
+        """从磁盘快照恢复索引，版本不匹配时返回 None"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != SNAPSHOT_VERSION:
+            return None
+        index = cls(state["facets"])
+        index.watermark = state["watermark"]
+        index.universe = RoaringBitmap(state["universe"])
+        for name, data in state["facets"].items():
+            facet = index.facets[name]
+            facet.values = data["values"]
+            facet.codes = {v: i for i, v in enumerate(facet.values)}
+            facet.postings = [
+                RoaringBitmap(c) if c is not None else None
+                for c in data["postings"]
+            ]
+            facet.doc_codes = data["doc_codes"]
+        return index
@@ -0,0 +1,219 @@
+"""Roaring 风格的压缩位图
+
+整数按高16位分块，每块是一个容器：
+- 元素不超过 4096 个时用有序 uint16 数组（array 容器）
+- 否则用 1024 个 uint64 组成的 65536 位位图（bitmap 容器）
+交、并、差运算按容器逐块进行，基数统计对位图容器使用 popcount。
+"""
+
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+ARRAY_LIMIT = 4096
+WORDS_PER_CHUNK = 1024  # 65536 / 64
+
+
+def is_bitmap(container: np.ndarray) -> bool:
+    return container.dtype == np.uint64
+
+
+def array_to_words(values: np.ndarray) -> np.ndarray:
+    bits = np.zeros(1 << 16, dtype=bool)
+    bits[values] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def words_to_array(words: np.ndarray) -> np.ndarray:
+    bits = np.unpackbits(words.view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _normalize(container: np.ndarray) -> np.ndarray:
+    """根据基数在 array / bitmap 两种表示之间转换"""
+    if is_bitmap(container):
+        if int(np.bitwise_count(container).sum()) <= ARRAY_LIMIT:
+            return words_to_array(container)
+        return container
+    if len(container) > ARRAY_LIMIT:
+        return array_to_words(container)
+    return container
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if is_bitmap(container):
+        return int(np.bitwise_count(container).sum())
+    return len(container)
+
+
+def bits_set(words: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """返回 values 中每个元素在位图 words 中是否置位"""
+    values = values.astype(np.uint64)
+    shifted = words[values >> np.uint64(6)] >> (values & np.uint64(63))
+    return (shifted & np.uint64(1)).astype(bool)
+
+
+def _and(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if is_bitmap(a) and is_bitmap(b):
+        return _normalize(a & b)
+    if is_bitmap(a):
+        return b[bits_set(a, b)]
+    if is_bitmap(b):
+        return a[bits_set(b, a)]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def _or(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if not is_bitmap(a) and not is_bitmap(b):
+        return _normalize(np.union1d(a, b))
+    wa = a if is_bitmap(a) else array_to_words(a)
+    wb = b if is_bitmap(b) else array_to_words(b)
+    return wa | wb
+
+
+def _andnot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if is_bitmap(a):
+        wb = b if is_bitmap(b) else array_to_words(b)
+        return _normalize(a & ~wb)
+    if is_bitmap(b):
+        return a[~bits_set(b, a)]
+    return np.setdiff1d(a, b, assume_unique=True)
+
+
+class RoaringBitmap:
+    """压缩整数位图（非负 32 位整数）"""
+
+    __slots__ = ("containers",)
+
+    def __init__(self, containers: Dict[int, np.ndarray] = None):
+        self.containers: Dict[int, np.ndarray] = containers or {}
+
+    @classmethod
+    def from_array(cls, values: Iterable[int]) -> "RoaringBitmap":
+        """从整数序列批量构建"""
+        values = np.unique(np.asarray(values, dtype=np.uint32))
+        bitmap = cls()
+        if not len(values):
+            return bitmap
+        highs = values >> 16
+        bounds = np.flatnonzero(np.diff(highs)) + 1
+        for chunk in np.split(values, bounds):
+            high = int(chunk[0] >> 16)
+            bitmap.containers[high] = _normalize(
+                (chunk & 0xFFFF).astype(np.uint16)
+            )
+        return bitmap
+
+    def copy(self) -> "RoaringBitmap":
+        return RoaringBitmap(
+            {h: c.copy() for h, c in self.containers.items()}
+        )
+
+    def add(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            self.containers[high] = np.array([low], dtype=np.uint16)
+        elif is_bitmap(container):
+            container[low >> 6] |= np.uint64(1 << (low & 63))
+        else:
+            pos = np.searchsorted(container, low)
+            if pos < len(container) and container[pos] == low:
+                return
+            self.containers[high] = _normalize(
+                np.insert(container, pos, np.uint16(low))
+            )
+
+    def discard(self, value: int):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            return
+        if is_bitmap(container):
+            container[low >> 6] &= ~np.uint64(1 << (low & 63))
+            container = _normalize(container)
+        else:
+            pos = np.searchsorted(container, low)
+            if pos < len(container) and container[pos] == low:
+                container = np.delete(container, pos)
+        if _cardinality(container):
+            self.containers[high] = container
+        else:
+            del self.containers[high]
+
+    def __contains__(self, value: int) -> bool:
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if is_bitmap(container):
+            return bool((int(container[low >> 6]) >> (low & 63)) & 1)
+        pos = np.searchsorted(container, low)
+        return pos < len(container) and container[pos] == low
+
+    def __len__(self) -> int:
+        return sum(_cardinality(c) for c in self.containers.values())
+
+    def _combine(self, other: "RoaringBitmap", op, keep_left=False):
+        result = {}
+        highs = (
+            self.containers.keys()
+            if keep_left
+            else self.containers.keys() & other.containers.keys()
+        )
+        for high in highs:
+            right = other.containers.get(high)
+            left = self.containers[high]
+            container = left.copy() if right is None else op(left, right)
+            if _cardinality(container):
+                result[high] = container
+        return RoaringBitmap(result)
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, _and)
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        return self._combine(other, _andnot, keep_left=True)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        result = {h: c.copy() for h, c in self.containers.items()}
+        for high, container in other.containers.items():
+            left = result.get(high)
+            result[high] = (
+                container.copy() if left is None else _or(left, container)
+            )
+        return RoaringBitmap(result)
+
+    def items(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """按高位顺序遍历 (高16位, 容器)"""
+        for high in sorted(self.containers):
+            yield high, self.containers[high]
+
+    def to_array(self) -> np.ndarray:
+        """展开为有序 uint32 数组"""
+        parts = []
+        for high, container in self.items():
+            low = (
+                words_to_array(container)
+                if is_bitmap(container)
+                else container
+            )
+            parts.append(low.astype(np.uint32) | np.uint32(high << 16))
+        if not parts:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate(parts)
+
+    def to_dense_words(self, num_chunks: int) -> np.ndarray:
+        """展开为覆盖 num_chunks 个块的定长位图，用于批量计数"""
+        words = np.zeros(num_chunks * WORDS_PER_CHUNK, dtype=np.uint64)
+        for high, container in self.containers.items():
+            if high >= num_chunks:
+                continue
+            start = high * WORDS_PER_CHUNK
+            if not is_bitmap(container):
+                container = array_to_words(container)
+            words[start : start + WORDS_PER_CHUNK] = container
+        return words
+
+    def __repr__(self):
+        return f"<RoaringBitmap(cardinality={len(self)})>"
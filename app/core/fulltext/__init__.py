@@ -0,0 +1,14 @@
+"""中文全文检索（二元组分词 + BM25 分段倒排索引）"""
+
+from .index import FullTextIndex
+from .segment import MemorySegment, Segment
+from .tokenizer import query_terms, term_counts, tokenize
+
+__all__ = [
+    "FullTextIndex",
+    "MemorySegment",
+    "Segment",
+    "query_terms",
+    "term_counts",
+    "tokenize",
+]
@@ -0,0 +1,347 @@
+"""分段倒排索引与 BM25 检索
+
+索引由若干不可变段和一个内存段组成：
+- 写入（新增/更新）进入内存段，删除只改文档归属表 ``owner``
+  （doc_id -> 当前版本所在段编号，0 表示不存在），旧版本的倒排
+  留在原段中，查询时按归属表屏蔽
+- ``checkpoint`` 把内存段写成磁盘段，段数超过上限时合并最小的几段，
+  再写入清单（段列表、归属表、文档长度、水位线）；构建新段和合并都在
+  锁外进行，只在替换时短暂持锁
+- 查询先取文档频率最低的词项的倒排作为候选，其余词项在各段倒排上
+  二分查找候选，代价与最稀有词项的倒排长度成正比；默认要求包含
+  全部查询词（and），也可按任一词（or）召回
+
+文档频率按各段倒排长度之和计算，包含尚未合并掉的旧版本，与
+Lucene 的处理一致。
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .segment import MemorySegment, Segment, segment_dirname
+from .tokenizer import query_terms
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+# OR 检索时忽略出现在超过该比例文档中的词项（有更稀有的词项时）
+COMMON_TERM_RATIO = 0.2
+
+AnySegment = Union[Segment, MemorySegment]
+
+
+class FullTextIndex:
+    """分段倒排索引"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_segments: int = 8,
+    ):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.watermark: Optional[datetime] = None
+        self.segments: List[AnySegment] = []
+        self.owner = np.zeros(1024, dtype=np.int32)
+        self.doc_len = np.zeros(1024, dtype=np.float32)
+        self.n_docs = 0
+        self.total_len = 0.0
+        self._next_number = 1
+        self.memory = self._new_memory()
+        self._lock = threading.Lock()
+        # checkpoint 串行执行
+        self._checkpoint_lock = threading.Lock()
+
+    def _new_memory(self) -> MemorySegment:
+        memory = MemorySegment(self._next_number)
+        self._next_number += 1
+        return memory
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @property
+    def pending(self) -> int:
+        """内存段中尚未写入磁盘段的文档数"""
+        return len(self.memory)
+
+    def _grow(self, doc_id: int):
+        size = len(self.owner)
+        if doc_id < size:
+            return
+        while size <= doc_id:
+            size *= 2
+        owner = np.zeros(size, dtype=np.int32)
+        owner[: len(self.owner)] = self.owner
+        doc_len = np.zeros(size, dtype=np.float32)
+        doc_len[: len(self.doc_len)] = self.doc_len
+        self.owner, self.doc_len = owner, doc_len
+
+    def _unlink(self, doc_id: int):
+        """从统计中去掉文档的当前版本（调用方持锁）"""
+        if doc_id < len(self.owner) and self.owner[doc_id]:
+            self.n_docs -= 1
+            self.total_len -= float(self.doc_len[doc_id])
+            self.owner[doc_id] = 0
+            self.doc_len[doc_id] = 0
+        self.memory.discard(doc_id)
+
+    def upsert(self, doc_id: int, counts: Counter):
+        """写入文档的词频，空文档视为删除"""
+        with self._lock:
+            self._unlink(doc_id)
+            if not counts:
+                return
+            self._grow(doc_id)
+            length = float(sum(counts.values()))
+            self.memory.add(doc_id, counts)
+            self.owner[doc_id] = self.memory.number
+            self.doc_len[doc_id] = length
+            self.n_docs += 1
+            self.total_len += length
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._unlink(doc_id)
+
+    def live_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.owner).astype(np.int32)
+
+    # 检索
+
+    def _postings(
+        self, segments: List[AnySegment], term: str, candidates: np.ndarray
+    ) -> np.ndarray:
+        """候选文档在当前版本中的词频"""
+        tfs = np.zeros(len(candidates), dtype=np.float32)
+        owners = self.owner[candidates]
+        for segment in segments:
+            mine = owners == segment.number
+            if not mine.any():
+                continue
+            docs, seg_tfs = segment.lookup(term)
+            if not len(docs):
+                continue
+            wanted = candidates[mine]
+            pos = np.searchsorted(docs, wanted)
+            pos[pos >= len(docs)] = 0
+            found = np.asarray(docs[pos]) == wanted
+            values = np.zeros(len(wanted), dtype=np.float32)
+            values[found] = np.asarray(seg_tfs)[pos[found]]
+            tfs[mine] = values
+        return tfs
+
+    def _live_docs(self, segments: List[AnySegment], term: str) -> np.ndarray:
+        """包含词项的当前版本文档"""
+        parts = []
+        for segment in segments:
+            docs, _ = segment.lookup(term)
+            if len(docs):
+                docs = np.asarray(docs)
+                parts.append(docs[self.owner[docs] == segment.number])
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(parts))
+
+    def search(
+        self, query: str, limit: int = 20, offset: int = 0, mode: str = "and"
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """BM25 检索，返回 ([(文档ID, 得分)], 命中总数)"""
+        if mode not in ("and", "or"):
+            raise ValueError(f"未知的检索模式: {mode}")
+        terms = query_terms(query)
+        with self._lock:
+            if not terms or not self.n_docs:
+                return [], 0
+            segments = [*self.segments, self.memory]
+            n_docs = self.n_docs
+            avg_len = self.total_len / n_docs
+            df = {t: sum(s.df(t) for s in segments) for t in terms}
+            if mode == "and" and min(df.values()) == 0:
+                return [], 0
+            terms = sorted((t for t in terms if df[t]), key=df.get)
+            if not terms:
+                return [], 0
+
+            if mode == "and":
+                candidates = self._live_docs(segments, terms[0])
+            else:
+                limit_df = COMMON_TERM_RATIO * n_docs
+                recall = [t for t in terms if df[t] <= limit_df] or terms[:1]
+                candidates = np.unique(
+                    np.concatenate(
+                        [self._live_docs(segments, t) for t in recall]
+                    )
+                )
+            norm = self.k1 * (
+                1 - self.b + self.b * self.doc_len[candidates] / avg_len
+            )
+            scores = np.zeros(len(candidates), dtype=np.float32)
+            for term in terms:
+                if not len(candidates):
+                    break
+                tfs = self._postings(segments, term, candidates)
+                if mode == "and":
+                    keep = tfs > 0
+                    candidates, norm = candidates[keep], norm[keep]
+                    scores, tfs = scores[keep], tfs[keep]
+                # 旧版本可能使 df 超过现存文档数，截断以保证 idf 为正
+                term_df = min(df[term], n_docs)
+                idf = math.log(1 + (n_docs - term_df + 0.5) / (term_df + 0.5))
+                scores += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        total = len(candidates)
+        end = min(total, offset + limit)
+        if offset >= end:
+            return [], total
+        if end < total:
+            top = np.argpartition(-scores, end - 1)[:end]
+        else:
+            top = np.arange(total)
+        top = top[np.lexsort((candidates[top], -scores[top]))][offset:end]
+        hits = [(int(candidates[i]), float(scores[i])) for i in top]
+        return hits, total
+
+    # 持久化
+
+    def checkpoint(self):
+        """内存段落盘，必要时合并，并写入清单"""
+        if not self.directory:
+            return
+        with self._checkpoint_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._flush()
+            self._merge()
+            self._write_manifest()
+
+    def _flush(self):
+        with self._lock:
+            frozen = self.memory
+            if not len(frozen):
+                return
+            # 冻结的内存段在写成磁盘段之前继续参与查询
+            self.segments.append(frozen)
+            self.memory = self._new_memory()
+        segment = Segment.build(frozen.number, sorted(frozen.docs.items()))
+        segment.save(self.directory)
+        segment = Segment.load(self.directory, frozen.number)
+        with self._lock:
+            self.segments[self.segments.index(frozen)] = segment
+
+    def _merge(self):
+        with self._lock:
+            if len(self.segments) <= self.max_segments:
+                return
+            by_size = sorted(self.segments, key=len)
+            victims = by_size[: len(self.segments) - self.max_segments + 1]
+            number = self._next_number
+            self._next_number += 1
+        # 合并期间被更新或删除的文档归属已不在原段，合并结果中的旧版本
+        # 不会被重新认领
+        merged = Segment.merge(number, victims, self.owner)
+        merged.save(self.directory)
+        merged = Segment.load(self.directory, number)
+        victim_numbers = np.array([s.number for s in victims], dtype=np.int32)
+        with self._lock:
+            doc_ids = np.asarray(merged.doc_ids)
+            still = np.isin(self.owner[doc_ids], victim_numbers)
+            self.owner[doc_ids[still]] = number
+            position = min(self.segments.index(s) for s in victims)
+            self.segments = [s for s in self.segments if s not in victims]
+            self.segments.insert(position, merged)
+
+    def _write_manifest(self):
+        with self._lock:
+            numbers = [s.number for s in self.segments]
+            owner = self.owner.copy()
+            doc_len = self.doc_len.copy()
+            # 内存段的文档未落盘，清单中视为不存在，恢复时按水位线追赶
+            owner[owner == self.memory.number] = 0
+            watermark = self.watermark
+            next_number = self._next_number
+        generation = next_number
+        np.save(self._path(f"owner_{generation}.npy"), owner)
+        np.save(self._path(f"doc_len_{generation}.npy"), doc_len)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "segments": numbers,
+            "generation": generation,
+            "next_number": next_number,
+            "watermark": watermark.isoformat() if watermark else None,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._path(MANIFEST))
+        self._cleanup(numbers, generation)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _cleanup(self, numbers: List[int], generation: int):
+        """删除清单不再引用的段和归属表"""
+        keep = {segment_dirname(n) for n in numbers} | {
+            f"owner_{generation}.npy",
+            f"doc_len_{generation}.npy",
+            MANIFEST,
+        }
+        for name in os.listdir(self.directory):
+            if name in keep or name.endswith(".tmp"):
+                continue
+            path = self._path(name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith(("owner_", "doc_len_")):
+                os.unlink(path)
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> Optional["FullTextIndex"]:
+        """从清单恢复，没有清单或版本不匹配时返回 None"""
+        path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        index = cls(directory, **kwargs)
+        for number in manifest["segments"]:
+            segment = Segment.load(directory, number)
+            if segment is None:
+                return None
+            index.segments.append(segment)
+        generation = manifest["generation"]
+        index.owner = np.load(index._path(f"owner_{generation}.npy"))
+        index.doc_len = np.load(index._path(f"doc_len_{generation}.npy"))
+        live = index.owner > 0
+        index.n_docs = int(live.sum())
+        index.total_len = float(index.doc_len[live].sum(dtype=np.float64))
+        index._next_number = manifest["next_number"]
+        index.memory = index._new_memory()
+        if manifest["watermark"]:
+            index.watermark = datetime.fromisoformat(manifest["watermark"])
+        return index
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "docs": self.n_docs,
+            "segments": len(self.segments),
+            "pending": self.pending,
+            "postings": sum(
+                len(s.docs) if isinstance(s, Segment) else 0
+                for s in self.segments
+            ),
+        }
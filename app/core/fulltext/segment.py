@@ -0,0 +1,254 @@
+"""倒排索引段
+
+段按编号标识，写入后不再修改。文档更新时写入新段，旧段中的倒排
+由索引的文档归属表（doc_id -> 段编号）屏蔽，合并时才真正丢弃。
+
+磁盘格式：每段一个目录 ``seg_<编号>``，内含
+
+- ``terms.npy``    排序后的词项（定长 Unicode）
+- ``offsets.npy``  每个词项倒排在 docs/tfs 中的起止位置（int64）
+- ``docs.npy``     倒排的文档ID，词项内升序（int32）
+- ``tfs.npy``      对应的词频，截断到 255（uint8）
+- ``doc_ids.npy``  段内文档ID（int32）
+- ``meta.json``    格式版本和统计
+
+读取时以内存映射方式打开，只有查询命中的页才会读入内存。
+"""
+
+import json
+import os
+import shutil
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .tokenizer import MAX_TERM
+
+SEGMENT_VERSION = 1
+TERM_DTYPE = f"<U{MAX_TERM}"
+
+_EMPTY_DOCS = np.zeros(0, dtype=np.int32)
+_EMPTY_TFS = np.zeros(0, dtype=np.uint8)
+
+
+class MemorySegment:
+    """内存中的可写段，接收最近的写入，写满后转为磁盘段"""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.docs: Dict[int, Counter] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, doc_id: int, counts: Counter):
+        self.discard(doc_id)
+        self.docs[doc_id] = counts
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def discard(self, doc_id: int):
+        counts = self.docs.pop(doc_id, None)
+        if counts is None:
+            return
+        for term in counts:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+    def df(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+    def lookup(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        posting = self.postings.get(term)
+        if not posting:
+            return _EMPTY_DOCS, _EMPTY_TFS
+        docs = np.fromiter(posting.keys(), dtype=np.int32, count=len(posting))
+        tfs = np.fromiter(
+            (min(tf, 255) for tf in posting.values()),
+            dtype=np.uint8,
+            count=len(posting),
+        )
+        order = np.argsort(docs)
+        return docs[order], tfs[order]
+
+
+class Segment:
+    """不可变的倒排段"""
+
+    def __init__(
+        self,
+        number: int,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_ids: np.ndarray,
+        path: Optional[str] = None,
+    ):
+        self.number = number
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_ids = doc_ids
+        self.path = path
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _slot(self, term: str) -> int:
+        i = int(np.searchsorted(self.terms, term))
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return -1
+
+    def df(self, term: str) -> int:
+        i = self._slot(term)
+        return 0 if i < 0 else int(self.offsets[i + 1] - self.offsets[i])
+
+    def lookup(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        i = self._slot(term)
+        if i < 0:
+            return _EMPTY_DOCS, _EMPTY_TFS
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    @classmethod
+    def build(
+        cls, number: int, docs: Iterable[Tuple[int, Counter]]
+    ) -> "Segment":
+        """由 (文档ID, 词频) 构建"""
+        doc_ids: List[int] = []
+        terms: List[str] = []
+        posting_docs: List[int] = []
+        tfs: List[int] = []
+        for doc_id, counts in docs:
+            doc_ids.append(doc_id)
+            terms.extend(counts.keys())
+            posting_docs.extend([doc_id] * len(counts))
+            tfs.extend(counts.values())
+        return cls._from_postings(
+            number,
+            np.asarray(terms, dtype=TERM_DTYPE),
+            np.asarray(posting_docs, dtype=np.int32),
+            np.minimum(np.asarray(tfs, dtype=np.int64), 255).astype(np.uint8),
+            np.sort(np.asarray(doc_ids, dtype=np.int32)),
+        )
+
+    @classmethod
+    def _from_postings(
+        cls,
+        number: int,
+        terms: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_ids: np.ndarray,
+    ) -> "Segment":
+        vocab, term_index = np.unique(terms, return_inverse=True)
+        return cls._from_indexed(number, vocab, term_index, docs, tfs, doc_ids)
+
+    @classmethod
+    def _from_indexed(
+        cls,
+        number: int,
+        vocab: np.ndarray,
+        term_index: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_ids: np.ndarray,
+    ) -> "Segment":
+        order = np.lexsort((docs, term_index))
+        counts = np.bincount(term_index, minlength=len(vocab))
+        used = counts > 0
+        offsets = np.zeros(int(used.sum()) + 1, dtype=np.int64)
+        np.cumsum(counts[used], out=offsets[1:])
+        return cls(
+            number,
+            vocab[used].astype(TERM_DTYPE),
+            offsets,
+            docs[order],
+            tfs[order],
+            doc_ids,
+        )
+
+    @classmethod
+    def merge(
+        cls,
+        number: int,
+        segments: Sequence["Segment"],
+        owner: np.ndarray,
+    ) -> "Segment":
+        """合并若干段，只保留归属于各自段的文档（即当前版本）"""
+        vocab = np.unique(np.concatenate([s.terms for s in segments]))
+        term_parts, doc_parts, tf_parts, id_parts = [], [], [], []
+        for segment in segments:
+            term_index = np.repeat(
+                np.searchsorted(vocab, segment.terms),
+                np.diff(segment.offsets),
+            )
+            docs = np.asarray(segment.docs)
+            keep = _owned(owner, docs, segment.number)
+            term_parts.append(term_index[keep])
+            doc_parts.append(docs[keep])
+            tf_parts.append(np.asarray(segment.tfs)[keep])
+            doc_ids = np.asarray(segment.doc_ids)
+            id_parts.append(doc_ids[_owned(owner, doc_ids, segment.number)])
+        return cls._from_indexed(
+            number,
+            vocab,
+            np.concatenate(term_parts),
+            np.concatenate(doc_parts),
+            np.concatenate(tf_parts),
+            np.sort(np.concatenate(id_parts)),
+        )
+
+    def save(self, directory: str):
+        """写入 directory/seg_<编号>，先写临时目录再改名"""
+        path = os.path.join(directory, segment_dirname(self.number))
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name in ("terms", "offsets", "docs", "tfs", "doc_ids"):
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "version": SEGMENT_VERSION,
+            "number": self.number,
+            "terms": len(self.terms),
+            "postings": len(self.docs),
+            "docs": len(self.doc_ids),
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, directory: str, number: int) -> Optional["Segment"]:
+        """以内存映射方式打开，版本不匹配时返回 None"""
+        path = os.path.join(directory, segment_dirname(number))
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != SEGMENT_VERSION:
+            return None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("terms", "offsets", "docs", "tfs", "doc_ids")
+        }
+        return cls(number, path=path, **arrays)
+
+
+def segment_dirname(number: int) -> str:
+    return f"seg_{number:06d}"
+
+
+def _owned(owner: np.ndarray, docs: np.ndarray, number: int) -> np.ndarray:
+    """docs 中当前归属于段 number 的位置"""
+    inside = docs < len(owner)
+    result = np.zeros(len(docs), dtype=bool)
+    result[inside] = owner[docs[inside]] == number
+    return result
@@ -0,0 +1,62 @@
+"""中文分词
+
+不依赖词典：连续的汉字按二元组（bigram）切分，同时保留单字；字母数字
+串（含小数点、连字符，如 ``ph7.0``、``64-17-5``）整体作为一个词。先做
+NFKC 归一化（全角转半角）并转小写。
+
+查询时汉字串只取二元组，单个汉字才用单字，使多字查询近似于短语匹配。
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterator, List
+
+MAX_TERM = 16  # 词项最大长度，更长的字母数字串被截断
+
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_TOKEN = re.compile(rf"[{_CJK}]+|[0-9a-z]+(?:[.\-][0-9a-z]+)*")
+
+
+def _runs(text: str) -> Iterator[str]:
+    text = unicodedata.normalize("NFKC", text).lower()
+    for match in _TOKEN.finditer(text):
+        yield match.group()
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] > "⿿"
+
+
+def tokenize(text: str) -> List[str]:
+    """索引用分词：汉字单字和二元组，字母数字串整体"""
+    terms: List[str] = []
+    for run in _runs(text):
+        if not _is_cjk(run):
+            terms.append(run[:MAX_TERM])
+            continue
+        terms.extend(run)
+        terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def query_terms(text: str) -> List[str]:
+    """查询用分词（去重，保持顺序）"""
+    terms: List[str] = []
+    for run in _runs(text):
+        if not _is_cjk(run):
+            terms.append(run[:MAX_TERM])
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return list(dict.fromkeys(terms))
+
+
+def term_counts(*texts: str) -> Counter:
+    """多个字段合并后的词频"""
+    counts: Counter = Counter()
+    for text in texts:
+        if text:
+            counts.update(tokenize(text))
+    return counts
@@ -0,0 +1,34 @@
+"""后台任务（进程内 SQLite 队列 / Celery）
+
+Celery 后端按需从 ``core.jobs.celery_queue`` 导入。
+"""
+
+from .base import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RETRYING,
+    RUNNING,
+    SUCCEEDED,
+    REGISTRY,
+    JobCancelled,
+    JobContext,
+    JobQueue,
+    job,
+)
+from .local import LocalJobQueue
+
+__all__ = [
+    "CANCELLED",
+    "FAILED",
+    "QUEUED",
+    "REGISTRY",
+    "RETRYING",
+    "RUNNING",
+    "SUCCEEDED",
+    "JobCancelled",
+    "JobContext",
+    "JobQueue",
+    "LocalJobQueue",
+    "job",
+]
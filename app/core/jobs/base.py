@@ -0,0 +1,149 @@
+"""后台任务的注册表、执行上下文和队列接口
+
+任务函数用 ``@job`` 注册，签名为 ``fn(ctx)`` 或 ``fn(ctx, params)``；
+params 是注册时声明的 Pydantic 模型，提交时即校验，参数错误不会进入
+队列。任务函数可以是同步函数（在线程/worker 中执行）或协程函数。
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+@dataclass
+class JobSpec:
+    """已注册的任务"""
+
+    name: str
+    fn: Callable
+    params: Optional[Type[BaseModel]] = None
+    max_retries: int = 0
+    retry_backoff: float = 2.0
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self.fn)
+
+    def validate(self, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """校验参数并转为可 JSON 序列化的字典"""
+        if self.params is None:
+            if params:
+                raise ValueError(f"任务 {self.name} 不接受参数")
+            return {}
+        return self.params.model_validate(params or {}).model_dump(
+            mode="json"
+        )
+
+    def call(self, ctx: "JobContext", params: Dict[str, Any]):
+        """调用任务函数；协程函数返回协程，由调用方负责等待"""
+        if self.params is None:
+            return self.fn(ctx)
+        return self.fn(ctx, self.params.model_validate(params))
+
+    def retry_delay(self, attempt: int) -> float:
+        """第 attempt 次失败后的重试等待(秒)，指数退避"""
+        return self.retry_backoff * 2 ** (attempt - 1)
+
+
+REGISTRY: Dict[str, JobSpec] = {}
+
+
+def job(
+    name: str,
+    params: Optional[Type[BaseModel]] = None,
+    max_retries: int = 0,
+    retry_backoff: float = 2.0,
+):
+    """注册后台任务的装饰器"""
+
+    def decorator(fn: Callable) -> Callable:
+        REGISTRY[name] = JobSpec(name, fn, params, max_retries, retry_backoff)
+        return fn
+
+    return decorator
+
+
+def get_spec(name: str) -> JobSpec:
+    spec = REGISTRY.get(name)
+    if spec is None:
+        raise ValueError(f"未注册的任务: {name}，可选: {sorted(REGISTRY)}")
+    return spec
+
+
+class JobContext:
+    """传给任务函数的执行上下文：上报进度、检查取消"""
+
+    def __init__(
+        self,
+        job_id: str,
+        attempt: int = 1,
+        reporter: Optional[Callable[[float, Optional[str]], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ):
+        self.job_id = job_id
+        self.attempt = attempt
+        self._reporter = reporter
+        self._cancelled = cancelled
+
+    def progress(self, value: float, message: Optional[str] = None):
+        """上报进度（0~1）"""
+        if self._reporter is not None:
+            self._reporter(min(max(float(value), 0.0), 1.0), message)
+
+    def check_cancelled(self):
+        """任务已被取消时抛出 JobCancelled"""
+        if self._cancelled is not None and self._cancelled():
+            raise JobCancelled()
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def now() -> float:
+    return time.time()
+
+
+class JobQueue:
+    """后台任务队列接口"""
+
+    backend = "base"
+
+    async def start(self):
+        """启动（进程内队列在此启动执行协程）"""
+
+    async def stop(self):
+        """停止"""
+
+    async def submit(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_retries: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """提交任务，立即返回任务信息（含 job_id）"""
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询任务状态、进度和结果，任务不存在时返回 None"""
+        raise NotImplementedError
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """取消任务：排队中的直接取消，运行中的协作式取消"""
+        raise NotImplementedError
@@ -0,0 +1,196 @@
+"""基于 Celery 的后台任务队列
+
+所有注册任务共用一个 Celery 任务 ``jobs.run``，按任务名分发。进度通过
+``update_state(state="PROGRESS")`` 写入结果后端，失败按注册时的重试
+次数和指数退避调用 ``retry``。worker 启动方式见 ``worker.py``。
+
+取消时除了 ``revoke``（只能丢弃未开始的任务）还在结果后端写入取消
+标记：revoke 不更新运行中任务的状态，prefork 子进程也看不到 worker
+主进程的已撤销集合。运行中的任务在 ``ctx.check_cancelled()`` 时读到
+标记并停止。结果后端须为 Redis 等键值存储。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from celery import Celery
+from celery.result import AsyncResult
+from celery.worker import state as worker_state
+
+from .base import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RETRYING,
+    RUNNING,
+    SUCCEEDED,
+    JobCancelled,
+    JobContext,
+    JobQueue,
+    get_spec,
+    new_job_id,
+)
+
+# Celery 状态 -> 任务状态
+STATES = {
+    "PENDING": QUEUED,
+    "RECEIVED": QUEUED,
+    "STARTED": RUNNING,
+    "PROGRESS": RUNNING,
+    "RETRY": RETRYING,
+    "SUCCESS": SUCCEEDED,
+    "FAILURE": FAILED,
+    "REVOKED": CANCELLED,
+}
+
+# 结果后端中取消标记的键前缀
+CANCEL_KEY_PREFIX = "jobs-cancel-"
+
+
+class CeleryJobQueue(JobQueue):
+    """Celery/Redis 任务队列"""
+
+    backend = "celery"
+
+    def __init__(
+        self,
+        broker_url: str,
+        result_backend: str,
+        result_ttl: float = 7 * 86400,
+        async_cleanup: Optional[Callable[[], Awaitable]] = None,
+    ):
+        self.async_cleanup = async_cleanup
+        self.app = Celery(
+            "ai_smart_formula", broker=broker_url, backend=result_backend
+        )
+        self.app.conf.update(
+            task_serializer="json",
+            result_serializer="json",
+            accept_content=["json"],
+            task_track_started=True,
+            # 结果中保存任务名和参数，查询状态时可以返回
+            result_extended=True,
+            result_expires=int(result_ttl),
+            task_acks_late=True,
+            worker_prefetch_multiplier=1,
+        )
+        queue = self
+
+        @self.app.task(bind=True, name="jobs.run")
+        def run_job(task, name, params, max_retries=None):
+            return queue._run(task, name, params, max_retries)
+
+        self.run_task = run_job
+
+    def _cancel_key(self, job_id: str) -> str:
+        return f"{CANCEL_KEY_PREFIX}{job_id}"
+
+    def _cancelled(self, job_id: str) -> bool:
+        """任务是否已被请求取消（worker 中调用）"""
+        if job_id in worker_state.revoked:
+            return True
+        return self.app.backend.get(self._cancel_key(job_id)) is not None
+
+    def _run(
+        self,
+        task,
+        name: str,
+        params: Dict[str, Any],
+        max_retries: Optional[int] = None,
+    ):
+        """worker 中执行注册任务"""
+        spec = get_spec(name)
+        ctx = JobContext(
+            task.request.id,
+            attempt=task.request.retries + 1,
+            reporter=lambda value, message: task.update_state(
+                state="PROGRESS",
+                meta={"progress": value, "message": message},
+            ),
+            cancelled=lambda: self._cancelled(task.request.id),
+        )
+        try:
+            if spec.is_async:
+                return asyncio.run(self._run_async(spec, ctx, params))
+            return spec.call(ctx, params)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            if self._cancelled(task.request.id):
+                raise JobCancelled() from e
+            if max_retries is None:
+                max_retries = spec.max_retries
+            if task.request.retries < max_retries:
+                raise task.retry(
+                    exc=e,
+                    countdown=spec.retry_delay(task.request.retries + 1),
+                    max_retries=max_retries,
+                )
+            raise
+
+    async def _run_async(self, spec, ctx: JobContext, params: Dict[str, Any]):
+        try:
+            return await spec.call(ctx, params)
+        finally:
+            # 每个任务一个事件循环，连接池不能跨循环复用
+            if self.async_cleanup is not None:
+                await self.async_cleanup()
+
+    async def submit(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_retries: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        params = get_spec(name).validate(params)
+        job_id = new_job_id()
+        kwargs: Dict[str, Any] = {"name": name, "params": params}
+        if max_retries is not None:
+            kwargs["max_retries"] = max_retries
+        # 发布消息是阻塞调用，放到线程中避免 broker 抖动卡住事件循环
+        await asyncio.to_thread(
+            self.run_task.apply_async, kwargs=kwargs, task_id=job_id
+        )
+        return {"job_id": job_id, "name": name, "status": QUEUED}
+
+    def _info(self, job_id: str) -> Dict[str, Any]:
+        result = AsyncResult(job_id, app=self.app)
+        # Celery 无法区分未知ID和尚未被领取的任务，二者都是 PENDING
+        state = result.state
+        meta = result.info if isinstance(result.info, dict) else {}
+        kwargs = result.kwargs or {}
+        info = {
+            "job_id": job_id,
+            "name": kwargs.get("name", result.name),
+            "backend": self.backend,
+            "status": STATES.get(state, state.lower()),
+            "progress": meta.get("progress", 0.0),
+            "message": meta.get("message"),
+            "result": None,
+            "error": None,
+            "attempts": (result.retries or 0) + 1,
+            "finished_at": (
+                result.date_done.isoformat() if result.date_done else None
+            ),
+        }
+        if state == "SUCCESS":
+            info["progress"] = 1.0
+            info["result"] = result.result
+        elif isinstance(result.info, JobCancelled):
+            info["status"] = CANCELLED
+        elif state in ("FAILURE", "RETRY"):
+            info["error"] = f"{type(result.info).__name__}: {result.info}"
+        return info
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._info, job_id)
+
+    def _cancel(self, job_id: str):
+        # 未开始的任务被 worker 丢弃；已开始的任务不强制终止，
+        # 由取消标记让其在下一个检查点停止（标记随结果一起过期）
+        self.app.control.revoke(job_id)
+        self.app.backend.set(self._cancel_key(job_id), "1")
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        await asyncio.to_thread(self._cancel, job_id)
+        return await self.get(job_id)
@@ -0,0 +1,429 @@
+"""进程内后台任务队列（SQLite 持久化）
+
+用于测试和单机部署：任务记录写入 SQLite（``:memory:`` 时不落盘），
+由事件循环中的若干执行协程领取执行。同步任务在线程中运行，协程任务
+直接在事件循环中运行。
+
+多个进程可共用同一个数据库文件：领取任务时记录所属进程和租约到期
+时间，运行期间定期续租。只有租约已过期（所属进程崩溃或被杀）的
+运行中任务才会重新排队，其他进程正在执行的任务不受影响。取消运行中
+的任务时在记录上标记 cancel_requested，执行该任务的进程（不论是哪个）
+在 ``ctx.check_cancelled()`` 时读到标记并停止，协程任务由续租时的
+检查直接取消。
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .base import (
+    CANCELLED,
+    FAILED,
+    QUEUED,
+    RETRYING,
+    RUNNING,
+    SUCCEEDED,
+    REGISTRY,
+    JobCancelled,
+    JobContext,
+    JobQueue,
+    get_spec,
+    new_job_id,
+    now,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_retries INTEGER NOT NULL DEFAULT 0,
+    run_after REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    lease_until REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS ix_jobs_finished ON jobs (finished_at);
+"""
+
+# 旧版本数据库缺少的列
+MIGRATIONS = {
+    "owner": "TEXT",
+    "lease_until": "REAL",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# 清理过期任务记录的最小间隔(秒)
+PURGE_INTERVAL = 600
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat() if value else None
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "job_id": row["id"],
+        "name": row["name"],
+        "backend": LocalJobQueue.backend,
+        "status": row["status"],
+        "progress": row["progress"],
+        "message": row["message"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "attempts": row["attempts"],
+        "max_retries": row["max_retries"],
+        "created_at": _timestamp(row["created_at"]),
+        "started_at": _timestamp(row["started_at"]),
+        "finished_at": _timestamp(row["finished_at"]),
+    }
+
+
+class LocalJobQueue(JobQueue):
+    """SQLite 持久化的进程内任务队列"""
+
+    backend = "local"
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        result_ttl: float = 7 * 86400,
+        lease: float = 60.0,
+    ):
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.lease = lease
+        # 本进程的标识，pid 可能被复用，加随机后缀
+        self.owner = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._db: Optional[sqlite3.Connection] = None
+        # 同步任务在线程中上报进度，连接访问统一加锁
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        # 运行中的任务；协程任务记录其 Task 以便直接取消
+        self._running: Dict[str, Optional[asyncio.Task]] = {}
+        self._cancel_requested: Set[str] = set()
+        self._last_purge = 0.0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """首次使用时打开数据库，导入模块不产生文件"""
+        if self._db is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(jobs)")
+            }
+            for column, kind in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(
+                        f"ALTER TABLE jobs ADD COLUMN {column} {kind}"
+                    )
+            self._db = conn
+        return self._db
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    def _fetchone(self, sql: str, args: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()
+
+    def _fetchall(self, sql: str, args: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def _recover(self):
+        """租约过期（所属进程已退出）的运行中任务重新排队
+
+        已请求取消的直接标记为已取消。
+        """
+        self._execute(
+            "UPDATE jobs SET status = CASE WHEN cancel_requested "
+            "THEN ? ELSE ? END, run_after = ?, finished_at = CASE "
+            "WHEN cancel_requested THEN ? END, owner = NULL "
+            "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+            (CANCELLED, RETRYING, now(), now(), RUNNING, now()),
+        )
+
+    def _renew(self):
+        """为本进程运行中的任务续租"""
+        self._execute(
+            "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+            (now() + self.lease, self.owner, RUNNING),
+        )
+
+    def _release(self):
+        """队列停止时把本进程未跑完的任务立即交还队列（已请求取消的除外）"""
+        self._execute(
+            "UPDATE jobs SET status = CASE WHEN cancel_requested "
+            "THEN ? ELSE ? END, run_after = ?, finished_at = CASE "
+            "WHEN cancel_requested THEN ? END, owner = NULL "
+            "WHERE owner = ? AND status = ?",
+            (CANCELLED, RETRYING, now(), now(), self.owner, RUNNING),
+        )
+
+    def _cancelled(self, job_id: str) -> bool:
+        """任务是否已被请求取消（可能由其他进程发出）"""
+        if job_id in self._cancel_requested:
+            return True
+        row = self._fetchone(
+            "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+        )
+        if row is not None and row["cancel_requested"]:
+            self._cancel_requested.add(job_id)
+            return True
+        return False
+
+    def _poll_cancels(self):
+        """取消其他进程请求取消的本进程协程任务"""
+        rows = self._fetchall(
+            "SELECT id FROM jobs WHERE owner = ? AND status = ? "
+            "AND cancel_requested",
+            (self.owner, RUNNING),
+        )
+        for row in rows:
+            job_id = row["id"]
+            task = self._running.get(job_id)
+            if job_id in self._cancel_requested or task is None:
+                # 线程中的同步任务在 check_cancelled 时自行读到标记
+                continue
+            self._cancel_requested.add(job_id)
+            task.cancel()
+
+    async def _keep_alive(self):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            self._renew()
+            self._recover()
+            self._poll_cancels()
+
+    def _purge(self):
+        self._last_purge = now()
+        self._execute(
+            "DELETE FROM jobs WHERE finished_at < ?",
+            (now() - self.result_ttl,),
+        )
+
+    async def start(self):
+        if self._workers:
+            return
+        self._recover()
+        self._purge()
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.concurrency)
+        ]
+        self._heartbeat = asyncio.create_task(self._keep_alive())
+
+    async def stop(self):
+        workers, self._workers = self._workers, []
+        if self._heartbeat is not None:
+            workers.append(self._heartbeat)
+            self._heartbeat = None
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._db is not None:
+            self._release()
+
+    async def submit(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_retries: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        spec = get_spec(name)
+        params = spec.validate(params)
+        job_id = new_job_id()
+        created = now()
+        self._execute(
+            "INSERT INTO jobs (id, name, params, status, max_retries, "
+            "run_after, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                name,
+                json.dumps(params),
+                QUEUED,
+                spec.max_retries if max_retries is None else max_retries,
+                created,
+                created,
+            ),
+        )
+        self._wakeup.set()
+        return {"job_id": job_id, "name": name, "status": QUEUED}
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetchone("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _row_to_dict(row) if row else None
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ? "
+            "WHERE id = ? AND status IN (?, ?)",
+            (CANCELLED, now(), job_id, QUEUED, RETRYING),
+        )
+        # 运行中的任务可能在其他进程，标记后由执行进程协作式停止
+        self._execute(
+            "UPDATE jobs SET cancel_requested = 1 "
+            "WHERE id = ? AND status = ?",
+            (job_id, RUNNING),
+        )
+        if job_id in self._running:
+            self._cancel_requested.add(job_id)
+            # 线程中的同步任务只能等其调用 ctx.check_cancelled()
+            task = self._running[job_id]
+            if task is not None:
+                task.cancel()
+        return await self.get(job_id)
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        return self._fetchone(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, "
+            "started_at = ?, progress = 0, message = NULL, "
+            "owner = ?, lease_until = ?, cancel_requested = 0 "
+            "WHERE id = (SELECT id FROM jobs WHERE status IN (?, ?) "
+            "AND run_after <= ? ORDER BY created_at LIMIT 1) "
+            "RETURNING *",
+            (
+                RUNNING,
+                now(),
+                self.owner,
+                now() + self.lease,
+                QUEUED,
+                RETRYING,
+                now(),
+            ),
+        )
+
+    def _report(self, job_id: str, value: float, message: Optional[str]):
+        self._execute(
+            "UPDATE jobs SET progress = ?, message = ? "
+            "WHERE id = ? AND owner = ?",
+            (value, message, job_id, self.owner),
+        )
+
+    def _update(self, job_id: str, **fields):
+        """更新本进程持有的任务；租约已被收回时不覆盖新的执行"""
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        self._execute(
+            f"UPDATE jobs SET {columns} WHERE id = ? AND owner = ?",
+            (*fields.values(), job_id, self.owner),
+        )
+
+    def _finish(self, job_id: str, status: str, **fields):
+        fields.update(status=status, finished_at=now())
+        if status == SUCCEEDED:
+            fields["progress"] = 1.0
+        self._update(job_id, **fields)
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            row = self._claim()
+            if row is None:
+                if now() - self._last_purge > PURGE_INTERVAL:
+                    self._purge()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(row)
+
+    async def _run(self, row: sqlite3.Row):
+        job_id, attempt = row["id"], row["attempts"]
+        spec = REGISTRY.get(row["name"])
+        if spec is None:
+            self._finish(job_id, FAILED, error=f"未注册的任务: {row['name']}")
+            return
+        ctx = JobContext(
+            job_id,
+            attempt=attempt,
+            reporter=lambda value, message: self._report(
+                job_id, value, message
+            ),
+            cancelled=lambda: self._cancelled(job_id),
+        )
+        params = json.loads(row["params"])
+        if spec.is_async:
+            future = asyncio.ensure_future(spec.call(ctx, params))
+        else:
+            future = asyncio.ensure_future(
+                asyncio.to_thread(spec.call, ctx, params)
+            )
+        self._running[job_id] = future if spec.is_async else None
+        try:
+            result = await future
+        except JobCancelled:
+            self._finish(job_id, CANCELLED)
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                # 队列停止：stop() 把任务交还队列
+                raise
+            self._finish(job_id, CANCELLED)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if self._cancelled(job_id):
+                self._finish(job_id, CANCELLED, error=error)
+            elif attempt <= row["max_retries"]:
+                self._update(
+                    job_id,
+                    status=RETRYING,
+                    error=error,
+                    run_after=now() + spec.retry_delay(attempt),
+                )
+            else:
+                self._finish(job_id, FAILED, error=error)
+        else:
+            self._finish(
+                job_id,
+                SUCCEEDED,
+                result=json.dumps(result, default=str),
+                error=None,
+            )
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
@@ -0,0 +1,17 @@
+"""CPU 密集任务的进程池卸载"""
+
+from .executor import (
+    JobCancelled,
+    OffloadExecutor,
+    OffloadRejected,
+    check_cancelled,
+)
+from .shm import SharedArrayRef
+
+__all__ = [
+    "JobCancelled",
+    "OffloadExecutor",
+    "OffloadRejected",
+    "SharedArrayRef",
+    "check_cancelled",
+]
@@ -0,0 +1,276 @@
+"""按任务类型划分的进程池卸载执行器
+
+CPU 密集的工作（嵌入、优化、查重、图像处理、大 JSON 校验等）在事件循环
+里执行会阻塞所有请求。执行器为每种任务类型维护独立的进程池：
+- 有界队列：每个池最多容纳 workers + max_queue 个未完成任务，超出时
+  立即拒绝（OffloadRejected），由上层返回 503 而不是无限排队
+- 取消：调用方被取消（例如客户端断开）时，尚未开始的任务直接从队列
+  撤销；已在运行的任务通过共享内存中的状态位通知，任务函数可调用
+  ``check_cancelled()`` 协作式退出
+- 结果中的大 NumPy 数组通过共享内存回传
+- 统计排队数、运行数、完成/失败/取消/拒绝次数和运行耗时分位数
+"""
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import CancelledError as FutureCancelledError
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .shm import export_arrays, import_arrays, release_arrays
+
+# 任务槽状态
+QUEUED, RUNNING, CANCEL_REQUESTED, DONE = 0, 1, 2, 3
+
+# 子进程内当前任务的 (状态内存, 槽位)
+_current_job: Optional[tuple] = None
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class OffloadRejected(Exception):
+    """任务队列已满"""
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+def check_cancelled():
+    """在子进程的任务函数中调用：若任务已被取消则抛出 JobCancelled"""
+    if _current_job is not None:
+        flags, slot = _current_job
+        if flags.buf[slot] == CANCEL_REQUESTED:
+            raise JobCancelled()
+
+
+def _run_job(
+    flags_name: str,
+    slot: int,
+    min_shared_bytes: int,
+    fn: Callable,
+    args: tuple,
+    kwargs: dict,
+):
+    """子进程入口：登记状态、执行任务、导出大数组"""
+    global _current_job
+    flags = _attached.get(flags_name)
+    if flags is None:
+        flags = _attached[flags_name] = shared_memory.SharedMemory(
+            name=flags_name
+        )
+    if flags.buf[slot] == CANCEL_REQUESTED:
+        raise JobCancelled()
+    flags.buf[slot] = RUNNING
+    _current_job = (flags, slot)
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        _current_job = None
+    elapsed = time.perf_counter() - start
+    return export_arrays(result, min_shared_bytes), elapsed
+
+
+class _JobPool:
+    """单一任务类型的进程池"""
+
+    def __init__(
+        self,
+        job_type: str,
+        workers: int,
+        max_queue: int,
+        mp_context,
+        min_shared_bytes: int,
+    ):
+        self.job_type = job_type
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.min_shared_bytes = min_shared_bytes
+        self.mp_context = mp_context
+        self.executor = self._new_executor()
+        self.broken = False
+        # 每个任务槽一个字节的状态位，父子进程共享
+        self.flags = shared_memory.SharedMemory(
+            create=True, size=self.capacity
+        )
+        self.free_slots: List[int] = list(range(self.capacity))
+        self.durations: deque = deque(maxlen=1000)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=self.mp_context
+        )
+
+    def ensure_executor(self):
+        """子进程异常退出会使整个池不可用，此时重建进程池"""
+        if self.broken:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._new_executor()
+            self.broken = False
+
+    def acquire_slot(self) -> int:
+        if not self.free_slots:
+            self.rejected += 1
+            raise OffloadRejected(f"{self.job_type} 任务队列已满")
+        slot = self.free_slots.pop()
+        self.flags.buf[slot] = QUEUED
+        return slot
+
+    def release_slot(self, slot: int):
+        self.flags.buf[slot] = DONE
+        self.free_slots.append(slot)
+
+    def metrics(self) -> Dict[str, Any]:
+        active = [
+            self.flags.buf[s]
+            for s in range(self.capacity)
+            if s not in self.free_slots
+        ]
+        durations = np.array(self.durations) if self.durations else None
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "queued": sum(1 for s in active if s == QUEUED),
+            "running": sum(1 for s in active if s != QUEUED),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "run_time": (
+                {
+                    "count": len(durations),
+                    "mean": float(durations.mean()),
+                    "p50": float(np.percentile(durations, 50)),
+                    "p95": float(np.percentile(durations, 95)),
+                    "max": float(durations.max()),
+                }
+                if durations is not None
+                else None
+            ),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.flags.close()
+        self.flags.unlink()
+
+
+class OffloadExecutor:
+    """进程池卸载执行器，由应用 lifespan 启动和关闭"""
+
+    def __init__(
+        self,
+        pools: Dict[str, int],
+        max_queue: int = 32,
+        start_method: str = "spawn",
+        min_shared_bytes: int = 1 << 20,
+    ):
+        self.pool_sizes = dict(pools)
+        self.max_queue = max_queue
+        self.start_method = start_method
+        self.min_shared_bytes = min_shared_bytes
+        self._pools: Dict[str, _JobPool] = {}
+
+    @property
+    def started(self) -> bool:
+        return bool(self._pools)
+
+    def start(self):
+        """创建各任务类型的进程池（子进程按需启动）"""
+        if self.started:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        for job_type, workers in self.pool_sizes.items():
+            self._pools[job_type] = _JobPool(
+                job_type,
+                workers,
+                self.max_queue,
+                context,
+                self.min_shared_bytes,
+            )
+
+    def shutdown(self):
+        """取消排队中的任务并等待运行中的任务结束"""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown()
+
+    def _pool(self, job_type: str) -> _JobPool:
+        pool = self._pools.get(job_type) or self._pools.get("default")
+        if pool is None:
+            raise KeyError(f"未配置的任务类型: {job_type}")
+        return pool
+
+    async def submit(
+        self, job_type: str, fn: Callable, *args, **kwargs
+    ) -> Any:
+        """在对应进程池中执行 fn(*args, **kwargs) 并等待结果
+
+        fn 及其参数必须可 pickle（模块级函数）。调用方被取消时任务也会
+        被取消。执行器未启动时（脚本、测试等场景）退化为线程中执行。
+        """
+        if not self.started:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+        pool = self._pool(job_type)
+        pool.ensure_executor()
+        slot = pool.acquire_slot()
+        future = pool.executor.submit(
+            _run_job,
+            pool.flags.name,
+            slot,
+            pool.min_shared_bytes,
+            fn,
+            args,
+            kwargs,
+        )
+
+        def on_done(f):
+            if f.cancelled():
+                pool.cancelled += 1
+            elif f.exception() is not None:
+                error = f.exception()
+                if isinstance(error, JobCancelled):
+                    pool.cancelled += 1
+                else:
+                    pool.failed += 1
+                    pool.broken |= isinstance(error, BrokenProcessPool)
+            else:
+                result, elapsed = f.result()
+                pool.completed += 1
+                pool.durations.append(elapsed)
+                if abandoned:
+                    release_arrays(result)
+            pool.release_slot(slot)
+
+        abandoned = False
+        loop = asyncio.get_running_loop()
+        # 回调在执行器的管理线程中触发，转回事件循环线程更新统计
+        future.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(on_done, f)
+        )
+        try:
+            result, _ = await asyncio.wrap_future(future)
+        except (asyncio.CancelledError, FutureCancelledError):
+            abandoned = True
+            if not future.cancel():
+                # 已在运行：通知子进程协作式退出
+                pool.flags.buf[slot] = CANCEL_REQUESTED
+            raise
+        return import_arrays(result)
+
+    def metrics(self) -> Dict[str, Any]:
+        """各任务类型的队列深度和运行耗时统计"""
+        return {
+            job_type: pool.metrics() for job_type, pool in self._pools.items()
+        }
@@ -0,0 +1,84 @@
+"""通过共享内存传递 NumPy 数组
+
+子进程把结果中较大的数组写入 ``SharedMemory``，结果里只留下一个描述符
+（名称、形状、类型）经管道回传；主进程按描述符挂载、拷出数组后立即
+释放共享内存段。大数组因此不需要 pickle 序列化再经管道传输。
+"""
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedArrayRef:
+    """共享内存中数组的描述符"""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def _to_shared(array: np.ndarray) -> SharedArrayRef:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        target[...] = array
+        return SharedArrayRef(shm.name, array.shape, array.dtype.str)
+    finally:
+        shm.close()
+
+
+def _from_shared(ref: SharedArrayRef) -> np.ndarray:
+    shm = shared_memory.SharedMemory(name=ref.name)
+    try:
+        view = np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=shm.buf)
+        return view.copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def export_arrays(value: Any, min_bytes: int) -> Any:
+    """把结果中不小于 min_bytes 的数组替换为共享内存描述符（子进程侧）"""
+    if isinstance(value, np.ndarray):
+        if value.nbytes >= min_bytes and value.dtype != object:
+            return _to_shared(value)
+        return value
+    if isinstance(value, dict):
+        return {k: export_arrays(v, min_bytes) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [export_arrays(v, min_bytes) for v in value]
+        return type(value)(items) if isinstance(value, tuple) else items
+    return value
+
+
+def import_arrays(value: Any) -> Any:
+    """把描述符还原为数组并释放共享内存（主进程侧）"""
+    if isinstance(value, SharedArrayRef):
+        return _from_shared(value)
+    if isinstance(value, dict):
+        return {k: import_arrays(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [import_arrays(v) for v in value]
+        return type(value)(items) if isinstance(value, tuple) else items
+    return value
+
+
+def release_arrays(value: Any):
+    """结果不再需要时（如任务已取消）释放其中的共享内存段"""
+    if isinstance(value, SharedArrayRef):
+        try:
+            shm = shared_memory.SharedMemory(name=value.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+    elif isinstance(value, dict):
+        for item in value.values():
+            release_arrays(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            release_arrays(item)
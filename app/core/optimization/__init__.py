@@ -0,0 +1,6 @@
+"""配方参数优化（代理模型 + 批量贝叶斯优化）"""
+
+from .acquisition import generate_candidates, thompson_batch
+from .surrogate import RFFSurrogate
+
+__all__ = ["RFFSurrogate", "generate_candidates", "thompson_batch"]
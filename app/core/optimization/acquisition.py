@@ -0,0 +1,108 @@
+"""批量采集：候选点生成与并行 Thompson 采样
+
+每轮从代理模型权重后验中采样 B 组权重，每组在候选池上取最大值对应的
+点，得到一批 B 个互不相同的建议点。不同的后验样本自然落在不同区域，
+批内无需额外的多样性惩罚。
+
+候选池按块切分后在线程池中并行打分：numpy 的矩阵乘法和 cos 运算会
+释放 GIL，因此多个块可以同时占用多个核心。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .surrogate import RFFSurrogate
+
+
+def generate_candidates(
+    X: np.ndarray,
+    y: np.ndarray,
+    count: int,
+    fixed: Optional[np.ndarray] = None,
+    local_ratio: float = 0.5,
+    local_scale: float = 0.05,
+    rng: Optional[np.random.Generator] = None,
+    bounds: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> np.ndarray:
+    """生成候选点：一部分在可行域内均匀采样，一部分在最优历史点附近扰动
+
+    fixed 为长度 d 的数组，非 NaN 的维度固定为该值；bounds 为 [0,1]
+    空间中的可行域 (下界, 上界)，缺省为整个 [0,1]。历史点可以在可行域
+    之外，其附近的扰动点会被截断到可行域内。
+    """
+    rng = rng or np.random.default_rng()
+    dim = X.shape[1]
+    num_local = int(count * local_ratio) if len(X) else 0
+    low, high = bounds if bounds is not None else (0.0, 1.0)
+
+    candidates = low + rng.random((count, dim)) * np.subtract(high, low)
+    if num_local:
+        top = max(1, len(X) // 10)
+        elite = X[np.argsort(-y)[:top]]
+        centers = elite[rng.integers(0, len(elite), num_local)]
+        local = centers + rng.normal(0, local_scale, (num_local, dim))
+        candidates[:num_local] = np.clip(local, low, high)
+
+    if fixed is not None:
+        mask = ~np.isnan(fixed)
+        candidates[:, mask] = fixed[mask]
+    return candidates
+
+
+def _score_chunk(
+    model: RFFSurrogate, chunk: np.ndarray, weights: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """返回块内每个采样列得分最高的 k 个候选（局部下标, 得分）"""
+    scores = model.features(chunk) @ weights
+    k = min(k, len(chunk))
+    top = np.argpartition(-scores, k - 1, axis=0)[:k]
+    return top, np.take_along_axis(scores, top, axis=0)
+
+
+def thompson_batch(
+    model: RFFSurrogate,
+    candidates: np.ndarray,
+    batch_size: int,
+    workers: Optional[int] = None,
+    chunk_size: int = 2048,
+    check: Optional[Callable[[], None]] = None,
+) -> List[int]:
+    """并行 Thompson 采样，返回选中的候选下标（互不相同）
+
+    check 在每块打分之前调用，可抛出异常中止采样。
+    """
+    weights = model.sample_weights(batch_size)
+    starts = range(0, len(candidates), chunk_size)
+    workers = workers or os.cpu_count() or 1
+
+    def score(start):
+        if check is not None:
+            check()
+        chunk = candidates[start : start + chunk_size]
+        top, values = _score_chunk(model, chunk, weights, batch_size)
+        return top + start, values
+
+    if workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(score, starts))
+    else:
+        parts = [score(start) for start in starts]
+
+    # 合并各块：每列得到全局得分降序的候选下标
+    indices = np.concatenate([p[0] for p in parts])
+    values = np.concatenate([p[1] for p in parts])
+    order = np.argsort(-values, axis=0)
+    ranked = np.take_along_axis(indices, order, axis=0)
+
+    chosen: List[int] = []
+    seen = set()
+    for column in range(batch_size):
+        for index in ranked[:, column]:
+            if int(index) not in seen:
+                seen.add(int(index))
+                chosen.append(int(index))
+                break
+    return chosen
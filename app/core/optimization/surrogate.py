@@ -0,0 +1,152 @@
+"""随机傅里叶特征贝叶斯回归代理模型
+
+用随机傅里叶特征近似 RBF 核高斯过程：
+    φ(x) = sqrt(2/D) · cos(x·Ω + b)，Ω ~ N(0, 1/ℓ²)，b ~ U(0, 2π)
+在特征空间做贝叶斯线性回归，训练代价 O(n·D²)，与历史实验数量线性相关，
+数千条实验也能在几十毫秒内完成拟合；预测均值/方差和 Thompson 采样
+都只是矩阵乘法。
+
+输入需预先缩放到 [0, 1]，目标值在内部标准化。长度尺度（按 sqrt(d)
+缩放）和噪声在一个小网格上按边际似然选择，选择时只用一部分样本，
+选定后再用全部样本拟合一次。
+"""
+
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 长度尺度相对 sqrt(d)：[0,1]^d 中两点的典型距离随 sqrt(d) 增长
+DEFAULT_LENGTHSCALES = (0.25, 0.5, 1.0)
+DEFAULT_NOISES = (1e-2, 1e-1, 0.5)
+# 超参数选择使用的最大样本数
+SELECTION_SAMPLES = 1000
+
+
+class RFFSurrogate:
+    """RFF 贝叶斯线性回归"""
+
+    def __init__(
+        self,
+        num_features: int = 512,
+        lengthscales: Sequence[float] = DEFAULT_LENGTHSCALES,
+        noises: Sequence[float] = DEFAULT_NOISES,
+        seed: Optional[int] = None,
+    ):
+        self.num_features = num_features
+        self.lengthscales = tuple(lengthscales)
+        self.noises = tuple(noises)
+        self.rng = np.random.default_rng(seed)
+        self.lengthscale: Optional[float] = None
+        self.noise: Optional[float] = None
+
+    def features(self, X: np.ndarray) -> np.ndarray:
+        """把输入映射到随机傅里叶特征空间"""
+        projection = X @ (self._omega / self.lengthscale)
+        projection += self._phase
+        np.cos(projection, out=projection)
+        projection *= np.sqrt(2.0 / self.num_features)
+        return projection
+
+    def _posterior(
+        self, gram: np.ndarray, phi_y: np.ndarray, noise: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # 先验 w ~ N(0, I)，噪声方差 noise：
+        # A = ΦᵀΦ / noise + I，后验均值 A⁻¹Φᵀy / noise，协方差 A⁻¹
+        A = gram / noise
+        A[np.diag_indices_from(A)] += 1.0
+        chol = np.linalg.cholesky(A)
+        mean = _cho_solve(chol, phi_y / noise)
+        return chol, mean
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        check: Optional[Callable[[], None]] = None,
+    ) -> "RFFSurrogate":
+        """拟合模型，X 形状 (n, d) 且已缩放到 [0,1]，y 形状 (n,)
+
+        check 在每个长度尺度和最终拟合之前调用，可抛出异常中止拟合
+        （例如卸载任务的取消检查）。
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n, dim = X.shape
+        self._y_mean = float(y.mean())
+        self._y_std = float(y.std()) or 1.0
+        target = (y - self._y_mean) / self._y_std
+
+        self._omega = self.rng.standard_normal((dim, self.num_features))
+        self._phase = self.rng.uniform(0, 2 * np.pi, self.num_features)
+
+        subset = np.arange(n)
+        if n > SELECTION_SAMPLES:
+            subset = self.rng.choice(n, SELECTION_SAMPLES, replace=False)
+        X_sel, y_sel = X[subset], target[subset]
+
+        best = None
+        for relative in self.lengthscales:
+            if check is not None:
+                check()
+            self.lengthscale = relative * np.sqrt(dim)
+            phi = self.features(X_sel)
+            # 每个长度尺度做一次特征分解，所有噪声取值共用
+            eigvals, eigvecs = np.linalg.eigh(phi.T @ phi)
+            projected = eigvecs.T @ (phi.T @ y_sel)
+            for noise in self.noises:
+                evidence = _log_evidence(
+                    eigvals, projected, y_sel @ y_sel, noise, len(subset)
+                )
+                if best is None or evidence > best[0]:
+                    best = (evidence, self.lengthscale, noise)
+
+        _, self.lengthscale, self.noise = best
+        if check is not None:
+            check()
+        phi = self.features(X)
+        self._chol, self._mean = self._posterior(
+            phi.T @ phi, phi.T @ target, self.noise
+        )
+        return self
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """预测均值和标准差（原始目标尺度）"""
+        phi = self.features(np.asarray(X, dtype=np.float64))
+        mean = phi @ self._mean
+        half = np.linalg.solve(self._chol, phi.T)
+        var = np.einsum("ij,ij->j", half, half)
+        return (
+            mean * self._y_std + self._y_mean,
+            np.sqrt(var) * self._y_std,
+        )
+
+    def sample_weights(self, count: int) -> np.ndarray:
+        """从权重后验中采样，返回形状 (D, count)"""
+        z = self.rng.standard_normal((self.num_features, count))
+        # A = LLᵀ，协方差 A⁻¹ 的采样为 L⁻ᵀz
+        noise = np.linalg.solve(self._chol.T, z)
+        return self._mean[:, None] + noise
+
+    def to_original_scale(self, values: np.ndarray) -> np.ndarray:
+        return values * self._y_std + self._y_mean
+
+
+def _cho_solve(chol: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.linalg.solve(chol.T, np.linalg.solve(chol, b))
+
+
+def _log_evidence(eigvals, projected, y_norm2, noise, n) -> float:
+    """贝叶斯线性回归的对数边际似然（省略常数项）
+
+    在 ΦᵀΦ 的特征基下计算：eigvals 为特征值，projected 为 Vᵀ·Φᵀy，
+    y_norm2 为 yᵀy。
+    """
+    eigvals = np.clip(eigvals, 0.0, None)
+    # 特征基下的后验均值坐标
+    coords = projected / (eigvals + noise)
+    residual = (
+        y_norm2 - 2 * coords @ projected + (eigvals * coords) @ coords
+    )
+    fit = residual / noise + coords @ coords
+    log_det = np.log1p(eigvals / noise).sum() + n * np.log(noise)
+    return float(-0.5 * (fit + log_det))
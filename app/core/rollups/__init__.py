@@ -0,0 +1,5 @@
+"""按天分桶的指标汇总"""
+
+from .daily import DailyRollup, day_date, day_number
+
+__all__ = ["DailyRollup", "day_date", "day_number"]
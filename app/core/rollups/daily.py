@@ -0,0 +1,273 @@
+"""按天分桶的指标汇总
+
+每个键（如配方ID）一条按天排序的序列，每天保存各指标的和与非空
+计数；任意时间窗口的平均值由窗口内各天的和相加得到，只需一次二分
+查找和一次切片求和，与原始记录条数无关。
+
+同时记录每条原始记录当前计入的 (键, 天, 指标值)，记录被修改或删除时
+先减去旧贡献再加上新贡献，因此可以随写入增量维护。
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+EPOCH = date(1970, 1, 1)
+
+
+def day_number(value: date) -> int:
+    """日期 -> 自 1970-01-01 起的天数"""
+    return (value - EPOCH).days
+
+
+def day_date(number: int) -> date:
+    return date.fromordinal(EPOCH.toordinal() + number)
+
+
+class _Series:
+    """单个键的按天序列：days 升序，values 每行为 [各指标和, 各指标计数]"""
+
+    __slots__ = ("days", "values")
+
+    def __init__(self, days: np.ndarray, values: np.ndarray):
+        self.days = days
+        self.values = values
+
+    def add(self, day: int, delta: np.ndarray):
+        i = int(np.searchsorted(self.days, day))
+        if i < len(self.days) and self.days[i] == day:
+            self.values[i] += delta
+            return
+        self.days = np.insert(self.days, i, day)
+        self.values = np.insert(self.values, i, delta, axis=0)
+
+    def slice(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo = int(np.searchsorted(self.days, start))
+        hi = int(np.searchsorted(self.days, end, side="right"))
+        return self.days[lo:hi], self.values[lo:hi]
+
+
+class DailyRollup:
+    """按 (键, 天) 汇总若干指标的和与计数"""
+
+    def __init__(self, metrics: Sequence[str]):
+        self.metrics = tuple(metrics)
+        self.series: Dict[int, _Series] = {}
+        self.watermark: Optional[datetime] = None
+        # 原始记录当前的贡献，按记录ID索引；doc_key 为 -1 表示未计入
+        self.doc_key = np.full(1024, -1, dtype=np.int64)
+        self.doc_day = np.zeros(1024, dtype=np.int32)
+        self.doc_values = np.full(
+            (1024, len(self.metrics)), np.nan, dtype=np.float64
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int((self.doc_key >= 0).sum())
+
+    def _grow(self, doc_id: int):
+        size = len(self.doc_key)
+        if doc_id < size:
+            return
+        while size <= doc_id:
+            size *= 2
+        doc_key = np.full(size, -1, dtype=np.int64)
+        doc_key[: len(self.doc_key)] = self.doc_key
+        doc_day = np.zeros(size, dtype=np.int32)
+        doc_day[: len(self.doc_day)] = self.doc_day
+        doc_values = np.full((size, len(self.metrics)), np.nan)
+        doc_values[: len(self.doc_values)] = self.doc_values
+        self.doc_key, self.doc_day, self.doc_values = (
+            doc_key,
+            doc_day,
+            doc_values,
+        )
+
+    @staticmethod
+    def _delta(values: np.ndarray, sign: int) -> np.ndarray:
+        present = ~np.isnan(values)
+        return sign * np.concatenate(
+            [np.where(present, values, 0.0), present.astype(np.float64)]
+        )
+
+    def _apply(self, key: int, day: int, values: np.ndarray, sign: int):
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _Series(
+                np.zeros(0, dtype=np.int32),
+                np.zeros((0, 2 * len(self.metrics))),
+            )
+        series.add(day, self._delta(values, sign))
+
+    def _unlink(self, doc_id: int):
+        """减去记录的旧贡献（调用方持锁）"""
+        if doc_id >= len(self.doc_key) or self.doc_key[doc_id] < 0:
+            return
+        self._apply(
+            int(self.doc_key[doc_id]),
+            int(self.doc_day[doc_id]),
+            self.doc_values[doc_id],
+            -1,
+        )
+        self.doc_key[doc_id] = -1
+        self.doc_values[doc_id] = np.nan
+
+    def upsert(
+        self,
+        doc_id: int,
+        key: Optional[int],
+        day: int,
+        values: Sequence[Optional[float]],
+    ):
+        """写入记录的贡献，key 为空时视为删除"""
+        row = np.array(
+            [np.nan if v is None else float(v) for v in values],
+            dtype=np.float64,
+        )
+        with self._lock:
+            self._unlink(doc_id)
+            if key is None:
+                return
+            self._grow(doc_id)
+            self._apply(key, day, row, 1)
+            self.doc_key[doc_id] = key
+            self.doc_day[doc_id] = day
+            self.doc_values[doc_id] = row
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self._unlink(doc_id)
+
+    def live_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.doc_key >= 0)
+
+    def bulk_load(
+        self,
+        doc_ids: np.ndarray,
+        keys: np.ndarray,
+        days: np.ndarray,
+        values: np.ndarray,
+    ):
+        """一次性载入（覆盖现有内容），values 中缺失值为 NaN"""
+        with self._lock:
+            self.series = {}
+            self.doc_key[:] = -1
+            self.doc_values[:] = np.nan
+            if not len(doc_ids):
+                return
+            self._grow(int(doc_ids.max()))
+            self.doc_key[doc_ids] = keys
+            self.doc_day[doc_ids] = days
+            self.doc_values[doc_ids] = values
+
+            present = ~np.isnan(values)
+            rows = np.hstack(
+                [np.where(present, values, 0.0), present.astype(np.float64)]
+            )
+            order = np.lexsort((days, keys))
+            keys, days, rows = keys[order], days[order], rows[order]
+            # 相同 (键, 天) 的行合并为一个桶
+            new_bucket = np.ones(len(keys), dtype=bool)
+            new_bucket[1:] = (keys[1:] != keys[:-1]) | (days[1:] != days[:-1])
+            starts = np.flatnonzero(new_bucket)
+            sums = np.add.reduceat(rows, starts, axis=0)
+            bucket_keys, bucket_days = keys[starts], days[starts]
+            key_starts = np.flatnonzero(
+                np.r_[True, bucket_keys[1:] != bucket_keys[:-1]]
+            )
+            key_ends = np.r_[key_starts[1:], len(bucket_keys)]
+            for lo, hi in zip(key_starts, key_ends):
+                self.series[int(bucket_keys[lo])] = _Series(
+                    bucket_days[lo:hi].astype(np.int32), sums[lo:hi].copy()
+                )
+
+    def _summarize(self, values: np.ndarray) -> Dict[str, Dict[str, float]]:
+        totals = values.sum(axis=0) if len(values) else None
+        m = len(self.metrics)
+        result = {}
+        for i, metric in enumerate(self.metrics):
+            total = float(totals[i]) if totals is not None else 0.0
+            count = int(totals[m + i]) if totals is not None else 0
+            result[metric] = {
+                "avg": total / count if count else None,
+                "count": count,
+                "sum": total,
+            }
+        return result
+
+    def window(
+        self, key: int, start: int, end: int
+    ) -> Dict[str, Dict[str, float]]:
+        """[start, end] 天内各指标的平均值、计数和总和"""
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return self._summarize(np.zeros((0, 2 * len(self.metrics))))
+            _, values = series.slice(start, end)
+            return self._summarize(values)
+
+    def daily(
+        self, key: int, start: int, end: int
+    ) -> List[Tuple[int, Dict[str, Dict[str, float]]]]:
+        """[start, end] 内有数据的每一天的汇总"""
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                return []
+            days, values = series.slice(start, end)
+            return [
+                (int(day), self._summarize(row[None, :]))
+                for day, row in zip(days, values)
+            ]
+
+    def save(self, path: str):
+        """原子地把快照写入磁盘"""
+        with self._lock:
+            live = self.live_ids()
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "metrics": self.metrics,
+                "watermark": self.watermark,
+                "doc_ids": live,
+                "doc_key": self.doc_key[live],
+                "doc_day": self.doc_day[live],
+                "doc_values": self.doc_values[live],
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(
+        cls, path: str, metrics: Sequence[str]
+    ) -> Optional["DailyRollup"]:
+        """从快照恢复（桶由记录贡献重新汇总），指标不一致时返回 None"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != SNAPSHOT_VERSION:
+            return None
+        if tuple(state["metrics"]) != tuple(metrics):
+            return None
+        rollup = cls(metrics)
+        rollup.bulk_load(
+            state["doc_ids"],
+            state["doc_key"],
+            state["doc_day"],
+            state["doc_values"],
+        )
+        rollup.watermark = state["watermark"]
+        return rollup
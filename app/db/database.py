@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from config.settings import settings
+from db import pool
+from db.replica import ReplicaRouter
+from db.slow_query import slow_query_log
+from fastapi import Request
+from utils import deadline
+from utils.auth import client_key
 from utils.logger import setup_logger
-from typing import Generator, AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Generator, AsyncGenerator, AsyncIterator
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
@@ -12,25 +20,37 @@ from sqlalchemy.ext.asyncio import (
 
 logger = setup_logger()
 
-# 创建同步数据库引擎
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.debug,
-)
+# 创建同步数据库引擎（连接池参数见 db/pool.py）
+engine = pool.create(create_engine, settings.database_url)
+
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://").replace(
+        "sqlite://", "sqlite+aiosqlite://"
+    )
+
 
 # 创建异步数据库引擎（用于异步操作）
-async_database_url = settings.database_url.replace(
-    "postgresql://", "postgresql+asyncpg://"
+async_database_url = _async_url(settings.database_url)
+async_engine = pool.create(
+    create_async_engine, async_database_url, asynchronous=True
 )
-async_engine = create_async_engine(
-    async_database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    echo=settings.debug,
+
+# 只读副本引擎（未配置时只读会话也走主库）
+replicas = ReplicaRouter(
+    [
+        pool.create(create_async_engine, _async_url(url), asynchronous=True)
+        for url in settings.database_replica_urls
+    ],
+    retry_interval=settings.replica_retry_interval,
+    read_your_writes=settings.replica_read_your_writes,
 )
 
+# 慢查询日志（db/slow_query.py）
+if settings.slow_query_enabled:
+    for _engine in (engine, async_engine, *replicas.engines):
+        slow_query_log.install(_engine)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 AsyncSessionLocal = async_sessionmaker(
@@ -41,6 +61,33 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+@event.listens_for(Session, "after_begin")
+def apply_statement_timeout(session, transaction, connection):
+    """请求有截止时间时，把剩余时间设为本事务的 statement_timeout"""
+    remaining = deadline.remaining()
+    if remaining is None:
+        return
+    deadline.check()
+    if connection.dialect.name == "postgresql":
+        timeout_ms = max(1, int(remaining * 1000))
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {timeout_ms}"
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def mark_flush_write(session, flush_context):
+    """记录会话写入过数据，用于只读副本的写后读窗口"""
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def mark_execute_write(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
 def get_db() -> Generator[Session, None, None]:
     """获取数据库会话（同步）"""
     db = SessionLocal()
@@ -54,19 +101,70 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
-    """获取数据库会话（异步）"""
-    async with AsyncSessionLocal() as session:
+@asynccontextmanager
+async def _session_scope(
+    session: AsyncSession,
+) -> AsyncIterator[AsyncSession]:
+    async with session:
         try:
             yield session
         except Exception as e:
-            logger.error(f"异步数据库会话错误: {e}")
             await session.rollback()
+            if deadline.expired() and isinstance(
+                e, (DBAPIError, deadline.DeadlineExceeded)
+            ):
+                # statement_timeout 触发的取消按请求超时处理
+                raise deadline.DeadlineExceeded() from e
+            logger.error(f"异步数据库会话错误: {e}")
             raise
         finally:
             await session.close()
 
 
+async def get_async_db(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """获取数据库会话（异步）"""
+    async with _session_scope(AsyncSessionLocal()) as session:
+        yield session
+        if replicas.enabled and session.info.get("wrote"):
+            replicas.record_write(client_key(request))
+
+
+async def _read_session(request: Request) -> AsyncSession:
+    """选择只读会话的引擎：写后读窗口内或副本都不可用时用主库"""
+    if not replicas.enabled:
+        return AsyncSessionLocal()
+    if replicas.recently_wrote(client_key(request)):
+        replicas.count_primary("recent_write")
+        return AsyncSessionLocal()
+    for index in replicas.candidates():
+        session = AsyncSessionLocal(bind=replicas.engines[index])
+        try:
+            # 先取连接，副本不可达时换下一个
+            await session.connection()
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            replicas.mark_down(index, e)
+            continue
+        replicas.count_read(index)
+        return session
+    replicas.count_primary("unavailable")
+    return AsyncSessionLocal()
+
+
+async def get_read_db(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """获取只读数据库会话（异步），配置了只读副本时路由到副本
+
+    用于可以容忍复制延迟的查询；结果会写入缓存的读取仍应使用
+    get_async_db，避免把副本上的旧数据写回缓存。
+    """
+    async with _session_scope(await _read_session(request)) as session:
+        yield session
+
+
 async def init_db():
     """初始化数据库"""
     try:
@@ -82,5 +180,7 @@ async def init_db():
 async def close_db():
     """关闭数据库连接"""
     await async_engine.dispose()
+    for replica in replicas.engines:
+        await replica.dispose()
     engine.dispose()
     logger.info("数据库连接已关闭")
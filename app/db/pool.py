@@ -0,0 +1,243 @@
+"""数据库连接池
+
+按配置生成同步/异步引擎的连接池参数，并统计连接池的实时状态：
+取连接次数、等待耗时、超时、占用时长、新建与失效连接数、探活结果。
+
+探活策略 idle 只在连接空闲超过阈值时执行一次 SELECT 1，繁忙时
+连续复用的连接不再为每次取出多付一个往返。
+
+pgbouncer 事务池模式下同一会话的语句可能落到不同的服务端连接，
+asyncpg 的预编译语句缓存会失效或重名，因此关闭两级语句缓存，
+并为每条预编译语句生成唯一名称。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    NullPool,
+    Pool,
+    QueuePool,
+)
+
+from config.settings import settings
+
+PRE_PING_POLICIES = ("always", "idle", "never")
+
+
+def _percentile(samples, q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PoolStats:
+    """连接池累计计数和最近若干次的等待/占用耗时"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self._holds = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.wait_max = 0.0
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self._waits.append(seconds)
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_hold(self, seconds: float):
+        with self._lock:
+            self._holds.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._waits)
+            holds = list(self._holds)
+            counters = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+            }
+            wait_max = self.wait_max
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            **counters,
+            "wait_ms": {
+                "p50": ms(_percentile(waits, 0.5)),
+                "p95": ms(_percentile(waits, 0.95)),
+                "max": ms(wait_max),
+            },
+            "hold_ms": {
+                "p50": ms(_percentile(holds, 0.5)),
+                "p95": ms(_percentile(holds, 0.95)),
+                "max": ms(max(holds) if holds else None),
+            },
+        }
+
+
+def _instrumented(base: type, stats: PoolStats) -> type:
+    """生成记录取连接等待时间的连接池类
+
+    每个引擎一个子类，engine.dispose() 重建连接池后统计仍然保留。
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except PoolTimeoutError:
+            stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    return type(
+        f"Instrumented{base.__name__}",
+        (base,),
+        {"connect": connect, "stats": stats},
+    )
+
+
+def _ping_idle(engine: Engine, stats: PoolStats, idle: float):
+    """取出空闲超过 idle 秒的连接时先探活，失败则让连接池重连"""
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, record, proxy):
+        now = time.monotonic()
+        checked_in = record.info.get("checked_in_at")
+        if checked_in is None or now - checked_in < idle:
+            return
+        stats.incr("pings")
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            stats.incr("ping_failures")
+            raise DisconnectionError(f"连接探活失败: {e}") from e
+
+
+def _track(engine: Engine, stats: PoolStats):
+    """登记连接创建、失效和占用时长"""
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, record):
+        stats.incr("connects")
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, record, proxy):
+        record.info["checked_out_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, record):
+        now = time.monotonic()
+        checked_out = record.info.pop("checked_out_at", None)
+        if checked_out is not None:
+            stats.record_hold(now - checked_out)
+        record.info["checked_in_at"] = now
+
+    @event.listens_for(engine, "invalidate")
+    def invalidate(dbapi_connection, record, exception):
+        stats.incr("invalidations")
+
+
+def engine_options(
+    url: str, asynchronous: bool, stats: PoolStats
+) -> Dict[str, Any]:
+    """按配置生成 create_engine/create_async_engine 的连接池参数"""
+    policy = settings.db_pool_pre_ping
+    if policy not in PRE_PING_POLICIES:
+        raise ValueError(f"未知的探活策略: {policy}")
+    options: Dict[str, Any] = {
+        "pool_pre_ping": policy == "always",
+        "echo": settings.debug,
+    }
+    if settings.db_pool_size <= 0:
+        options["poolclass"] = _instrumented(NullPool, stats)
+    else:
+        base = AsyncAdaptedQueuePool if asynchronous else QueuePool
+        options.update(
+            poolclass=_instrumented(base, stats),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    if url.startswith("postgresql+asyncpg://"):
+        options["connect_args"] = asyncpg_connect_args()
+    return options
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def asyncpg_connect_args() -> Dict[str, Any]:
+    """asyncpg 的语句缓存参数"""
+    if settings.db_pgbouncer:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
+
+
+def create(factory, url: str, asynchronous: bool = False):
+    """创建引擎并挂上连接池统计"""
+    stats = PoolStats()
+    engine = factory(url, **engine_options(url, asynchronous, stats))
+    sync_engine = engine.sync_engine if asynchronous else engine
+    _track(sync_engine, stats)
+    if settings.db_pool_pre_ping == "idle":
+        _ping_idle(sync_engine, stats, settings.db_pool_ping_idle)
+    return engine
+
+
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    """连接池当前占用和累计统计"""
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # 负数表示尚未建满常驻连接
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
@@ -0,0 +1,25 @@
+"""Redis连接管理"""
+
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from config.settings import settings
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """获取共享的异步Redis客户端（懒加载）"""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _redis
+
+
+async def close_redis():
+    """关闭Redis连接"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
@@ -0,0 +1,102 @@
+"""只读副本路由
+
+只读会话按轮询分配到健康的副本；取连接失败的副本暂停使用
+``replica_retry_interval`` 秒，所有副本都不可用时回到主库。
+
+副本存在复制延迟：请求方刚写入后立即读取可能读不到自己的修改。
+写会话提交过修改后记录请求方，之后 ``replica_read_your_writes`` 秒内
+该请求方的只读会话仍走主库。记录保存在进程内，多进程部署时各进程
+分别判断，窗口应覆盖写请求之后紧随的读请求。
+"""
+
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class ReplicaRouter:
+    """副本轮询、健康状态和写后读窗口"""
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        retry_interval: float = 10.0,
+        read_your_writes: float = 5.0,
+    ):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self.read_your_writes = read_your_writes
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = [0.0] * len(engines)
+        self._writes: Dict[str, float] = {}
+        self.reads = [0] * len(engines)
+        self.failures = [0] * len(engines)
+        # 回到主库的只读会话：recent_write 写后读窗口，unavailable 无可用副本
+        self.primary_reads = {"recent_write": 0, "unavailable": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def record_write(self, key: str):
+        """登记请求方刚提交过写入"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._writes) >= 10000:
+                self._writes = {
+                    k: until
+                    for k, until in self._writes.items()
+                    if until > now
+                }
+            self._writes[key] = now + self.read_your_writes
+
+    def recently_wrote(self, key: str) -> bool:
+        until = self._writes.get(key)
+        return until is not None and until > time.monotonic()
+
+    def candidates(self) -> List[int]:
+        """本次依次尝试的健康副本下标，起点轮转"""
+        now = time.monotonic()
+        with self._lock:
+            start = self._next
+            self._next = (start + 1) % len(self.engines)
+        count = len(self.engines)
+        order = [(start + i) % count for i in range(count)]
+        return [i for i in order if self._down_until[i] <= now]
+
+    def mark_down(self, index: int, error: Exception):
+        with self._lock:
+            self.failures[index] += 1
+            self._down_until[index] = time.monotonic() + self.retry_interval
+        logger.warning(
+            f"只读副本 {index} 不可用，{self.retry_interval}s 内不再使用: "
+            f"{error}"
+        )
+
+    def count_read(self, index: int):
+        with self._lock:
+            self.reads[index] += 1
+
+    def count_primary(self, reason: str):
+        with self._lock:
+            self.primary_reads[reason] += 1
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "index": i,
+                "host": engine.url.host,
+                "healthy": self._down_until[i] <= now,
+                "reads": self.reads[i],
+                "failures": self.failures[i],
+            }
+            for i, engine in enumerate(self.engines)
+        ]
@@ -0,0 +1,318 @@
+"""慢查询日志
+
+在引擎的 cursor 执行事件上计时每条语句，超过 ``slow_query_threshold_ms``
+的语句按指纹（去掉字面量、参数占位符和 IN/VALUES 列表长度后的语句）
+汇总次数、耗时和发起的路由，并记录一条日志。参数只保留类型，不记录值。
+
+SELECT 语句在新的连接上补做一次执行计划（PostgreSQL 为
+``EXPLAIN (ANALYZE, BUFFERS)``，SQLite 为 ``EXPLAIN QUERY PLAN``）：
+异步引擎在事件循环中另起任务，同步引擎交给单独的线程，不阻塞原请求。
+同一指纹在 ``slow_query_explain_interval`` 秒内只采集一次，全局同时
+只采集一条；EXPLAIN ANALYZE 会真正执行语句，写语句和加锁的查询不采集，
+采集所在事务最后回滚。
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.settings import settings
+from utils import request_context
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 采集执行计划所用连接的执行选项，避免计划语句本身再被记录
+_SKIP = "slow_query_skip"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+_SPACE = re.compile(r"\s+")
+_LOCKING = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE)\b", re.I)
+_WRITE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b", re.I)
+
+
+def normalize(statement: str) -> str:
+    """去掉字面量和参数，合并 IN 列表与多行 VALUES"""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(?+)", sql)
+    sql = _ROWS.sub(r"\1, ...", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _kind(value: Any) -> Optional[str]:
+    return None if value is None else f"<{type(value).__name__}>"
+
+
+def redact(parameters: Any, executemany: bool = False, limit: int = 20):
+    """只保留参数类型"""
+    if executemany:
+        rows = list(parameters or ())
+        return {
+            "rows": len(rows),
+            "first": redact(rows[0], limit=limit) if rows else None,
+        }
+    if isinstance(parameters, dict):
+        items = list(parameters.items())
+        redacted = {key: _kind(value) for key, value in items[:limit]}
+        if len(items) > limit:
+            redacted["..."] = f"+{len(items) - limit}"
+        return redacted
+    if isinstance(parameters, (list, tuple)):
+        redacted = [_kind(value) for value in parameters[:limit]]
+        if len(parameters) > limit:
+            redacted.append(f"+{len(parameters) - limit}")
+        return redacted
+    return _kind(parameters)
+
+
+def explainable(statement: str, executemany: bool) -> bool:
+    """只对只读查询采集执行计划"""
+    head = statement.lstrip()[:6].upper()
+    if executemany or head not in ("SELECT", "WITH"):
+        return False
+    if _LOCKING.search(statement):
+        return False
+    return head == "SELECT" or not _WRITE.search(statement)
+
+
+class SlowQueryLog:
+    """按语句指纹汇总慢查询"""
+
+    def __init__(
+        self,
+        threshold_ms: float = 200.0,
+        explain: bool = True,
+        explain_interval: float = 300.0,
+        explain_timeout: float = 10.0,
+        max_fingerprints: int = 500,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout = explain_timeout
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._explaining: Optional[str] = None
+        self._runners: Dict[Engine, Union[Engine, AsyncEngine]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def install(self, engine: Union[Engine, AsyncEngine]):
+        """在引擎上挂计时事件"""
+        sync_engine = (
+            engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        )
+        self._runners[sync_engine] = engine
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, many):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, many):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        if context.execution_options.get(_SKIP):
+            return
+        self.record(conn, statement, parameters, many, elapsed_ms)
+
+    def record(
+        self,
+        conn: Connection,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed_ms: float,
+    ):
+        normalized = normalize(statement)
+        key = fingerprint(normalized)
+        route = request_context.current_route()
+        redacted = redact(parameters, executemany)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = {
+                    "fingerprint": key,
+                    "statement": normalized,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": Counter(),
+                    "plan": None,
+                    "plan_at": None,
+                    "plan_error": None,
+                }
+                if len(self._entries) >= self.max_fingerprints:
+                    self._entries.popitem(last=False)
+            self._entries[key] = entry
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = datetime.now().isoformat()
+            entry["parameters"] = redacted
+            entry["routes"][route or "-"] += 1
+            explain = self._claim_explain(entry, statement, executemany)
+        logger.warning(
+            f"慢查询 {elapsed_ms:.1f}ms [{key}] {route or '-'}: "
+            f"{normalized} 参数={redacted}"
+        )
+        if explain:
+            self._schedule_explain(conn, key, statement, parameters)
+
+    def _claim_explain(
+        self, entry: Dict[str, Any], statement: str, executemany: bool
+    ) -> bool:
+        if not self.explain or self._explaining is not None:
+            return False
+        if not explainable(statement, executemany):
+            return False
+        now = time.time()
+        plan_at = entry["plan_at"]
+        if plan_at is not None and now - plan_at < self.explain_interval:
+            return False
+        self._explaining = entry["fingerprint"]
+        entry["plan_at"] = now
+        return True
+
+    def _schedule_explain(
+        self, conn: Connection, key: str, statement: str, parameters: Any
+    ):
+        runner = self._runners.get(conn.engine)
+        try:
+            if isinstance(runner, AsyncEngine):
+                task = asyncio.get_running_loop().create_task(
+                    self._explain_async(runner, key, statement, parameters)
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                return
+            if runner is not None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        1, thread_name_prefix="slow-query-explain"
+                    )
+                self._executor.submit(
+                    self._explain_sync, runner, key, statement, parameters
+                )
+                return
+        except RuntimeError as e:
+            logger.debug(f"无法采集执行计划: {e}")
+        self._explaining = None
+
+    async def _explain_async(
+        self, engine: AsyncEngine, key: str, statement: str, parameters: Any
+    ):
+        try:
+            async with engine.connect() as conn:
+                plan = await conn.run_sync(
+                    self._explain, statement, parameters
+                )
+            self._store_plan(key, plan, None)
+        except Exception as e:
+            self._store_plan(key, None, e)
+
+    def _explain_sync(
+        self, engine: Engine, key: str, statement: str, parameters: Any
+    ):
+        try:
+            with engine.connect() as conn:
+                plan = self._explain(conn, statement, parameters)
+            self._store_plan(key, plan, None)
+        except Exception as e:
+            self._store_plan(key, None, e)
+
+    def _explain(self, conn: Connection, statement: str, parameters: Any):
+        conn.execution_options(**{_SKIP: True})
+        with conn.begin() as transaction:
+            if conn.dialect.name == "postgresql":
+                timeout_ms = max(1, int(self.explain_timeout * 1000))
+                conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {timeout_ms}"
+                )
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement,
+                    parameters,
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+            elif conn.dialect.name == "sqlite":
+                rows = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                plan = [row[-1] for row in rows]
+            else:
+                plan = None
+            transaction.rollback()
+        return plan
+
+    def _store_plan(self, key: str, plan: Any, error: Optional[Exception]):
+        if error is not None:
+            logger.warning(f"慢查询 [{key}] 执行计划采集失败: {error}")
+        with self._lock:
+            self._explaining = None
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["plan"] = plan
+                entry["plan_error"] = None if error is None else str(error)
+
+    def snapshot(
+        self, order_by: str = "total_ms", limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """按总耗时（或 max_ms / count）排序的指纹汇总"""
+        with self._lock:
+            entries = [
+                {
+                    **entry,
+                    "mean_ms": entry["total_ms"] / entry["count"],
+                    "routes": dict(entry["routes"].most_common(5)),
+                }
+                for entry in self._entries.values()
+            ]
+        for entry in entries:
+            if entry["plan_at"] is not None:
+                entry["plan_at"] = datetime.fromtimestamp(
+                    entry["plan_at"]
+                ).isoformat()
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    explain=settings.slow_query_explain,
+    explain_interval=settings.slow_query_explain_interval,
+    explain_timeout=settings.slow_query_explain_timeout,
+    max_fingerprints=settings.slow_query_max_fingerprints,
+)
@@ -1,11 +1,43 @@
 from config.settings import settings
 from utils.logger import setup_logger
-from api.routes import health_router
+from api.routes import (
+    attachments_router,
+    diagnostics_router,
+    experiments_router,
+    feedback_router,
+    health_router,
+    jobs_router,
+    recipes_router,
+    search_router,
+    tasks_router,
+    users_router,
+)
+from api.conditional import NotModified
+from api.middleware import DeadlineMiddleware, RequestContextMiddleware
+from db.redis import close_redis
+from services.attachment_service import (
+    AttachmentNotFound,
+    attachment_service,
+)
+from services.cache_service import cache_service
+from services.counter_service import counter_service
+from services.dedup_service import dedup_service
+from services.experiment_report_service import experiment_report_service
+from services.facet_service import facet_service
+from services.feedback_cluster_service import feedback_cluster_service
+from services.feedback_rollup_service import feedback_rollup_service
+from services.fulltext_service import fulltext_service
+from services.job_service import job_queue
+from services.offload_service import offload_executor
+from core.offload import OffloadRejected
+from services.admission_service import AdmissionRejected
+from utils.deadline import DeadlineExceeded
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import sys
 from pathlib import Path
@@ -26,10 +58,33 @@ async def lifespan(app: FastAPI):
     logger.info(f"启动 {settings.app_name} v{settings.app_version}")
     logger.info(f"调试模式: {settings.debug}")
     logger.info(f"数据库: {settings.database_url}")
+    await cache_service.start()
+    await counter_service.start()
+    await dedup_service.start()
+    await facet_service.start()
+    await fulltext_service.start()
+    await feedback_cluster_service.start()
+    await feedback_rollup_service.start()
+    await experiment_report_service.start()
+    await attachment_service.start()
+    offload_executor.start()
+    await job_queue.start()
 
     yield
 
     # 关闭时执行
+    await job_queue.stop()
+    await asyncio.to_thread(offload_executor.shutdown)
+    await attachment_service.stop()
+    await experiment_report_service.stop()
+    await feedback_rollup_service.stop()
+    await feedback_cluster_service.stop()
+    await fulltext_service.stop()
+    await facet_service.stop()
+    await dedup_service.stop()
+    await counter_service.stop()
+    await cache_service.stop()
+    await close_redis()
     logger.info("应用关闭")
 
 
@@ -42,6 +97,17 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# 请求截止时间：超时取消处理并返回 504（放在 CORS 内层，504 也带跨域头）
+app.add_middleware(
+    DeadlineMiddleware,
+    default=settings.request_timeout,
+    maximum=settings.request_timeout_max,
+    routes=settings.request_timeout_routes,
+)
+
+# 记录当前请求供慢查询日志等取得路由（在截止时间中间件外层设置）
+app.add_middleware(RequestContextMiddleware)
+
 # 添加CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -52,6 +118,77 @@ app.add_middleware(
 )
 
 
+# 条件请求命中时返回 304，不生成响应体
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    """客户端缓存仍然有效"""
+    return Response(status_code=304, headers=exc.validators.headers())
+
+
+# 卸载任务队列已满时提示客户端稍后重试
+@app.exception_handler(OffloadRejected)
+async def offload_rejected_handler(request: Request, exc: OffloadRejected):
+    """进程池过载"""
+    logger.warning(f"任务被拒绝: {exc}")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "error": "服务繁忙",
+            "message": str(exc),
+            "path": str(request.url),
+        },
+    )
+
+
+# 限流返回 429，过载返回 503，均提示重试等待时间
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(
+    request: Request, exc: AdmissionRejected
+):
+    """准入控制拒绝"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "error": "请求被拒绝",
+            "message": str(exc),
+            "path": str(request.url),
+        },
+    )
+
+
+# 数据库语句超时、进程池任务超时等
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """请求超过截止时间"""
+    logger.warning(f"请求超时: {request.url.path}")
+    return JSONResponse(
+        status_code=504,
+        content={
+            "error": "请求超时",
+            "message": str(exc),
+            "path": str(request.url),
+        },
+    )
+
+
+# 附件字段引用了不存在的附件
+@app.exception_handler(AttachmentNotFound)
+async def attachment_not_found_handler(
+    request: Request, exc: AttachmentNotFound
+):
+    """附件引用无效"""
+    return JSONResponse(
+        status_code=422,
+        content={
+            "error": "附件不存在",
+            "message": str(exc),
+            "path": str(request.url),
+        },
+    )
+
+
 # 全局异常处理器
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -69,6 +206,15 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # 注册路由
 app.include_router(health_router, prefix="/api/v1", tags=["健康检查"])
+app.include_router(recipes_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
+app.include_router(users_router, prefix="/api/v1")
+app.include_router(experiments_router, prefix="/api/v1")
+app.include_router(tasks_router, prefix="/api/v1")
+app.include_router(search_router, prefix="/api/v1")
+app.include_router(feedback_router, prefix="/api/v1")
+app.include_router(attachments_router, prefix="/api/v1")
+app.include_router(diagnostics_router, prefix="/api/v1")
 
 
 # 根路径
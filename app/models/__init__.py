@@ -1,15 +1,23 @@
 """数据模型包初始化文件"""
 
 # 导入所有数据库模型，确保在创建表时被SQLAlchemy发现
+from .blob import Blob
 from .experiment import Experiment
 from .feedback import Feedback
 from .recipe import Recipe
+from .recipe_ingredient import RecipeIngredient
+from .recipe_lineage import RecipeLineage
+from .task import Task
 from .user import User
 
 # 导出所有模型
 __all__ = [
     "User",
     "Recipe",
+    "RecipeIngredient",
+    "RecipeLineage",
     "Experiment",
     "Feedback",
+    "Task",
+    "Blob",
 ]
@@ -0,0 +1,53 @@
+"""附件内容数据模型"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class Blob(Base):
+    """按 SHA-256 寻址的附件内容
+
+    内容相同的附件只存一份；ref_count 为实验、反馈的附件字段中引用该
+    内容的次数，归零并超过宽限期后由垃圾回收删除。
+    """
+
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True, comment="内容SHA-256")
+    size = Column(BigInteger, nullable=False, comment="字节数")
+    content_type = Column(String(100), comment="MIME类型")
+    filename = Column(String(255), comment="首次上传时的文件名")
+    ref_count = Column(
+        Integer, nullable=False, default=0, index=True, comment="引用次数"
+    )
+
+    # 时间戳（updated_at 在上传或引用变化时刷新，用于回收宽限期）
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), comment="创建时间"
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间",
+    )
+
+    def __repr__(self):
+        return (
+            f"<Blob(sha256='{self.sha256}', size={self.size}, "
+            f"ref_count={self.ref_count})>"
+        )
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            "sha256": self.sha256,
+            "size": self.size,
+            "content_type": self.content_type,
+            "filename": self.filename,
+            "ref_count": self.ref_count,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
@@ -123,7 +123,8 @@ class Feedback(Base):
 
     # 标签和元数据
     tags = Column(JSON, comment="标签(JSON数组)")
-    metadata = Column(JSON, comment="元数据(JSON格式)")
+    # metadata 是 Declarative 保留属性名，属性改名但保持数据库列名不变
+    meta_data = Column("metadata", JSON, comment="元数据(JSON格式)")
 
     # 时间戳
     created_at = Column(
@@ -188,7 +189,7 @@ class Feedback(Base):
             "helpfulness_votes": self.helpfulness_votes,
             "view_count": self.view_count,
             "tags": self.tags,
-            "metadata": self.metadata,
+            "metadata": self.meta_data,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
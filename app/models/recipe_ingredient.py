@@ -0,0 +1,171 @@
+"""配方原料倒排索引模型
+
+把 ``Recipe.ingredients`` JSON 展开为每个原料一行，按 CAS 号（缺失时按
+归一化名称）建立索引，使“含有/不含某些化学品”和用量范围查询走索引，
+而不必扫描每个 JSON。用量同时换算到基准单位（g / mL / mol）存储。
+
+索引表在 Recipe 的 after_insert / after_update 事件中于同一事务内维护。
+"""
+
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    delete,
+    event,
+    insert,
+    inspect,
+)
+
+from app.db.database import Base
+
+from .recipe import Recipe
+
+# 单位 -> (基准单位, 换算系数)
+UNIT_CONVERSIONS: Dict[str, Tuple[str, float]] = {
+    "kg": ("g", 1000.0),
+    "g": ("g", 1.0),
+    "mg": ("g", 1e-3),
+    "μg": ("g", 1e-6),
+    "ug": ("g", 1e-6),
+    "l": ("ml", 1000.0),
+    "ml": ("ml", 1.0),
+    "μl": ("ml", 1e-3),
+    "ul": ("ml", 1e-3),
+    "mol": ("mol", 1.0),
+    "mmol": ("mol", 1e-3),
+    "μmol": ("mol", 1e-6),
+    "umol": ("mol", 1e-6),
+}
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    if not unit:
+        return ""
+    # NFKC 会把微符号 µ(U+00B5) 转为希腊字母 μ(U+03BC)，与换算表一致
+    return unicodedata.normalize("NFKC", unit).strip().lower()
+
+
+def to_base_amount(
+    amount: Any, unit: Optional[str]
+) -> Tuple[Optional[float], str]:
+    """把用量换算到基准单位，未知单位原样返回"""
+    unit = normalize_unit(unit)
+    try:
+        value = float(amount)
+    except (TypeError, ValueError):
+        return None, unit
+    base_unit, factor = UNIT_CONVERSIONS.get(unit, (unit, 1.0))
+    return value * factor, base_unit
+
+
+def ingredient_key(
+    cas_number: Optional[str] = None, name: Optional[str] = None
+) -> Optional[str]:
+    """索引键：优先使用CAS号，否则使用归一化名称"""
+    if cas_number and cas_number.strip():
+        return cas_number.strip()
+    if name and name.strip():
+        normalized = unicodedata.normalize("NFKC", name).strip().lower()
+        return f"name:{normalized}"
+    return None
+
+
+class RecipeIngredient(Base):
+    """配方原料索引表"""
+
+    __tablename__ = "recipe_ingredients"
+
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(
+        Integer,
+        ForeignKey("recipes.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="配方ID",
+    )
+    position = Column(Integer, nullable=False, comment="原料在列表中的位置")
+    ingredient_key = Column(
+        String(200), nullable=False, comment="索引键(CAS号或name:名称)"
+    )
+    name = Column(String(200), comment="原料名称")
+    cas_number = Column(String(50), comment="CAS号")
+    amount = Column(Float, comment="原始用量")
+    unit = Column(String(20), comment="原始单位")
+    base_amount = Column(Float, comment="换算到基准单位的用量")
+    base_unit = Column(String(20), comment="基准单位(g/ml/mol)")
+    supplier = Column(String(200), comment="供应商")
+
+    __table_args__ = (
+        # 化学品查询与用量范围过滤
+        Index(
+            "ix_recipe_ingredients_key_amount",
+            "ingredient_key",
+            "base_unit",
+            "base_amount",
+            "recipe_id",
+        ),
+    )
+
+    def __repr__(self):
+        return (
+            f"<RecipeIngredient(recipe_id={self.recipe_id}, "
+            f"key='{self.ingredient_key}')>"
+        )
+
+
+def build_index_rows(recipe_id: int, ingredients) -> List[Dict[str, Any]]:
+    """把原料JSON展开为索引行"""
+    rows = []
+    for position, item in enumerate(ingredients or []):
+        if not isinstance(item, dict):
+            continue
+        key = ingredient_key(item.get("cas_number"), item.get("name"))
+        if key is None:
+            continue
+        base_amount, base_unit = to_base_amount(
+            item.get("amount"), item.get("unit")
+        )
+        rows.append(
+            {
+                "recipe_id": recipe_id,
+                "position": position,
+                "ingredient_key": key,
+                "name": item.get("name"),
+                "cas_number": item.get("cas_number"),
+                "amount": item.get("amount"),
+                "unit": item.get("unit"),
+                "base_amount": base_amount,
+                "base_unit": base_unit,
+                "supplier": item.get("supplier"),
+            }
+        )
+    return rows
+
+
+def _sync_ingredients(connection, target, replace: bool):
+    table = RecipeIngredient.__table__
+    if replace:
+        connection.execute(
+            delete(table).where(table.c.recipe_id == target.id)
+        )
+    rows = build_index_rows(target.id, target.ingredients)
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+@event.listens_for(Recipe, "after_insert")
+def _recipe_after_insert(mapper, connection, target):
+    _sync_ingredients(connection, target, replace=False)
+
+
+@event.listens_for(Recipe, "after_update")
+def _recipe_after_update(mapper, connection, target):
+    if inspect(target).attrs.ingredients.history.has_changes():
+        _sync_ingredients(connection, target, replace=True)
@@ -0,0 +1,147 @@
+"""配方版本谱系闭包表模型
+
+为 ``Recipe.parent_recipe_id`` 维护一张闭包表：每个 (祖先, 后代) 对一行，
+包含自身 (depth=0)。整棵版本树、全部后代、到根的路径都可以通过
+一次带索引的查询得到，而不需要逐代懒加载。
+
+闭包表在 Recipe 的 after_insert / after_update 事件中于同一事务内维护，
+因此无论通过哪条代码路径创建或重新挂接配方都会保持一致。
+"""
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    and_,
+    delete,
+    event,
+    exists,
+    insert,
+    inspect,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.orm import aliased
+
+from app.db.database import Base
+
+from .recipe import Recipe
+
+
+class RecipeLineage(Base):
+    """配方谱系闭包表"""
+
+    __tablename__ = "recipe_lineage"
+
+    ancestor_id = Column(
+        Integer,
+        ForeignKey("recipes.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="祖先配方ID",
+    )
+    descendant_id = Column(
+        Integer,
+        ForeignKey("recipes.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="后代配方ID",
+    )
+    depth = Column(Integer, nullable=False, comment="代数距离(自身为0)")
+
+    __table_args__ = (
+        # 按后代反查祖先（到根路径、找根节点）
+        Index(
+            "ix_recipe_lineage_descendant_depth", "descendant_id", "depth"
+        ),
+    )
+
+    def __repr__(self):
+        return (
+            f"<RecipeLineage(ancestor_id={self.ancestor_id}, "
+            f"descendant_id={self.descendant_id}, depth={self.depth})>"
+        )
+
+
+lineage = RecipeLineage.__table__
+
+
+def _link_to_parent(connection, recipe_id: int, parent_id):
+    """为新节点插入自身行及其到所有祖先的行"""
+    connection.execute(
+        insert(lineage).values(
+            ancestor_id=recipe_id, descendant_id=recipe_id, depth=0
+        )
+    )
+    if parent_id is not None:
+        connection.execute(
+            insert(lineage).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    lineage.c.ancestor_id,
+                    literal(recipe_id),
+                    lineage.c.depth + 1,
+                ).where(lineage.c.descendant_id == parent_id),
+            )
+        )
+
+
+def _reparent(connection, recipe_id: int, new_parent_id):
+    """把以 recipe_id 为根的子树整体挂到新的父节点下"""
+    if new_parent_id is not None:
+        is_cycle = connection.execute(
+            select(
+                exists().where(
+                    and_(
+                        lineage.c.ancestor_id == recipe_id,
+                        lineage.c.descendant_id == new_parent_id,
+                    )
+                )
+            )
+        ).scalar()
+        if is_cycle:
+            raise ValueError("不能把配方挂到其自身或其后代之下")
+
+    subtree = select(lineage.c.descendant_id).where(
+        lineage.c.ancestor_id == recipe_id
+    )
+    # 断开子树与原祖先之间的所有连接（保留子树内部连接）
+    connection.execute(
+        delete(lineage).where(
+            lineage.c.descendant_id.in_(subtree),
+            lineage.c.ancestor_id.not_in(subtree),
+        )
+    )
+    if new_parent_id is None:
+        return
+
+    # 新祖先 × 子树 的笛卡尔积
+    sup = aliased(lineage)
+    sub = aliased(lineage)
+    connection.execute(
+        insert(lineage).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(
+                sup.c.ancestor_id,
+                sub.c.descendant_id,
+                sup.c.depth + sub.c.depth + 1,
+            )
+            .select_from(sup.join(sub, true()))
+            .where(
+                sup.c.descendant_id == new_parent_id,
+                sub.c.ancestor_id == recipe_id,
+            ),
+        )
+    )
+
+
+@event.listens_for(Recipe, "after_insert")
+def _recipe_after_insert(mapper, connection, target):
+    _link_to_parent(connection, target.id, target.parent_recipe_id)
+
+
+@event.listens_for(Recipe, "after_update")
+def _recipe_after_update(mapper, connection, target):
+    history = inspect(target).attrs.parent_recipe_id.history
+    if history.has_changes():
+        _reparent(connection, target.id, target.parent_recipe_id)
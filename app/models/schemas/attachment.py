@@ -0,0 +1,19 @@
+"""附件Pydantic模型"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class AttachmentLink(BaseModel):
+    """附件关联请求模型"""
+
+    owner: Literal["experiment", "feedback"] = Field(
+        ..., description="所属对象类型"
+    )
+    owner_id: int = Field(..., description="实验或反馈ID")
+    field: str = Field(
+        ...,
+        description="附件字段: experiment 为 photos/files，"
+        "feedback 为 screenshots/attachments",
+    )
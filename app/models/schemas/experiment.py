@@ -0,0 +1,107 @@
+"""实验Pydantic模型"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import Field
+
+from .common import BaseSchema
+
+
+class ExperimentStatus(str, Enum):
+    """实验状态枚举"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    PAUSED = "paused"
+
+
+class ExperimentResult(str, Enum):
+    """实验结果枚举"""
+
+    SUCCESS = "success"
+    PARTIAL = "partial"
+    FAILURE = "failure"
+    UNKNOWN = "unknown"
+
+
+class ExperimentCreate(BaseSchema):
+    """创建实验记录模型"""
+
+    name: str = Field(
+        ..., min_length=1, max_length=200, description="实验名称"
+    )
+    description: Optional[str] = Field(None, description="实验描述")
+    batch_number: Optional[str] = Field(
+        None, max_length=50, description="批次号"
+    )
+    recipe_id: int = Field(..., description="配方ID")
+    user_id: int = Field(..., description="执行用户ID")
+
+    # 实验条件
+    actual_ingredients: Optional[List[Dict[str, Any]]] = Field(
+        None, description="实际使用原料"
+    )
+    actual_parameters: Optional[Dict[str, Any]] = Field(
+        None, description="实际实验参数"
+    )
+    actual_procedures: Optional[List[Dict[str, Any]]] = Field(
+        None, description="实际执行步骤"
+    )
+    temperature: Optional[float] = Field(None, description="环境温度(°C)")
+    humidity: Optional[float] = Field(
+        None, ge=0, le=100, description="环境湿度(%)"
+    )
+    pressure: Optional[float] = Field(None, ge=0, description="环境压力(kPa)")
+
+    # 状态与时间
+    status: ExperimentStatus = Field(
+        default=ExperimentStatus.PENDING, description="实验状态"
+    )
+    result: Optional[ExperimentResult] = Field(None, description="实验结果")
+    planned_start_time: Optional[datetime] = Field(
+        None, description="计划开始时间"
+    )
+    actual_start_time: Optional[datetime] = Field(
+        None, description="实际开始时间"
+    )
+    actual_end_time: Optional[datetime] = Field(
+        None, description="实际结束时间"
+    )
+    duration_minutes: Optional[int] = Field(
+        None, ge=0, description="实际耗时(分钟)"
+    )
+
+    # 结果数据
+    observations: Optional[str] = Field(None, description="实验观察记录")
+    measurements: Optional[Dict[str, Any]] = Field(
+        None, description="测量数据"
+    )
+    actual_cost: Optional[float] = Field(None, ge=0, description="实际成本")
+    quality_score: Optional[float] = Field(
+        None, ge=0, le=10, description="质量评分(0-10)"
+    )
+    success_rating: Optional[int] = Field(
+        None, ge=1, le=5, description="成功评级(1-5)"
+    )
+    meets_criteria: Optional[bool] = Field(
+        None, description="是否满足成功标准"
+    )
+    issues_encountered: Optional[str] = Field(None, description="遇到的问题")
+
+
+class ExperimentBatchCreate(BaseSchema):
+    """批量创建实验记录请求模型"""
+
+    items: List[ExperimentCreate] = Field(
+        ..., min_length=1, description="实验记录列表"
+    )
+    chunk_size: Optional[int] = Field(
+        None,
+        ge=1,
+        description="分块提交的条数，每块一个事务；不提供时整批一个事务",
+    )
@@ -0,0 +1,33 @@
+"""后台任务Pydantic模型"""
+
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobSubmitRequest(BaseModel):
+    """后台任务提交请求模型"""
+
+    name: str = Field(..., description="任务名称，如 recipe.optimize")
+    params: Optional[Dict[str, Any]] = Field(None, description="任务参数")
+    max_retries: Optional[int] = Field(
+        None, ge=0, le=10, description="失败重试次数，默认使用任务注册值"
+    )
+
+
+class JobInfo(BaseModel):
+    """后台任务状态模型"""
+
+    job_id: str = Field(..., description="任务ID")
+    name: Optional[str] = Field(None, description="任务名称")
+    backend: Optional[str] = Field(None, description="队列后端")
+    status: str = Field(..., description="任务状态")
+    progress: float = Field(default=0.0, description="进度(0~1)")
+    message: Optional[str] = Field(None, description="进度说明")
+    result: Optional[Any] = Field(None, description="任务结果")
+    error: Optional[str] = Field(None, description="错误信息")
+    attempts: int = Field(default=0, description="已执行次数")
+    max_retries: Optional[int] = Field(None, description="最大重试次数")
+    created_at: Optional[str] = Field(None, description="提交时间")
+    started_at: Optional[str] = Field(None, description="开始时间")
+    finished_at: Optional[str] = Field(None, description="结束时间")
@@ -4,9 +4,10 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from .common import BaseSchema
+from .workstation import TaskCommand, TaskPriority
 
 
 class RecipeDifficulty(str, Enum):
@@ -72,10 +73,10 @@ class RecipeBase(BaseSchema):
 
     # 配方内容
     ingredients: List[IngredientItem] = Field(
-        ..., min_items=1, description="原料列表"
+        ..., min_length=1, description="原料列表"
     )
     procedures: List[ProcedureStep] = Field(
-        ..., min_items=1, description="实验步骤"
+        ..., min_length=1, description="实验步骤"
     )
     parameters: Optional[Dict[str, Any]] = Field(
         default_factory=dict, description="实验参数"
@@ -113,20 +114,45 @@ class RecipeBase(BaseSchema):
 class RecipeCreate(RecipeBase):
     """创建配方模型"""
 
-    @validator("procedures")
-    def validate_procedures(cls, v):
-        """验证实验步骤"""
-        if not v:
-            raise ValueError("至少需要一个实验步骤")
+    @field_validator("procedures")
+    @classmethod
+    def validate_procedures(cls, v: List[ProcedureStep]):
+        """验证实验步骤：步骤号不重复且从1开始连续编号
+
+        n 个步骤号互不重复且都落在 [1, n] 内，即为 1..n 的一个排列，
+        一次遍历即可判断。非空由 min_length 保证。
+        """
+        count = len(v)
+        seen = bytearray(count + 1)
+        # 越界的步骤号只在出错时出现，单独记录以便仍能先报告重复
+        overflow = set()
+        for step in v:
+            number = step.step_number
+            if number <= count:
+                if seen[number]:
+                    raise ValueError("步骤号不能重复")
+                seen[number] = 1
+            elif number in overflow:
+                raise ValueError("步骤号不能重复")
+            else:
+                overflow.add(number)
+        if overflow:
+            raise ValueError("步骤号必须从1开始连续编号")
+        return v
 
-        step_numbers = [step.step_number for step in v]
-        if len(step_numbers) != len(set(step_numbers)):
-            raise ValueError("步骤号不能重复")
 
-        if min(step_numbers) != 1 or max(step_numbers) != len(step_numbers):
-            raise ValueError("步骤号必须从1开始连续编号")
+class RecipeBatchCreate(BaseSchema):
+    """批量创建配方请求模型"""
 
-        return v
+    creator_id: int = Field(..., description="创建者ID")
+    items: List[RecipeCreate] = Field(
+        ..., min_length=1, description="配方列表"
+    )
+    chunk_size: Optional[int] = Field(
+        None,
+        ge=1,
+        description="分块提交的条数，每块一个事务；不提供时整批一个事务",
+    )
 
 
 class RecipeUpdate(BaseSchema):
@@ -211,8 +237,125 @@ class RecipeOptimizeRequest(BaseModel):
     """配方优化请求模型"""
 
     recipe_id: int = Field(..., description="配方ID")
-    optimization_goals: List[str] = Field(..., description="优化目标")
-    constraints: Optional[Dict[str, Any]] = Field(None, description="约束条件")
+    optimization_goals: List[str] = Field(
+        ..., min_length=1, description="优化目标(quality/success/cost/time)"
+    )
+    constraints: Optional[Dict[str, Any]] = Field(
+        None,
+        description=(
+            "约束条件，如 {'parameters': {'temperature': {'min': 20, "
+            "'max': 80}}, 'ingredients': {'64-17-5': 5.0}}"
+        ),
+    )
+    batch_size: int = Field(default=5, ge=1, le=50, description="建议数量")
+
+
+class RecipeDuplicateMatch(BaseModel):
+    """近似重复配方匹配结果"""
+
+    recipe_id: int = Field(..., description="配方ID")
+    name: Optional[str] = Field(None, description="配方名称")
+    similarity: float = Field(..., ge=0, le=1, description="估计相似度")
+
+
+class IngredientFilter(BaseModel):
+    """原料筛选条件（CAS号优先，其次按名称匹配）"""
+
+    cas_number: Optional[str] = Field(None, description="CAS号")
+    name: Optional[str] = Field(None, description="原料名称")
+    min_amount: Optional[float] = Field(None, ge=0, description="最小用量")
+    max_amount: Optional[float] = Field(None, ge=0, description="最大用量")
+    unit: Optional[str] = Field(None, description="用量单位")
+
+    @model_validator(mode="after")
+    def require_unit_for_amount(self):
+        """用量范围按单位换算后比较，没有单位时无法匹配任何记录"""
+        has_bound = self.min_amount is not None or self.max_amount is not None
+        if has_bound and not self.unit:
+            raise ValueError("指定用量范围时必须提供 unit")
+        return self
+
+
+class IngredientSearchRequest(BaseModel):
+    """按原料搜索配方请求模型"""
+
+    all_of: List[IngredientFilter] = Field(
+        default_factory=list, description="必须全部包含"
+    )
+    any_of: List[IngredientFilter] = Field(
+        default_factory=list, description="至少包含其一"
+    )
+    none_of: List[IngredientFilter] = Field(
+        default_factory=list, description="不能包含"
+    )
+    page: int = Field(default=1, ge=1, description="页码")
+    page_size: int = Field(default=20, ge=1, le=100, description="每页大小")
+
+
+class DOEFactor(BaseModel):
+    """试验设计因子"""
+
+    name: str = Field(..., description="参数名，或原料的CAS号/名称")
+    target: str = Field(
+        default="parameter",
+        pattern="^(parameter|ingredient)$",
+        description="因子作用对象：配方参数或原料用量",
+    )
+    low: Optional[float] = Field(None, description="下限")
+    high: Optional[float] = Field(None, description="上限")
+    relative_span: Optional[float] = Field(
+        None, gt=0, le=1, description="围绕基准值的相对范围，如0.2表示±20%"
+    )
+    levels: int = Field(default=3, ge=1, le=100, description="全因子水平数")
+    log_scale: bool = Field(default=False, description="是否按对数刻度取值")
+    round_digits: Optional[int] = Field(
+        None, ge=0, le=10, description="保留小数位数"
+    )
+
+
+class DOERequest(BaseModel):
+    """试验设计批量生成请求模型"""
+
+    design: str = Field(
+        ...,
+        pattern="^(full_factorial|latin_hypercube|sobol)$",
+        description="设计类型",
+    )
+    factors: List[DOEFactor] = Field(..., min_length=1, description="因子")
+    count: Optional[int] = Field(
+        None, ge=1, description="试验点数(拉丁超立方/Sobol)"
+    )
+    seed: Optional[int] = Field(None, description="随机种子")
+    user_id: int = Field(..., description="执行用户ID")
+    workstation_id: Optional[int] = Field(
+        None, description="工站ID，提供时为每个实验生成工站任务"
+    )
+    commands: Optional[List[TaskCommand]] = Field(
+        None,
+        description="任务命令模板，参数值写成 ${因子名} 时替换为该实验的取值；"
+        "不提供时按配方步骤生成",
+    )
+    priority: TaskPriority = Field(
+        default=TaskPriority.NORMAL, description="任务优先级"
+    )
+    batch_number: Optional[str] = Field(
+        None, max_length=50, description="批次号，默认自动生成"
+    )
+    dry_run: bool = Field(default=False, description="只返回设计矩阵不入库")
+
+
+class DOEJobParams(DOERequest):
+    """试验设计后台任务参数"""
+
+    recipe_id: int = Field(..., description="配方ID")
+
+
+class DedupClusterParams(BaseModel):
+    """全量查重聚类后台任务参数"""
+
+    threshold: Optional[float] = Field(
+        None, gt=0, le=1, description="相似度阈值，默认使用配置值"
+    )
 
 
 # 为了兼容性，创建别名
@@ -1,7 +1,13 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    ValidationInfo,
+    field_validator,
+)
 
 from .common import BaseSchema
 
@@ -32,13 +38,15 @@ class UserCreate(UserBase):
     confirm_password: str = Field(..., description="确认密码")
 
     @field_validator("confirm_password")
-    def passwords_match(cls, v, values):
-        if "password" in values and v != values["password"]:
+    @classmethod
+    def passwords_match(cls, v: str, info: ValidationInfo):
+        if "password" in info.data and v != info.data["password"]:
             raise ValueError("密码不匹配")
         return v
 
     @field_validator("password")
-    def validate_password(cls, v):
+    @classmethod
+    def validate_password(cls, v: str):
         """密码强度验证"""
         if len(v) < 8:
             raise ValueError("密码长度至少8位")
@@ -99,8 +107,9 @@ class UserPasswordReset(BaseModel):
     confirm_password: str = Field(..., description="确认新密码")
 
     @field_validator("confirm_password")
-    def passwords_match(cls, v, values):
-        if "new_password" in values and v != values["new_password"]:
+    @classmethod
+    def passwords_match(cls, v: str, info: ValidationInfo):
+        if "new_password" in info.data and v != info.data["new_password"]:
             raise ValueError("新密码不匹配")
         return v
 
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from .common import BaseSchema
 
@@ -135,7 +135,7 @@ class TaskBase(BaseSchema):
         default=TaskPriority.NORMAL, description="任务优先级"
     )
     commands: List[TaskCommand] = Field(
-        ..., min_items=1, description="任务命令列表"
+        ..., min_length=1, description="任务命令列表"
     )
     estimated_duration: Optional[int] = Field(
         None, ge=0, description="预计耗时(分钟)"
@@ -154,6 +154,20 @@ class TaskCreate(TaskBase):
     )
 
 
+class TaskBatchCreate(BaseSchema):
+    """批量创建任务请求模型"""
+
+    user_id: int = Field(..., description="创建用户ID")
+    items: List[TaskCreate] = Field(
+        ..., min_length=1, description="任务列表"
+    )
+    chunk_size: Optional[int] = Field(
+        None,
+        ge=1,
+        description="分块提交的条数，每块一个事务；不提供时整批一个事务",
+    )
+
+
 class TaskUpdate(BaseSchema):
     """更新任务模型"""
 
@@ -199,6 +213,12 @@ class TaskResponse(TaskBase):
     workstation_name: Optional[str] = Field(None, description="工站名称")
     recipe_name: Optional[str] = Field(None, description="配方名称")
 
+    @field_validator("logs", mode="before")
+    @classmethod
+    def default_logs(cls, v):
+        """历史数据和未写日志的任务 logs 为 NULL，按空列表返回"""
+        return [] if v is None else v
+
 
 class TaskSearchRequest(BaseModel):
     """任务搜索请求模型"""
@@ -245,7 +265,7 @@ class TaskControlRequest(BaseModel):
 
     action: str = Field(
         ...,
-        regex="^(start|pause|resume|cancel|retry)$",
+        pattern="^(start|pause|resume|cancel|retry)$",
         description="控制动作",
     )
     reason: Optional[str] = Field(None, description="操作原因")
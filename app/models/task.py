@@ -0,0 +1,141 @@
+"""工站任务数据模型"""
+
+from enum import Enum as PyEnum
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class TaskStatus(PyEnum):
+    """任务状态枚举"""
+
+    PENDING = "pending"  # 待执行
+    QUEUED = "queued"  # 已排队
+    RUNNING = "running"  # 执行中
+    COMPLETED = "completed"  # 已完成
+    FAILED = "failed"  # 失败
+    CANCELLED = "cancelled"  # 已取消
+    PAUSED = "paused"  # 已暂停
+
+
+class TaskPriority(PyEnum):
+    """任务优先级枚举"""
+
+    LOW = "low"  # 低
+    NORMAL = "normal"  # 普通
+    HIGH = "high"  # 高
+    URGENT = "urgent"  # 紧急
+
+
+class Task(Base):
+    """工站任务模型"""
+
+    __tablename__ = "tasks"
+
+    # 基础字段
+    id = Column(Integer, primary_key=True, index=True, comment="任务ID")
+    name = Column(String(200), nullable=False, comment="任务名称")
+    description = Column(Text, comment="任务描述")
+    priority = Column(
+        Enum(TaskPriority), default=TaskPriority.NORMAL, comment="优先级"
+    )
+    commands = Column(JSON, nullable=False, comment="任务命令列表(JSON格式)")
+    estimated_duration = Column(Integer, comment="预计耗时(分钟)")
+    max_retries = Column(Integer, default=3, comment="最大重试次数")
+
+    # 关联字段（工站表尚未建模，workstation_id 暂不加外键）
+    workstation_id = Column(
+        Integer, nullable=False, index=True, comment="工站ID"
+    )
+    recipe_id = Column(
+        Integer, ForeignKey("recipes.id"), index=True, comment="关联配方ID"
+    )
+    experiment_id = Column(
+        Integer,
+        ForeignKey("experiments.id", ondelete="CASCADE"),
+        index=True,
+        comment="关联实验ID",
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id"), nullable=False, comment="创建用户ID"
+    )
+
+    # 状态管理
+    status = Column(
+        Enum(TaskStatus),
+        default=TaskStatus.PENDING,
+        index=True,
+        comment="任务状态",
+    )
+    progress = Column(Float, default=0.0, comment="进度百分比")
+    retry_count = Column(Integer, default=0, comment="已重试次数")
+
+    # 时间信息
+    scheduled_time = Column(DateTime(timezone=True), comment="计划执行时间")
+    started_at = Column(DateTime(timezone=True), comment="开始时间")
+    completed_at = Column(DateTime(timezone=True), comment="完成时间")
+    actual_duration = Column(Integer, comment="实际耗时(分钟)")
+
+    # 执行结果
+    result = Column(JSON, comment="执行结果(JSON格式)")
+    error_message = Column(Text, comment="错误信息")
+    logs = Column(JSON, default=list, comment="执行日志(JSON数组)")
+    outputs = Column(JSON, comment="输出数据(JSON格式)")
+
+    # 时间戳
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), comment="创建时间"
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间",
+    )
+
+    def __repr__(self):
+        return (
+            f"<Task(id={self.id}, name='{self.name}', "
+            f"status='{self.status.value}')>"
+        )
+
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "priority": self.priority.value if self.priority else None,
+            "commands": self.commands,
+            "estimated_duration": self.estimated_duration,
+            "max_retries": self.max_retries,
+            "workstation_id": self.workstation_id,
+            "recipe_id": self.recipe_id,
+            "experiment_id": self.experiment_id,
+            "user_id": self.user_id,
+            "status": self.status.value if self.status else None,
+            "progress": self.progress,
+            "retry_count": self.retry_count,
+            "scheduled_time": self.scheduled_time,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "actual_duration": self.actual_duration,
+            "result": self.result,
+            "error_message": self.error_message,
+            "logs": self.logs or [],
+            "outputs": self.outputs,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
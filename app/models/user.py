@@ -53,10 +53,16 @@ class User(Base):
         "Recipe", back_populates="creator", cascade="all, delete-orphan"
     )
     experiments = relationship(
-        "Experiment", back_populates="user", cascade="all, delete-orphan"
+        "Experiment",
+        back_populates="user",
+        foreign_keys="Experiment.user_id",
+        cascade="all, delete-orphan",
     )
     feedbacks = relationship(
-        "Feedback", back_populates="user", cascade="all, delete-orphan"
+        "Feedback",
+        back_populates="user",
+        foreign_keys="Feedback.user_id",
+        cascade="all, delete-orphan",
     )
 
     def __repr__(self):
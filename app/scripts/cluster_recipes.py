@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+配方近似重复聚类脚本
+对全部配方计算MinHash签名并聚类，输出近似重复的配方簇
+
+用法: python -m scripts.cluster_recipes [--threshold 0.7] [--output out.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.dedup_service import dedup_service  # noqa: E402
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="配方近似重复聚类")
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    clusters = dedup_service.cluster_catalog(
+        threshold=args.threshold, workers=args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(f"✅ 聚类完成，用时 {elapsed:.1f}s")
+    print(f"   近似重复簇: {len(clusters)}，可合并配方: {duplicates}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"clusters": clusters}, f, ensure_ascii=False)
+        print(f"   结果已写入: {args.output}")
+    else:
+        for cluster in clusters[:20]:
+            print(f"   {cluster}")
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,33 @@ DATABASE_USER=your_db_user
 DATABASE_PASSWORD=your_db_password
 DATABASE_NAME=ai_recipe_db
 
+# ==================== 只读副本配置 ====================
+# 只读副本连接URL列表，例如 ["postgresql://u:p@replica1:5432/db"]
+DATABASE_REPLICA_URLS=[]
+REPLICA_RETRY_INTERVAL=10.0
+REPLICA_READ_YOUR_WRITES=5.0
+
+# ==================== 数据库连接池配置 ====================
+DB_POOL_SIZE=10
+DB_MAX_OVERFLOW=20
+DB_POOL_TIMEOUT=30.0
+DB_POOL_RECYCLE=300
+# 探活策略: always / idle / never
+DB_POOL_PRE_PING=idle
+DB_POOL_PING_IDLE=30.0
+DB_STATEMENT_CACHE_SIZE=100
+# 经 pgbouncer 事务池模式连接时开启
+DB_PGBOUNCER=false
+
+# ==================== 慢查询日志配置 ====================
+SLOW_QUERY_ENABLED=true
+SLOW_QUERY_THRESHOLD_MS=200
+# 为慢 SELECT 采集 EXPLAIN (ANALYZE, BUFFERS)，会在新连接上再执行一次语句
+SLOW_QUERY_EXPLAIN=true
+SLOW_QUERY_EXPLAIN_INTERVAL=300
+SLOW_QUERY_EXPLAIN_TIMEOUT=10
+SLOW_QUERY_MAX_FINGERPRINTS=500
+
 # ==================== Redis配置 ====================
 REDIS_URL=redis://localhost:6379/0
 REDIS_HOST=localhost
@@ -95,6 +122,142 @@ LOG_FILE=./logs/app.log
 CELERY_BROKER_URL=redis://localhost:6379/1
 CELERY_RESULT_BACKEND=redis://localhost:6379/2
 
+# ==================== 计数器配置 ====================
+# memory: 进程内缓冲; redis: 多进程共享缓冲
+COUNTER_BACKEND=memory
+COUNTER_FLUSH_INTERVAL=5.0
+COUNTER_FLUSH_BATCH_SIZE=1000
+
+# ==================== 内存索引多进程同步配置 ====================
+# 追赶其他工作进程写入的间隔（秒）
+INDEX_CATCH_UP_INTERVAL=30
+# 追赶窗口向前多留的时间（秒），覆盖提交较晚的长事务
+INDEX_CATCH_UP_LAG=300
+# 读取全部现存ID核对已删除记录的间隔（秒），行数减少时会提前核对
+INDEX_DELETE_SCAN_INTERVAL=3600
+
+# ==================== 配方查重配置 ====================
+DEDUP_THRESHOLD=0.7
+DEDUP_NUM_PERM=128
+DEDUP_BANDS=16
+# 全量签名计算进程数（在 API 进程中运行，与请求共用主机）
+DEDUP_WORKERS=2
+
+# ==================== 配方分面索引配置 ====================
+FACET_SNAPSHOT_PATH=./data/facets.snapshot
+FACET_SNAPSHOT_INTERVAL=300
+FACET_CACHE_SIZE=256
+
+# ==================== 全文检索配置 ====================
+FULLTEXT_INDEX_DIR=./data/fulltext
+# 内存段达到该文档数时写成磁盘段
+FULLTEXT_FLUSH_DOCS=20000
+FULLTEXT_FLUSH_INTERVAL=60
+FULLTEXT_MAX_SEGMENTS=8
+FULLTEXT_BM25_K1=1.2
+FULLTEXT_BM25_B=0.75
+
+# ==================== 反馈聚类配置 ====================
+FEEDBACK_CLUSTER_SNAPSHOT_PATH=./data/feedback_clusters.snapshot
+FEEDBACK_CLUSTER_SNAPSHOT_INTERVAL=300
+# 归入簇的最低余弦相似度
+FEEDBACK_CLUSTER_THRESHOLD=0.6
+FEEDBACK_CLUSTER_DIM=256
+FEEDBACK_CLUSTER_BANDS=20
+FEEDBACK_CLUSTER_ROWS=10
+# 全量聚类进程数（在 API 进程中运行，与请求共用主机）
+FEEDBACK_CLUSTER_WORKERS=2
+
+# ==================== 反馈评分汇总配置 ====================
+FEEDBACK_ROLLUP_SNAPSHOT_PATH=./data/feedback_rollups.snapshot
+FEEDBACK_ROLLUP_SNAPSHOT_INTERVAL=300
+# 按该时区划分自然日
+FEEDBACK_ROLLUP_TIMEZONE=Asia/Shanghai
+
+# ==================== 实验报表快照配置 ====================
+# 报表读取的 Parquet 快照目录（需要安装 pyarrow）
+EXPERIMENT_REPORT_SNAPSHOT_DIR=./data/experiment_snapshots
+EXPERIMENT_REPORT_EXPORT_INTERVAL=60
+# 按该时区划分月份
+EXPERIMENT_REPORT_TIMEZONE=Asia/Shanghai
+# 在内存中缓存解码后的分区（按快照大小占用内存）
+EXPERIMENT_REPORT_CACHE=true
+
+# ==================== 附件存储配置 ====================
+# 按 SHA-256 寻址的附件目录，相同内容只存一份
+ATTACHMENT_DIR=./data/attachments
+# 单个附件上限（字节）
+ATTACHMENT_MAX_BYTES=2147483648
+# 无引用附件保留多久后回收（秒）及回收间隔（秒，0 表示不启动）
+ATTACHMENT_GC_GRACE=86400
+ATTACHMENT_GC_INTERVAL=3600
+ATTACHMENT_FSYNC=true
+# nginx internal location 前缀，设置后下载由 X-Accel-Redirect 交给 nginx
+# ATTACHMENT_ACCEL_REDIRECT=/_attachments/
+
+# ==================== 配方优化配置 ====================
+OPTIMIZER_NUM_CANDIDATES=8192
+OPTIMIZER_NUM_FEATURES=512
+OPTIMIZER_MAX_EXPERIMENTS=5000
+# 候选打分线程数，默认为CPU核数
+# OPTIMIZER_WORKERS=4
+
+# ==================== 试验设计配置 ====================
+DOE_MAX_VARIANTS=10000
+
+# ==================== 进程池卸载配置 ====================
+OFFLOAD_POOLS={{"default": 2, "optimization": 1}}
+OFFLOAD_MAX_QUEUE=32
+OFFLOAD_START_METHOD=spawn
+OFFLOAD_SHARED_MIN_BYTES=1048576
+
+# ==================== 后台任务配置 ====================
+# local 使用进程内 SQLite 队列；celery 使用上面的 Celery 配置
+JOB_BACKEND=local
+JOB_LOCAL_DB_PATH=./data/jobs.sqlite3
+JOB_LOCAL_CONCURRENCY=2
+JOB_POLL_INTERVAL=1.0
+JOB_RESULT_TTL=604800
+JOB_LEASE=60
+
+# ==================== 读穿缓存配置 ====================
+CACHE_ENABLED=true
+CACHE_TTL=300
+CACHE_TTL_JITTER=0.1
+CACHE_LOCAL_SIZE=10000
+CACHE_LOCAL_TTL=30.0
+CACHE_NEGATIVE_TTL=2
+
+# ==================== 响应编码配置 ====================
+# Accept 为 MessagePack/Arrow 时需要安装可选依赖: poetry install -E binary
+RESPONSE_COMPRESS_MIN_BYTES=4096
+RESPONSE_GZIP_LEVEL=5
+RESPONSE_ZSTD_LEVEL=3
+
+# ==================== 准入控制配置 ====================
+# memory 为进程内状态；多 worker 部署使用 redis 共享预算
+ADMISSION_ENABLED=true
+ADMISSION_BACKEND=memory
+ADMISSION_CONCURRENCY={{"llm": 4, "optimization": 2, "export": 4}}
+ADMISSION_COST={{"llm": 5.0, "optimization": 3.0, "export": 1.0}}
+# 按角色的令牌桶 [每秒令牌数, 桶容量]，默认值见 config/settings.py
+# ADMISSION_USER_RATES={{"user": [0.5, 15]}}
+# ADMISSION_ROLE_RATES={{"user": [10.0, 100]}}
+ADMISSION_PRIORITIES={{"admin": 0, "expert": 1, "user": 2, "anonymous": 3}}
+ADMISSION_QUEUE_TARGET=2.0
+ADMISSION_MAX_QUEUE=100
+ADMISSION_LEASE_TTL=600
+
+# ==================== 请求截止时间配置 ====================
+# 客户端可用 X-Request-Timeout 请求头指定（不超过上限）
+REQUEST_TIMEOUT=30.0
+REQUEST_TIMEOUT_MAX=300.0
+# 按路径通配符设置，默认值见 config/settings.py
+# REQUEST_TIMEOUT_ROUTES={{"/api/v1/recipes/optimize": 120.0}}
+
+# ==================== 批量写入配置 ====================
+BATCH_MAX_ITEMS=5000
+
 # ==================== CORS配置 ====================
 ALLOWED_HOSTS=["*"]
 ALLOWED_ORIGINS=["*"]
@@ -147,6 +310,33 @@ DATABASE_USER=your_db_user
 DATABASE_PASSWORD=your_db_password
 DATABASE_NAME=your_db_name
 
+# ==================== 只读副本配置 ====================
+# 只读副本连接URL列表，例如 ["postgresql://u:p@replica1:5432/db"]
+DATABASE_REPLICA_URLS=[]
+REPLICA_RETRY_INTERVAL=10.0
+REPLICA_READ_YOUR_WRITES=5.0
+
+# ==================== 数据库连接池配置 ====================
+DB_POOL_SIZE=10
+DB_MAX_OVERFLOW=20
+DB_POOL_TIMEOUT=30.0
+DB_POOL_RECYCLE=300
+# 探活策略: always / idle / never
+DB_POOL_PRE_PING=idle
+DB_POOL_PING_IDLE=30.0
+DB_STATEMENT_CACHE_SIZE=100
+# 经 pgbouncer 事务池模式连接时开启
+DB_PGBOUNCER=false
+
+# ==================== 慢查询日志配置 ====================
+SLOW_QUERY_ENABLED=true
+SLOW_QUERY_THRESHOLD_MS=200
+# 为慢 SELECT 采集 EXPLAIN (ANALYZE, BUFFERS)，会在新连接上再执行一次语句
+SLOW_QUERY_EXPLAIN=true
+SLOW_QUERY_EXPLAIN_INTERVAL=300
+SLOW_QUERY_EXPLAIN_TIMEOUT=10
+SLOW_QUERY_MAX_FINGERPRINTS=500
+
 # ==================== Redis配置 ====================
 REDIS_URL=redis://localhost:6379/0
 REDIS_HOST=localhost
@@ -176,6 +366,142 @@ LOG_FILE=./logs/app.log
 CELERY_BROKER_URL=redis://localhost:6379/1
 CELERY_RESULT_BACKEND=redis://localhost:6379/2
 
+# ==================== 计数器配置 ====================
+# memory: 进程内缓冲; redis: 多进程共享缓冲
+COUNTER_BACKEND=memory
+COUNTER_FLUSH_INTERVAL=5.0
+COUNTER_FLUSH_BATCH_SIZE=1000
+
+# ==================== 内存索引多进程同步配置 ====================
+# 追赶其他工作进程写入的间隔（秒）
+INDEX_CATCH_UP_INTERVAL=30
+# 追赶窗口向前多留的时间（秒），覆盖提交较晚的长事务
+INDEX_CATCH_UP_LAG=300
+# 读取全部现存ID核对已删除记录的间隔（秒），行数减少时会提前核对
+INDEX_DELETE_SCAN_INTERVAL=3600
+
+# ==================== 配方查重配置 ====================
+DEDUP_THRESHOLD=0.7
+DEDUP_NUM_PERM=128
+DEDUP_BANDS=16
+# 全量签名计算进程数（在 API 进程中运行，与请求共用主机）
+DEDUP_WORKERS=2
+
+# ==================== 配方分面索引配置 ====================
+FACET_SNAPSHOT_PATH=./data/facets.snapshot
+FACET_SNAPSHOT_INTERVAL=300
+FACET_CACHE_SIZE=256
+
+# ==================== 全文检索配置 ====================
+FULLTEXT_INDEX_DIR=./data/fulltext
+# 内存段达到该文档数时写成磁盘段
+FULLTEXT_FLUSH_DOCS=20000
+FULLTEXT_FLUSH_INTERVAL=60
+FULLTEXT_MAX_SEGMENTS=8
+FULLTEXT_BM25_K1=1.2
+FULLTEXT_BM25_B=0.75
+
+# ==================== 反馈聚类配置 ====================
+FEEDBACK_CLUSTER_SNAPSHOT_PATH=./data/feedback_clusters.snapshot
+FEEDBACK_CLUSTER_SNAPSHOT_INTERVAL=300
+# 归入簇的最低余弦相似度
+FEEDBACK_CLUSTER_THRESHOLD=0.6
+FEEDBACK_CLUSTER_DIM=256
+FEEDBACK_CLUSTER_BANDS=20
+FEEDBACK_CLUSTER_ROWS=10
+# 全量聚类进程数（在 API 进程中运行，与请求共用主机）
+FEEDBACK_CLUSTER_WORKERS=2
+
+# ==================== 反馈评分汇总配置 ====================
+FEEDBACK_ROLLUP_SNAPSHOT_PATH=./data/feedback_rollups.snapshot
+FEEDBACK_ROLLUP_SNAPSHOT_INTERVAL=300
+# 按该时区划分自然日
+FEEDBACK_ROLLUP_TIMEZONE=Asia/Shanghai
+
+# ==================== 实验报表快照配置 ====================
+# 报表读取的 Parquet 快照目录（需要安装 pyarrow）
+EXPERIMENT_REPORT_SNAPSHOT_DIR=./data/experiment_snapshots
+EXPERIMENT_REPORT_EXPORT_INTERVAL=60
+# 按该时区划分月份
+EXPERIMENT_REPORT_TIMEZONE=Asia/Shanghai
+# 在内存中缓存解码后的分区（按快照大小占用内存）
+EXPERIMENT_REPORT_CACHE=true
+
+# ==================== 附件存储配置 ====================
+# 按 SHA-256 寻址的附件目录，相同内容只存一份
+ATTACHMENT_DIR=./data/attachments
+# 单个附件上限（字节）
+ATTACHMENT_MAX_BYTES=2147483648
+# 无引用附件保留多久后回收（秒）及回收间隔（秒，0 表示不启动）
+ATTACHMENT_GC_GRACE=86400
+ATTACHMENT_GC_INTERVAL=3600
+ATTACHMENT_FSYNC=true
+# nginx internal location 前缀，设置后下载由 X-Accel-Redirect 交给 nginx
+# ATTACHMENT_ACCEL_REDIRECT=/_attachments/
+
+# ==================== 配方优化配置 ====================
+OPTIMIZER_NUM_CANDIDATES=8192
+OPTIMIZER_NUM_FEATURES=512
+OPTIMIZER_MAX_EXPERIMENTS=5000
+# 候选打分线程数，默认为CPU核数
+# OPTIMIZER_WORKERS=4
+
+# ==================== 试验设计配置 ====================
+DOE_MAX_VARIANTS=10000
+
+# ==================== 进程池卸载配置 ====================
+OFFLOAD_POOLS={"default": 2, "optimization": 1}
+OFFLOAD_MAX_QUEUE=32
+OFFLOAD_START_METHOD=spawn
+OFFLOAD_SHARED_MIN_BYTES=1048576
+
+# ==================== 后台任务配置 ====================
+# local 使用进程内 SQLite 队列；celery 使用上面的 Celery 配置
+JOB_BACKEND=local
+JOB_LOCAL_DB_PATH=./data/jobs.sqlite3
+JOB_LOCAL_CONCURRENCY=2
+JOB_POLL_INTERVAL=1.0
+JOB_RESULT_TTL=604800
+JOB_LEASE=60
+
+# ==================== 读穿缓存配置 ====================
+CACHE_ENABLED=true
+CACHE_TTL=300
+CACHE_TTL_JITTER=0.1
+CACHE_LOCAL_SIZE=10000
+CACHE_LOCAL_TTL=30.0
+CACHE_NEGATIVE_TTL=2
+
+# ==================== 响应编码配置 ====================
+# Accept 为 MessagePack/Arrow 时需要安装可选依赖: poetry install -E binary
+RESPONSE_COMPRESS_MIN_BYTES=4096
+RESPONSE_GZIP_LEVEL=5
+RESPONSE_ZSTD_LEVEL=3
+
+# ==================== 准入控制配置 ====================
+# memory 为进程内状态；多 worker 部署使用 redis 共享预算
+ADMISSION_ENABLED=true
+ADMISSION_BACKEND=memory
+ADMISSION_CONCURRENCY={"llm": 4, "optimization": 2, "export": 4}
+ADMISSION_COST={"llm": 5.0, "optimization": 3.0, "export": 1.0}
+# 按角色的令牌桶 [每秒令牌数, 桶容量]，默认值见 config/settings.py
+# ADMISSION_USER_RATES={"user": [0.5, 15]}
+# ADMISSION_ROLE_RATES={"user": [10.0, 100]}
+ADMISSION_PRIORITIES={"admin": 0, "expert": 1, "user": 2, "anonymous": 3}
+ADMISSION_QUEUE_TARGET=2.0
+ADMISSION_MAX_QUEUE=100
+ADMISSION_LEASE_TTL=600
+
+# ==================== 请求截止时间配置 ====================
+# 客户端可用 X-Request-Timeout 请求头指定（不超过上限）
+REQUEST_TIMEOUT=30.0
+REQUEST_TIMEOUT_MAX=300.0
+# 按路径通配符设置，默认值见 config/settings.py
+# REQUEST_TIMEOUT_ROUTES={"/api/v1/recipes/optimize": 120.0}
+
+# ==================== 批量写入配置 ====================
+BATCH_MAX_ITEMS=5000
+
 # ==================== CORS配置 ====================
 ALLOWED_HOSTS=["*"]
 ALLOWED_ORIGINS=["*"]
@@ -0,0 +1,41 @@
+# 服务模块
+
+from . import (
+    batch_service,
+    doe_service,
+    ingredient_service,
+    lineage_service,
+    measurement_service,
+    optimization_service,
+)
+from .attachment_service import attachment_service
+from .cache_service import cache_service
+from .counter_service import counter_service
+from .dedup_service import dedup_service
+from .experiment_report_service import experiment_report_service
+from .facet_service import facet_service
+from .feedback_cluster_service import feedback_cluster_service
+from .feedback_rollup_service import feedback_rollup_service
+from .fulltext_service import fulltext_service
+from .job_service import job_queue
+from .offload_service import offload_executor
+
+__all__ = [
+    "attachment_service",
+    "batch_service",
+    "cache_service",
+    "counter_service",
+    "dedup_service",
+    "doe_service",
+    "experiment_report_service",
+    "facet_service",
+    "feedback_cluster_service",
+    "feedback_rollup_service",
+    "fulltext_service",
+    "ingredient_service",
+    "job_queue",
+    "lineage_service",
+    "measurement_service",
+    "offload_executor",
+    "optimization_service",
+]
@@ -0,0 +1,460 @@
+"""准入控制服务（限流、并发预算、优先级排队、过载保护）
+
+昂贵接口（LLM 生成、配方优化、数据导出等）按接口类别做准入：
+
+1. 令牌桶：每个用户一个桶（速率按角色），每个角色再共享一个总桶；
+   请求按类别消耗若干令牌，任一桶不足即返回 429 和 Retry-After
+2. 并发预算：每个类别同时执行的请求数有上限，超出时按角色优先级
+   排队（同优先级先到先得）
+3. 过载保护：按类别平均耗时估算排队时间，超过目标延迟时直接返回
+   503；排队等待超过目标延迟同样返回 503
+
+- memory 模式：状态保存在进程内，适合单进程部署和测试
+- redis 模式：令牌桶和并发租约保存在 Redis（Lua 脚本保证原子性），
+  多个 worker 共享同一份预算；排队仍在各进程内，等待者定期重试。
+  租约带过期时间，进程崩溃后占用的并发额度会自动释放
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from db.redis import get_redis
+from utils import deadline
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# (键, 每秒令牌数, 桶容量)
+Bucket = Tuple[str, float, float]
+
+# 未登录请求使用的角色
+ANONYMOUS = "anonymous"
+
+
+class AdmissionRejected(Exception):
+    """请求被准入控制拒绝"""
+
+    def __init__(self, status_code: int, retry_after: float, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass(frozen=True)
+class Identity:
+    """限流主体：登录用户按ID，匿名请求按客户端地址"""
+
+    key: str
+    role: str = ANONYMOUS
+    user_id: Optional[int] = None
+
+
+@dataclass
+class Ticket:
+    """已获准执行的请求，结束后必须 release"""
+
+    endpoint_class: str
+    lease_id: str
+    started: float = field(default_factory=time.monotonic)
+
+
+def _refill(
+    tokens: float, updated: float, now: float, rate: float, burst: float
+) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+def _wait_time(tokens: float, cost: float, rate: float) -> float:
+    if tokens >= cost:
+        return 0.0
+    return math.inf if rate <= 0 else (cost - tokens) / rate
+
+
+class MemoryAdmissionBackend:
+    """进程内令牌桶和并发计数"""
+
+    shared = False
+
+    # 桶数量超过该值时清理已经回满的桶
+    PRUNE_THRESHOLD = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._leases: Dict[str, set] = {}
+
+    async def take(self, buckets: Sequence[Bucket], cost: float) -> float:
+        """所有桶都足够时扣除令牌并返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                tokens, updated, _, _ = self._buckets.get(
+                    key, (burst, now, rate, burst)
+                )
+                tokens = _refill(tokens, updated, now, rate, burst)
+                levels.append(tokens)
+                wait = max(wait, _wait_time(tokens, cost, rate))
+            if wait > 0:
+                return wait
+            for (key, rate, burst), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - cost, now, rate, burst)
+            if len(self._buckets) > self.PRUNE_THRESHOLD:
+                self._prune(now)
+            return 0.0
+
+    def _prune(self, now: float):
+        full = [
+            key
+            for key, (tokens, updated, rate, burst) in self._buckets.items()
+            if _refill(tokens, updated, now, rate, burst) >= burst
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    async def try_acquire(
+        self, endpoint_class: str, limit: int, lease_id: str
+    ) -> bool:
+        with self._lock:
+            leases = self._leases.setdefault(endpoint_class, set())
+            if len(leases) >= limit:
+                return False
+            leases.add(lease_id)
+            return True
+
+    async def release(self, endpoint_class: str, lease_id: str):
+        with self._lock:
+            self._leases.get(endpoint_class, set()).discard(lease_id)
+
+    async def active(self, endpoint_class: str) -> int:
+        with self._lock:
+            return len(self._leases.get(endpoint_class, ()))
+
+
+class RedisAdmissionBackend:
+    """基于Redis的多进程共享令牌桶和并发租约"""
+
+    shared = True
+
+    BUCKET_PREFIX = "admission:bucket:"
+    ACTIVE_PREFIX = "admission:active:"
+
+    # KEYS: 各令牌桶；ARGV: cost, 然后每个桶的 rate, burst
+    # 所有桶都足够时一起扣除，否则返回最长等待时间（字符串，保留小数）
+    _TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        if rate <= 0 then return 'inf' end
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait > 0 then return tostring(wait) end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return '0'
+"""
+
+    # KEYS[1]: 租约有序集合；ARGV: limit, lease_id, ttl
+    _ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then return 0 end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[2])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[3])) + 60)
+return 1
+"""
+
+    def __init__(self, lease_ttl: float):
+        self.lease_ttl = lease_ttl
+
+    async def take(self, buckets: Sequence[Bucket], cost: float) -> float:
+        args: List[float] = [cost]
+        for _, rate, burst in buckets:
+            args.extend((rate, burst))
+        keys = [self.BUCKET_PREFIX + key for key, _, _ in buckets]
+        wait = await get_redis().eval(
+            self._TAKE_SCRIPT, len(keys), *keys, *args
+        )
+        return float(wait)
+
+    async def try_acquire(
+        self, endpoint_class: str, limit: int, lease_id: str
+    ) -> bool:
+        acquired = await get_redis().eval(
+            self._ACQUIRE_SCRIPT,
+            1,
+            self.ACTIVE_PREFIX + endpoint_class,
+            limit,
+            lease_id,
+            self.lease_ttl,
+        )
+        return bool(acquired)
+
+    async def release(self, endpoint_class: str, lease_id: str):
+        await get_redis().zrem(self.ACTIVE_PREFIX + endpoint_class, lease_id)
+
+    async def active(self, endpoint_class: str) -> int:
+        key = self.ACTIVE_PREFIX + endpoint_class
+        redis = get_redis()
+        await redis.zremrangebyscore(key, "-inf", time.time())
+        return await redis.zcard(key)
+
+
+class _ClassState:
+    """单个接口类别的排队状态"""
+
+    def __init__(self, limit: int, cost: float):
+        self.limit = limit
+        self.cost = cost
+        # (优先级, 序号, lease_id, future)
+        self.waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self.dispatching = asyncio.Lock()
+        # 平均执行耗时(秒)，用于估算排队时间
+        self.service_time = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.shed = 0
+
+
+class AdmissionService:
+    """准入控制服务"""
+
+    # redis 模式下等待者重试获取租约的间隔(秒)
+    POLL_INTERVAL = 0.05
+    # 平均耗时的指数平滑系数
+    EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        backend: str = "memory",
+        enabled: bool = True,
+        concurrency: Optional[Dict[str, int]] = None,
+        cost: Optional[Dict[str, float]] = None,
+        user_rates: Optional[Dict[str, List[float]]] = None,
+        role_rates: Optional[Dict[str, List[float]]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+        queue_target: float = 2.0,
+        max_queue: int = 100,
+        lease_ttl: float = 600,
+    ):
+        if backend == "redis":
+            self.backend = RedisAdmissionBackend(lease_ttl=lease_ttl)
+        elif backend == "memory":
+            self.backend = MemoryAdmissionBackend()
+        else:
+            raise ValueError(f"不支持的准入控制后端: {backend}")
+        self.enabled = enabled
+        self.concurrency = concurrency or {}
+        self.cost = cost or {}
+        self.user_rates = user_rates or {}
+        self.role_rates = role_rates or {}
+        self.priorities = priorities or {}
+        self.queue_target = queue_target
+        self.max_queue = max_queue
+        self._classes: Dict[str, _ClassState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, endpoint_class: str) -> _ClassState:
+        state = self._classes.get(endpoint_class)
+        if state is None:
+            if endpoint_class not in self.concurrency:
+                raise ValueError(f"未配置的接口类别: {endpoint_class}")
+            state = _ClassState(
+                self.concurrency[endpoint_class],
+                self.cost.get(endpoint_class, 1.0),
+            )
+            self._classes[endpoint_class] = state
+        return state
+
+    def _buckets(self, identity: Identity) -> List[Bucket]:
+        buckets = []
+        user_rate = self.user_rates.get(identity.role)
+        if user_rate:
+            buckets.append((f"user:{identity.key}", *user_rate))
+        role_rate = self.role_rates.get(identity.role)
+        if role_rate:
+            buckets.append((f"role:{identity.role}", *role_rate))
+        return buckets
+
+    def _priority(self, identity: Identity) -> int:
+        return self.priorities.get(
+            identity.role, max(self.priorities.values(), default=0)
+        )
+
+    async def acquire(
+        self, endpoint_class: str, identity: Identity
+    ) -> Optional[Ticket]:
+        """获取执行许可；被拒绝时抛出 AdmissionRejected"""
+        if not self.enabled:
+            return None
+        state = self._state(endpoint_class)
+
+        buckets = self._buckets(identity)
+        if buckets:
+            wait = await self.backend.take(buckets, state.cost)
+            if wait > 0:
+                state.throttled += 1
+                raise AdmissionRejected(
+                    429, min(wait, 3600), "请求过于频繁，请稍后重试"
+                )
+
+        lease_id = uuid.uuid4().hex
+        if not state.waiters and await self.backend.try_acquire(
+            endpoint_class, state.limit, lease_id
+        ):
+            state.admitted += 1
+            return Ticket(endpoint_class, lease_id)
+
+        priority = self._priority(identity)
+        ahead = sum(1 for waiter in state.waiters if waiter[0] <= priority)
+        estimate = (ahead + 1) * state.service_time / state.limit
+        if len(state.waiters) >= self.max_queue or (
+            estimate > self.queue_target
+        ):
+            state.shed += 1
+            raise AdmissionRejected(
+                503, estimate or self.queue_target, "服务繁忙，请稍后重试"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._seq), lease_id, future)
+        heapq.heappush(state.waiters, waiter)
+        admitted = False
+        try:
+            await self._wait(endpoint_class, state, future)
+            admitted = True
+        except asyncio.TimeoutError:
+            state.shed += 1
+            raise AdmissionRejected(
+                503, max(estimate, self.queue_target), "服务繁忙，请稍后重试"
+            )
+        finally:
+            if waiter in state.waiters:
+                state.waiters.remove(waiter)
+                heapq.heapify(state.waiters)
+            if not admitted:
+                if future.done() and not future.cancelled():
+                    # 已分到额度但请求被取消（如客户端断开）
+                    await self.backend.release(endpoint_class, lease_id)
+                future.cancel()
+        state.admitted += 1
+        return Ticket(endpoint_class, lease_id)
+
+    async def _wait(
+        self, endpoint_class: str, state: _ClassState, future: asyncio.Future
+    ):
+        budget = self.queue_target
+        request_remaining = deadline.remaining()
+        if request_remaining is not None:
+            budget = min(budget, request_remaining)
+        expires = time.monotonic() + budget
+        # 排队期间本进程可能没有请求结束，需要主动尝试
+        await self._dispatch(endpoint_class, state)
+        while not future.done():
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                # 请求本身已到截止时间时按超时处理
+                deadline.check()
+                raise asyncio.TimeoutError()
+            timeout = remaining
+            if self.backend.shared:
+                # 其他进程释放的额度不会通知到这里，定期重试
+                timeout = min(remaining, self.POLL_INTERVAL)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                await self._dispatch(endpoint_class, state)
+
+    async def _dispatch(self, endpoint_class: str, state: _ClassState):
+        """按优先级把空出的额度分给排队的请求"""
+        async with state.dispatching:
+            while state.waiters:
+                _, _, lease_id, future = state.waiters[0]
+                if future.done():
+                    heapq.heappop(state.waiters)
+                    continue
+                if not await self.backend.try_acquire(
+                    endpoint_class, state.limit, lease_id
+                ):
+                    return
+                heapq.heappop(state.waiters)
+                if future.done():
+                    # 等待者刚好超时离开，归还额度
+                    await self.backend.release(endpoint_class, lease_id)
+                else:
+                    future.set_result(True)
+
+    async def release(self, ticket: Optional[Ticket]):
+        """归还执行许可并唤醒排队的请求"""
+        if ticket is None:
+            return
+        state = self._state(ticket.endpoint_class)
+        elapsed = time.monotonic() - ticket.started
+        if state.service_time:
+            state.service_time += self.EWMA_ALPHA * (
+                elapsed - state.service_time
+            )
+        else:
+            state.service_time = elapsed
+        try:
+            await self.backend.release(ticket.endpoint_class, ticket.lease_id)
+        except Exception as e:
+            # 租约会按 TTL 过期，不影响请求本身
+            logger.error(f"归还并发额度失败: {e}")
+        await self._dispatch(ticket.endpoint_class, state)
+
+    async def metrics(self) -> Dict[str, Dict]:
+        """各接口类别的并发、排队和拒绝统计"""
+        result = {}
+        for name, limit in self.concurrency.items():
+            state = self._state(name)
+            result[name] = {
+                "limit": limit,
+                "active": await self.backend.active(name),
+                "queued": len(state.waiters),
+                "service_time": round(state.service_time, 4),
+                "admitted": state.admitted,
+                "throttled": state.throttled,
+                "shed": state.shed,
+            }
+        return result
+
+
+admission_service = AdmissionService(
+    backend=settings.admission_backend,
+    enabled=settings.admission_enabled,
+    concurrency=settings.admission_concurrency,
+    cost=settings.admission_cost,
+    user_rates=settings.admission_user_rates,
+    role_rates=settings.admission_role_rates,
+    priorities=settings.admission_priorities,
+    queue_target=settings.admission_queue_target,
+    max_queue=settings.admission_max_queue,
+    lease_ttl=settings.admission_lease_ttl,
+)
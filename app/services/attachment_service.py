@@ -0,0 +1,347 @@
+"""附件服务
+
+实验的 photos、files 和反馈的 screenshots、attachments 字段保存附件
+引用（"sha256:<摘要>"），内容存放在按内容寻址的本地存储中：
+- 上传流式写盘并计算摘要，内容已存在时直接复用（自动去重）
+- 附件字段的引用变化通过 ORM 事件在同一事务内增减 Blob.ref_count，
+  事务回滚时计数随之回滚；引用不存在的附件时写入失败
+- 引用数为零且超过宽限期的内容由后台垃圾回收删除；旧数据中的普通
+  路径不是附件引用，不参与计数
+"""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from sqlalchemy import delete, event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from config.settings import settings
+from core.blobstore import BlobStore, PendingBlob
+from db.database import SessionLocal
+from models import Blob, Experiment, Feedback
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+REFERENCE_PREFIX = "sha256:"
+
+# 附件字段
+ATTACHMENT_FIELDS = {
+    Experiment: ("photos", "files"),
+    Feedback: ("screenshots", "attachments"),
+}
+OWNERS = {"experiment": Experiment, "feedback": Feedback}
+
+
+class AttachmentNotFound(ValueError):
+    """引用的附件内容不存在"""
+
+
+class DigestMismatch(ValueError):
+    """上传内容与客户端声明的 SHA-256 不一致"""
+
+
+def reference(digest: str) -> str:
+    return f"{REFERENCE_PREFIX}{digest}"
+
+
+def parse_reference(value: Any) -> Optional[str]:
+    """附件引用 -> 摘要，不是附件引用时返回 None"""
+    if isinstance(value, str) and value.startswith(REFERENCE_PREFIX):
+        digest = value[len(REFERENCE_PREFIX):]
+        if BlobStore.valid(digest):
+            return digest
+    return None
+
+
+def _count_refs(values: Optional[Iterable[Any]]) -> Counter:
+    digests = (parse_reference(value) for value in values or ())
+    return Counter(digest for digest in digests if digest is not None)
+
+
+class AttachmentService:
+    """附件服务"""
+
+    def __init__(
+        self,
+        root: str = "./data/attachments",
+        max_bytes: int = 2 << 30,
+        gc_grace: float = 86400.0,
+        gc_interval: float = 3600.0,
+        fsync: bool = True,
+    ):
+        self.store = BlobStore(root, fsync=fsync)
+        self.max_bytes = max_bytes
+        self.gc_grace = gc_grace
+        self.gc_interval = gc_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _register(
+        self,
+        db: AsyncSession,
+        pending: PendingBlob,
+        content_type: Optional[str],
+        filename: Optional[str],
+    ):
+        """登记内容元数据；已存在时刷新 updated_at 以重新计算回收宽限期"""
+        touch = (
+            update(Blob)
+            .where(Blob.sha256 == pending.sha256)
+            .values(updated_at=func.now())
+        )
+        if (await db.execute(touch)).rowcount:
+            await db.commit()
+            return
+        db.add(
+            Blob(
+                sha256=pending.sha256,
+                size=pending.size,
+                content_type=content_type,
+                filename=filename,
+                ref_count=0,
+            )
+        )
+        try:
+            await db.commit()
+        except IntegrityError:
+            # 相同内容的并发上传已先登记
+            await db.rollback()
+            await db.execute(touch)
+            await db.commit()
+
+    async def upload(
+        self,
+        db: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        expected_sha256: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """流式保存上传内容，返回附件元数据、引用和是否复用已有内容"""
+        pending = await self.store.receive(chunks, self.max_bytes)
+        try:
+            if expected_sha256 and expected_sha256 != pending.sha256:
+                raise DigestMismatch(
+                    f"内容摘要 {pending.sha256} 与声明的 "
+                    f"{expected_sha256} 不一致"
+                )
+            # 持共享锁，期间垃圾回收不会删除该内容
+            async with self.store.shared():
+                await self._register(db, pending, content_type, filename)
+                created = await asyncio.to_thread(self.store.commit, pending)
+        finally:
+            self.store.discard(pending)
+        blob = await db.get(Blob, pending.sha256, populate_existing=True)
+        return {
+            **blob.to_dict(),
+            "ref": reference(pending.sha256),
+            "deduplicated": not created,
+        }
+
+    async def get_blob(self, db: AsyncSession, digest: str) -> Optional[Blob]:
+        """附件元数据（内容文件不存在时返回 None）"""
+        if not self.store.exists(digest):
+            return None
+        return await db.get(Blob, digest)
+
+    async def _owner(self, db: AsyncSession, owner: str, owner_id: int):
+        model = OWNERS[owner]
+        return model, await db.get(model, owner_id)
+
+    async def link(
+        self,
+        db: AsyncSession,
+        digest: str,
+        owner: str,
+        owner_id: int,
+        field: str,
+    ) -> Optional[List[Any]]:
+        """把附件加入实验或反馈的附件字段（已存在时不重复添加）
+
+        对象不存在时返回 None，附件不存在时抛出 AttachmentNotFound。
+        """
+        model, obj = await self._owner(db, owner, owner_id)
+        if field not in ATTACHMENT_FIELDS[model]:
+            raise ValueError(f"{owner} 没有附件字段 {field}")
+        if obj is None:
+            return None
+        values = list(getattr(obj, field) or [])
+        ref = reference(digest)
+        if ref not in values:
+            setattr(obj, field, [*values, ref])
+            await db.commit()
+        return getattr(obj, field)
+
+    async def unlink(
+        self,
+        db: AsyncSession,
+        digest: str,
+        owner: str,
+        owner_id: int,
+        field: str,
+    ) -> Optional[List[Any]]:
+        """从附件字段中移除附件，对象不存在时返回 None"""
+        model, obj = await self._owner(db, owner, owner_id)
+        if field not in ATTACHMENT_FIELDS[model]:
+            raise ValueError(f"{owner} 没有附件字段 {field}")
+        if obj is None:
+            return None
+        ref = reference(digest)
+        values = list(getattr(obj, field) or [])
+        if ref in values:
+            setattr(obj, field, [value for value in values if value != ref])
+            await db.commit()
+        return getattr(obj, field)
+
+    def collect_garbage(
+        self, limit: int = 1000, check: Optional[Callable[[], None]] = None
+    ) -> Dict[str, int]:
+        """删除引用数为零且超过宽限期的内容（同步，供后台调用）
+
+        每个对象在存储排他锁内先删元数据再删文件，与上传互斥；每个
+        对象之前调用 check，取消时已删除的对象保持删除。
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=self.gc_grace
+        )
+        unused = (Blob.ref_count <= 0, Blob.updated_at < cutoff)
+        removed = freed = 0
+        with SessionLocal() as db:
+            candidates = db.execute(
+                select(Blob.sha256, Blob.size).where(*unused).limit(limit)
+            ).all()
+            for digest, size in candidates:
+                if check is not None:
+                    check()
+                with self.store.locked(exclusive=True):
+                    result = db.execute(
+                        delete(Blob).where(Blob.sha256 == digest, *unused)
+                    )
+                    if result.rowcount:
+                        self.store.delete(digest)
+                    db.commit()
+                if result.rowcount:
+                    removed += 1
+                    freed += size
+        swept = self.store.sweep_tmp(self.gc_grace)
+        if removed or swept:
+            logger.info(
+                f"附件回收: 删除 {removed} 个（{freed} 字节），"
+                f"清理中断的上传 {swept} 个"
+            )
+        return {"removed": removed, "bytes": freed, "tmp_removed": swept}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.gc_interval)
+            try:
+                await asyncio.to_thread(self.collect_garbage)
+            except Exception as e:
+                logger.error(f"附件回收失败: {e}")
+
+    async def start(self):
+        """启动定期垃圾回收"""
+        if self._task is None and self.gc_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+attachment_service = AttachmentService(
+    root=settings.attachment_dir,
+    max_bytes=settings.attachment_max_bytes,
+    gc_grace=settings.attachment_gc_grace,
+    gc_interval=settings.attachment_gc_interval,
+    fsync=settings.attachment_fsync,
+)
+
+
+def _apply_delta(connection, delta: Dict[str, int]):
+    """在 flush 所在事务中调整引用数"""
+    for digest, change in sorted(delta.items()):
+        if not change:
+            continue
+        result = connection.execute(
+            update(Blob.__table__)
+            .where(Blob.__table__.c.sha256 == digest)
+            .values(
+                ref_count=Blob.__table__.c.ref_count + change,
+                updated_at=func.now(),
+            )
+        )
+        if change > 0 and not result.rowcount:
+            raise AttachmentNotFound(f"附件不存在: {digest}")
+
+
+def _stored_refs(connection, mapper, target, fields) -> Counter:
+    """数据库中当前保存的引用（不依赖对象上已加载的旧值）"""
+    table = mapper.local_table
+    row = connection.execute(
+        select(*(table.c[field] for field in fields)).where(
+            table.c.id == target.id
+        )
+    ).first()
+    counts = Counter()
+    if row is not None:
+        for values in row:
+            counts += _count_refs(values)
+    return counts
+
+
+def _new_refs(target, fields) -> Counter:
+    counts = Counter()
+    for field in fields:
+        counts += _count_refs(getattr(target, field))
+    return counts
+
+
+def _after_insert(mapper, connection, target):
+    fields = ATTACHMENT_FIELDS[mapper.class_]
+    _apply_delta(connection, _new_refs(target, fields))
+
+
+def _before_update(mapper, connection, target):
+    state = inspect(target)
+    fields = [
+        field
+        for field in ATTACHMENT_FIELDS[mapper.class_]
+        if state.attrs[field].history.has_changes()
+    ]
+    if not fields:
+        return
+    old = _stored_refs(connection, mapper, target, fields)
+    new = _new_refs(target, fields)
+    _apply_delta(
+        connection, {digest: new[digest] - old[digest] for digest in old | new}
+    )
+
+
+def _before_delete(mapper, connection, target):
+    fields = ATTACHMENT_FIELDS[mapper.class_]
+    old = _stored_refs(connection, mapper, target, fields)
+    _apply_delta(connection, {digest: -count for digest, count in old.items()})
+
+
+for _model in ATTACHMENT_FIELDS:
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "before_update", _before_update)
+    event.listen(_model, "before_delete", _before_delete)
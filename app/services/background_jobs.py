@@ -0,0 +1,94 @@
+"""后台任务定义
+
+在此注册可通过 ``POST /jobs`` 提交的长耗时操作。进程内队列和 Celery
+worker 都通过导入本模块完成注册。
+"""
+
+from typing import Any, Dict
+
+from core.jobs import JobContext, job
+from db.database import AsyncSessionLocal
+from models.schemas.recipe import (
+    DedupClusterParams,
+    DOEJobParams,
+    RecipeOptimizeRequest,
+)
+from services import doe_service, optimization_service
+from services.attachment_service import attachment_service
+from services.dedup_service import dedup_service
+from services.experiment_report_service import experiment_report_service
+from services.facet_service import facet_service
+from services.feedback_cluster_service import feedback_cluster_service
+
+
+@job("recipe.optimize", params=RecipeOptimizeRequest, max_retries=1)
+async def optimize_recipe(
+    ctx: JobContext, params: RecipeOptimizeRequest
+) -> Dict[str, Any]:
+    """配方家族的下一轮实验建议"""
+    ctx.progress(0.0, "拟合代理模型")
+    async with AsyncSessionLocal() as db:
+        result = await optimization_service.optimize_recipe(db, params)
+    if result is None:
+        raise ValueError("配方不存在")
+    return result
+
+
+# 批量写入不是幂等的，不自动重试
+@job("recipe.doe", params=DOEJobParams)
+async def create_doe_batch(
+    ctx: JobContext, params: DOEJobParams
+) -> Dict[str, Any]:
+    """生成试验设计并批量创建实验和工站任务"""
+    ctx.progress(0.0, "生成设计矩阵")
+    async with AsyncSessionLocal() as db:
+        result = await doe_service.create_doe_batch(
+            db, params.recipe_id, params
+        )
+    if result is None:
+        raise ValueError("配方不存在")
+    return result
+
+
+@job("recipe.dedup_clusters", params=DedupClusterParams, max_retries=1)
+def cluster_duplicates(
+    ctx: JobContext, params: DedupClusterParams
+) -> Dict[str, Any]:
+    """全量配方近似重复聚类"""
+    ctx.progress(0.0, "计算配方签名")
+    clusters = dedup_service.cluster_catalog(
+        threshold=params.threshold, check=ctx.check_cancelled
+    )
+    return {"count": len(clusters), "clusters": clusters}
+
+
+@job("index.facet_snapshot", max_retries=2)
+def rebuild_facet_snapshot(ctx: JobContext) -> Dict[str, Any]:
+    """全量重建分面索引快照"""
+    ctx.progress(0.0, "全量构建分面索引")
+    return {
+        "documents": facet_service.rebuild_snapshot(
+            check=ctx.check_cancelled
+        )
+    }
+
+
+@job("feedback.recluster", max_retries=1)
+def recluster_feedback(ctx: JobContext) -> Dict[str, Any]:
+    """全量反馈重聚类"""
+    ctx.progress(0.0, "全量聚类反馈")
+    return feedback_cluster_service.recluster(check=ctx.check_cancelled)
+
+
+@job("report.export_experiments", max_retries=2)
+def export_experiment_snapshot(ctx: JobContext) -> Dict[str, Any]:
+    """立即把变更的实验增量导出到报表快照"""
+    ctx.progress(0.0, "导出实验快照")
+    return experiment_report_service.export(check=ctx.check_cancelled)
+
+
+@job("attachments.gc", max_retries=1)
+def collect_attachment_garbage(ctx: JobContext) -> Dict[str, Any]:
+    """立即回收无引用且超过保留期的附件"""
+    ctx.progress(0.0, "回收附件")
+    return attachment_service.collect_garbage(check=ctx.check_cancelled)
@@ -0,0 +1,239 @@
+"""批量创建服务
+
+配方、实验记录和工站任务的批量写入。请求体在进入服务前已整体校验，
+这里再用每张关联表一条 IN 查询核对外键，然后以多行
+INSERT … RETURNING（SQLAlchemy insertmanyvalues）写入并按原顺序取回ID。
+
+Core 批量插入不触发 ORM 事件，配方的原料索引行、谱系闭包表自身行在同一
+事务内补写；提交后登记分面/查重索引更新并失效缓存（清掉不存在ID的负缓存）。
+
+默认整批一个事务，任一条外键不存在时整批不写入；指定 chunk_size 时按块
+分别提交，外键不存在的条目跳过，某块写入失败只影响该块。
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import (
+    Experiment,
+    Recipe,
+    RecipeIngredient,
+    RecipeLineage,
+    Task,
+    User,
+)
+from models.experiment import ExperimentResult, ExperimentStatus
+from models.recipe import RecipeDifficulty, RecipeStatus
+from models.recipe_ingredient import build_index_rows
+from models.schemas.experiment import ExperimentBatchCreate
+from models.schemas.recipe import RecipeBatchCreate
+from models.schemas.workstation import TaskBatchCreate
+from models.task import TaskPriority, TaskStatus
+from services.cache_service import CACHED_MODELS, cache_service
+from services.dedup_service import dedup_service
+from services.facet_service import facet_service
+from services.fulltext_service import fulltext_service
+from utils import deadline
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+CREATED = "created"
+FAILED = "failed"
+SKIPPED = "skipped"  # 整批事务中本身合法、因其他条目出错而未写入
+
+AfterInsert = Callable[[AsyncSession, List[int], List[Dict]], Awaitable]
+
+
+async def _missing_ids(db: AsyncSession, model, ids) -> Set[int]:
+    """返回 ids 中在表内不存在的ID"""
+    wanted = {i for i in ids if i is not None}
+    if not wanted:
+        return set()
+    result = await db.execute(select(model.id).where(model.id.in_(wanted)))
+    return wanted - set(result.scalars())
+
+
+async def _check_refs(
+    db: AsyncSession, rows: List[Dict[str, Any]], refs: Dict[str, tuple]
+) -> List[List[str]]:
+    """按外键字段核对引用，返回每条记录的错误列表"""
+    errors: List[List[str]] = [[] for _ in rows]
+    for column, (model, label) in refs.items():
+        missing = await _missing_ids(db, model, (r[column] for r in rows))
+        if not missing:
+            continue
+        for row_errors, row in zip(errors, rows):
+            if row[column] in missing:
+                row_errors.append(f"{label}不存在: {row[column]}")
+    return errors
+
+
+async def _insert_returning_ids(
+    db: AsyncSession, model, rows: List[Dict[str, Any]]
+) -> List[int]:
+    """多行插入并按参数顺序返回ID"""
+    if db.bind.dialect.name == "sqlite":
+        # SQLite 不保证 RETURNING 的行序，SQLAlchemy 会退化为逐行插入；
+        # 同一条语句内的自增ID按 VALUES 顺序递增分配，排序即可对应
+        result = await db.execute(
+            insert(model.__table__).returning(model.id), rows
+        )
+        return sorted(result.scalars())
+    result = await db.execute(
+        insert(model.__table__).returning(
+            model.id, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    return list(result.scalars())
+
+
+async def _insert_rows(
+    db: AsyncSession,
+    model,
+    rows: List[Dict[str, Any]],
+    errors: List[List[str]],
+    chunk_size: Optional[int],
+    after_insert: Optional[AfterInsert] = None,
+) -> Dict[str, Any]:
+    items: List[Dict[str, Any]] = [
+        {"index": index, "id": None, "status": FAILED, "errors": row_errors}
+        for index, row_errors in enumerate(errors)
+    ]
+    pending = [i for i, row_errors in enumerate(errors) if not row_errors]
+    if chunk_size is None:
+        if len(pending) < len(rows):
+            for index in pending:
+                items[index]["status"] = SKIPPED
+            pending = []
+        chunk_size = max(len(pending), 1)
+
+    created: List[int] = []
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start : start + chunk_size]
+        chunk_rows = [rows[index] for index in chunk]
+        try:
+            ids = await _insert_returning_ids(db, model, chunk_rows)
+            if after_insert is not None:
+                await after_insert(db, ids, chunk_rows)
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            if deadline.expired():
+                # 语句超时由请求截止时间触发，交给 504 处理
+                raise
+            logger.warning(f"批量写入 {model.__tablename__} 失败: {e}")
+            error = str(getattr(e, "orig", None) or e)
+            for index in chunk:
+                items[index]["errors"].append(error)
+            continue
+        for index, obj_id in zip(chunk, ids):
+            items[index].update(id=obj_id, status=CREATED)
+        created.extend(ids)
+
+    if created and issubclass(model, CACHED_MODELS):
+        await cache_service.invalidate_objects(model, created)
+    return {
+        "total": len(rows),
+        "created": len(created),
+        "failed": sum(item["status"] == FAILED for item in items),
+        "items": items,
+    }
+
+
+def status_code(result: Dict[str, Any]) -> int:
+    """全部写入 201，部分写入 207，没有写入任何条目 422"""
+    if result["created"] == result["total"]:
+        return 201
+    return 207 if result["created"] else 422
+
+
+async def _index_recipes(
+    db: AsyncSession, ids: List[int], rows: List[Dict[str, Any]]
+):
+    """补写 ORM 事件中维护的原料索引和谱系闭包表"""
+    index_rows = [
+        index_row
+        for recipe_id, row in zip(ids, rows)
+        for index_row in build_index_rows(recipe_id, row["ingredients"])
+    ]
+    if index_rows:
+        await db.execute(insert(RecipeIngredient.__table__), index_rows)
+    await db.execute(
+        insert(RecipeLineage.__table__),
+        [{"ancestor_id": i, "descendant_id": i, "depth": 0} for i in ids],
+    )
+
+
+async def create_recipes(
+    db: AsyncSession, request: RecipeBatchCreate
+) -> Dict[str, Any]:
+    """批量创建配方（草稿状态）"""
+    rows = []
+    for item in request.items:
+        row = item.model_dump()
+        row["difficulty"] = RecipeDifficulty(row["difficulty"])
+        row["status"] = RecipeStatus.DRAFT
+        row["creator_id"] = request.creator_id
+        rows.append(row)
+    errors = await _check_refs(db, rows, {"creator_id": (User, "用户")})
+    result = await _insert_rows(
+        db, Recipe, rows, errors, request.chunk_size, _index_recipes
+    )
+    for item in result["items"]:
+        if item["status"] == CREATED:
+            facet_service.mark_stale(item["id"])
+            dedup_service.mark_stale(item["id"])
+    return result
+
+
+async def create_experiments(
+    db: AsyncSession, request: ExperimentBatchCreate
+) -> Dict[str, Any]:
+    """批量创建实验记录"""
+    rows = []
+    for item in request.items:
+        row = item.model_dump()
+        row["status"] = ExperimentStatus(row["status"])
+        if row["result"] is not None:
+            row["result"] = ExperimentResult(row["result"])
+        rows.append(row)
+    errors = await _check_refs(
+        db,
+        rows,
+        {"recipe_id": (Recipe, "配方"), "user_id": (User, "用户")},
+    )
+    result = await _insert_rows(
+        db, Experiment, rows, errors, request.chunk_size
+    )
+    for item in result["items"]:
+        if item["status"] == CREATED:
+            fulltext_service.mark_stale("experiment", item["id"])
+    return result
+
+
+async def create_tasks(
+    db: AsyncSession, request: TaskBatchCreate
+) -> Dict[str, Any]:
+    """批量创建工站任务（待执行状态）"""
+    rows = []
+    for item in request.items:
+        row = item.model_dump()
+        row["priority"] = TaskPriority(row["priority"])
+        row["status"] = TaskStatus.PENDING
+        row["user_id"] = request.user_id
+        rows.append(row)
+    errors = await _check_refs(
+        db,
+        rows,
+        {
+            "user_id": (User, "用户"),
+            "recipe_id": (Recipe, "配方"),
+            "experiment_id": (Experiment, "实验"),
+        },
+    )
+    return await _insert_rows(db, Task, rows, errors, request.chunk_size)
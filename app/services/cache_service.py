@@ -0,0 +1,419 @@
+"""两级读穿缓存（按ID读取配方、用户、实验）
+
+读取顺序：进程内 LRU -> Redis -> 数据库，未命中时逐级回填：
+- 同一进程内同一个键的并发未命中合并为一次加载（single-flight）；
+  跨进程用 Redis 短锁，抢锁失败的进程短暂等待其他进程回填
+- Redis TTL 加随机抖动，避免同一批键同时过期；不存在的ID短暂缓存
+- ORM 提交后（after_commit）使相关键失效：本进程 LRU 立即清除，Redis
+  中的版本号加一并删除数据，再通过 pub/sub 通知其他进程清除 LRU
+- Redis 中的值带写入时的版本号，读取时与当前版本比较，避免并发加载
+  把提交前读到的旧值写回缓存
+
+进程内 LRU 只在 pub/sub 订阅正常时启用，订阅断开期间只读 Redis，
+因此更新后读到旧值的时间窗口取决于 pub/sub 延迟（毫秒级）。
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import redis as sync_redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from db.redis import get_redis
+from models import Experiment, Recipe, User
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+CACHED_MODELS = (Recipe, User, Experiment)
+CHANNEL = "cache:invalidate"
+# 跨进程加载锁的有效期和抢锁失败后的等待上限(秒)
+LOAD_LOCK_TTL = 2.0
+LOAD_WAIT = 0.2
+LOAD_POLL = 0.02
+
+_PENDING_KEYS = "cache_invalidate_keys"
+_MISSING = object()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _decode(payload: Optional[str]) -> Optional[Dict[str, Any]]:
+    return json.loads(payload) if payload is not None else None
+
+
+class CacheService:
+    """进程内 LRU + Redis 的读穿缓存"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl: int = 300,
+        ttl_jitter: float = 0.1,
+        local_size: int = 10000,
+        local_ttl: float = 30.0,
+        negative_ttl: int = 2,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.ttl_jitter = ttl_jitter
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.negative_ttl = negative_ttl
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        # 键 -> (JSON 或 None 表示不存在, 过期时间)
+        self._local: "OrderedDict[str, Tuple[Optional[str], float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 加载期间被失效的键，加载结果不回填进程内缓存
+        self._dirty: Set[str] = set()
+        self._origin = uuid.uuid4().hex
+        self._subscribed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self._sync_redis: Optional[sync_redis.Redis] = None
+
+    @staticmethod
+    def key(model, obj_id: int) -> str:
+        return f"{model.__tablename__}:{obj_id}"
+
+    @staticmethod
+    def _data_key(key: str) -> str:
+        return f"cache:{key}"
+
+    @staticmethod
+    def _version_key(key: str) -> str:
+        return f"cache:ver:{key}"
+
+    def _jittered(self, ttl: float) -> int:
+        jitter = random.uniform(-self.ttl_jitter, self.ttl_jitter)
+        return max(1, int(ttl * (1 + jitter)))
+
+    # ---------- 进程内 LRU ----------
+
+    def _local_get(self, key: str):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            payload, expires = entry
+            if expires < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return payload
+
+    def _local_set(self, key: str, payload: Optional[str]):
+        if not self._subscribed:
+            return
+        ttl = self.local_ttl if payload is not None else self.negative_ttl
+        with self._lock:
+            if key in self._dirty:
+                return
+            self._local[key] = (payload, time.monotonic() + ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def invalidate_local(self, keys: Iterable[str]):
+        """清除本进程缓存中的键"""
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+                if key in self._inflight:
+                    self._dirty.add(key)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._dirty.update(self._inflight)
+
+    # ---------- 读取 ----------
+
+    async def get(
+        self, db: AsyncSession, model, obj_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """按ID读取对象的 to_dict() 结果，不存在时返回 None"""
+        if not self.enabled:
+            obj = await db.get(model, obj_id)
+            return obj.to_dict() if obj is not None else None
+
+        key = self.key(model, obj_id)
+        payload = self._local_get(key)
+        if payload is not _MISSING:
+            self.stats["local_hits"] += 1
+            return _decode(payload)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return _decode(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 负责加载的请求被取消，自己重新加载
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await self._load(db, model, obj_id, key)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(payload)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._dirty.discard(key)
+        return _decode(payload)
+
+    async def _redis_get(self, key: str) -> Tuple[Any, Optional[str]]:
+        """返回 (缓存值或 _MISSING, 当前版本号)，Redis 不可用时版本为 None"""
+        try:
+            raw, version = await get_redis().mget(
+                self._data_key(key), self._version_key(key)
+            )
+        except RedisError as e:
+            logger.debug(f"读取缓存失败: {e}")
+            return _MISSING, None
+        version = version or "0"
+        if raw is not None:
+            stored_version, _, payload = raw.partition(":")
+            if stored_version == version:
+                return (None if payload == "" else payload), version
+        return _MISSING, version
+
+    async def _load(
+        self, db: AsyncSession, model, obj_id: int, key: str
+    ) -> Optional[str]:
+        payload, version = await self._redis_get(key)
+        if payload is not _MISSING:
+            self.stats["redis_hits"] += 1
+            self._local_set(key, payload)
+            return payload
+
+        redis = get_redis()
+        locked = False
+        if version is not None:
+            try:
+                locked = await redis.set(
+                    f"cache:lock:{key}",
+                    self._origin,
+                    nx=True,
+                    px=int(LOAD_LOCK_TTL * 1000),
+                )
+                if not locked:
+                    # 其他进程正在加载，短暂等待其回填
+                    deadline = time.monotonic() + LOAD_WAIT
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOAD_POLL)
+                        payload, version = await self._redis_get(key)
+                        if payload is not _MISSING:
+                            self.stats["redis_hits"] += 1
+                            self._local_set(key, payload)
+                            return payload
+            except RedisError as e:
+                logger.debug(f"缓存加载锁失败: {e}")
+
+        self.stats["misses"] += 1
+        obj = await db.get(model, obj_id)
+        payload = (
+            json.dumps(obj.to_dict(), default=_json_default)
+            if obj is not None
+            else None
+        )
+        if version is not None:
+            ttl = self.ttl if payload is not None else self.negative_ttl
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.set(
+                        self._data_key(key),
+                        f"{version}:{payload or ''}",
+                        ex=self._jittered(ttl),
+                    )
+                    if locked:
+                        pipe.delete(f"cache:lock:{key}")
+                    await pipe.execute()
+            except RedisError as e:
+                logger.debug(f"写入缓存失败: {e}")
+        self._local_set(key, payload)
+        return payload
+
+    # ---------- 失效 ----------
+
+    def _version_ttl(self) -> int:
+        # 版本号存活时间长于数据，过期后版本回到 0 只会造成一次未命中
+        return int(self.ttl * (1 + self.ttl_jitter) * 2) + 1
+
+    def _message(self, keys: List[str]) -> str:
+        return json.dumps({"origin": self._origin, "keys": keys})
+
+    async def invalidate(self, keys: Iterable[str]):
+        """使键失效并通知所有进程"""
+        keys = list(keys)
+        if not keys or not self.enabled:
+            return
+        self.invalidate_local(keys)
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(self._version_key(key))
+                    pipe.expire(self._version_key(key), self._version_ttl())
+                    pipe.delete(self._data_key(key))
+                pipe.publish(CHANNEL, self._message(keys))
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"缓存失效广播失败: {e}")
+
+    async def invalidate_objects(self, model, ids: Iterable[int]):
+        await self.invalidate(self.key(model, obj_id) for obj_id in ids)
+
+    def _invalidate_sync(self, keys: List[str]):
+        """没有事件循环时（脚本、Celery worker）用同步客户端失效"""
+        self.invalidate_local(keys)
+        try:
+            if self._sync_redis is None:
+                self._sync_redis = sync_redis.Redis.from_url(
+                    settings.redis_url, decode_responses=True
+                )
+            pipe = self._sync_redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(self._version_key(key))
+                pipe.expire(self._version_key(key), self._version_ttl())
+                pipe.delete(self._data_key(key))
+            pipe.publish(CHANNEL, self._message(keys))
+            pipe.execute()
+        except RedisError as e:
+            logger.error(f"缓存失效广播失败: {e}")
+
+    def invalidate_after_commit(self, keys: List[str]):
+        """ORM 提交后调用（同步上下文），在合适的事件循环中执行失效"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(self.invalidate(keys))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        elif self._loop is not None and self._loop.is_running():
+            # 线程中的同步会话提交：本进程缓存立即清除，广播交给事件循环
+            self.invalidate_local(keys)
+            asyncio.run_coroutine_threadsafe(self.invalidate(keys), self._loop)
+        else:
+            self._invalidate_sync(keys)
+
+    # ---------- 订阅 ----------
+
+    async def _listen(self):
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self._subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("origin") != self._origin:
+                        self.invalidate_local(data.get("keys") or [])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"缓存失效订阅中断，1秒后重连: {e}")
+            finally:
+                # 断开期间可能漏掉失效通知，清空本进程缓存
+                self._subscribed = False
+                self.clear_local()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(1)
+
+    async def start(self):
+        """启动失效通知订阅"""
+        if self.enabled and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "local_size": len(self._local),
+            "subscribed": self._subscribed,
+        }
+
+
+cache_service = CacheService(
+    enabled=settings.cache_enabled,
+    ttl=settings.cache_ttl,
+    ttl_jitter=settings.cache_ttl_jitter,
+    local_size=settings.cache_local_size,
+    local_ttl=settings.cache_local_ttl,
+    negative_ttl=settings.cache_negative_ttl,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    keys = session.info.setdefault(_PENDING_KEYS, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CACHED_MODELS) and obj.id is not None:
+            keys.add(CacheService.key(type(obj), obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    keys = session.info.pop(_PENDING_KEYS, None)
+    if keys:
+        cache_service.invalidate_after_commit(sorted(keys))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    # 回滚保存点时外层事务仍可能提交，保留已收集的键
+    if not previous_transaction.nested:
+        session.info.pop(_PENDING_KEYS, None)
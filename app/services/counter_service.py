@@ -0,0 +1,329 @@
+"""计数器写回服务
+
+浏览量、有用投票数等高频计数不在每次读取时 UPDATE，而是先累积在
+进程内存或 Redis 中，再按固定间隔合并为批量 UPDATE 写回数据库。
+
+- memory 模式：每个进程各自缓冲，写回使用 ``col = col + delta``，
+  多进程之间天然可以正确叠加；崩溃最多丢失一个刷写间隔内的增量。
+- redis 模式：所有进程共享同一个待刷写哈希，增量在 Redis 中持久化；
+  刷写时原子地将其改名为带 TTL 的 in-flight 键，在数据库事务提交前
+  删除。进程在删除后、提交前崩溃最多丢失这一批；提交后 in-flight 键
+  已不存在，读取时不会把已写回的增量再算一遍。
+
+读取时可调用 ``apply_pending`` 把尚未写回的增量合并进结果，
+使计数看起来是实时的。
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+
+from config.settings import settings
+from db.database import async_engine
+from db.redis import get_redis
+from models import Feedback, Recipe
+from services.cache_service import CACHED_MODELS, cache_service
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 计数器名称 -> (模型, 字段)
+COUNTER_FIELDS = {
+    "recipe.view_count": (Recipe, "view_count"),
+    "feedback.view_count": (Feedback, "view_count"),
+    "feedback.helpfulness_votes": (Feedback, "helpfulness_votes"),
+}
+
+Deltas = Dict[str, Dict[int, int]]
+
+
+def _check_counter(name: str):
+    if name not in COUNTER_FIELDS:
+        raise ValueError(f"未知的计数器: {name}")
+
+
+class MemoryCounterBackend:
+    """进程内计数缓冲"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Deltas = defaultdict(lambda: defaultdict(int))
+        self._inflight: Deltas = {}
+
+    async def incr(self, name: str, obj_id: int, amount: int = 1):
+        with self._lock:
+            self._pending[name][obj_id] += amount
+
+    async def get_pending(
+        self, name: str, ids: Iterable[int]
+    ) -> Dict[int, int]:
+        with self._lock:
+            pending = self._pending.get(name, {})
+            inflight = self._inflight.get(name, {})
+            result = {}
+            for obj_id in ids:
+                delta = pending.get(obj_id, 0) + inflight.get(obj_id, 0)
+                if delta:
+                    result[obj_id] = delta
+            return result
+
+    async def drain(self) -> Deltas:
+        with self._lock:
+            drained = {k: dict(v) for k, v in self._pending.items() if v}
+            self._pending.clear()
+            self._inflight = drained
+            return drained
+
+    async def discard_inflight(self):
+        with self._lock:
+            self._inflight = {}
+
+    async def restore(self, deltas: Deltas):
+        with self._lock:
+            for name, values in deltas.items():
+                for obj_id, delta in values.items():
+                    self._pending[name][obj_id] += delta
+            self._inflight = {}
+
+
+class RedisCounterBackend:
+    """基于Redis的多进程共享计数缓冲"""
+
+    PENDING_KEY = "counters:pending"
+    INFLIGHT_SET = "counters:inflight"
+
+    # 原子地把待刷写哈希改名为本进程的 in-flight 键并登记
+    _DRAIN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return {} end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+redis.call('SADD', KEYS[3], KEYS[2])
+return redis.call('HGETALL', KEYS[2])
+"""
+
+    def __init__(self, inflight_ttl: int):
+        self._inflight_key = f"counters:inflight:{uuid.uuid4().hex}"
+        self._inflight_ttl = inflight_ttl
+
+    @staticmethod
+    def _field(name: str, obj_id: int) -> str:
+        return f"{name}:{obj_id}"
+
+    async def incr(self, name: str, obj_id: int, amount: int = 1):
+        await get_redis().hincrby(
+            self.PENDING_KEY, self._field(name, obj_id), amount
+        )
+
+    async def get_pending(
+        self, name: str, ids: Iterable[int]
+    ) -> Dict[int, int]:
+        ids = list(ids)
+        if not ids:
+            return {}
+        redis = get_redis()
+        fields = [self._field(name, obj_id) for obj_id in ids]
+        inflight_keys = await redis.smembers(self.INFLIGHT_SET)
+        keys = [self.PENDING_KEY, *inflight_keys]
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hmget(key, fields)
+            rows = await pipe.execute()
+
+        result: Dict[int, int] = {}
+        for values in rows:
+            for obj_id, value in zip(ids, values):
+                if value:
+                    result[obj_id] = result.get(obj_id, 0) + int(value)
+        return result
+
+    async def drain(self) -> Deltas:
+        redis = get_redis()
+        # 清理已过期（所属进程崩溃）的 in-flight 登记
+        for key in await redis.smembers(self.INFLIGHT_SET):
+            if not await redis.exists(key):
+                await redis.srem(self.INFLIGHT_SET, key)
+
+        raw = await redis.eval(
+            self._DRAIN_SCRIPT,
+            3,
+            self.PENDING_KEY,
+            self._inflight_key,
+            self.INFLIGHT_SET,
+            self._inflight_ttl,
+        )
+        deltas: Deltas = defaultdict(dict)
+        for field, value in zip(raw[::2], raw[1::2]):
+            name, _, obj_id = field.rpartition(":")
+            if name in COUNTER_FIELDS and int(value):
+                deltas[name][int(obj_id)] = int(value)
+        return dict(deltas)
+
+    async def discard_inflight(self):
+        redis = get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._inflight_key)
+            pipe.srem(self.INFLIGHT_SET, self._inflight_key)
+            await pipe.execute()
+
+    async def restore(self, deltas: Deltas):
+        redis = get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            for name, values in deltas.items():
+                for obj_id, delta in values.items():
+                    pipe.hincrby(
+                        self.PENDING_KEY, self._field(name, obj_id), delta
+                    )
+            pipe.delete(self._inflight_key)
+            pipe.srem(self.INFLIGHT_SET, self._inflight_key)
+            await pipe.execute()
+
+
+class CounterService:
+    """计数器写回服务"""
+
+    def __init__(
+        self,
+        backend: str = "memory",
+        flush_interval: float = 5.0,
+        batch_size: int = 1000,
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        if backend == "redis":
+            self.backend = RedisCounterBackend(
+                inflight_ttl=max(60, int(flush_interval * 12))
+            )
+        elif backend == "memory":
+            self.backend = MemoryCounterBackend()
+        else:
+            raise ValueError(f"不支持的计数器后端: {backend}")
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def incr(self, name: str, obj_id: int, amount: int = 1):
+        """累加计数（不立即写数据库）"""
+        _check_counter(name)
+        await self.backend.incr(name, obj_id, amount)
+
+    async def get_pending(
+        self, name: str, ids: Iterable[int]
+    ) -> Dict[int, int]:
+        """获取尚未写回数据库的增量"""
+        _check_counter(name)
+        return await self.backend.get_pending(name, ids)
+
+    async def apply_pending(
+        self, entity: str, rows: List[dict]
+    ) -> List[dict]:
+        """把待写回增量合并进 to_dict() 结果，entity 为 recipe/feedback"""
+        ids = [row["id"] for row in rows if row.get("id") is not None]
+        if not ids:
+            return rows
+        for name in COUNTER_FIELDS:
+            prefix, _, field = name.partition(".")
+            if prefix != entity:
+                continue
+            pending = await self.get_pending(name, ids)
+            for row in rows:
+                delta = pending.get(row.get("id"))
+                if delta:
+                    row[field] = (row.get(field) or 0) + delta
+        return rows
+
+    async def flush(self) -> int:
+        """把缓冲的增量批量写回数据库，返回更新的行数"""
+        async with self._flush_lock:
+            deltas = await self.backend.drain()
+            if not deltas:
+                return 0
+            try:
+                updated = await self._write(deltas)
+            except Exception as e:
+                logger.error(f"计数器写回失败，增量已放回缓冲: {e}")
+                await self.backend.restore(deltas)
+                raise
+            # 计数写回不经过 ORM，需要单独使缓存失效
+            for name, values in deltas.items():
+                model = COUNTER_FIELDS[name][0]
+                if model in CACHED_MODELS:
+                    await cache_service.invalidate_objects(model, values)
+            return updated
+
+    async def _write(self, deltas: Deltas) -> int:
+        updated = 0
+        async with async_engine.begin() as conn:
+            for name, values in deltas.items():
+                stmt, params = self._build_update(name, values)
+                for i in range(0, len(params), self.batch_size):
+                    chunk = params[i : i + self.batch_size]
+                    await conn.execute(stmt, chunk)
+                    updated += len(chunk)
+            # 先丢弃 in-flight 增量再提交：崩溃时宁可少计这一批，
+            # 也不让已写回的增量在 TTL 内被重复计入读取结果
+            await self.backend.discard_inflight()
+        return updated
+
+    @staticmethod
+    def _build_update(name: str, values: Dict[int, int]) -> Tuple:
+        model, field = COUNTER_FIELDS[name]
+        table = model.__table__
+        column = table.c[field]
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                {
+                    field: func.coalesce(column, 0) + bindparam("_delta"),
+                    # 计数变化不视为内容修改，保持 updated_at 不变
+                    "updated_at": table.c.updated_at,
+                }
+            )
+        )
+        # 按ID排序，避免多个进程同时刷写时互相死锁
+        params = [
+            {"_id": obj_id, "_delta": delta}
+            for obj_id, delta in sorted(values.items())
+            if delta
+        ]
+        return stmt, params
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # 已记录日志，下个周期重试
+                pass
+
+    async def start(self):
+        """启动后台刷写任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"计数器写回服务已启动，间隔 {self.flush_interval}s")
+
+    async def stop(self):
+        """停止后台任务并做最后一次刷写"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            pass
+        logger.info("计数器写回服务已停止")
+
+
+counter_service = CounterService(
+    backend=settings.counter_backend,
+    flush_interval=settings.counter_flush_interval,
+    batch_size=settings.counter_flush_batch_size,
+)
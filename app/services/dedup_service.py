@@ -0,0 +1,177 @@
+"""配方近似重复检测服务
+
+进程内维护一份全目录的 LSH 索引，由 IncrementalIndexService 维护。
+索引在第一次查询时从数据库构建，不写快照；之后本进程对配方的新增和
+修改通过 ORM 事件登记为“待刷新”，在下一次查询时按ID重新读取并更新
+索引，因此回滚的事务不会在索引中留下脏数据；其他工作进程的写入由
+后台任务按 updated_at 水位线定期追赶。
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.dedup import (
+    LSHIndex,
+    MinHasher,
+    cluster_signatures,
+    compute_signatures,
+)
+from db.database import SessionLocal
+from models import Recipe
+from services.incremental_index import Check, IncrementalIndexService
+
+# 查重只需要这些列
+DEDUP_COLUMNS = (
+    Recipe.id,
+    Recipe.updated_at,
+    Recipe.name,
+    Recipe.ingredients,
+    Recipe.procedures,
+)
+
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "ingredients": row.ingredients,
+        "procedures": row.procedures,
+    }
+
+
+def iter_catalog(check: Check = None, batch_size: int = 5000):
+    """以流式方式遍历全部配方的查重字段（同步），每批数据前调用 check"""
+    with SessionLocal() as db:
+        result = db.execute(
+            select(*DEDUP_COLUMNS)
+            .order_by(Recipe.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for rows in result.partitions():
+            if check is not None:
+                check()
+            for row in rows:
+                yield _row_to_dict(row)
+
+
+class DedupService(IncrementalIndexService):
+    """配方查重服务"""
+
+    label = "配方查重索引"
+    model = Recipe
+    columns = DEDUP_COLUMNS
+    # 首次查询时才构建
+    warm_up = False
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 128,
+        bands: int = 16,
+        workers: int = 2,
+        start_method: str = "spawn",
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+    ):
+        super().__init__(
+            catch_up_interval=catch_up_interval,
+            catch_up_lag=catch_up_lag,
+            delete_scan_interval=delete_scan_interval,
+        )
+        self.threshold = threshold
+        self.bands = bands
+        self.workers = workers
+        self.start_method = start_method
+        self.hasher = MinHasher(num_perm=num_perm)
+
+    def _build(self, check: Check = None) -> LSHIndex:
+        watermark = self._latest_update()
+        ids, signatures = compute_signatures(
+            iter_catalog(check),
+            self.hasher,
+            workers=self.workers,
+            check=check,
+            start_method=self.start_method,
+        )
+        index = LSHIndex(
+            num_perm=self.hasher.num_perm,
+            bands=self.bands,
+            threshold=self.threshold,
+        )
+        index.add_many(ids, signatures)
+        index.watermark = watermark
+        return index
+
+    def _apply_rows(self, index: LSHIndex, rows):
+        for row in rows:
+            index.add(row.id, self.hasher.recipe_signature(row._mapping))
+
+    def _indexed_ids(self, index: LSHIndex) -> np.ndarray:
+        return index.keys()
+
+    def _remove(self, index: LSHIndex, recipe_id: int):
+        index.remove(recipe_id)
+
+    async def find_near_duplicates(
+        self,
+        db: AsyncSession,
+        recipe: Dict[str, Any],
+        threshold: Optional[float] = None,
+        limit: int = 20,
+        exclude_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """查找与给定配方近似重复的配方，返回 (配方ID, 相似度)"""
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+        signature = self.hasher.recipe_signature(recipe)
+        return index.query(signature, threshold, exclude=exclude_id)[:limit]
+
+    def cluster_catalog(
+        self,
+        threshold: Optional[float] = None,
+        workers: Optional[int] = None,
+        check: Check = None,
+    ) -> List[List[int]]:
+        """全量聚类（同步，CPU密集），签名计算分发到 workers 个进程
+
+        读取每批数据和完成每个签名块后调用 check。
+        """
+        ids, signatures = compute_signatures(
+            iter_catalog(check),
+            self.hasher,
+            workers=workers or self.workers,
+            check=check,
+            start_method=self.start_method,
+        )
+        if check is not None:
+            check()
+        return cluster_signatures(
+            ids,
+            signatures,
+            threshold=threshold or self.threshold,
+            bands=self.bands,
+        )
+
+
+dedup_service = DedupService(
+    threshold=settings.dedup_threshold,
+    num_perm=settings.dedup_num_perm,
+    bands=settings.dedup_bands,
+    workers=settings.dedup_workers,
+    start_method=settings.offload_start_method,
+    catch_up_interval=settings.index_catch_up_interval,
+    catch_up_lag=settings.index_catch_up_lag,
+    delete_scan_interval=settings.index_delete_scan_interval,
+)
+
+
+@event.listens_for(Recipe, "after_insert")
+@event.listens_for(Recipe, "after_update")
+@event.listens_for(Recipe, "after_delete")
+def _recipe_changed(mapper, connection, target):
+    dedup_service.mark_stale(target.id)
@@ -0,0 +1,272 @@
+"""试验设计（DOE）批量生成服务
+
+以配方的 ``parameters`` 和原料用量为基准，按全因子 / 拉丁超立方 / Sobol
+设计生成参数变体（设计矩阵整体向量化计算），并一次性写入：
+- 每个变体一条待执行的 ``Experiment``，计划取值写在 actual_parameters /
+  actual_ingredients 中，执行后由实际值覆盖
+- 提供工站时，每个实验再生成一条工站任务（``TaskCreate`` + 命令列表）
+两张表各用一条批量 INSERT，在同一事务内完成。
+"""
+
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.doe import Factor, generate_design
+from models import Experiment, Recipe, Task
+from models.experiment import ExperimentStatus
+from models.recipe_ingredient import ingredient_key
+from models.schemas.recipe import DOEFactor, DOERequest
+from models.schemas.workstation import TaskCreate
+from models.task import TaskPriority, TaskStatus
+
+PLACEHOLDER = re.compile(r"^\$\{(.+)\}$")
+
+
+def _base_value(value) -> Optional[float]:
+    if isinstance(value, dict):
+        value = value.get("value")
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _find_ingredient(ingredients: List[Any], name: str) -> Optional[int]:
+    """按CAS号或名称查找原料在列表中的位置"""
+    wanted = {ingredient_key(cas_number=name), ingredient_key(name=name)}
+    for position, item in enumerate(ingredients):
+        if isinstance(item, dict) and (
+            ingredient_key(item.get("cas_number"), item.get("name")) in wanted
+            or ingredient_key(name=item.get("name")) in wanted
+        ):
+            return position
+    return None
+
+
+def resolve_factors(
+    recipe: Recipe, factors: List[DOEFactor]
+) -> Tuple[List[Factor], List[Tuple[str, Any]]]:
+    """确定每个因子的取值区间，并返回其作用位置 (类型, 参数名或原料位置)"""
+    parameters = recipe.parameters or {}
+    ingredients = recipe.ingredients or []
+    resolved, targets = [], []
+    for spec in factors:
+        if spec.target == "parameter":
+            base = _base_value(parameters.get(spec.name))
+            targets.append(("parameter", spec.name))
+        else:
+            position = _find_ingredient(ingredients, spec.name)
+            if position is None:
+                raise ValueError(f"配方中不存在原料: {spec.name}")
+            base = _base_value(ingredients[position].get("amount"))
+            targets.append(("ingredient", position))
+
+        low, high = spec.low, spec.high
+        if spec.relative_span is not None:
+            if base is None:
+                raise ValueError(f"因子 {spec.name} 没有可用的基准值")
+            low = base * (1 - spec.relative_span) if low is None else low
+            high = base * (1 + spec.relative_span) if high is None else high
+        if low is None or high is None:
+            raise ValueError(
+                f"因子 {spec.name} 需要提供 low/high 或 relative_span"
+            )
+        resolved.append(
+            Factor(
+                name=spec.name,
+                low=min(low, high),
+                high=max(low, high),
+                levels=spec.levels,
+                log_scale=spec.log_scale,
+                round_digits=spec.round_digits,
+            )
+        )
+    return resolved, targets
+
+
+def _variant(
+    recipe: Recipe, targets: List[Tuple[str, Any]], values: np.ndarray
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """把一行设计取值套用到配方基准参数和原料上"""
+    parameters = dict(recipe.parameters or {})
+    ingredients = recipe.ingredients or []
+    copied = False
+    for (kind, key), value in zip(targets, values.tolist()):
+        if kind == "parameter":
+            current = parameters.get(key)
+            if isinstance(current, dict):
+                parameters[key] = {**current, "value": value}
+            else:
+                parameters[key] = value
+        else:
+            if not copied:
+                ingredients = [
+                    dict(i) if isinstance(i, dict) else i for i in ingredients
+                ]
+                copied = True
+            ingredients[key]["amount"] = value
+    return parameters, ingredients
+
+
+def default_commands(
+    recipe: Recipe, parameters: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """按配方步骤生成任务命令：先下发参数，再逐步执行"""
+    commands = [{"action": "set_parameters", "parameters": parameters}]
+    for number, step in enumerate(recipe.procedures or [], start=1):
+        if isinstance(step, dict):
+            step_parameters = dict(step.get("parameters") or {})
+            # 步骤参数中与设计因子同名的取值替换为本实验的取值
+            for key in step_parameters.keys() & parameters.keys():
+                step_parameters[key] = parameters[key]
+            commands.append(
+                {
+                    "action": step.get("action")
+                    or step.get("name")
+                    or f"step_{number}",
+                    "parameters": step_parameters,
+                }
+            )
+        else:
+            commands.append(
+                {"action": "manual_step", "parameters": {"instruction": step}}
+            )
+    return commands
+
+
+def render_commands(
+    template: List[Dict[str, Any]], values: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """把命令模板中的 ${因子名} 占位符替换为本实验的取值"""
+    rendered = []
+    for command in template:
+        parameters = {}
+        for key, value in command["parameters"].items():
+            if isinstance(value, str):
+                match = PLACEHOLDER.match(value)
+                if match and match.group(1) in values:
+                    value = values[match.group(1)]
+            parameters[key] = value
+        rendered.append({**command, "parameters": parameters})
+    return rendered
+
+
+def build_design(
+    recipe: Recipe, request: DOERequest
+) -> Tuple[List[Factor], List[Tuple[str, Any]], np.ndarray]:
+    factors, targets = resolve_factors(recipe, request.factors)
+    if request.design == "full_factorial":
+        total = int(np.prod([f.levels for f in factors]))
+    else:
+        total = request.count or 0
+    if total > settings.doe_max_variants:
+        raise ValueError(
+            f"试验点数 {total} 超过上限 {settings.doe_max_variants}"
+        )
+    design = generate_design(
+        request.design, factors, count=request.count, seed=request.seed
+    )
+    return factors, targets, design
+
+
+async def create_doe_batch(
+    db: AsyncSession, recipe_id: int, request: DOERequest
+) -> Optional[Dict[str, Any]]:
+    """生成试验设计并批量写入实验和工站任务，配方不存在时返回 None"""
+    recipe = await db.get(Recipe, recipe_id)
+    if recipe is None:
+        return None
+    factors, targets, design = build_design(recipe, request)
+    names = [f.name for f in factors]
+
+    if request.dry_run:
+        return {
+            "design": request.design,
+            "count": len(design),
+            "factors": names,
+            "variants": design.tolist(),
+        }
+
+    batch = request.batch_number or (
+        f"DOE-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+    )
+    experiment_rows = []
+    variants = []
+    for number, values in enumerate(design, start=1):
+        parameters, ingredients = _variant(recipe, targets, values)
+        variants.append((dict(zip(names, values.tolist())), parameters))
+        experiment_rows.append(
+            {
+                "name": f"{recipe.name} {batch} #{number}",
+                "description": f"{request.design} 设计第 {number} 组",
+                "batch_number": batch,
+                "recipe_id": recipe.id,
+                "user_id": request.user_id,
+                "actual_parameters": parameters,
+                "actual_ingredients": ingredients,
+                "status": ExperimentStatus.PENDING,
+            }
+        )
+
+    result = await db.execute(
+        insert(Experiment).returning(
+            Experiment.id, sort_by_parameter_order=True
+        ),
+        experiment_rows,
+    )
+    experiment_ids = list(result.scalars())
+
+    task_count = 0
+    if request.workstation_id is not None:
+        template = (
+            [c.model_dump() for c in request.commands]
+            if request.commands
+            else None
+        )
+        task_rows = []
+        for experiment_id, row, (values, parameters) in zip(
+            experiment_ids, experiment_rows, variants
+        ):
+            commands = (
+                render_commands(template, values)
+                if template
+                else default_commands(recipe, parameters)
+            )
+            # 命令模板已随请求校验过，其余字段来自配方和本次生成的数据
+            task = TaskCreate.trusted(
+                dict(
+                    name=row["name"],
+                    description=row["description"],
+                    priority=request.priority,
+                    commands=commands,
+                    estimated_duration=recipe.estimated_time,
+                    workstation_id=request.workstation_id,
+                    recipe_id=recipe.id,
+                    experiment_id=experiment_id,
+                )
+            ).model_dump()
+            task["priority"] = TaskPriority(task["priority"])
+            task["user_id"] = request.user_id
+            task["status"] = TaskStatus.PENDING
+            task_rows.append(task)
+        await db.execute(insert(Task), task_rows)
+        task_count = len(task_rows)
+
+    await db.commit()
+    return {
+        "batch_number": batch,
+        "design": request.design,
+        "count": len(experiment_ids),
+        "factors": names,
+        "experiment_ids": experiment_ids,
+        "task_count": task_count,
+    }
@@ -0,0 +1,305 @@
+"""实验报表服务
+
+实验的耗时、成本、质量评分和环境参数等报表不再对主库执行 GROUP BY：
+- 后台按 updated_at 水位线定期把变更过的实验增量导出到按月分区的
+  Parquet 快照（core/analytics），已删除的实验在导出时一并剔除；
+  多个工作进程中只有持有 ``export.writer`` 文件锁的一个定期导出，
+  每次导出在快照目录的排他锁内基于最新清单进行
+- 其他进程查询前发现清单被替换时重新读取
+- 报表查询只读快照，由 Arrow 的向量化引擎在进程内分组聚合，不产生
+  任何数据库查询；结果截至快照水位线（as_of），有一个导出周期的延迟
+- 快照依赖可选的 pyarrow，未安装时报表接口不可用
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import select
+
+from config.settings import settings
+from db.database import SessionLocal
+from models import Experiment
+from utils.filelock import FileLock
+from utils.logger import setup_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from core.analytics import ColumnarSnapshot
+except ImportError:  # pragma: no cover - 可选依赖
+    pa = None
+
+logger = setup_logger()
+
+# 可用于分组的维度
+DIMENSIONS = ("recipe_id", "user_id", "month", "status", "result")
+# 可聚合的指标
+MEASURES = (
+    "duration_minutes",
+    "actual_cost",
+    "quality_score",
+    "success_rating",
+    "temperature",
+    "humidity",
+    "pressure",
+)
+# 聚合函数（Arrow hash_* 聚合），count 只统计非空值
+AGGREGATES = ("mean", "min", "max", "sum", "count", "stddev")
+
+EXPORT_COLUMNS = (
+    Experiment.id,
+    Experiment.recipe_id,
+    Experiment.user_id,
+    Experiment.status,
+    Experiment.result,
+    Experiment.meets_criteria,
+    Experiment.created_at,
+    Experiment.updated_at,
+    *(getattr(Experiment, measure) for measure in MEASURES),
+)
+
+
+def _schema():
+    timestamp = pa.timestamp("us", tz="UTC")
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("recipe_id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("month", pa.string()),
+            ("status", pa.string()),
+            ("result", pa.string()),
+            ("meets_criteria", pa.bool_()),
+            ("created_at", timestamp),
+            ("updated_at", timestamp),
+            ("duration_minutes", pa.int64()),
+            ("actual_cost", pa.float64()),
+            ("quality_score", pa.float64()),
+            ("success_rating", pa.int64()),
+            ("temperature", pa.float64()),
+            ("humidity", pa.float64()),
+            ("pressure", pa.float64()),
+        ]
+    )
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """无时区的时间按 UTC 处理"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ReportUnavailable(Exception):
+    """未安装 pyarrow 或快照尚未生成"""
+
+
+class ExperimentReportService:
+    """实验报表服务"""
+
+    def __init__(
+        self,
+        snapshot_dir: str = "./data/experiment_snapshots",
+        export_interval: float = 60.0,
+        tz: str = "Asia/Shanghai",
+        batch_size: int = 10000,
+        cache: bool = True,
+    ):
+        self.snapshot_dir = snapshot_dir
+        self.export_interval = export_interval
+        self.tz = ZoneInfo(tz)
+        self.batch_size = batch_size
+        self.cache = cache
+        self._snapshot = None
+        self._export_lock = threading.Lock()
+        self._writer = FileLock(os.path.join(snapshot_dir, "export.writer"))
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    @property
+    def snapshot(self) -> "ColumnarSnapshot":
+        if pa is None:
+            raise ReportUnavailable("未安装 pyarrow，报表不可用")
+        if self._snapshot is None:
+            self._snapshot = ColumnarSnapshot(
+                self.snapshot_dir, _schema(), cache=self.cache
+            )
+        return self._snapshot
+
+    def _month(self, row) -> str:
+        created = _utc(row.created_at or row.updated_at)
+        if created is None:
+            return "unknown"
+        return created.astimezone(self.tz).strftime("%Y-%m")
+
+    def _to_batch(self, rows, schema: "pa.Schema") -> "pa.RecordBatch":
+        columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+        for row in rows:
+            columns["id"].append(row.id)
+            columns["recipe_id"].append(row.recipe_id)
+            columns["user_id"].append(row.user_id)
+            columns["month"].append(self._month(row))
+            columns["status"].append(row.status.value if row.status else None)
+            columns["result"].append(row.result.value if row.result else None)
+            columns["meets_criteria"].append(row.meets_criteria)
+            columns["created_at"].append(_utc(row.created_at))
+            columns["updated_at"].append(_utc(row.updated_at))
+            for measure in MEASURES:
+                columns[measure].append(getattr(row, measure))
+        return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+    def export(
+        self, check: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """把水位线之后变更的实验导出到快照（同步，供后台调用）
+
+        主库上只有按 updated_at 的增量读取和一次主键扫描（识别删除）。
+        读取水位线到写入快照都在快照的跨进程写锁内，其他进程的导出
+        不会与之交错。每批数据前调用 check，取消时快照保持不变。
+        """
+        snapshot = self.snapshot
+        with self._export_lock, snapshot.writing():
+            since = snapshot.watermark
+            batches = []
+            watermark = None
+            with SessionLocal() as db:
+                stmt = select(*EXPORT_COLUMNS)
+                if since is not None:
+                    stmt = stmt.where(
+                        Experiment.updated_at
+                        >= datetime.fromisoformat(since)
+                    )
+                result = db.execute(
+                    stmt.execution_options(yield_per=self.batch_size)
+                )
+                for rows in result.partitions():
+                    if check is not None:
+                        check()
+                    batches.append(self._to_batch(rows, snapshot.schema))
+                    latest = max(
+                        (row.updated_at for row in rows if row.updated_at),
+                        default=None,
+                    )
+                    if latest is not None and (
+                        watermark is None or latest > watermark
+                    ):
+                        watermark = latest
+                live = np.fromiter(
+                    db.execute(select(Experiment.id)).scalars(),
+                    dtype=np.int64,
+                )
+            changed = pa.Table.from_batches(batches, schema=snapshot.schema)
+            deleted = np.setdiff1d(snapshot.keys(), live)
+            if check is not None:
+                check()
+            stats = snapshot.apply(
+                changed,
+                deleted,
+                watermark.isoformat() if watermark is not None else None,
+            )
+        if stats["partitions_rewritten"]:
+            logger.info(f"实验快照已导出: {stats}")
+        return {**stats, "watermark": snapshot.watermark}
+
+    def _where(self, filters: Dict[str, Any]) -> Optional["pc.Expression"]:
+        expressions = []
+        for name in ("recipe_id", "user_id", "status", "result"):
+            values = filters.get(name)
+            if values:
+                expressions.append(pc.field(name).isin(values))
+        if filters.get("start_month"):
+            expressions.append(pc.field("month") >= filters["start_month"])
+        if filters.get("end_month"):
+            expressions.append(pc.field("month") <= filters["end_month"])
+        if not expressions:
+            return None
+        where = expressions[0]
+        for expression in expressions[1:]:
+            where = where & expression
+        return where
+
+    def _report(
+        self,
+        group_by: Sequence[str],
+        measures: Sequence[str],
+        aggregates: Sequence[str],
+        filters: Dict[str, Any],
+    ) -> "pa.Table":
+        snapshot = self.snapshot
+        snapshot.refresh()
+        if not snapshot.ready:
+            raise ReportUnavailable("实验快照尚未生成")
+        aggregations = [("id", "count")] + [
+            (measure, aggregate)
+            for measure in measures
+            for aggregate in aggregates
+        ]
+        table = snapshot.query(group_by, aggregations, self._where(filters))
+        return table.rename_columns(
+            [
+                "experiments" if name == "id_count" else name
+                for name in table.column_names
+            ]
+        )
+
+    async def report(
+        self,
+        group_by: Sequence[str],
+        measures: Sequence[str],
+        aggregates: Sequence[str],
+        filters: Dict[str, Any],
+    ) -> "pa.Table":
+        """按维度分组聚合实验指标，结果列为分组键、experiments（实验数）
+        和 <指标>_<聚合函数>"""
+        return await asyncio.to_thread(
+            self._report, group_by, measures, aggregates, filters
+        )
+
+    @property
+    def as_of(self) -> Optional[str]:
+        return self.snapshot.watermark if pa is not None else None
+
+    async def _run(self):
+        while True:
+            try:
+                # 只有一个进程定期导出，其他进程在其退出后接任
+                if self._writer.try_acquire():
+                    await asyncio.to_thread(self.export)
+            except Exception as e:
+                logger.error(f"实验快照导出失败: {e}")
+            await asyncio.sleep(self.export_interval)
+
+    async def start(self):
+        """启动定期增量导出"""
+        if not self.available:
+            logger.warning("未安装 pyarrow，实验报表快照不启用")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._writer.release()
+
+
+experiment_report_service = ExperimentReportService(
+    snapshot_dir=settings.experiment_report_snapshot_dir,
+    export_interval=settings.experiment_report_export_interval,
+    tz=settings.experiment_report_timezone,
+    cache=settings.experiment_report_cache,
+)
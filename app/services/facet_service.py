@@ -0,0 +1,178 @@
+"""配方分面浏览服务
+
+进程内维护 category / difficulty / status / tags 四个分面的位图索引，
+由 IncrementalIndexService 维护：
+- 启动时优先从磁盘快照恢复，再按 updated_at 水位线追赶快照之后的
+  变更并剔除已删除的配方；没有可用快照时从数据库全量构建
+- 本进程对配方的新增、修改、删除通过 ORM 事件登记为“待刷新”，在下一次
+  查询时按ID重新读取，因此回滚的事务不会在索引中留下脏数据；其他
+  工作进程的写入由后台任务按水位线定期追赶
+- 选举出的写入者进程定期把索引快照写回磁盘，其他进程在快照更新后
+  重新加载
+- 同一索引版本下相同筛选条件的计数结果会被缓存
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.facets import FacetIndex
+from db.database import SessionLocal
+from models import Recipe
+from services.incremental_index import Check, IncrementalIndexService
+
+FACETS = ("category", "difficulty", "status", "tags")
+
+FACET_COLUMNS = (
+    Recipe.id,
+    Recipe.category,
+    Recipe.difficulty,
+    Recipe.status,
+    Recipe.tags,
+    Recipe.updated_at,
+)
+
+
+def _enum_value(value) -> Optional[str]:
+    return getattr(value, "value", value)
+
+
+def recipe_facets(row) -> Dict[str, Tuple[str, ...]]:
+    """提取配方的分面取值"""
+    tags = row.tags if isinstance(row.tags, list) else []
+    single = {
+        "category": row.category,
+        "difficulty": _enum_value(row.difficulty),
+        "status": _enum_value(row.status),
+    }
+    facets = {k: (v,) for k, v in single.items() if v}
+    facets["tags"] = tuple(
+        dict.fromkeys(str(t).strip() for t in tags if str(t).strip())
+    )
+    return facets
+
+
+def _selection_key(selections: Dict[str, List[str]]) -> Tuple:
+    return tuple(
+        sorted((k, tuple(sorted(set(v)))) for k, v in selections.items() if v)
+    )
+
+
+class FacetService(IncrementalIndexService):
+    """配方分面索引服务"""
+
+    label = "分面索引"
+    model = Recipe
+    columns = FACET_COLUMNS
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 300.0,
+        cache_size: int = 256,
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+    ):
+        super().__init__(
+            snapshot_path=snapshot_path,
+            snapshot_interval=snapshot_interval,
+            catch_up_interval=catch_up_interval,
+            catch_up_lag=catch_up_lag,
+            delete_scan_interval=delete_scan_interval,
+        )
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+    def _apply_rows(self, index: FacetIndex, rows):
+        for row in rows:
+            index.upsert(row.id, recipe_facets(row))
+
+    def _indexed_ids(self, index: FacetIndex) -> np.ndarray:
+        return index.universe.to_array()
+
+    def _remove(self, index: FacetIndex, recipe_id: int):
+        index.remove(recipe_id)
+
+    def _changed(self):
+        self._cache.clear()
+
+    def _build(self, check: Check = None) -> FacetIndex:
+        """全量构建（同步）"""
+        index = FacetIndex(FACETS)
+        index.watermark = self._latest_update()
+
+        def docs():
+            with SessionLocal() as db:
+                result = db.execute(
+                    select(*FACET_COLUMNS).execution_options(yield_per=5000)
+                )
+                for rows in result.partitions():
+                    if check is not None:
+                        check()
+                    for row in rows:
+                        yield row.id, recipe_facets(row)
+
+        index.bulk_load(docs())
+        return index
+
+    def _read_snapshot(self) -> Optional[FacetIndex]:
+        return FacetIndex.load(self.snapshot_path)
+
+    def _write_snapshot(self, index: FacetIndex):
+        index.save(self.snapshot_path)
+
+    async def facet_counts(
+        self,
+        db: AsyncSession,
+        selections: Dict[str, List[str]],
+        top: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """按分面筛选并统计各分面取值数量"""
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+
+        key = (_selection_key(selections), top)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        bitmap = index.filter(selections)
+        result = {
+            "total": len(bitmap),
+            "facets": index.facet_counts(bitmap, top=top),
+        }
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def rebuild_snapshot(self, check: Check = None) -> int:
+        """全量重建并写入快照（同步，供后台任务调用），返回索引条数
+
+        各进程在下一次维护时重新加载新快照。
+        """
+        return len(self.rebuild(check))
+
+
+facet_service = FacetService(
+    snapshot_path=settings.facet_snapshot_path,
+    snapshot_interval=settings.facet_snapshot_interval,
+    cache_size=settings.facet_cache_size,
+    catch_up_interval=settings.index_catch_up_interval,
+    catch_up_lag=settings.index_catch_up_lag,
+    delete_scan_interval=settings.index_delete_scan_interval,
+)
+
+
+@event.listens_for(Recipe, "after_insert")
+@event.listens_for(Recipe, "after_update")
+@event.listens_for(Recipe, "after_delete")
+def _recipe_changed(mapper, connection, target):
+    facet_service.mark_stale(target.id)
@@ -0,0 +1,348 @@
+"""反馈聚类服务
+
+进程内维护反馈文本的增量聚类索引，把报告同一问题的反馈归为一簇，
+便于按簇分拣待处理反馈，由 IncrementalIndexService 维护：
+- 启动时优先从磁盘快照恢复，再按 updated_at 水位线追赶之后的变更并
+  剔除已删除的反馈；没有可用快照时全量聚类（多进程）
+- 簇编号必须在各工作进程间一致，因此只有快照写入者归簇：新增和文本
+  有变化的反馈（按文本指纹判断）归入最相似的簇，定期写入快照；其他
+  进程只更新分拣信息和删除，快照更新后重新加载，新反馈在写入者下一次
+  写快照后出现在簇中
+- 簇的优先级由其中待处理反馈的 FeedbackPriority 汇总
+- 全量重聚类由后台任务执行并写入快照，各进程随后重新加载；簇编号在
+  重聚类后会变化
+"""
+
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.clustering import ClusterIndex, hash_terms, recluster
+from core.fulltext import term_counts
+from db.database import SessionLocal
+from models import Feedback
+from models.feedback import FeedbackPriority, FeedbackStatus
+from services.incremental_index import Check, IncrementalIndexService
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 参与聚类的文本字段
+TEXT_FIELDS = ("title", "content", "what_worked", "what_failed", "suggestions")
+
+CLUSTER_COLUMNS = (
+    Feedback.id,
+    Feedback.updated_at,
+    Feedback.priority,
+    Feedback.status,
+    *(getattr(Feedback, field) for field in TEXT_FIELDS),
+)
+
+# 优先级按 FeedbackPriority 定义顺序排列，权重逐级翻倍
+PRIORITIES = list(FeedbackPriority)
+PRIORITY_WEIGHTS = np.array(
+    [1 << rank for rank in range(len(PRIORITIES))], dtype=np.float64
+)
+_DEFAULT_PRIORITY = PRIORITIES.index(FeedbackPriority.MEDIUM)
+
+
+def _priority_rank(priority: Optional[FeedbackPriority]) -> int:
+    if priority is None:
+        return _DEFAULT_PRIORITY
+    return PRIORITIES.index(priority)
+
+
+def _texts(row) -> Tuple[Optional[str], ...]:
+    return tuple(getattr(row, field) for field in TEXT_FIELDS)
+
+
+class FeedbackClusterService(IncrementalIndexService):
+    """反馈聚类服务"""
+
+    label = "反馈聚类"
+    model = Feedback
+    columns = CLUSTER_COLUMNS
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 300.0,
+        threshold: float = 0.6,
+        dim: int = 256,
+        bands: int = 20,
+        rows: int = 10,
+        workers: Optional[int] = 2,
+        start_method: str = "spawn",
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+    ):
+        super().__init__(
+            snapshot_path=snapshot_path,
+            snapshot_interval=snapshot_interval,
+            catch_up_interval=catch_up_interval,
+            catch_up_lag=catch_up_lag,
+            delete_scan_interval=delete_scan_interval,
+        )
+        self.config = {
+            "dim": dim,
+            "threshold": threshold,
+            "bands": bands,
+            "rows": rows,
+        }
+        self.workers = workers
+        self.start_method = start_method
+        # 分拣信息：优先级序号（-1 表示不存在）和是否待处理，按反馈ID索引
+        self.priority = np.full(1024, -1, dtype=np.int8)
+        self.pending = np.zeros(1024, dtype=bool)
+        # 归簇时的文本指纹（0 表示未知），文本不变的反馈不重新归簇
+        self.fingerprint = np.zeros(1024, dtype=np.int64)
+
+    def _grow(self, feedback_id: int):
+        size = len(self.priority)
+        if feedback_id < size:
+            return
+        while size <= feedback_id:
+            size *= 2
+        priority = np.full(size, -1, dtype=np.int8)
+        priority[: len(self.priority)] = self.priority
+        pending = np.zeros(size, dtype=bool)
+        pending[: len(self.pending)] = self.pending
+        fingerprint = np.zeros(size, dtype=np.int64)
+        fingerprint[: len(self.fingerprint)] = self.fingerprint
+        self.priority, self.pending = priority, pending
+        self.fingerprint = fingerprint
+
+    def _set_meta(self, row):
+        self._grow(row.id)
+        self.priority[row.id] = _priority_rank(row.priority)
+        self.pending[row.id] = row.status in (None, FeedbackStatus.PENDING)
+
+    def _clear_meta(self, feedback_id: int):
+        if feedback_id < len(self.priority):
+            self.priority[feedback_id] = -1
+            self.pending[feedback_id] = False
+            self.fingerprint[feedback_id] = 0
+
+    def _apply_rows(self, index: ClusterIndex, rows):
+        """更新分拣信息；写入者把新反馈和文本有变化的反馈重新归簇"""
+        for row in rows:
+            self._set_meta(row)
+            if not self.is_writer:
+                continue
+            texts = _texts(row)
+            fingerprint = hash(texts)
+            is_new = index.cluster(row.id) < 0
+            if is_new or self.fingerprint[row.id] != fingerprint:
+                hashes, tfs = hash_terms(term_counts(*texts))
+                if is_new:
+                    index.vectorizer.observe(hashes)
+                index.assign(row.id, index.vectorizer.transform(hashes, tfs))
+                self.fingerprint[row.id] = fingerprint
+
+    def _indexed_ids(self, index: ClusterIndex) -> np.ndarray:
+        return index.labels()[0]
+
+    def _remove(self, index: ClusterIndex, feedback_id: int):
+        index.remove(feedback_id)
+        self._clear_meta(feedback_id)
+
+    def _live_ids(self, db) -> np.ndarray:
+        """现存的反馈ID，同时整体刷新分拣信息"""
+        rows = db.execute(
+            select(Feedback.id, Feedback.priority, Feedback.status)
+        ).all()
+        for row in rows:
+            self._set_meta(row)
+        ids = np.asarray([row.id for row in rows], dtype=np.int64)
+        gone = np.setdiff1d(np.flatnonzero(self.priority >= 0), ids)
+        self.priority[gone] = -1
+        self.pending[gone] = False
+        return ids
+
+    def _chunks(self, check: Check = None, batch_size: int = 5000):
+        """流式读取全部反馈文本（同步），供全量聚类使用"""
+        columns = (Feedback.id, *CLUSTER_COLUMNS[4:])
+        with SessionLocal() as db:
+            result = db.execute(
+                select(*columns)
+                .order_by(Feedback.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for rows in result.partitions():
+                if check is not None:
+                    check()
+                ids = [row.id for row in rows]
+                texts = [_texts(row) for row in rows]
+                self._grow(ids[-1])
+                self.fingerprint[ids] = [hash(t) for t in texts]
+                yield ids, texts
+
+    def _build(self, check: Check = None) -> ClusterIndex:
+        """全量聚类（同步，CPU密集），分词和向量化分发到 workers 个进程
+
+        聚类期间的变更由之后的追赶按开始前的水位线补上。
+        """
+        watermark = self._latest_update()
+        self.fingerprint[:] = 0
+        index = recluster(
+            partial(self._chunks, check),
+            workers=self.workers,
+            start_method=self.start_method,
+            **self.config,
+        )
+        index.watermark = watermark
+        with SessionLocal() as db:
+            self._live_ids(db)
+        return index
+
+    def _read_snapshot(self) -> Optional[ClusterIndex]:
+        # 快照中的归簇来自写入者，文本指纹未知，追赶到的反馈重新归簇
+        self.fingerprint[:] = 0
+        return ClusterIndex.load(self.snapshot_path, **self.config)
+
+    def _write_snapshot(self, index: ClusterIndex):
+        index.save(self.snapshot_path)
+
+    def _summary(self, index: ClusterIndex) -> str:
+        return str(index.stats())
+
+    def _aggregate(
+        self, ids: np.ndarray, labels: np.ndarray, n: int
+    ) -> Dict[str, np.ndarray]:
+        """按簇汇总规模、待处理数和待处理反馈的优先级"""
+        self._grow(int(ids.max()) if len(ids) else 0)
+        priority = self.priority[ids].astype(np.int64)
+        priority[priority < 0] = _DEFAULT_PRIORITY
+        pending = self.pending[ids]
+        open_labels, open_priority = labels[pending], priority[pending]
+        top = np.full(n, -1, dtype=np.int64)
+        np.maximum.at(top, open_labels, open_priority)
+        first = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, labels, ids)
+        latest = np.full(n, -1, dtype=np.int64)
+        np.maximum.at(latest, labels, ids)
+        levels = len(PRIORITIES)
+        return {
+            "size": np.bincount(labels, minlength=n),
+            "pending": np.bincount(open_labels, minlength=n),
+            "score": np.bincount(
+                open_labels, PRIORITY_WEIGHTS[open_priority], minlength=n
+            ),
+            "top": top,
+            "levels": np.bincount(
+                open_labels * levels + open_priority, minlength=n * levels
+            ).reshape(n, levels),
+            "first": first,
+            "latest": latest,
+        }
+
+    @staticmethod
+    def _describe(
+        stats: Dict[str, np.ndarray], row: int, cluster_id: int
+    ) -> Dict[str, Any]:
+        top = int(stats["top"][row])
+        return {
+            "cluster_id": cluster_id,
+            "size": int(stats["size"][row]),
+            "pending": int(stats["pending"][row]),
+            "priority": PRIORITIES[top].value if top >= 0 else None,
+            "priority_score": float(stats["score"][row]),
+            "pending_by_priority": {
+                level.value: int(count)
+                for level, count in zip(PRIORITIES, stats["levels"][row])
+                if count
+            },
+            "first_feedback_id": int(stats["first"][row]),
+            "latest_feedback_id": int(stats["latest"][row]),
+        }
+
+    async def cluster_summaries(
+        self,
+        db: AsyncSession,
+        pending_only: bool = True,
+        min_size: int = 2,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """按优先级排序的簇列表
+
+        先比较待处理反馈中的最高优先级，再比较按优先级加权的待处理数。
+        """
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+        ids, labels = index.labels()
+        stats = self._aggregate(ids, labels, index.n_clusters)
+        mask = stats["size"] >= min_size
+        if pending_only:
+            mask &= stats["pending"] > 0
+        clusters = np.flatnonzero(mask)
+        order = np.lexsort(
+            (
+                clusters,
+                -stats["pending"][clusters],
+                -stats["score"][clusters],
+                -stats["top"][clusters],
+            )
+        )
+        return [
+            self._describe(stats, int(cluster), int(cluster))
+            for cluster in clusters[order][:limit]
+        ]
+
+    async def cluster_members(
+        self, db: AsyncSession, cluster_id: int
+    ) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """簇的汇总和成员ID（从新到旧），簇不存在时返回 (None, [])"""
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+        members = index.members(cluster_id)
+        if not len(members):
+            return None, members
+        labels = np.zeros(len(members), dtype=np.int64)
+        stats = self._aggregate(members, labels, 1)
+        return self._describe(stats, 0, cluster_id), members[::-1]
+
+    async def cluster_of(
+        self, db: AsyncSession, feedback_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """反馈所在簇的汇总"""
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+        cluster_id = index.cluster(feedback_id)
+        if cluster_id < 0:
+            return None
+        summary, _ = await self.cluster_members(db, cluster_id)
+        return summary
+
+    def recluster(self, check: Check = None) -> Dict[str, int]:
+        """全量重聚类并写入快照（同步，供后台任务调用）
+
+        各进程在下一次维护时重新加载新快照。
+        """
+        return self.rebuild(check).stats()
+
+
+feedback_cluster_service = FeedbackClusterService(
+    snapshot_path=settings.feedback_cluster_snapshot_path,
+    snapshot_interval=settings.feedback_cluster_snapshot_interval,
+    threshold=settings.feedback_cluster_threshold,
+    dim=settings.feedback_cluster_dim,
+    bands=settings.feedback_cluster_bands,
+    rows=settings.feedback_cluster_rows,
+    workers=settings.feedback_cluster_workers,
+    start_method=settings.offload_start_method,
+    catch_up_interval=settings.index_catch_up_interval,
+    catch_up_lag=settings.index_catch_up_lag,
+    delete_scan_interval=settings.index_delete_scan_interval,
+)
+
+
+@event.listens_for(Feedback, "after_insert")
+@event.listens_for(Feedback, "after_update")
+@event.listens_for(Feedback, "after_delete")
+def _feedback_changed(mapper, connection, target):
+    feedback_cluster_service.mark_stale(target.id)
@@ -0,0 +1,207 @@
+"""反馈评分汇总服务
+
+进程内按 (配方, 天) 维护反馈各项评分的和与计数，任意时间窗口的
+平均分由窗口内各天的桶相加得到，不再扫描原始反馈，由
+IncrementalIndexService 维护：
+- 启动时优先从磁盘快照恢复，再按 updated_at 水位线追赶之后的变更并
+  剔除已删除的反馈；没有可用快照时全量构建
+- 新增、删除以及配方、创建时间或评分被修改的反馈通过 ORM 事件登记
+  为“待刷新”，下一次查询时按ID重新读取，先减去旧贡献再计入新值；
+  其他工作进程的写入由后台任务按水位线定期追赶
+- 快照只由选举出的写入者进程写入，其他进程在快照更新后重新加载
+- “天”按 feedback_rollup_timezone 时区的自然日划分
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.rollups import DailyRollup, day_date, day_number
+from db.database import SessionLocal
+from models import Feedback
+from services.incremental_index import Check, IncrementalIndexService
+
+# 汇总的评分字段
+METRICS = ("rating", "usefulness_score", "accuracy_score", "clarity_score")
+
+ROLLUP_COLUMNS = (
+    Feedback.id,
+    Feedback.recipe_id,
+    Feedback.created_at,
+    Feedback.updated_at,
+    *(getattr(Feedback, metric) for metric in METRICS),
+)
+
+# 影响汇总结果的字段，其余字段的修改不触发刷新
+TRACKED_FIELDS = ("recipe_id", "created_at", *METRICS)
+
+
+class FeedbackRollupService(IncrementalIndexService):
+    """反馈评分汇总服务"""
+
+    label = "评分汇总"
+    model = Feedback
+    columns = ROLLUP_COLUMNS
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 300.0,
+        tz: str = "Asia/Shanghai",
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+    ):
+        super().__init__(
+            snapshot_path=snapshot_path,
+            snapshot_interval=snapshot_interval,
+            catch_up_interval=catch_up_interval,
+            catch_up_lag=catch_up_lag,
+            delete_scan_interval=delete_scan_interval,
+        )
+        self.tz = ZoneInfo(tz)
+
+    def day_of(self, value: datetime) -> int:
+        """时间 -> 所在自然日编号，无时区的时间按 UTC 处理"""
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return day_number(value.astimezone(self.tz).date())
+
+    def today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    def _apply_rows(self, rollup: DailyRollup, rows):
+        for row in rows:
+            if row.recipe_id is None or row.created_at is None:
+                rollup.remove(row.id)
+            else:
+                rollup.upsert(
+                    row.id,
+                    row.recipe_id,
+                    self.day_of(row.created_at),
+                    [getattr(row, metric) for metric in METRICS],
+                )
+
+    def _indexed_ids(self, rollup: DailyRollup) -> np.ndarray:
+        return rollup.live_ids()
+
+    def _remove(self, rollup: DailyRollup, feedback_id: int):
+        rollup.remove(feedback_id)
+
+    def _build(
+        self, check: Check = None, batch_size: int = 10000
+    ) -> DailyRollup:
+        """全量构建（同步），构建期间的变更由之后的追赶按开始前的水位线补上"""
+        watermark = self._latest_update()
+        ids, keys, days, values = [], [], [], []
+        with SessionLocal() as db:
+            result = db.execute(
+                select(*ROLLUP_COLUMNS)
+                .where(
+                    Feedback.recipe_id.is_not(None),
+                    Feedback.created_at.is_not(None),
+                )
+                .execution_options(yield_per=batch_size)
+            )
+            for rows in result.partitions():
+                if check is not None:
+                    check()
+                for row in rows:
+                    ids.append(row.id)
+                    keys.append(row.recipe_id)
+                    days.append(self.day_of(row.created_at))
+                    values.append(
+                        [
+                            np.nan if value is None else value
+                            for value in row[4:]
+                        ]
+                    )
+        rollup = DailyRollup(METRICS)
+        rollup.bulk_load(
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(keys, dtype=np.int64),
+            np.asarray(days, dtype=np.int32),
+            np.asarray(values, dtype=np.float64).reshape(-1, len(METRICS)),
+        )
+        rollup.watermark = watermark
+        return rollup
+
+    def _read_snapshot(self) -> Optional[DailyRollup]:
+        return DailyRollup.load(self.snapshot_path, METRICS)
+
+    def _write_snapshot(self, rollup: DailyRollup):
+        rollup.save(self.snapshot_path)
+
+    def _summary(self, rollup: DailyRollup) -> str:
+        return f"{len(rollup)} 条反馈，{len(rollup.series)} 个配方"
+
+    async def windows(
+        self,
+        db: AsyncSession,
+        recipe_id: int,
+        windows: List[int],
+        end: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """以 end（默认今天）为最后一天的若干个 N 天窗口的评分汇总"""
+        rollup = await self.ensure_index()
+        await self._refresh_stale(db)
+        end = end or self.today()
+        last = day_number(end)
+        return {
+            "end": end.isoformat(),
+            "windows": {
+                str(days): rollup.window(recipe_id, last - days + 1, last)
+                for days in windows
+            },
+        }
+
+    async def range(
+        self, db: AsyncSession, recipe_id: int, start: date, end: date
+    ) -> Dict[str, Any]:
+        """[start, end] 日期范围内的评分汇总"""
+        rollup = await self.ensure_index()
+        await self._refresh_stale(db)
+        return rollup.window(recipe_id, day_number(start), day_number(end))
+
+    async def daily(
+        self, db: AsyncSession, recipe_id: int, start: date, end: date
+    ) -> List[Dict[str, Any]]:
+        """[start, end] 内有反馈的每一天的评分汇总"""
+        rollup = await self.ensure_index()
+        await self._refresh_stale(db)
+        return [
+            {"date": day_date(day).isoformat(), "scores": scores}
+            for day, scores in rollup.daily(
+                recipe_id, day_number(start), day_number(end)
+            )
+        ]
+
+
+feedback_rollup_service = FeedbackRollupService(
+    snapshot_path=settings.feedback_rollup_snapshot_path,
+    snapshot_interval=settings.feedback_rollup_snapshot_interval,
+    tz=settings.feedback_rollup_timezone,
+    catch_up_interval=settings.index_catch_up_interval,
+    catch_up_lag=settings.index_catch_up_lag,
+    delete_scan_interval=settings.index_delete_scan_interval,
+)
+
+
+@event.listens_for(Feedback, "after_insert")
+@event.listens_for(Feedback, "after_delete")
+def _feedback_written(mapper, connection, target):
+    feedback_rollup_service.mark_stale(target.id)
+
+
+@event.listens_for(Feedback, "after_update")
+def _feedback_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(
+        state.attrs[field].history.has_changes() for field in TRACKED_FIELDS
+    ):
+        feedback_rollup_service.mark_stale(target.id)
@@ -0,0 +1,266 @@
+"""反馈与实验记录的中文全文检索服务
+
+每个来源（反馈、实验记录）一份分段倒排索引，保存在
+``fulltext_index_dir/<来源>`` 下，由 IncrementalIndexService 维护：
+- 启动时优先从磁盘清单恢复，再按 updated_at 水位线追赶之后的变更并
+  剔除已删除的记录；没有可用清单时从数据库流式全量构建
+- 本进程的写入通过 ORM 事件登记为“待刷新”，其他工作进程的写入由
+  后台任务按水位线定期追赶
+- 只有写入者进程落盘：内存段达到 ``fulltext_flush_docs`` 条或到达
+  落盘间隔时写成磁盘段、按需合并并写入清单；其他进程只在内存中维护
+  变更，清单更新后重新加载（段以内存映射打开，写入者清理旧段不影响
+  已加载的进程）
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.fulltext import FullTextIndex, term_counts
+from core.fulltext.index import MANIFEST
+from db.database import SessionLocal
+from models import Experiment, Feedback
+from services.incremental_index import Check, IncrementalIndexService
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 来源 -> (模型, 参与检索的文本字段)
+SOURCES: Dict[str, Tuple[Any, Tuple[str, ...]]] = {
+    "feedback": (
+        Feedback,
+        ("title", "content", "what_worked", "what_failed", "suggestions"),
+    ),
+    "experiment": (
+        Experiment,
+        ("observations", "issues_encountered", "lessons_learned"),
+    ),
+}
+
+
+class SourceIndex(IncrementalIndexService):
+    """单个来源的全文索引"""
+
+    def __init__(
+        self,
+        source: str,
+        directory: Optional[str] = None,
+        flush_docs: int = 20000,
+        flush_interval: float = 60.0,
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+        **index_options,
+    ):
+        super().__init__(
+            snapshot_path=directory,
+            snapshot_interval=flush_interval,
+            catch_up_interval=catch_up_interval,
+            catch_up_lag=catch_up_lag,
+            delete_scan_interval=delete_scan_interval,
+            lock_path=os.path.join(directory, "index") if directory else None,
+        )
+        self.source = source
+        self.label = f"全文索引 {source}"
+        self.model, self.fields = SOURCES[source]
+        self.columns = (
+            self.model.id,
+            self.model.updated_at,
+            *(getattr(self.model, field) for field in self.fields),
+        )
+        self.flush_docs = flush_docs
+        self.index_options = index_options
+        self._checkpoint: Optional[asyncio.Task] = None
+
+    def _stamp_path(self) -> Optional[str]:
+        if not self.snapshot_path:
+            return None
+        return os.path.join(self.snapshot_path, MANIFEST)
+
+    def _apply_rows(self, index: FullTextIndex, rows):
+        for row in rows:
+            index.upsert(
+                row.id,
+                term_counts(*(getattr(row, field) for field in self.fields)),
+            )
+
+    def _indexed_ids(self, index: FullTextIndex) -> np.ndarray:
+        return index.live_ids()
+
+    def _remove(self, index: FullTextIndex, record_id: int):
+        index.remove(record_id)
+
+    def _checkpoint_locked(self, index: FullTextIndex):
+        with self._publish_lock.hold(exclusive=True):
+            index.checkpoint()
+
+    def _build(self, check: Check = None) -> FullTextIndex:
+        """全量构建（同步），写入者每 flush_docs 条写成一个磁盘段
+
+        其他进程构建的索引只在内存中，写入者写出清单后改为加载清单。
+        """
+        directory = self.snapshot_path if self.is_writer else None
+        index = FullTextIndex(directory, **self.index_options)
+        index.watermark = self._latest_update()
+        with SessionLocal() as db:
+            result = db.execute(
+                select(*self.columns).execution_options(yield_per=5000)
+            )
+            for rows in result.partitions():
+                if check is not None:
+                    check()
+                self._apply_rows(index, rows)
+                if directory and index.pending >= self.flush_docs:
+                    self._checkpoint_locked(index)
+        if directory:
+            self._checkpoint_locked(index)
+        return index
+
+    def _read_snapshot(self) -> Optional[FullTextIndex]:
+        return FullTextIndex.load(self.snapshot_path, **self.index_options)
+
+    def _write_snapshot(self, index: FullTextIndex):
+        # 在内存中构建的索引由接任的写入者首次落盘
+        index.directory = self.snapshot_path
+        index.checkpoint()
+
+    def _changed(self):
+        if self.is_writer and self.index.pending >= self.flush_docs:
+            self._schedule_checkpoint()
+
+    def _schedule_checkpoint(self):
+        if self._checkpoint is None or self._checkpoint.done():
+            self._checkpoint = asyncio.create_task(self._safe_checkpoint())
+
+    async def _safe_checkpoint(self):
+        try:
+            await self.save_snapshot()
+        except Exception as e:
+            logger.error(f"{self.label}落盘失败: {e}")
+
+    async def search(
+        self, db: AsyncSession, query: str, **options
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        index = await self.ensure_index()
+        await self._refresh_stale(db)
+        return index.search(query, **options)
+
+    async def stop(self):
+        """停止后台任务，写入者把内存段落盘"""
+        if self._checkpoint is not None and not self._checkpoint.done():
+            self._checkpoint.cancel()
+            try:
+                await self._checkpoint
+            except asyncio.CancelledError:
+                pass
+        self._checkpoint = None
+        await super().stop()
+
+
+class FullTextService:
+    """中文全文检索服务"""
+
+    def __init__(
+        self,
+        index_dir: Optional[str] = None,
+        flush_docs: int = 20000,
+        flush_interval: float = 60.0,
+        max_segments: int = 8,
+        k1: float = 1.2,
+        b: float = 0.75,
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+    ):
+        self.index_dir = index_dir
+        self.sources: Dict[str, SourceIndex] = {
+            source: SourceIndex(
+                source,
+                os.path.join(index_dir, source) if index_dir else None,
+                flush_docs=flush_docs,
+                flush_interval=flush_interval,
+                catch_up_interval=catch_up_interval,
+                catch_up_lag=catch_up_lag,
+                delete_scan_interval=delete_scan_interval,
+                k1=k1,
+                b=b,
+                max_segments=max_segments,
+            )
+            for source in SOURCES
+        }
+
+    def mark_stale(self, source: str, record_id: int):
+        """登记需要重新索引的记录"""
+        self.sources[source].mark_stale(record_id)
+
+    def _source(self, source: str) -> SourceIndex:
+        if source not in self.sources:
+            raise ValueError(f"未知的检索来源: {source}")
+        return self.sources[source]
+
+    async def ensure_index(self, source: str) -> FullTextIndex:
+        """确保索引可用（首次调用时在线程中恢复或构建）"""
+        return await self._source(source).ensure_index()
+
+    async def search(
+        self,
+        db: AsyncSession,
+        source: str,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        mode: str = "and",
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """检索，返回 ([(记录ID, 得分)], 命中总数)"""
+        return await self._source(source).search(
+            db, query, limit=limit, offset=offset, mode=mode
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            source: index.index.stats()
+            for source, index in self.sources.items()
+            if index.index is not None
+        }
+
+    async def start(self):
+        """启动各来源的后台预热、追赶和落盘任务"""
+        for index in self.sources.values():
+            await index.start()
+
+    async def stop(self):
+        """停止后台任务，写入者把内存段落盘"""
+        for index in self.sources.values():
+            await index.stop()
+
+
+fulltext_service = FullTextService(
+    index_dir=settings.fulltext_index_dir,
+    flush_docs=settings.fulltext_flush_docs,
+    flush_interval=settings.fulltext_flush_interval,
+    max_segments=settings.fulltext_max_segments,
+    k1=settings.fulltext_bm25_k1,
+    b=settings.fulltext_bm25_b,
+    catch_up_interval=settings.index_catch_up_interval,
+    catch_up_lag=settings.index_catch_up_lag,
+    delete_scan_interval=settings.index_delete_scan_interval,
+)
+
+
+@event.listens_for(Feedback, "after_insert")
+@event.listens_for(Feedback, "after_update")
+@event.listens_for(Feedback, "after_delete")
+def _feedback_changed(mapper, connection, target):
+    fulltext_service.mark_stale("feedback", target.id)
+
+
+@event.listens_for(Experiment, "after_insert")
+@event.listens_for(Experiment, "after_update")
+@event.listens_for(Experiment, "after_delete")
+def _experiment_changed(mapper, connection, target):
+    fulltext_service.mark_stale("experiment", target.id)
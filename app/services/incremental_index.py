@@ -0,0 +1,444 @@
+"""增量维护的内存索引服务基类
+
+分面、全文、反馈聚类、评分汇总、配方查重都在进程内维护一份由数据库
+派生的索引，维护方式相同，集中在这里：
+- 首次使用时优先从磁盘快照恢复并按 updated_at 水位线追赶，没有可用
+  快照时从数据库全量构建
+- 本进程的写入通过 ORM 事件登记为“待刷新”，下一次查询时按ID重新
+  读取，回滚的事务不会在索引中留下脏数据
+- 其他工作进程的写入看不到 ORM 事件，后台任务每隔
+  ``index_catch_up_interval`` 秒按水位线追赶一次；追赶窗口向前多留
+  ``index_catch_up_lag`` 秒，覆盖提交晚于 updated_at 的长事务，窗口内
+  已应用过的同一版本不会重复应用
+- 删除没有水位线可循：每次追赶只比较表的行数，索引中的记录多于表时
+  才读取全部现存ID剔除已删除的记录；同时有新增时行数可能相抵，因此
+  另每隔 ``index_delete_scan_interval`` 秒完整核对一次
+- 快照只由一个进程写入：各进程用快照旁的 ``.writer`` 文件锁选举，
+  持有者定期写快照，进程退出后由其他进程接任；写入和读取快照在
+  ``.lock`` 文件锁内进行
+- 快照被其他进程（写入者或全量重建任务）替换后，各进程重新加载；
+  写入者发现快照已被替换时放弃本次写入，以重建结果为准
+
+子类提供模型、查询列和索引的读写方法。
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import SessionLocal
+from utils.filelock import FileLock
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+Stamp = Tuple[int, int, int]
+# 取消检查：任务已被取消时抛出异常（如 JobContext.check_cancelled）
+Check = Optional[Callable[[], None]]
+
+
+class IncrementalIndexService:
+    """增量维护、多进程共享快照的索引服务基类"""
+
+    # 日志中的名称
+    label = "索引"
+    # 对应的模型和读取的列（须包含 id 和 updated_at）
+    model: Any = None
+    columns: Tuple = ()
+    # 启动时是否预热
+    warm_up = True
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_interval: float = 300.0,
+        catch_up_interval: float = 30.0,
+        catch_up_lag: float = 300.0,
+        delete_scan_interval: float = 3600.0,
+        lock_path: Optional[str] = None,
+    ):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.catch_up_interval = catch_up_interval
+        self.catch_up_lag = timedelta(seconds=catch_up_lag)
+        self.delete_scan_interval = delete_scan_interval
+        self.index: Any = None
+        lock_path = lock_path or snapshot_path
+        self._publish_lock = (
+            FileLock(f"{lock_path}.lock") if lock_path else None
+        )
+        self._writer_lock = (
+            FileLock(f"{lock_path}.writer") if lock_path else None
+        )
+        # 已加载或已写入的快照文件标识，用于发现其他进程的替换
+        self._stamp: Optional[Stamp] = None
+        # 追赶窗口内已应用的版本：记录ID -> updated_at
+        self._seen: Dict[int, datetime] = {}
+        self._generation = 0
+        self._saved_generation = 0
+        self._next_save = 0.0
+        self._next_scan = 0.0
+        self._stale: Set[int] = set()
+        self._stale_lock = threading.Lock()
+        self._build_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # 子类实现
+
+    def _build(self, check: Check = None) -> Any:
+        """全量构建（同步），须设置索引的 watermark，每批数据前调用 check"""
+        raise NotImplementedError
+
+    def _read_snapshot(self) -> Any:
+        """读取快照（同步），没有快照或格式不符时返回 None"""
+        raise NotImplementedError
+
+    def _write_snapshot(self, index: Any):
+        """写入快照（同步，调用方持有排他快照锁）"""
+        raise NotImplementedError
+
+    def _apply_rows(self, index: Any, rows: List[Any]):
+        """把重新读取的记录写入索引"""
+        raise NotImplementedError
+
+    def _indexed_ids(self, index: Any) -> np.ndarray:
+        """索引中现有的记录ID"""
+        raise NotImplementedError
+
+    def _remove(self, index: Any, record_id: int):
+        raise NotImplementedError
+
+    def _summary(self, index: Any) -> str:
+        return f"{len(index)} 条"
+
+    def _changed(self):
+        """索引内容变化后调用（在事件循环中）"""
+
+    def _live_ids(self, db) -> np.ndarray:
+        """数据库中现存的记录ID（同步）"""
+        return np.fromiter(
+            db.execute(select(self.model.id)).scalars(), dtype=np.int64
+        )
+
+    # 快照与写入者
+
+    def _stamp_path(self) -> Optional[str]:
+        return self.snapshot_path
+
+    def _read_stamp(self) -> Optional[Stamp]:
+        path = self._stamp_path()
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @property
+    def is_writer(self) -> bool:
+        return self._writer_lock is not None and self._writer_lock.held
+
+    def _elect(self) -> bool:
+        """尝试成为快照写入者，本次刚成为写入者时返回 True"""
+        if self._writer_lock is None or self._writer_lock.held:
+            return False
+        return self._writer_lock.try_acquire()
+
+    def _replaced(self) -> bool:
+        """快照是否已被其他进程替换"""
+        stamp = self._read_stamp()
+        return stamp is not None and stamp != self._stamp
+
+    def _publish(self, index: Any) -> bool:
+        """写入快照（同步）；快照已被其他进程替换时不覆盖，返回 False"""
+        with self._publish_lock.hold(exclusive=True):
+            if self._read_stamp() not in (None, self._stamp):
+                return False
+            self._write_snapshot(index)
+            self._stamp = self._read_stamp()
+        return True
+
+    # 构建、恢复与追赶（同步部分在线程中执行）
+
+    def _latest_update(self) -> Optional[datetime]:
+        """数据库中最新的 updated_at，全量构建前读取作为水位线"""
+        with SessionLocal() as db:
+            return db.execute(
+                select(self.model.updated_at)
+                .order_by(self.model.updated_at.desc())
+                .limit(1)
+            ).scalar()
+
+    def _since(self, index: Any) -> Optional[datetime]:
+        if index.watermark is None:
+            return None
+        return index.watermark - self.catch_up_lag
+
+    def _fetch_changes(
+        self, since: Optional[datetime], scan: bool
+    ) -> Tuple[List[Any], Optional[np.ndarray], int]:
+        """读取 since 之后修改的记录和表的行数（同步）
+
+        scan 为 True 时同时读取现存的全部ID，返回 (记录, 现存ID, 行数)，
+        否则现存ID为 None。
+        """
+        stmt = select(*self.columns)
+        if since is not None:
+            stmt = stmt.where(self.model.updated_at >= since)
+        with SessionLocal() as db:
+            rows = db.execute(stmt).all()
+            if scan:
+                live = self._live_ids(db)
+                return rows, live, len(live)
+            total = db.execute(
+                select(func.count()).select_from(self.model)
+            ).scalar()
+        return rows, None, total
+
+    def _scan_live_ids(self) -> np.ndarray:
+        with SessionLocal() as db:
+            return self._live_ids(db)
+
+    def _deleted_ids(self, index: Any, live: np.ndarray) -> np.ndarray:
+        """索引中有、数据库中已不存在的记录ID（同步）"""
+        return np.setdiff1d(self._indexed_ids(index), live)
+
+    def _remove_deleted(
+        self, index: Any, seen: Dict[int, datetime], deleted: np.ndarray
+    ):
+        for record_id in deleted:
+            self._remove(index, int(record_id))
+            seen.pop(int(record_id), None)
+
+    def _merge_changes(
+        self,
+        index: Any,
+        seen: Dict[int, datetime],
+        since: Optional[datetime],
+        rows: List[Any],
+    ) -> int:
+        """应用追赶到的变更，推进水位线，返回更新数"""
+        fresh = [
+            row
+            for row in rows
+            if row.updated_at is None or seen.get(row.id) != row.updated_at
+        ]
+        self._apply_rows(index, fresh)
+        for row in fresh:
+            if row.updated_at is None:
+                continue
+            seen[row.id] = row.updated_at
+            if index.watermark is None or row.updated_at > index.watermark:
+                index.watermark = row.updated_at
+        if since is not None:
+            for record_id in [k for k, v in seen.items() if v < since]:
+                del seen[record_id]
+        return len(fresh)
+
+    def _restore(self) -> Optional[Tuple[Any, Optional[Stamp], Dict]]:
+        """从快照恢复并追赶之后的变更（同步）"""
+        if self._read_stamp() is None:
+            return None
+        try:
+            with self._publish_lock.hold():
+                stamp = self._read_stamp()
+                index = self._read_snapshot()
+        except Exception as e:
+            logger.warning(f"{self.label}快照读取失败，改为全量构建: {e}")
+            return None
+        if index is None or index.watermark is None:
+            return None
+        seen: Dict[int, datetime] = {}
+        since = self._since(index)
+        rows, live, _ = self._fetch_changes(since, scan=True)
+        updated = self._merge_changes(index, seen, since, rows)
+        deleted = self._deleted_ids(index, live)
+        self._remove_deleted(index, seen, deleted)
+        logger.info(
+            f"{self.label}已从快照恢复: "
+            f"追赶 {updated} 条，删除 {len(deleted)} 条"
+        )
+        return index, stamp, seen
+
+    def _load(self) -> Tuple[Any, Optional[Stamp], Dict]:
+        restored = self._restore()
+        if restored is not None:
+            return restored
+        # 构建前记下快照标识：构建期间写入者发布的快照会被重新加载
+        stamp = self._read_stamp()
+        index = self._build()
+        if self.is_writer:
+            stamp = self._read_stamp()
+        return index, stamp, {}
+
+    # 异步接口
+
+    def mark_stale(self, record_id: int):
+        """登记需要刷新的记录（索引尚未构建时无需登记）"""
+        if self.index is not None:
+            with self._stale_lock:
+                self._stale.add(record_id)
+
+    async def ensure_index(self) -> Any:
+        """确保索引可用（首次调用时在线程中恢复或构建）"""
+        if self.index is None:
+            async with self._build_lock:
+                if self.index is None:
+                    self._elect()
+                    index, stamp, seen = await asyncio.to_thread(self._load)
+                    self.index, self._stamp, self._seen = index, stamp, seen
+                    self._generation += 1
+                    logger.info(f"{self.label}就绪: {self._summary(index)}")
+        return self.index
+
+    async def _refresh_stale(self, db: AsyncSession):
+        with self._stale_lock:
+            stale, self._stale = self._stale, set()
+        if not stale:
+            return
+        async with self._write_lock:
+            stmt = select(*self.columns).where(self.model.id.in_(stale))
+            rows = (await db.execute(stmt)).all()
+            self._apply_rows(self.index, rows)
+            for row in rows:
+                if row.updated_at is not None:
+                    self._seen[row.id] = row.updated_at
+            # 剩下的ID已被删除或所在事务已回滚
+            for record_id in stale - {row.id for row in rows}:
+                self._remove(self.index, record_id)
+                self._seen.pop(record_id, None)
+            self._generation += 1
+            self._changed()
+
+    async def catch_up(self):
+        """按水位线追赶其他进程的写入，剔除已删除的记录"""
+        loop = asyncio.get_running_loop()
+        # 读取和应用之间持有写锁，避免把更旧的版本覆盖到刚刷新的记录上
+        async with self._write_lock:
+            index = self.index
+            since = self._since(index)
+            scan = loop.time() >= self._next_scan
+            rows, live, total = await asyncio.to_thread(
+                self._fetch_changes, since, scan
+            )
+            updated = self._merge_changes(index, self._seen, since, rows)
+            if live is None and len(index) > total:
+                # 索引中的记录多于表，有记录已被其他进程删除
+                live = await asyncio.to_thread(self._scan_live_ids)
+            deleted = 0
+            if live is not None:
+                self._next_scan = loop.time() + self.delete_scan_interval
+                missing = await asyncio.to_thread(
+                    self._deleted_ids, index, live
+                )
+                self._remove_deleted(index, self._seen, missing)
+                deleted = len(missing)
+            if updated or deleted:
+                self._generation += 1
+                self._changed()
+
+    async def reload(self):
+        """重新加载快照（快照被其他进程替换或本进程刚成为写入者时）"""
+        restored = await asyncio.to_thread(self._restore)
+        async with self._write_lock:
+            if restored is None:
+                # 快照不可用时保留当前索引，写入者下次写入时覆盖它
+                self._stamp = self._read_stamp()
+                return
+            index, self._stamp, self._seen = restored
+            self.index = index
+            self._generation += 1
+            self._changed()
+        logger.info(f"{self.label}已重新加载: {self._summary(index)}")
+
+    async def save_snapshot(self):
+        """本进程是写入者且索引有变化时写入快照"""
+        if (
+            self.index is None
+            or not self.is_writer
+            or self._generation == self._saved_generation
+        ):
+            return
+        async with self._write_lock:
+            generation = self._generation
+            published = await asyncio.to_thread(self._publish, self.index)
+        if published:
+            self._saved_generation = generation
+        else:
+            await self.reload()
+
+    async def refresh(self):
+        """定期维护：选举写入者，快照被替换时重新加载，否则追赶变更"""
+        if self.index is None:
+            if self.warm_up:
+                await self.ensure_index()
+            return
+        if self._elect() or self._replaced():
+            await self.reload()
+        else:
+            await self.catch_up()
+        loop = asyncio.get_running_loop()
+        if self.is_writer and loop.time() >= self._next_save:
+            self._next_save = loop.time() + self.snapshot_interval
+            await self.save_snapshot()
+
+    def rebuild(self, check: Check = None) -> Any:
+        """全量重建并写入快照（同步，供后台任务调用），返回新索引
+
+        各进程（包括本进程）在下一次维护时发现快照已替换并重新加载；
+        没有配置快照时直接替换本进程的索引。任务被取消时不写快照。
+        """
+        index = self._build(check)
+        if check is not None:
+            check()
+        if not self.snapshot_path:
+            if self.index is not None:
+                self.index, self._seen = index, {}
+                self._generation += 1
+            return index
+        with self._publish_lock.hold(exclusive=True):
+            self._write_snapshot(index)
+        return index
+
+    async def _run(self):
+        if self.warm_up:
+            try:
+                await self.ensure_index()
+            except Exception as e:
+                # 预热失败不影响服务启动，首次查询时会重试
+                logger.error(f"{self.label}预热失败: {e}")
+        while True:
+            await asyncio.sleep(self.catch_up_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"{self.label}维护失败: {e}")
+
+    async def start(self):
+        """启动后台预热、追赶和快照任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台任务，写入者写入最后一次快照并交出写入权"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.save_snapshot()
+        except Exception as e:
+            logger.error(f"{self.label}快照写入失败: {e}")
+        if self._writer_lock is not None:
+            self._writer_lock.release()
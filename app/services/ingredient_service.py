@@ -0,0 +1,125 @@
+"""按原料检索配方服务
+
+基于 ``recipe_ingredients`` 倒排索引表：
+- all_of：每个条件各自命中的配方ID取交集（INTERSECT）
+- any_of：任一条件命中（OR）
+- none_of：排除任一条件命中的配方（NOT IN）
+用量范围条件会先换算到基准单位再比较。
+"""
+
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, intersect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Recipe, RecipeIngredient
+from models.recipe_ingredient import (
+    build_index_rows,
+    ingredient_key,
+    to_base_amount,
+)
+from models.schemas.recipe import IngredientFilter, IngredientSearchRequest
+
+index = RecipeIngredient.__table__
+
+
+def _filter_condition(item: IngredientFilter):
+    """把单个原料筛选条件转换为索引表上的 WHERE 条件"""
+    key = ingredient_key(item.cas_number, item.name)
+    if key is None:
+        raise ValueError("原料筛选条件需要提供 cas_number 或 name")
+
+    conditions = [index.c.ingredient_key == key]
+    if item.min_amount is not None or item.max_amount is not None:
+        _, base_unit = to_base_amount(0, item.unit)
+        conditions.append(index.c.base_unit == base_unit)
+        if item.min_amount is not None:
+            low, _ = to_base_amount(item.min_amount, item.unit)
+            conditions.append(index.c.base_amount >= low)
+        if item.max_amount is not None:
+            high, _ = to_base_amount(item.max_amount, item.unit)
+            conditions.append(index.c.base_amount <= high)
+    return and_(*conditions)
+
+
+def build_recipe_id_query(request: IngredientSearchRequest):
+    """构建满足原料条件的配方ID子查询，可与其它筛选条件组合"""
+    if request.all_of:
+        id_column = (
+            intersect(
+                *[
+                    select(index.c.recipe_id).where(_filter_condition(item))
+                    for item in request.all_of
+                ]
+            )
+            .subquery()
+            .c.recipe_id
+        )
+    else:
+        id_column = Recipe.id
+
+    stmt = select(id_column.label("recipe_id"))
+    if request.any_of:
+        stmt = stmt.where(
+            id_column.in_(
+                select(index.c.recipe_id).where(
+                    or_(*[_filter_condition(i) for i in request.any_of])
+                )
+            )
+        )
+    if request.none_of:
+        stmt = stmt.where(
+            id_column.not_in(
+                select(index.c.recipe_id).where(
+                    or_(*[_filter_condition(i) for i in request.none_of])
+                )
+            )
+        )
+    return stmt
+
+
+async def search_recipes(
+    db: AsyncSession, request: IngredientSearchRequest
+) -> Tuple[List[Recipe], int]:
+    """按原料条件分页检索配方，返回 (配方列表, 总数)"""
+    ids = build_recipe_id_query(request).subquery()
+    total = (
+        await db.execute(select(func.count()).select_from(ids))
+    ).scalar_one()
+
+    stmt = (
+        select(Recipe)
+        .where(Recipe.id.in_(select(ids.c.recipe_id)))
+        .order_by(Recipe.id.desc())
+        .offset((request.page - 1) * request.page_size)
+        .limit(request.page_size)
+    )
+    recipes = list((await db.execute(stmt)).scalars())
+    return recipes, total
+
+
+async def rebuild_ingredient_index(
+    db: AsyncSession, recipe_ids: Optional[List[int]] = None
+) -> int:
+    """重建原料索引（全部或指定配方），用于历史数据回填"""
+    stmt = select(Recipe.id, Recipe.ingredients)
+    clear = delete(index)
+    if recipe_ids is not None:
+        stmt = stmt.where(Recipe.id.in_(recipe_ids))
+        clear = clear.where(index.c.recipe_id.in_(recipe_ids))
+    await db.execute(clear)
+
+    count = 0
+    batch = []
+    result = await db.stream(stmt.execution_options(yield_per=1000))
+    async for recipe_id, ingredients in result:
+        batch.extend(build_index_rows(recipe_id, ingredients))
+        if len(batch) >= 5000:
+            await db.execute(insert(index), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        await db.execute(insert(index), batch)
+        count += len(batch)
+    await db.commit()
+    return count
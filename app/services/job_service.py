@@ -0,0 +1,38 @@
+"""后台任务服务
+
+按 ``JOB_BACKEND`` 选择队列：生产环境使用 Celery（broker/结果后端取自
+Celery 配置），测试和单机部署使用进程内 SQLite 队列。
+"""
+
+from typing import Optional
+
+from config.settings import settings
+from core.jobs import JobQueue, LocalJobQueue
+from db.database import async_engine
+from services import background_jobs  # noqa: F401  注册任务
+
+
+def create_job_queue(backend: Optional[str] = None) -> JobQueue:
+    """按配置创建任务队列"""
+    backend = backend or settings.job_backend
+    if backend == "celery":
+        from core.jobs.celery_queue import CeleryJobQueue
+
+        return CeleryJobQueue(
+            settings.celery_broker_url,
+            settings.celery_result_backend,
+            result_ttl=settings.job_result_ttl,
+            async_cleanup=async_engine.dispose,
+        )
+    if backend == "local":
+        return LocalJobQueue(
+            settings.job_local_db_path,
+            concurrency=settings.job_local_concurrency,
+            poll_interval=settings.job_poll_interval,
+            result_ttl=settings.job_result_ttl,
+            lease=settings.job_lease,
+        )
+    raise ValueError(f"不支持的任务队列后端: {backend}")
+
+
+job_queue = create_job_queue()
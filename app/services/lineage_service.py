@@ -0,0 +1,162 @@
+"""配方版本谱系查询服务
+
+所有查询都基于 ``recipe_lineage`` 闭包表，一次索引查询即可返回结果，
+与版本树的深度和规模无关。
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Recipe, RecipeLineage
+from models.recipe import RecipeStatus
+
+lineage = RecipeLineage.__table__
+
+# 构建版本树时只取这些列，避免加载大字段
+TREE_COLUMNS = (
+    Recipe.id,
+    Recipe.name,
+    Recipe.version,
+    Recipe.status,
+    Recipe.parent_recipe_id,
+    Recipe.created_at,
+    Recipe.updated_at,
+)
+
+
+def _node(row, depth: int) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "version": row.version,
+        "status": row.status.value if row.status else None,
+        "parent_recipe_id": row.parent_recipe_id,
+        "depth": depth,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+async def get_descendants(
+    db: AsyncSession, recipe_id: int, max_depth: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """获取全部后代（不含自身），按代数和ID排序"""
+    stmt = (
+        select(*TREE_COLUMNS, lineage.c.depth)
+        .join(lineage, lineage.c.descendant_id == Recipe.id)
+        .where(lineage.c.ancestor_id == recipe_id, lineage.c.depth > 0)
+        .order_by(lineage.c.depth, Recipe.id)
+    )
+    if max_depth is not None:
+        stmt = stmt.where(lineage.c.depth <= max_depth)
+    rows = (await db.execute(stmt)).all()
+    return [_node(row, row.depth) for row in rows]
+
+
+async def get_path_to_root(
+    db: AsyncSession, recipe_id: int
+) -> List[Dict[str, Any]]:
+    """获取从根配方到当前配方的路径（含两端）"""
+    stmt = (
+        select(*TREE_COLUMNS, lineage.c.depth)
+        .join(lineage, lineage.c.ancestor_id == Recipe.id)
+        .where(lineage.c.descendant_id == recipe_id)
+        .order_by(lineage.c.depth.desc())
+    )
+    rows = (await db.execute(stmt)).all()
+    return [_node(row, row.depth) for row in rows]
+
+
+def _root_id(recipe_id: int):
+    """配方所在版本树根节点ID的标量子查询"""
+    return (
+        select(lineage.c.ancestor_id)
+        .where(lineage.c.descendant_id == recipe_id)
+        .order_by(lineage.c.depth.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def family_ids_query(recipe_id: int):
+    """配方所在版本树（同一配方家族）全部配方ID的子查询"""
+    return select(lineage.c.descendant_id).where(
+        lineage.c.ancestor_id == _root_id(recipe_id)
+    )
+
+
+async def get_version_tree(
+    db: AsyncSession, recipe_id: int
+) -> Optional[Dict[str, Any]]:
+    """获取配方所在的完整版本树，返回嵌套结构的根节点"""
+    stmt = (
+        select(*TREE_COLUMNS, lineage.c.depth)
+        .join(lineage, lineage.c.descendant_id == Recipe.id)
+        .where(lineage.c.ancestor_id == _root_id(recipe_id))
+        .order_by(lineage.c.depth, Recipe.id)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return None
+
+    nodes: Dict[int, Dict[str, Any]] = {}
+    root = None
+    for row in rows:
+        node = _node(row, row.depth)
+        node["children"] = []
+        nodes[row.id] = node
+        # 按代数排序，父节点一定先于子节点出现
+        parent = nodes.get(row.parent_recipe_id)
+        if row.depth == 0:
+            root = node
+        elif parent is not None:
+            parent["children"].append(node)
+    return root
+
+
+async def get_latest_approved_descendant(
+    db: AsyncSession, recipe_id: int
+) -> Optional[Recipe]:
+    """获取最新的已审核版本（含自身）"""
+    stmt = (
+        select(Recipe)
+        .join(lineage, lineage.c.descendant_id == Recipe.id)
+        .where(
+            lineage.c.ancestor_id == recipe_id,
+            Recipe.status == RecipeStatus.APPROVED,
+        )
+        .order_by(Recipe.created_at.desc(), Recipe.id.desc())
+        .limit(1)
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def rebuild_lineage(db: AsyncSession) -> int:
+    """根据 parent_recipe_id 全量重建闭包表，用于历史数据回填"""
+    recipes = Recipe.__table__
+    tree = (
+        select(
+            recipes.c.id.label("ancestor_id"),
+            recipes.c.id.label("descendant_id"),
+            literal(0).label("depth"),
+        )
+    ).cte("tree", recursive=True)
+    tree = tree.union_all(
+        select(
+            tree.c.ancestor_id,
+            recipes.c.id,
+            tree.c.depth + 1,
+        ).where(recipes.c.parent_recipe_id == tree.c.descendant_id)
+    )
+
+    await db.execute(delete(lineage))
+    result = await db.execute(
+        insert(lineage).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth),
+        )
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,72 @@
+"""实验测量数据的列式导出
+
+``Experiment.measurements`` 是任意嵌套的 JSON，导出时展开为长表：
+每个数值一行 ``(experiment_id, name, seq, value)``。嵌套字典的键用
+``.`` 连接，数值数组按下标展开到 seq，非数值被跳过。列以 numpy 数组
+返回，可以直接写入 Arrow。
+"""
+
+from typing import Any, Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Experiment
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def flatten(
+    measurements: Any, prefix: str = ""
+) -> Iterator[Tuple[str, int, float]]:
+    """展开一条测量数据为 (name, seq, value)"""
+    if isinstance(measurements, dict):
+        for key, value in measurements.items():
+            name = f"{prefix}.{key}" if prefix else str(key)
+            yield from flatten(value, name)
+    elif isinstance(measurements, list):
+        if all(_is_number(value) for value in measurements):
+            for seq, value in enumerate(measurements):
+                yield prefix, seq, float(value)
+        else:
+            for seq, value in enumerate(measurements):
+                yield from flatten(value, f"{prefix}[{seq}]")
+    elif _is_number(measurements) and prefix:
+        yield prefix, 0, float(measurements)
+
+
+async def measurement_columns(
+    db: AsyncSession,
+    filters: Sequence[Any],
+    offset: int = 0,
+    limit: int = 1000,
+) -> Dict[str, Any]:
+    """按ID倒序取一页实验的测量数据，返回列式数据和实验数"""
+    rows = (
+        await db.execute(
+            select(Experiment.id, Experiment.measurements)
+            .where(*filters, Experiment.measurements.is_not(None))
+            .order_by(Experiment.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+    ).all()
+    ids, names, seqs, values = [], [], [], []
+    for experiment_id, measurements in rows:
+        for name, seq, value in flatten(measurements):
+            ids.append(experiment_id)
+            names.append(name)
+            seqs.append(seq)
+            values.append(value)
+    return {
+        "experiments": len(rows),
+        "columns": {
+            "experiment_id": np.array(ids, dtype=np.int64),
+            "name": names,
+            "seq": np.array(seqs, dtype=np.int32),
+            "value": np.array(values, dtype=np.float64),
+        },
+    }
@@ -0,0 +1,75 @@
+"""CPU 密集任务卸载服务
+
+全局执行器在应用 lifespan 中启动/关闭。路由通过 ``run_offloaded`` 提交
+任务，并传入当前请求：客户端断开连接或请求超过截止时间时，排队中
+的任务直接撤销，运行中的任务在下一次 ``check_cancelled()`` 时退出
+（配方优化在拟合和打分的各批之间检查）；不检查取消的任务会运行到
+结束。
+"""
+
+import asyncio
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+
+from config.settings import settings
+from core.offload import OffloadExecutor
+from utils import deadline
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# 轮询客户端连接状态的间隔(秒)
+DISCONNECT_POLL_INTERVAL = 0.2
+
+offload_executor = OffloadExecutor(
+    settings.offload_pools,
+    max_queue=settings.offload_max_queue,
+    start_method=settings.offload_start_method,
+    min_shared_bytes=settings.offload_shared_min_bytes,
+)
+
+
+async def _wait_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_offloaded(
+    job_type: str,
+    fn: Callable,
+    *args,
+    request: Optional[Request] = None,
+    **kwargs,
+) -> Any:
+    """在进程池中执行 fn，客户端断开或超过截止时间时取消任务
+
+    队列已满时抛出 OffloadRejected，由路由转换为 503；超时抛出
+    DeadlineExceeded，转换为 504。
+    """
+    timeout = deadline.timeout()
+    job = asyncio.ensure_future(
+        offload_executor.submit(job_type, fn, *args, **kwargs)
+    )
+    waiting = {job}
+    if request is not None:
+        waiting.add(asyncio.ensure_future(_wait_disconnect(request)))
+    try:
+        await asyncio.wait(
+            waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    except asyncio.CancelledError:
+        job.cancel()
+        raise
+    finally:
+        for task in waiting - {job}:
+            task.cancel()
+
+    if not job.done():
+        job.cancel()
+        if deadline.expired():
+            logger.info(f"请求已超时，取消 {job_type} 任务")
+            raise deadline.DeadlineExceeded()
+        logger.info(f"客户端已断开，取消 {job_type} 任务")
+        raise asyncio.CancelledError()
+    return job.result()
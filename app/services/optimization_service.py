@@ -0,0 +1,360 @@
+"""配方优化服务
+
+从同一配方家族（版本树）已完成实验的实际参数、实际原料用量和结果中
+学习代理模型，批量给出下一轮建议的参数组合：
+- 特征：``actual_parameters`` 中的数值参数，以及 ``actual_ingredients``
+  中各原料换算到基准单位后的用量
+- 目标：按 optimization_goals 组合质量评分、成功率、成本、耗时，
+  各目标先标准化再等权相加（成本和耗时取负）
+- 约束：constraints 可限定参数/原料的取值范围或固定取值
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.offload import check_cancelled
+from core.optimization import (
+    RFFSurrogate,
+    generate_candidates,
+    thompson_batch,
+)
+from models import Experiment, Recipe
+from models.experiment import ExperimentResult, ExperimentStatus
+from models.recipe_ingredient import ingredient_key, to_base_amount
+from models.schemas.recipe import RecipeOptimizeRequest
+from services.lineage_service import family_ids_query
+from services.offload_service import run_offloaded
+
+# 优化目标 -> (指标, 方向)
+GOALS: Dict[str, Tuple[str, float]] = {
+    "quality": ("quality_score", 1.0),
+    "质量": ("quality_score", 1.0),
+    "success": ("success", 1.0),
+    "成功率": ("success", 1.0),
+    "cost": ("actual_cost", -1.0),
+    "成本": ("actual_cost", -1.0),
+    "time": ("duration_minutes", -1.0),
+    "耗时": ("duration_minutes", -1.0),
+}
+
+RESULT_SCORES = {
+    ExperimentResult.SUCCESS: 1.0,
+    ExperimentResult.PARTIAL: 0.5,
+    ExperimentResult.FAILURE: 0.0,
+}
+
+MIN_EXPERIMENTS = 3
+# 历史取值范围向外扩展的比例，允许适度外推
+BOUND_MARGIN = 0.1
+
+EXPERIMENT_COLUMNS = (
+    Experiment.id,
+    Experiment.actual_parameters,
+    Experiment.actual_ingredients,
+    Experiment.quality_score,
+    Experiment.result,
+    Experiment.actual_cost,
+    Experiment.duration_minutes,
+)
+
+
+def _numeric(value) -> Optional[float]:
+    """解析数值，支持 {"value": x, "unit": ...} 形式"""
+    if isinstance(value, dict):
+        value = value.get("value")
+    if isinstance(value, bool):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def _metric(row, name: str) -> Optional[float]:
+    if name == "success":
+        return RESULT_SCORES.get(row.result)
+    return _numeric(getattr(row, name))
+
+
+def _row_features(
+    row, units: Dict[str, str], labels: Dict[str, str]
+) -> Dict[Tuple[str, str], float]:
+    """提取一条实验的特征：(类型, 名称) -> 数值"""
+    features = {}
+    parameters = row.actual_parameters
+    if isinstance(parameters, dict):
+        for name, value in parameters.items():
+            value = _numeric(value)
+            if value is not None:
+                features[("parameter", str(name))] = value
+
+    for item in row.actual_ingredients or []:
+        if not isinstance(item, dict):
+            continue
+        key = ingredient_key(item.get("cas_number"), item.get("name"))
+        amount, base_unit = to_base_amount(
+            item.get("amount"), item.get("unit")
+        )
+        if key is None or amount is None:
+            continue
+        # 同一原料的不同单位体系无法合并，以首次出现的为准
+        if units.setdefault(key, base_unit) != base_unit:
+            continue
+        labels.setdefault(key, item.get("name") or key)
+        feature = ("ingredient", key)
+        features[feature] = features.get(feature, 0.0) + amount
+    return features
+
+
+class FeatureSpace:
+    """特征空间：记录每个维度的名称和取值范围，负责 [0,1] 缩放
+
+    缩放范围取历史数据的范围（并扩展到覆盖约束范围），历史实验按原值
+    编码、不会被截断到约束范围内；约束只限制候选点的可行域
+    （box_lower/box_upper）。
+    """
+
+    def __init__(self, rows, constraints: Optional[Dict[str, Any]] = None):
+        self.units: Dict[str, str] = {}
+        self.labels: Dict[str, str] = {}
+        records = [_row_features(r, self.units, self.labels) for r in rows]
+        self.names: List[Tuple[str, str]] = sorted(
+            {name for record in records for name in record}
+        )
+        index = {name: i for i, name in enumerate(self.names)}
+
+        raw = np.full((len(records), len(self.names)), np.nan)
+        for i, record in enumerate(records):
+            for name, value in record.items():
+                raw[i, index[name]] = value
+        # 缺失的原料视为未使用，缺失的参数取中位数
+        for j, (kind, _) in enumerate(self.names):
+            column = raw[:, j]
+            missing = np.isnan(column)
+            column[missing] = 0.0 if kind == "ingredient" else (
+                np.median(column[~missing])
+            )
+        self.raw = raw
+
+        low, high = raw.min(axis=0), raw.max(axis=0)
+        margin = (high - low) * BOUND_MARGIN
+        self.lower = low - margin
+        self.upper = high + margin
+        is_ingredient = np.array([k == "ingredient" for k, _ in self.names])
+        if len(self.names):
+            self.lower[is_ingredient] = np.maximum(
+                self.lower[is_ingredient], 0.0
+            )
+        self.fixed = np.full(len(self.names), np.nan)
+        self.box_lower = self.lower.copy()
+        self.box_upper = self.upper.copy()
+        self._apply_constraints(constraints or {}, index)
+        self.lower = np.minimum(self.lower, self.box_lower)
+        self.upper = np.maximum(self.upper, self.box_upper)
+
+    def _apply_constraints(self, constraints, index):
+        by_name = {
+            ingredient_key(name=label): key
+            for key, label in self.labels.items()
+        }
+        for kind, label, group in (
+            ("parameter", "参数", constraints.get("parameters") or {}),
+            ("ingredient", "原料", constraints.get("ingredients") or {}),
+        ):
+            for name, spec in group.items():
+                # 原料可以用CAS号或名称指定
+                if kind == "ingredient" and (kind, name) not in index:
+                    name = by_name.get(ingredient_key(name=name), name)
+                j = index.get((kind, name))
+                if j is None:
+                    raise ValueError(f"约束中的{label}在历史实验中不存在: {name}")
+                unit = spec.get("unit") if isinstance(spec, dict) else None
+
+                def convert(value):
+                    if kind == "ingredient" and unit:
+                        return to_base_amount(value, unit)[0]
+                    return float(value)
+
+                if not isinstance(spec, dict):
+                    self.fixed[j] = convert(spec)
+                    self.box_lower[j] = self.box_upper[j] = self.fixed[j]
+                    continue
+                if spec.get("min") is not None:
+                    self.box_lower[j] = convert(spec["min"])
+                if spec.get("max") is not None:
+                    self.box_upper[j] = convert(spec["max"])
+                if self.box_lower[j] > self.box_upper[j]:
+                    raise ValueError(f"约束范围无效: {name}")
+
+    def encode(self, raw: np.ndarray) -> np.ndarray:
+        span = np.where(self.upper > self.lower, self.upper - self.lower, 1.0)
+        return np.clip((raw - self.lower) / span, 0.0, 1.0)
+
+    def decode(self, scaled: np.ndarray) -> np.ndarray:
+        return self.lower + scaled * (self.upper - self.lower)
+
+    def bounds_scaled(self) -> Tuple[np.ndarray, np.ndarray]:
+        """候选点可行域（约束范围）在 [0,1] 空间中的上下界"""
+        return self.encode(self.box_lower), self.encode(self.box_upper)
+
+    def fixed_scaled(self) -> np.ndarray:
+        """固定取值维度（约束固定或上下界相等）在 [0,1] 空间中的值"""
+        fixed = np.full(len(self.names), np.nan)
+        fixed[self.upper <= self.lower] = 0.0
+        mask = ~np.isnan(self.fixed)
+        fixed[mask] = self.encode(self.fixed)[mask]
+        return fixed
+
+    def to_proposal(self, values: np.ndarray) -> Dict[str, Any]:
+        parameters = {}
+        ingredients = []
+        for (kind, name), value in zip(self.names, values):
+            value = round(float(value), 6)
+            if kind == "parameter":
+                parameters[name] = value
+            elif value > 0:
+                ingredients.append(
+                    {
+                        "key": name,
+                        "name": self.labels.get(name, name),
+                        "amount": value,
+                        "unit": self.units.get(name),
+                    }
+                )
+        return {"parameters": parameters, "ingredients": ingredients}
+
+
+def build_objective(rows, goals: List[str]) -> np.ndarray:
+    """把多个优化目标合成为一个标量目标（标准化后等权相加）"""
+    unknown = [g for g in goals if g not in GOALS]
+    if unknown:
+        raise ValueError(
+            f"不支持的优化目标: {', '.join(unknown)}，"
+            f"可选: {', '.join(GOALS)}"
+        )
+    metrics = dict.fromkeys(GOALS[g] for g in goals)
+    columns = []
+    for name, direction in metrics:
+        values = np.array(
+            [_metric(row, name) for row in rows], dtype=np.float64
+        )
+        observed = values[~np.isnan(values)]
+        if len(observed) < 2:
+            continue
+        std = observed.std() or 1.0
+        columns.append(direction * (values - observed.mean()) / std)
+    if not columns:
+        return np.full(len(rows), np.nan)
+    stacked = np.vstack(columns)
+    valid = ~np.isnan(stacked)
+    # 某条实验缺少部分目标时按已有目标取平均
+    counts = valid.sum(axis=0)
+    totals = np.where(valid, stacked, 0.0).sum(axis=0)
+    return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def propose(
+    rows,
+    goals: List[str],
+    constraints: Optional[Dict[str, Any]] = None,
+    batch_size: int = 5,
+    num_candidates: int = 8192,
+    num_features: int = 512,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """基于历史实验给出一批建议（同步，CPU密集）"""
+    objective = build_objective(rows, goals)
+    keep = ~np.isnan(objective)
+    rows = [row for row, k in zip(rows, keep) if k]
+    objective = objective[keep]
+    if len(rows) < MIN_EXPERIMENTS:
+        raise ValueError(
+            f"历史实验数据不足：至少需要 {MIN_EXPERIMENTS} 条"
+            "已完成且包含目标指标的实验"
+        )
+
+    space = FeatureSpace(rows, constraints)
+    if not space.names:
+        raise ValueError("历史实验中没有可优化的数值参数或原料用量")
+
+    X = space.encode(space.raw)
+    rng = np.random.default_rng(seed)
+    # 在进程池中执行时，调用方取消后在拟合和打分的间隙退出
+    model = RFFSurrogate(num_features=num_features, seed=seed).fit(
+        X, objective, check=check_cancelled
+    )
+    candidates = generate_candidates(
+        X,
+        objective,
+        num_candidates,
+        fixed=space.fixed_scaled(),
+        rng=rng,
+        bounds=space.bounds_scaled(),
+    )
+    check_cancelled()
+    chosen = thompson_batch(
+        model, candidates, batch_size, workers=workers, check=check_cancelled
+    )
+    mean, std = model.predict(candidates[chosen])
+
+    proposals = []
+    for index, mu, sigma in zip(chosen, mean, std):
+        proposal = space.to_proposal(space.decode(candidates[index]))
+        proposal["predicted_score"] = round(float(mu), 4)
+        proposal["uncertainty"] = round(float(sigma), 4)
+        proposals.append(proposal)
+
+    best = int(np.argmax(objective))
+    return {
+        "experiments_used": len(rows),
+        "best_observed": {
+            "experiment_id": rows[best].id,
+            "score": round(float(objective[best]), 4),
+        },
+        "proposals": proposals,
+    }
+
+
+async def optimize_recipe(
+    db: AsyncSession,
+    request: RecipeOptimizeRequest,
+    client: Optional[Request] = None,
+) -> Optional[Dict[str, Any]]:
+    """为配方家族给出下一轮实验建议，配方不存在时返回 None
+
+    模型拟合和候选打分在 optimization 进程池中执行，client 断开时取消。
+    """
+    if await db.get(Recipe, request.recipe_id) is None:
+        return None
+    stmt = (
+        select(*EXPERIMENT_COLUMNS)
+        .where(
+            Experiment.recipe_id.in_(family_ids_query(request.recipe_id)),
+            Experiment.status == ExperimentStatus.COMPLETED,
+        )
+        .order_by(Experiment.id.desc())
+        .limit(settings.optimizer_max_experiments)
+    )
+    rows = (await db.execute(stmt)).all()
+    result = await run_offloaded(
+        "optimization",
+        propose,
+        rows,
+        request.optimization_goals,
+        request.constraints,
+        batch_size=request.batch_size,
+        num_candidates=settings.optimizer_num_candidates,
+        num_features=settings.optimizer_num_features,
+        workers=settings.optimizer_workers,
+        request=client,
+    )
+    result["recipe_id"] = request.recipe_id
+    result["goals"] = request.optimization_goals
+    return result
@@ -0,0 +1,48 @@
+"""请求方身份
+
+从 ``Authorization: Bearer <JWT>`` 中取出已验证的声明，供准入控制和
+只读副本路由识别请求方。
+"""
+
+from typing import Any, Dict, Optional
+
+from jose import JWTError, jwt
+from starlette.requests import HTTPConnection
+
+from config.settings import settings
+
+
+def bearer_token(request: HTTPConnection) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def bearer_claims(request: HTTPConnection) -> Optional[Dict[str, Any]]:
+    """验证通过的令牌声明（含整数用户ID ``sub``），否则返回 None"""
+    token = bearer_token(request)
+    if token is None:
+        return None
+    try:
+        claims = jwt.decode(
+            token,
+            settings.jwt_secret_key,
+            algorithms=[settings.jwt_algorithm],
+        )
+        claims["sub"] = int(claims["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
+    return claims
+
+
+def client_host(request: HTTPConnection) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def client_key(request: HTTPConnection) -> str:
+    """登录用户按ID，匿名请求按客户端地址"""
+    claims = bearer_claims(request)
+    if claims is not None:
+        return f"u{claims['sub']}"
+    return f"ip:{client_host(request)}"
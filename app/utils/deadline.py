@@ -0,0 +1,80 @@
+"""请求截止时间
+
+截止时间由 ``DeadlineMiddleware`` 按请求头或路由默认值设置，保存在
+上下文变量中，随协程、``asyncio.create_task`` 和 ``asyncio.to_thread``
+一起传播。下游据此设置数据库 statement_timeout，以及取消卸载到进程池
+的任务。没有设置截止时间时各函数均不做限制。
+
+LLM、工站等外部 HTTP 调用应以 ``timeout()`` 作为客户端超时；目前还
+没有发起外部调用的客户端，接入时在调用处使用。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional
+
+# 截止时刻（time.monotonic），None 表示不限
+_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """请求已超过截止时间，由全局处理器转换为 504"""
+
+    def __init__(self, message: str = "请求处理超时"):
+        super().__init__(message)
+
+
+def set_deadline(seconds: Optional[float]) -> Token:
+    """设置从现在起 seconds 秒后的截止时间，返回用于恢复的 token"""
+    value = None if seconds is None else time.monotonic() + seconds
+    return _deadline.set(value)
+
+
+def reset_deadline(token: Token):
+    _deadline.reset(token)
+
+
+@contextmanager
+def scope(seconds: Optional[float]) -> Iterator[None]:
+    """在代码块内使用截止时间，已有更早的截止时间时保留原值"""
+    current = remaining()
+    if current is not None and (seconds is None or current <= seconds):
+        yield
+        return
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+def remaining() -> Optional[float]:
+    """剩余时间(秒)，可能为负；没有截止时间时返回 None"""
+    value = _deadline.get()
+    return None if value is None else value - time.monotonic()
+
+
+def expired() -> bool:
+    value = remaining()
+    return value is not None and value <= 0
+
+
+def check():
+    """已超过截止时间时抛出 DeadlineExceeded"""
+    if expired():
+        raise DeadlineExceeded()
+
+
+def timeout(default: Optional[float] = None) -> Optional[float]:
+    """外部调用应使用的超时：default 与剩余时间中较小者
+
+    已超时时抛出 DeadlineExceeded，不再发起调用。
+    """
+    check()
+    value = remaining()
+    if value is None:
+        return default
+    return value if default is None else min(default, value)
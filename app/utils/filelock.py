@@ -0,0 +1,61 @@
+"""跨进程文件锁（flock）
+
+- ``hold`` 在上下文内持有共享或排他锁，阻塞等待，退出时关闭文件描述符
+  即释放
+- ``try_acquire`` 非阻塞地获取排他锁并一直持有到 ``release``，用于在
+  同一主机的多个工作进程中选出唯一的写入者；进程退出（包括崩溃）时
+  锁由内核释放，其他进程随后可以接任
+
+flock 只在同一主机上可靠，共享目录位于网络文件系统时不要依赖它。
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class FileLock:
+    """基于 flock 的文件锁"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def _open(self) -> int:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @contextmanager
+    def hold(self, exclusive: bool = False) -> Iterator[None]:
+        """持有锁（同步，阻塞等待）"""
+        fd = self._open()
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """非阻塞地获取并持有排他锁，已被其他进程持有时返回 False"""
+        if self._fd is not None:
+            return True
+        fd = self._open()
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,31 @@
+"""当前请求
+
+``RequestContextMiddleware`` 把请求的 ASGI scope 保存在上下文变量中，
+下游（如慢查询日志）据此取得发起调用的路由。路由匹配后 FastAPI 会把
+``route`` 写回同一个 scope，因此这里能拿到路径模板而不是具体路径。
+"""
+
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional
+
+_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "request_scope", default=None
+)
+
+
+def set_scope(scope: Dict[str, Any]) -> Token:
+    return _scope.set(scope)
+
+
+def reset_scope(token: Token):
+    _scope.reset(token)
+
+
+def current_route() -> Optional[str]:
+    """当前请求的方法和路由，如 ``GET /api/v1/recipes/{recipe_id}``"""
+    scope = _scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
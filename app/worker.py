@@ -0,0 +1,8 @@
+"""Celery worker 入口
+
+在 app 目录下启动：``celery -A worker worker -l info``
+"""
+
+from services.job_service import create_job_queue
+
+celery_app = create_job_queue("celery").app